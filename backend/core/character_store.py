@@ -0,0 +1,431 @@
+"""
+Character Store — the PSD character library in indexed SQLite tables.
+
+database.json (v1) and database_v2.json (v2) used to be re-read and
+rewritten whole (indent=4) on every ingest, purge and listing, and
+concurrent ingests raced on that read-modify-write. Characters now live in
+three tables (see models.py):
+
+    characters               unique (pipeline, name); data = the character
+                             JSON without its layers
+    character_layer_groups   a character's groups, in order
+    character_layers         each group's layer dicts, in order, indexed by hash
+
+Reads rebuild exactly the JSON the API always returned ({"id", "name",
+"canvas_size", "group_order", "layer_groups": {group: [layer, ...]}, ...}),
+a page at a time if asked. Writes only touch the rows of the character
+being ingested, in one transaction.
+
+    list_characters("v1", limit=50, offset=100)
+    merge_character_layers("v1", name, canvas_size, group_order, layer_groups)
+    upsert_character("v2", char_entry)
+    remove_layers_by_hash("v1", asset_hash)
+
+At startup migrate_json_db() imports a pre-existing JSON database once and
+renames it to <file>.migrated.
+
+Every write is recorded in an in-process change feed (`changes`); the
+listing endpoints serve pre-serialized bodies from `cached_listing()`,
+which are rebuilt only after a write to that pipeline, with an ETag for
+If-None-Match. The cache assumes this process does all the writes (the
+ingest engine's writer thread, purges) — as the single-process server does.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+
+from backend.core.database import SessionLocal
+from backend.core.models import Character, CharacterLayer, CharacterLayerGroup, generate_uuid
+
+logger = logging.getLogger(__name__)
+
+@contextmanager
+def _transaction():
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# ══════════════════════════════════════════════
+#  ROW ↔ JSON
+# ══════════════════════════════════════════════
+
+def _split(char: dict) -> tuple[dict, Optional[dict]]:
+    """(data, layer_groups) — data keeps a None placeholder so key order survives."""
+    data = {k: v for k, v in char.items() if k not in ("id", "name")}
+    layer_groups = data.get("layer_groups")
+    if isinstance(layer_groups, dict):
+        data["layer_groups"] = None
+        return data, layer_groups
+    return data, None
+
+
+def _to_dict(char: Character, groups: list, layers_by_group: dict) -> dict:
+    out = {"id": char.id, "name": char.name}
+    for key, value in (char.data or {}).items():
+        if key == "layer_groups" and value is None:
+            value = {g.name: [layer.data for layer in layers_by_group.get(g.id, [])] for g in groups}
+        out[key] = value
+    return out
+
+
+def _load(db, characters: list[Character], id_filter) -> list[dict]:
+    """Rebuild characters; id_filter selects their ids (a subquery or a list)."""
+    groups_by_char: dict[str, list] = {}
+    for group in db.query(CharacterLayerGroup).filter(CharacterLayerGroup.character_id.in_(id_filter)).order_by(
+        CharacterLayerGroup.character_id, CharacterLayerGroup.position
+    ):
+        groups_by_char.setdefault(group.character_id, []).append(group)
+    layers_by_group: dict[int, list] = {}
+    for layer in db.query(CharacterLayer).filter(CharacterLayer.character_id.in_(id_filter)).order_by(
+        CharacterLayer.group_id, CharacterLayer.position
+    ):
+        layers_by_group.setdefault(layer.group_id, []).append(layer)
+    return [_to_dict(c, groups_by_char.get(c.id, []), layers_by_group) for c in characters]
+
+
+def _add_groups(db, char_id: str, layer_groups: dict) -> None:
+    for position, (name, layers) in enumerate(layer_groups.items()):
+        db.add(CharacterLayerGroup(
+            character_id=char_id,
+            name=name,
+            position=position,
+            layers=[
+                CharacterLayer(character_id=char_id, position=i, hash=layer.get("hash"), data=layer)
+                for i, layer in enumerate(layers)
+            ],
+        ))
+
+
+def _delete_layers(db, char_id: str) -> None:
+    db.query(CharacterLayer).filter(CharacterLayer.character_id == char_id).delete(synchronize_session=False)
+    db.query(CharacterLayerGroup).filter(CharacterLayerGroup.character_id == char_id).delete(synchronize_session=False)
+
+
+def _insert(db, pipeline: str, char: dict, position: Optional[int] = None) -> Character:
+    if position is None:
+        position = (db.query(func.max(Character.position)).filter(Character.pipeline == pipeline).scalar() or 0) + 1
+    data, layer_groups = _split(char)
+    row = Character(id=char.get("id") or generate_uuid(), pipeline=pipeline, name=char["name"],
+                    position=position, data=data)
+    db.add(row)
+    if layer_groups:
+        _add_groups(db, row.id, layer_groups)
+    return row
+
+
+# ══════════════════════════════════════════════
+#  READS
+# ══════════════════════════════════════════════
+
+def list_characters(pipeline: str = "v1", limit: Optional[int] = None, offset: int = 0) -> list[dict]:
+    """Characters in creation order; limit/offset fetch one page."""
+    with _transaction() as db:
+        page = select(Character.id).where(Character.pipeline == pipeline).order_by(Character.position)
+        if limit is not None:
+            page = page.limit(limit)
+        if offset:
+            page = page.offset(offset)
+        characters = db.query(Character).filter(Character.id.in_(page)).order_by(Character.position).all()
+        return _load(db, characters, page)
+
+
+def count_characters(pipeline: str = "v1") -> int:
+    with _transaction() as db:
+        return db.query(func.count(Character.id)).filter(Character.pipeline == pipeline).scalar()
+
+
+def get_character(pipeline: str, char_id: Optional[str] = None, name: Optional[str] = None) -> Optional[dict]:
+    """One character by id or name, or None."""
+    with _transaction() as db:
+        query = db.query(Character).filter(Character.pipeline == pipeline)
+        query = query.filter(Character.id == char_id) if char_id is not None else query.filter(Character.name == name)
+        char = query.first()
+        return _load(db, [char], [char.id])[0] if char else None
+
+
+# ══════════════════════════════════════════════
+#  WRITES
+# ══════════════════════════════════════════════
+
+def upsert_character(pipeline: str, char: dict) -> dict:
+    """Store a character, replacing one with the same name (whose id is kept).
+
+    Returns the stored character (char, with its final id).
+    """
+    with _transaction() as db:
+        existing = db.query(Character).filter(Character.pipeline == pipeline, Character.name == char["name"]).first()
+        if existing is None:
+            row = _insert(db, pipeline, char)
+            char["id"] = row.id
+        else:
+            char["id"] = existing.id
+            data, layer_groups = _split(char)
+            _delete_layers(db, existing.id)
+            existing.data = data
+            if layer_groups:
+                _add_groups(db, existing.id, layer_groups)
+    changes.record(pipeline, "upsert", char["name"], char["id"])
+    return char
+
+
+def merge_character_layers(
+    pipeline: str,
+    name: str,
+    canvas_size: list,
+    group_order: list,
+    layer_groups: dict,
+) -> str:
+    """Merge one PSD's layer groups into a character (created if new).
+
+    New groups are appended to group_order; a group's layers are appended
+    unless a layer with the same hash is already in that group. Returns
+    the character id.
+    """
+    with _transaction() as db:
+        char_id = _merge_layers(db, pipeline, name, canvas_size, group_order, layer_groups)
+    changes.record(pipeline, "merge", name, char_id)
+    return char_id
+
+
+def _merge_layers(db, pipeline, name, canvas_size, group_order, layer_groups) -> str:
+    char = db.query(Character).filter(Character.pipeline == pipeline, Character.name == name).first()
+    if char is None:
+        row = _insert(db, pipeline, {
+            "id": generate_uuid(),
+            "name": name,
+            "canvas_size": canvas_size,
+            "group_order": group_order,
+            "layer_groups": layer_groups,
+        })
+        logger.info(f"Created new character: {name}")
+        return row.id
+
+    data = dict(char.data or {})
+    if "group_order" not in data:
+        # Old entries without groups
+        data["group_order"] = []
+        data["layer_groups"] = None
+    groups = {
+        g.name: g for g in db.query(CharacterLayerGroup).filter(CharacterLayerGroup.character_id == char.id)
+    }
+    known: dict[int, set] = {}
+    next_position: dict[int, int] = {}
+    for group_id, layer_hash, position in db.query(
+        CharacterLayer.group_id, CharacterLayer.hash, CharacterLayer.position
+    ).filter(CharacterLayer.character_id == char.id):
+        known.setdefault(group_id, set()).add(layer_hash)
+        next_position[group_id] = max(next_position.get(group_id, 0), position + 1)
+
+    group_order_out = list(data["group_order"])
+    for g in group_order:
+        if g not in group_order_out:
+            group_order_out.append(g)
+        group = groups.get(g)
+        if group is None:
+            group = CharacterLayerGroup(character_id=char.id, name=g, position=len(groups))
+            db.add(group)
+            db.flush()
+            groups[g] = group
+        hashes = known.setdefault(group.id, set())
+        for layer in layer_groups.get(g, []):
+            if layer["hash"] in hashes:
+                continue
+            position = next_position.get(group.id, 0)
+            next_position[group.id] = position + 1
+            hashes.add(layer["hash"])
+            db.add(CharacterLayer(group_id=group.id, character_id=char.id, position=position,
+                                  hash=layer["hash"], data=layer))
+
+    data["group_order"] = group_order_out
+    data["canvas_size"] = canvas_size
+    char.data = data
+    logger.info(f"Updated existing character: {name}")
+    return char.id
+
+
+def remove_layers_by_hash(pipeline: str, asset_hash: str) -> int:
+    """Remove an asset's layer entries from every character. Returns how many."""
+    with _transaction() as db:
+        ids = select(Character.id).where(Character.pipeline == pipeline)
+        removed = db.query(CharacterLayer).filter(
+            CharacterLayer.hash == asset_hash,
+            CharacterLayer.character_id.in_(ids),
+        ).delete(synchronize_session=False)
+    if removed:
+        changes.record(pipeline, "purge")
+    return removed
+
+
+def replace_characters(pipeline: str, characters: list[dict]) -> None:
+    """Replace a pipeline's whole library (the old save_db semantics)."""
+    with _transaction() as db:
+        ids = select(Character.id).where(Character.pipeline == pipeline)
+        db.query(CharacterLayer).filter(CharacterLayer.character_id.in_(ids)).delete(synchronize_session=False)
+        db.query(CharacterLayerGroup).filter(CharacterLayerGroup.character_id.in_(ids)).delete(synchronize_session=False)
+        db.query(Character).filter(Character.pipeline == pipeline).delete(synchronize_session=False)
+        for position, char in enumerate(characters, 1):
+            _insert(db, pipeline, char, position)
+    changes.record(pipeline, "replace")
+
+
+def migrate_json_db(pipeline: str, path: str) -> int:
+    """Import a legacy JSON character database into an empty store, once.
+
+    The file is renamed to <path>.migrated afterwards. Returns the number of
+    characters imported.
+    """
+    if not os.path.exists(path):
+        return 0
+    if count_characters(pipeline):
+        logger.warning(f"Not importing {path}: the {pipeline} character store is not empty")
+        return 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            characters = json.load(f)
+    except Exception as e:
+        logger.error(f"Could not read legacy character database {path}: {e}")
+        return 0
+    replace_characters(pipeline, characters)
+    os.replace(path, f"{path}.migrated")
+    logger.info(f"Imported {len(characters)} {pipeline} characters from {path}")
+    return len(characters)
+
+
+# ══════════════════════════════════════════════
+#  CHANGE FEED + CACHED LISTING
+# ══════════════════════════════════════════════
+
+class ChangeFeed:
+    """Numbered log of character writes that clients can long-poll.
+
+    Args:
+        max_changes: Changes kept; clients further behind must refetch.
+    """
+
+    def __init__(self, max_changes: int = 1000):
+        self.version = 0
+        self.pipeline_versions: dict[str, int] = {}
+        self._changes: deque = deque(maxlen=max_changes)
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._listeners: list[Callable[[dict], None]] = []
+
+    def subscribe(self, listener: Callable[[dict], None]) -> None:
+        """Call listener(change) synchronously, in the writing thread, after every write."""
+        self._listeners.append(listener)
+
+    def record(self, pipeline: str, op: str, name: Optional[str] = None, char_id: Optional[str] = None) -> int:
+        """Log a committed write (any thread) and wake long-polling clients."""
+        with self._lock:
+            self.version += 1
+            self.pipeline_versions[pipeline] = self.version
+            change = {"version": self.version, "pipeline": pipeline, "op": op, "name": name, "id": char_id}
+            self._changes.append(change)
+            waiters, self._waiters = self._waiters, []
+            version = self.version
+        for listener in self._listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                logger.warning(f"Character change listener failed: {e}")
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                pass  # that client's loop is gone
+        return version
+
+    def _since(self, version: int) -> Optional[list[dict]]:
+        if version > self.version:
+            return None  # from before a restart
+        if version == self.version:
+            return []
+        if not self._changes or self._changes[0]["version"] > version + 1:
+            return None
+        return [change for change in self._changes if change["version"] > version]
+
+    def since(self, version: int) -> Optional[list[dict]]:
+        """Changes after version; None if they are no longer retained."""
+        with self._lock:
+            return self._since(version)
+
+    async def wait(self, version: int, timeout: float) -> Optional[list[dict]]:
+        """since(), but waits up to timeout seconds for the first change."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            found = self._since(version)
+            if found != []:
+                return found
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+        return self.since(version)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ListingCache:
+    """Serialized listing bodies per (pipeline, limit, offset), dropped by writes."""
+
+    def __init__(self, feed: ChangeFeed, max_entries: int = 64):
+        self.feed = feed
+        self.max_entries = max_entries
+        # Distinguishes ETags across restarts (versions start over at 0)
+        self._boot = uuid.uuid4().hex[:8]
+        self._entries: dict[tuple, tuple[int, str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, pipeline: str, limit: Optional[int] = None, offset: int = 0) -> tuple[str, bytes]:
+        """(etag, JSON body) of list_characters(pipeline, limit, offset)."""
+        key = (pipeline, limit, offset)
+        # Read the version first: a write racing the rebuild only makes the entry stale
+        version = self.feed.pipeline_versions.get(pipeline, 0)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1], entry[2]
+
+        body = json.dumps(
+            list_characters(pipeline, limit, offset),
+            ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+        ).encode("utf-8")
+        etag = f'"{pipeline}-{self._boot}-{version}-{limit if limit is not None else "all"}-{offset}"'
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (version, etag, body)
+        return etag, body
+
+
+changes = ChangeFeed()
+listing_cache = ListingCache(changes)
+
+
+def cached_listing(pipeline: str = "v1", limit: Optional[int] = None, offset: int = 0) -> tuple[str, bytes]:
+    return listing_cache.get(pipeline, limit, offset)
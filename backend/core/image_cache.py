@@ -0,0 +1,290 @@
+"""
+Image Cache — process-wide, content-addressed cache of decoded asset images.
+
+Stage elements, character poses and faces are reused across many scenes
+(every 站立 / 微笑 of a character appears in dozens of them), so decoded
+RGBA pixels are cached once per *content*:
+
+    path  → (mtime_ns, size) stat key → SHA-256 of the file bytes
+    hash  → decoded RGBA array (H, W, 4, uint8, read-only)
+
+A changed file (new mtime/size) is re-hashed; identical files stored under
+different paths share one decoded array. Entries are evicted LRU once the
+byte budget (IMAGE_CACHE_MB env var, default 512) is exceeded; a path's
+stat → hash mapping is dropped with the last entry holding its hash.
+
+Worker processes can reuse the parent's pixels instead of decoding again:
+
+    manifest = get_image_cache().share(paths)     # parent → shared memory
+    get_image_cache().attach(manifest)            # in each worker
+    get_image_cache().release_shared(manifest)    # parent, when done
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _default_max_bytes() -> int:
+    env = os.environ.get("IMAGE_CACHE_MB", "")
+    return int(env) * 1024 * 1024 if env.isdigit() else DEFAULT_MAX_BYTES
+
+
+def _stat_key(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def decode_rgba(data: bytes) -> np.ndarray:
+    """Decode image file bytes into a read-only (H, W, 4) uint8 array."""
+    with Image.open(io.BytesIO(data)) as img:
+        array = np.asarray(img.convert("RGBA"))
+    array.flags.writeable = False
+    return array
+
+
+class ImageCache:
+    """Thread-safe LRU of decoded RGBA arrays and raw file bytes.
+
+    Args:
+        max_bytes: Budget for cached pixels + bytes (default IMAGE_CACHE_MB).
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else _default_max_bytes()
+        self._lock = threading.RLock()
+        # path → (stat key, sha256)
+        self._paths: dict[str, tuple[tuple[int, int], str]] = {}
+        # sha256 → paths mapped to it (so evicting a hash can drop its paths)
+        self._digest_paths: dict[str, set[str]] = {}
+        # ("rgba" | "file", sha256) → ndarray | bytes, in LRU order
+        self._entries: OrderedDict[tuple[str, str], object] = OrderedDict()
+        # sha256 → array backed by shared memory (not counted, never evicted)
+        self._pinned: dict[str, np.ndarray] = {}
+        self._attached: dict[str, shared_memory.SharedMemory] = {}
+        self._owned: dict[str, shared_memory.SharedMemory] = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ── lookups ──
+
+    def _known_digest(self, path: str) -> Optional[str]:
+        """SHA-256 of path if its stat key hasn't changed since it was hashed."""
+        known = self._paths.get(path)
+        if known is not None and known[0] == _stat_key(path):
+            return known[1]
+        return None
+
+    def _remember(self, path: str, key: tuple[int, int], digest: str) -> None:
+        previous = self._paths.get(path)
+        if previous is not None and previous[1] != digest:
+            others = self._digest_paths.get(previous[1])
+            if others is not None:
+                others.discard(path)
+                if not others:
+                    del self._digest_paths[previous[1]]
+        self._paths[path] = (key, digest)
+        self._digest_paths.setdefault(digest, set()).add(path)
+
+    def _forget(self, digest: str) -> None:
+        """Drop the paths mapped to digest once nothing caches it anymore."""
+        if (
+            digest in self._pinned
+            or ("rgba", digest) in self._entries
+            or ("file", digest) in self._entries
+        ):
+            return
+        for path in self._digest_paths.pop(digest, ()):
+            self._paths.pop(path, None)
+
+    @staticmethod
+    def _hash(path: str) -> tuple[tuple[int, int], bytes, str]:
+        key = _stat_key(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        return key, data, hashlib.sha256(data).hexdigest()
+
+    def _read(self, path: str) -> tuple[bytes, str]:
+        key, data, digest = self._hash(path)
+        self._remember(path, key, digest)
+        return data, digest
+
+    def _get_entry(self, kind: str, digest: Optional[str]):
+        if digest is None:
+            return None
+        if kind == "rgba" and digest in self._pinned:
+            return self._pinned[digest]
+        entry = self._entries.get((kind, digest))
+        if entry is not None:
+            self._entries.move_to_end((kind, digest))
+        return entry
+
+    def _put(self, kind: str, digest: str, value) -> None:
+        size = value.nbytes if isinstance(value, np.ndarray) else len(value)
+        if size > self.max_bytes:
+            self._forget(digest)
+            return
+        previous = self._entries.pop((kind, digest), None)
+        if previous is not None:
+            self.current_bytes -= previous.nbytes if isinstance(previous, np.ndarray) else len(previous)
+        self._entries[(kind, digest)] = value
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes and self._entries:
+            (_, evicted_digest), evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes if isinstance(evicted, np.ndarray) else len(evicted)
+            self.evictions += 1
+            self._forget(evicted_digest)
+
+    def get_array(self, path: str) -> np.ndarray:
+        """Decoded RGBA pixels of an image file (read-only array).
+
+        Raises OSError if the file can't be read and PIL errors if it can't
+        be decoded.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            array = self._get_entry("rgba", self._known_digest(path))
+            if array is not None:
+                self.hits += 1
+                return array
+            data, digest = self._read(path)
+            array = self._get_entry("rgba", digest)
+            if array is not None:
+                # Same content already decoded under another path
+                self.hits += 1
+                return array
+            self.misses += 1
+        array = decode_rgba(data)
+        with self._lock:
+            self._put("rgba", digest, array)
+        return array
+
+    def get_image(self, path: str) -> Image.Image:
+        """Cached RGBA Pillow image sharing the cached array's memory."""
+        return Image.fromarray(self.get_array(path))
+
+    def get_bytes(self, path: str) -> bytes:
+        """Raw file bytes (e.g. PNGs sent to the vision analyzer)."""
+        path = os.path.abspath(path)
+        with self._lock:
+            data = self._get_entry("file", self._known_digest(path))
+            if data is not None:
+                self.hits += 1
+                return data
+            self.misses += 1
+            data, digest = self._read(path)
+            self._put("file", digest, data)
+            return data
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "shared": len(self._pinned),
+                "bytes": self.current_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._paths.clear()
+            self._digest_paths.clear()
+            self._entries.clear()
+            self.current_bytes = 0
+
+    # ══════════════════════════════════════════════
+    #  SHARED MEMORY
+    # ══════════════════════════════════════════════
+
+    def share(self, paths: list[str]) -> dict:
+        """Publish decoded pixels of paths in shared memory.
+
+        Returns a picklable manifest for attach(). Unreadable files are
+        skipped. The caller must release_shared(manifest) when done.
+        """
+        manifest = {}
+        for path in paths:
+            try:
+                array = self.get_array(path)
+            except Exception as e:
+                logger.warning(f"[ImageCache] Not sharing {path}: {e}")
+                continue
+            path = os.path.abspath(path)
+            with self._lock:
+                known = self._paths.get(path)
+                if known is None:
+                    # Too large to cache, or evicted since get_array()
+                    stat_key, _, digest = self._hash(path)
+                else:
+                    stat_key, digest = known
+                block = self._owned.get(digest)
+                if block is None:
+                    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                    np.ndarray(array.shape, dtype=np.uint8, buffer=block.buf)[:] = array
+                    self._owned[digest] = block
+            manifest[path] = {"stat": stat_key, "digest": digest, "name": block.name, "shape": array.shape}
+        return manifest
+
+    def attach(self, manifest: dict) -> int:
+        """Map shared pixels from share() into this process. Returns arrays attached."""
+        attached = 0
+        with self._lock:
+            for path, info in manifest.items():
+                digest = info["digest"]
+                if digest not in self._pinned:
+                    try:
+                        block = shared_memory.SharedMemory(name=info["name"])
+                    except FileNotFoundError:
+                        continue
+                    array = np.ndarray(tuple(info["shape"]), dtype=np.uint8, buffer=block.buf)
+                    array.flags.writeable = False
+                    self._attached[digest] = block
+                    self._pinned[digest] = array
+                    attached += 1
+                self._remember(path, tuple(info["stat"]), digest)
+        return attached
+
+    def release_shared(self, manifest: Optional[dict] = None) -> None:
+        """Unlink shared blocks created by share() (all of them by default)."""
+        with self._lock:
+            digests = {info["digest"] for info in manifest.values()} if manifest else set(self._owned)
+            for digest in digests:
+                block = self._owned.pop(digest, None)
+                if block is not None:
+                    block.close()
+                    block.unlink()
+
+
+_cache: Optional[ImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """The process-wide image cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache()
+    return _cache
@@ -4,7 +4,11 @@ import io
 
 
 def calculate_hash_from_image(image: Image.Image) -> str:
-    """Calculate the SHA-256 hash of a PIL Image object."""
+    """Calculate the SHA-256 hash of a PIL Image object (legacy PNG-encoded).
+
+    Kept for rows hashed before pixel hashing; new code should use
+    calculate_pixel_hash, which skips the PNG encode.
+    """
     hasher = hashlib.sha256()
 
     # Convert image to RGBA if necessary before getting bytes
@@ -19,6 +23,42 @@ def calculate_hash_from_image(image: Image.Image) -> str:
     return hasher.hexdigest()
 
 
+# ── Pixel-content hashing ──
+# Hashing raw pixel bytes (plus mode/size/offset) gives the same dedup
+# identity as hashing an encoded PNG, without paying for zlib compression.
+
+def _pixel_bytes(image: Image.Image) -> tuple[Image.Image, bytes]:
+    if image.mode != "RGBA" and image.mode != "RGB":
+        image = image.convert("RGBA")
+    return image, image.tobytes()
+
+
+def _pixel_header(image: Image.Image, left: int, top: int) -> bytes:
+    return f"{image.mode}:{image.width}x{image.height}@{left},{top};".encode()
+
+
+def calculate_pixel_hash(image: Image.Image, left: int = 0, top: int = 0) -> str:
+    """SHA-256 of an image's raw pixels, mode, size and canvas offset.
+
+    This is the key stored in Asset.hash_sha256 / Asset.pixel_hash and used
+    as the asset filename for newly ingested layers.
+    """
+    image, data = _pixel_bytes(image)
+    hasher = hashlib.sha256(_pixel_header(image, left, top))
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def calculate_hash_from_layer(image: Image.Image, left: int, top: int) -> str:
+    """Hash of a cropped layer image plus its canvas offset.
+
+    The offset is part of the identity: the same pixels placed elsewhere on
+    the canvas are a different layer (as they were when layers were stored
+    padded to the full canvas).
+    """
+    return calculate_pixel_hash(image, left, top)
+
+
 def calculate_hash_from_path(file_path: str) -> str:
     """Calculate the SHA-256 hash of an image file on disk."""
     hasher = hashlib.sha256()
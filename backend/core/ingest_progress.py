@@ -0,0 +1,124 @@
+"""
+Ingest Progress — structured per-layer progress for PSD extraction.
+
+Extraction code reports into an IngestProgress tracker:
+
+    progress = IngestProgress(total_layers=n, sink=send)
+    with progress.phase("composite"):
+        image = layer.composite(force=True)
+    progress.add_bytes(os.path.getsize(save_path))
+    progress.layer_done(group="Body")
+    progress.finish()
+
+Snapshots (layers done/total, bytes written, current group and the time
+spent per phase — composite, hash, save, db) are passed to
+`sink` at most every `min_interval` seconds, plus once at finish(). In the
+ingest engine the sink puts them on a multiprocessing queue that a drainer
+thread forwards to the event loop; merge_snapshots() folds the snapshots
+of a sharded PSD into one.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+PHASES = ("composite", "hash", "save", "db")
+
+
+class IngestProgress:
+    """Thread-safe counters and phase timings for one extraction (or shard)."""
+
+    def __init__(
+        self,
+        total_layers: int = 0,
+        sink: Optional[Callable[[dict], None]] = None,
+        min_interval: float = 0.1,
+    ):
+        self.total_layers = total_layers
+        self.layers_done = 0
+        self.layers_reused = 0
+        self.bytes_written = 0
+        self.current_group: Optional[str] = None
+        self.timings = {name: 0.0 for name in PHASES}
+        self.started = time.perf_counter()
+        self._sink = sink
+        self._min_interval = min_interval
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def add_bytes(self, count: int) -> None:
+        with self._lock:
+            self.bytes_written += count
+
+    def layer_done(self, group: Optional[str] = None, reused: bool = False) -> None:
+        with self._lock:
+            self.layers_done += 1
+            if reused:
+                self.layers_reused += 1
+            if group is not None:
+                self.current_group = group
+        self._maybe_emit()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                "layersDone": self.layers_done,
+                "layersTotal": self.total_layers,
+                "layersReused": self.layers_reused,
+                "bytesWritten": self.bytes_written,
+                "currentGroup": self.current_group,
+                "timings": {name: round(value, 4) for name, value in self.timings.items()},
+                "elapsed": round(elapsed, 4),
+            }
+
+    def _maybe_emit(self, force: bool = False) -> None:
+        if self._sink is None:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._last_emit < self._min_interval:
+                return
+            self._last_emit = now
+        self._sink(self.snapshot())
+
+    def finish(self) -> None:
+        self._maybe_emit(force=True)
+
+
+def merge_snapshots(snapshots: list[dict]) -> dict:
+    """Combine shard snapshots of one PSD (sums; slowest shard's elapsed)."""
+    merged = {
+        "layersDone": 0,
+        "layersTotal": 0,
+        "layersReused": 0,
+        "bytesWritten": 0,
+        "currentGroup": None,
+        "timings": {name: 0.0 for name in PHASES},
+        "elapsed": 0.0,
+    }
+    for snap in snapshots:
+        for key in ("layersDone", "layersTotal", "layersReused", "bytesWritten"):
+            merged[key] += snap.get(key, 0)
+        for name, value in snap.get("timings", {}).items():
+            merged["timings"][name] = round(merged["timings"].get(name, 0.0) + value, 4)
+        merged["elapsed"] = max(merged["elapsed"], snap.get("elapsed", 0.0))
+        if snap.get("currentGroup"):
+            merged["currentGroup"] = snap["currentGroup"]
+    elapsed = merged["elapsed"]
+    merged["layersPerSec"] = round(merged["layersDone"] / elapsed, 2) if elapsed > 0 else 0.0
+    merged["bytesPerSec"] = round(merged["bytesWritten"] / elapsed) if elapsed > 0 else 0
+    return merged
@@ -0,0 +1,86 @@
+"""
+Layer Image — PSD layers stored cropped to their content, with offsets.
+
+Layers used to be pasted onto a transparent canvas the size of the whole
+PSD before hashing/saving, so a small mouth layer on a 3000×4000 PSD
+became a 48MB RGBA buffer and a mostly-empty PNG. Layers are now kept
+cropped to their visible pixels; `bbox` = (left, top, width, height) in
+PSD canvas coordinates says where to composite them.
+
+Layer entries written by the PSD processors carry:
+    "bbox":        [left, top, width, height]   — placement on the canvas
+    "cropped":     true                         — file covers bbox only
+and the character carries "canvas_size": [width, height]. Entries without
+"cropped" are legacy full-canvas PNGs (bbox is informational only).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from PIL import Image
+
+
+@dataclass
+class LayerImage:
+    """A layer's pixels cropped to content, plus its canvas offset."""
+
+    image: Image.Image
+    left: int
+    top: int
+
+    @property
+    def bbox(self) -> tuple:
+        """(left, top, width, height) on the PSD canvas."""
+        return (self.left, self.top, self.image.width, self.image.height)
+
+    def to_canvas(self, canvas_width: int, canvas_height: int) -> Image.Image:
+        """Full-canvas RGBA image (the legacy padded layout)."""
+        canvas = Image.new("RGBA", (canvas_width, canvas_height), (0, 0, 0, 0))
+        canvas.paste(self.image, (self.left, self.top))
+        return canvas
+
+
+def crop_layer_image(
+    image: Image.Image, left: int, top: int, canvas_width: int, canvas_height: int,
+) -> LayerImage:
+    """Clip a layer to the canvas and trim its fully transparent margins.
+
+    A layer with no visible pixels on the canvas becomes a 1×1 transparent
+    image so it still has a (tiny) file, like the padded layout did.
+    """
+    image = image.convert("RGBA")
+    # Clip to the canvas (what pasting onto it used to do implicitly)
+    x0, y0 = max(0, -left), max(0, -top)
+    x1 = min(image.width, canvas_width - left)
+    y1 = min(image.height, canvas_height - top)
+    if x1 <= x0 or y1 <= y0:
+        return LayerImage(Image.new("RGBA", (1, 1), (0, 0, 0, 0)), max(0, min(left, canvas_width - 1)), max(0, min(top, canvas_height - 1)))
+    if (x0, y0, x1, y1) != (0, 0, image.width, image.height):
+        image = image.crop((x0, y0, x1, y1))
+    left, top = left + x0, top + y0
+
+    content = image.getchannel("A").getbbox()
+    if content is None:
+        return LayerImage(Image.new("RGBA", (1, 1), (0, 0, 0, 0)), left, top)
+    if content != (0, 0, image.width, image.height):
+        image = image.crop(content)
+    return LayerImage(image, left + content[0], top + content[1])
+
+
+def composite_layers(layers: Iterable[Optional[LayerImage]]) -> Optional[LayerImage]:
+    """Alpha-composite layers (bottom to top) into one image covering their union."""
+    layers = [layer for layer in layers if layer is not None]
+    if not layers:
+        return None
+    if len(layers) == 1:
+        return layers[0]
+    left = min(layer.left for layer in layers)
+    top = min(layer.top for layer in layers)
+    right = max(layer.left + layer.image.width for layer in layers)
+    bottom = max(layer.top + layer.image.height for layer in layers)
+    canvas = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+    for layer in layers:
+        canvas.alpha_composite(layer.image, (layer.left - left, layer.top - top))
+    return LayerImage(canvas, left, top)
@@ -0,0 +1,130 @@
+"""
+Layer Manifest — per-PSD fingerprints for incremental re-ingest.
+
+Artists re-upload the same character PSD many times a day with a handful
+of edited layers. Each ingest records, per layer path, a cheap fingerprint
+of what extraction depends on — the raw (still compressed) channel data,
+the bbox, blend mode / opacity / clipping, and the canvas size — next to
+the asset hash it produced:
+
+    extracted_psds/<character>/layer_manifest.json
+    {"version": 1, "canvas": [w, h],
+     "layers": {"Body/arm": {"fingerprint": "...", "hash": "...", "bbox": [l, t, w, h]}}}
+
+On the next ingest a layer whose fingerprint is already known (and whose
+asset still exists) skips compositing, cropping and hashing and reuses
+the stored hash. Lookups go by fingerprint, so
+renamed or moved layers are reused too.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "layer_manifest.json"
+# Bump when extraction output changes (cropping, hashing) to invalidate old manifests
+MANIFEST_VERSION = 1
+
+
+def _update_layer(h, layer) -> None:
+    h.update(f"{layer.kind}|{layer.bbox}|{layer.blend_mode}|{layer.opacity}|{layer.clipping}".encode())
+    if layer.is_group():
+        for child in layer:
+            h.update(b"<")
+            h.update(child.name.encode("utf-8", "replace"))
+            _update_layer(h, child)
+            h.update(b">")
+        return
+    h.update(f"|effects={layer.has_effects()}|mask={layer.mask.bbox if layer.has_mask() else None}".encode())
+    for channel in layer._channels:
+        h.update(int(channel.compression).to_bytes(2, "little"))
+        h.update(len(channel.data).to_bytes(8, "little"))
+        h.update(channel.data)
+    # Clipped layers are composited onto this one
+    for clipped in getattr(layer, "clip_layers", []) or []:
+        h.update(b"clip")
+        _update_layer(h, clipped)
+
+
+def layer_fingerprint(layer, canvas_size: tuple) -> str:
+    """Fingerprint of a layer (or group) from its raw PSD data — no decoding."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{MANIFEST_VERSION}|{canvas_size[0]}x{canvas_size[1]}|".encode())
+    _update_layer(h, layer)
+    return h.hexdigest()
+
+
+class LayerManifest:
+    """Previous run's fingerprints (for lookups) plus this run's entries.
+
+    Args:
+        path: Manifest JSON path.
+        storage_dir: Asset pool root; reused hashes must still exist there.
+        canvas_size: PSD (width, height); part of every fingerprint.
+    """
+
+    def __init__(self, path: str, storage_dir: str, canvas_size: tuple, previous: Optional[dict] = None):
+        self.path = path
+        self.storage_dir = storage_dir
+        self.canvas_size = tuple(canvas_size)
+        self.entries: dict[str, dict] = {}
+        self._by_fingerprint = {
+            entry["fingerprint"]: entry
+            for entry in (previous or {}).values()
+            if entry.get("fingerprint") and entry.get("hash")
+        }
+        self.reused = 0
+        self.extracted = 0
+
+    @classmethod
+    def load(cls, path: str, storage_dir: str, canvas_size: tuple) -> "LayerManifest":
+        previous = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    previous = data.get("layers", {})
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable layer manifest {path}: {e}")
+        return cls(path, storage_dir, canvas_size, previous)
+
+    def fingerprint(self, layer) -> str:
+        return layer_fingerprint(layer, self.canvas_size)
+
+    def lookup(self, fingerprint: str) -> Optional[tuple]:
+        """(hash, bbox) from a previous ingest if its files are still in the pool."""
+        entry = self._by_fingerprint.get(fingerprint)
+        if entry is None:
+            return None
+        img_hash = entry["hash"]
+        # Thumbnails are not checked: the thumbnail service re-renders missing ones
+        if not os.path.exists(os.path.join(self.storage_dir, "assets", f"{img_hash}.png")):
+            return None
+        return img_hash, tuple(entry["bbox"])
+
+    def record(self, layer_path: str, fingerprint: str, img_hash: str, bbox: tuple, reused: bool) -> None:
+        key, n = layer_path, 1
+        while key in self.entries:
+            n += 1
+            key = f"{layer_path}#{n}"
+        self.entries[key] = {"fingerprint": fingerprint, "hash": img_hash, "bbox": list(bbox)}
+        if reused:
+            self.reused += 1
+        else:
+            self.extracted += 1
+
+
+def save_manifest(path: str, canvas_size: tuple, entries: dict) -> None:
+    """Write a manifest (atomically; the previous one stays valid until replaced)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "canvas": list(canvas_size), "layers": entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -2,10 +2,12 @@
 SQLAlchemy ORM models for AnimeStudio.
 Project stores scene/track/keyframe data as a JSON blob to match the frontend Zustand store structure.
 Asset and AssetVersion provide centralized asset management with SHA-256 hashing.
+Character, CharacterLayerGroup and CharacterLayer hold the PSD character library
+(formerly database.json / database_v2.json); see backend/core/character_store.py.
 """
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, JSON, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship, DeclarativeBase
 
 
@@ -66,6 +68,9 @@ class Asset(Base):
 
     id = Column(String, primary_key=True, default=generate_uuid)
     hash_sha256 = Column(String, unique=True, nullable=False, index=True)
+    # SHA-256 of raw pixels (image_hasher.calculate_pixel_hash). Equals hash_sha256
+    # for assets ingested since pixel hashing; backfilled for older PNG-hashed rows.
+    pixel_hash = Column(String, nullable=True, index=True)
     original_name = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     thumbnail_path = Column(String, nullable=True)
@@ -88,6 +93,7 @@ class Asset(Base):
         return {
             "id": self.id,
             "hash_sha256": self.hash_sha256,
+            "pixel_hash": self.pixel_hash,
             "original_name": self.original_name,
             "file_path": self.file_path,
             "thumbnail_path": self.thumbnail_path,
@@ -124,3 +130,51 @@ class AssetVersion(Base):
             "file_path": self.file_path,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class Character(Base):
+    """A PSD character. `data` is the character's JSON minus its layer groups."""
+    __tablename__ = "characters"
+    __table_args__ = (
+        UniqueConstraint("pipeline", "name", name="uq_characters_pipeline_name"),
+        Index("ix_characters_pipeline_position", "pipeline", "position"),
+    )
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    pipeline = Column(String, nullable=False, default="v1")   # v1 | v2
+    name = Column(String, nullable=False)
+    position = Column(Integer, nullable=False, default=0)     # listing order
+    data = Column(JSON, default=dict)
+
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
+
+    groups = relationship("CharacterLayerGroup", back_populates="character",
+                          cascade="all, delete-orphan", order_by="CharacterLayerGroup.position")
+
+
+class CharacterLayerGroup(Base):
+    __tablename__ = "character_layer_groups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    character_id = Column(String, ForeignKey("characters.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+
+    character = relationship("Character", back_populates="groups")
+    layers = relationship("CharacterLayer", back_populates="group",
+                          cascade="all, delete-orphan", order_by="CharacterLayer.position")
+
+
+class CharacterLayer(Base):
+    """One layer entry of a character's layer group (`data` is the layer dict)."""
+    __tablename__ = "character_layers"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    group_id = Column(Integer, ForeignKey("character_layer_groups.id", ondelete="CASCADE"), nullable=False, index=True)
+    character_id = Column(String, ForeignKey("characters.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False, default=0)
+    hash = Column(String, nullable=True, index=True)
+    data = Column(JSON, default=dict)
+
+    group = relationship("CharacterLayerGroup", back_populates="layers")
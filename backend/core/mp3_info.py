@@ -0,0 +1,168 @@
+"""
+MP3 Info — exact sample counts of MP3 streams without decoding or ffprobe.
+
+Every MPEG audio frame decodes to a fixed number of samples (1152 for
+MPEG-1 Layer III, 576 for MPEG-2/2.5 Layer III, ...), so walking the
+frame headers gives the decoded length exactly:
+
+    samples = frames × samples_per_frame − encoder delay − padding
+
+Encoder delay and padding come from the LAME/Info tag when the encoder
+wrote one (what gapless-aware decoders such as ffmpeg trim); the Xing /
+Info / VBRI metadata frame itself carries no audio and is not counted.
+ID3v2 tags, ID3v1 / APE trailers and garbage between frames are skipped.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+# Bitrates (kbps) by [version is MPEG-1][layer]; index 0 = free format (unsupported)
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits: 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+@dataclass
+class FrameHeader:
+    version: int        # version bits: 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    layer: int          # 1, 2 or 3
+    sample_rate: int
+    channels: int
+    length: int         # bytes, header included
+    samples: int        # decoded samples per channel
+
+
+@dataclass
+class Mp3Info:
+    sample_rate: int
+    channels: int
+    frames: int         # audio frames (the Xing/Info frame excluded)
+    samples: int        # decoded samples per channel, gapless trim applied
+    encoder_delay: int = 0
+    encoder_padding: int = 0
+
+    @property
+    def duration(self) -> float:
+        """Seconds of decoded audio."""
+        return self.samples / self.sample_rate if self.sample_rate else 0.0
+
+
+def parse_frame_header(data: bytes, pos: int) -> FrameHeader | None:
+    """The MPEG audio frame header at data[pos:pos + 4], or None."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = (b1 >> 3) & 0x3
+    layer = 4 - ((b1 >> 1) & 0x3)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x1
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+        samples = 384
+    elif layer == 2 or mpeg1:
+        length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        length = 72 * bitrate // sample_rate + padding
+        samples = 576
+    channels = 1 if b3 >> 6 == 3 else 2
+    return FrameHeader(version, layer, sample_rate, channels, length, samples)
+
+
+def _id3v2_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _gapless_info(data: bytes, pos: int, header: FrameHeader) -> tuple[bool, int, int]:
+    """(is metadata frame, encoder delay, padding) for the first frame."""
+    if data[pos + 36:pos + 40] == b"VBRI":
+        return True, 0, 0
+    if header.version == 3:
+        side_info = 17 if header.channels == 1 else 32
+    else:
+        side_info = 9 if header.channels == 1 else 17
+    tag = pos + 4 + side_info
+    if data[tag:tag + 4] not in (b"Xing", b"Info"):
+        return False, 0, 0
+
+    flags = int.from_bytes(data[tag + 4:tag + 8], "big")
+    lame = tag + 8
+    lame += 4 if flags & 0x1 else 0      # frame count
+    lame += 4 if flags & 0x2 else 0      # byte count
+    lame += 100 if flags & 0x4 else 0    # seek table
+    lame += 4 if flags & 0x8 else 0      # quality
+    if lame + 24 > pos + header.length or not data[lame:lame + 4].isalpha():
+        return True, 0, 0
+    packed = int.from_bytes(data[lame + 21:lame + 24], "big")
+    return True, packed >> 12, packed & 0xFFF
+
+
+def parse_mp3(data: bytes) -> Mp3Info:
+    """Count the frames of an MP3 byte string.
+
+    Raises:
+        ValueError: No MPEG audio frames found.
+    """
+    pos = _id3v2_size(data)
+    first: FrameHeader | None = None
+    frames = samples = delay = padding = 0
+    size = len(data)
+
+    while pos + 4 <= size:
+        header = parse_frame_header(data, pos)
+        if header is None or (first is not None and header.sample_rate != first.sample_rate):
+            pos += 1
+            continue
+        end = pos + header.length
+        if first is None:
+            # Confirm a fresh sync with the next header, so stray 0xFF bytes don't count
+            following = parse_frame_header(data, end)
+            if end < size and (following is None or following.sample_rate != header.sample_rate):
+                pos += 1
+                continue
+            first = header
+            is_tag, delay, padding = _gapless_info(data, pos, header)
+            if is_tag:
+                pos = end
+                continue
+        if end > size:
+            break  # truncated last frame: decoders drop it
+        frames += 1
+        samples += header.samples
+        pos = end
+
+    if first is None or frames == 0:
+        raise ValueError("No MPEG audio frames found")
+    return Mp3Info(
+        sample_rate=first.sample_rate,
+        channels=first.channels,
+        frames=frames,
+        samples=max(0, samples - delay - padding),
+        encoder_delay=delay,
+        encoder_padding=padding,
+    )
+
+
+def mp3_info(path: str) -> Mp3Info:
+    """parse_mp3() for a file."""
+    with open(path, "rb") as f:
+        return parse_mp3(f.read())
@@ -0,0 +1,447 @@
+"""
+PSD Ingest — process-pool PSD extraction with a single database writer.
+
+psd-tools compositing, Pillow cropping and PNG encoding are CPU-bound
+Python, so the old ThreadPoolExecutor(max_workers=3) barely parallelized
+batch uploads. Extraction now runs in worker processes:
+
+    one job per PSD             — workers run extract_psd / extract_psd_v2
+    one job per layer shard     — v1 PSDs >= PSD_SPLIT_MB are split into
+                                  contiguous runs of top-level layers
+
+Workers only write content-addressed files to the asset pool. Their
+results (layer groups + asset records) come back to the parent, where one
+writer thread registers the assets in SQLite and merges database.json /
+database_v2.json, so concurrent uploads never race on either database.
+Thumbnails for the new assets are then queued on the thumbnail service,
+outside the ingest's latency.
+
+    engine = get_ingest_engine()                      # PSD_INGEST_WORKERS
+    job = await engine.ingest(path, "hero.psd", batch_id=session_id)
+    engine.cancel(session_id)                         # from another request
+
+Workers report IngestProgress snapshots (layers done/total, bytes written,
+current group, per-phase timings) on a multiprocessing queue; a drainer
+thread hands them to the event loop, where they are merged per job and
+passed to ingest(on_progress=...).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPLIT_MB = 256
+
+
+def default_workers() -> int:
+    """Ingest worker processes: PSD_INGEST_WORKERS env var, default CPU count."""
+    env = os.environ.get("PSD_INGEST_WORKERS", "")
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+    return os.cpu_count() or 1
+
+
+def default_split_bytes() -> int:
+    """PSDs at least this large (PSD_SPLIT_MB, default 256) are split per layer group."""
+    env = os.environ.get("PSD_SPLIT_MB", "")
+    return (int(env) if env.isdigit() else DEFAULT_SPLIT_MB) * 1024 * 1024
+
+
+def plan_layer_shards(layer_count: int, max_shards: int) -> list[list[int]]:
+    """Split top-level layer indices into at most max_shards contiguous runs.
+
+    Runs stay contiguous so group order survives combine_psd_results().
+    """
+    if layer_count <= 0:
+        return []
+    size = math.ceil(layer_count / max(1, min(max_shards, layer_count)))
+    return [list(range(start, min(start + size, layer_count))) for start in range(0, layer_count, size)]
+
+
+# ══════════════════════════════════════════════
+#  WORKER FUNCTIONS (run in the process pool)
+# ══════════════════════════════════════════════
+
+_progress_queue = None
+
+
+def _init_worker(storage_dir: Optional[str], progress_queue=None) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+    if not storage_dir:
+        return
+    from backend.core import psd_processor, psd_processor_v2
+    psd_processor.STORAGE_DIR = storage_dir
+    psd_processor.EXTRACTED_DIR = os.path.join(storage_dir, "extracted_psds")
+    psd_processor.THUMBNAILS_DIR = os.path.join(storage_dir, "thumbnails")
+    psd_processor_v2.STORAGE_DIR = storage_dir
+    for sub in ("assets", "extracted_psds", "thumbnails"):
+        os.makedirs(os.path.join(storage_dir, sub), exist_ok=True)
+
+
+def _count_top_level_layers(file_path: str) -> int:
+    from psd_tools import PSDImage
+    return len(PSDImage.open(file_path))
+
+
+def _progress_sink(job_id: Optional[str], shard: int):
+    if _progress_queue is None or job_id is None:
+        return None
+    queue = _progress_queue
+
+    def sink(snapshot: dict) -> None:
+        queue.put((job_id, shard, snapshot))
+    return sink
+
+
+def _extract_v1(file_path: str, layer_indices: Optional[list[int]] = None,
+                job_id: Optional[str] = None, shard: int = 0) -> dict:
+    from backend.core.psd_processor import extract_psd
+    return extract_psd(file_path, layer_indices, _progress_sink(job_id, shard))
+
+
+def _extract_v2(file_path: str, job_id: Optional[str] = None) -> dict:
+    from backend.core.psd_processor_v2 import extract_psd_v2
+    return extract_psd_v2(file_path, _progress_sink(job_id, 0))
+
+
+# ══════════════════════════════════════════════
+#  JOBS
+# ══════════════════════════════════════════════
+
+class IngestCancelled(Exception):
+    """Raised inside ingest() when its batch was cancelled."""
+
+
+@dataclass
+class IngestJob:
+    """State of one PSD going through the ingest engine."""
+
+    job_id: str
+    filename: str
+    file_path: str
+    pipeline: str = "v1"            # v1 (database.json) | v2 (database_v2.json)
+    batch_id: Optional[str] = None
+    status: str = "queued"          # queued | extracting | merging | done | error | cancelled
+    shards: int = 0
+    error: Optional[str] = None
+    result: Optional[dict] = None   # v2: the stored character entry
+    progress: Optional[dict] = None # merged IngestProgress snapshot (see ingest_progress)
+    cancelled: bool = False
+    _futures: list = field(default_factory=list, repr=False)
+    _shard_progress: dict = field(default_factory=dict, repr=False)
+    _on_progress: Optional[Callable] = field(default=None, repr=False)
+    _loop: Optional[asyncio.AbstractEventLoop] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error", "cancelled")
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.job_id,
+            "filename": self.filename,
+            "pipeline": self.pipeline,
+            "status": self.status,
+            "shards": self.shards,
+            "error": self.error,
+            "progress": self.progress,
+        }
+
+
+class PsdIngestEngine:
+    """Runs PSD extraction in a process pool and merges results in one writer.
+
+    Args:
+        max_workers: Worker processes (default PSD_INGEST_WORKERS / CPU count).
+        split_bytes: v1 PSDs at least this large are split per top-level
+            layer run (default PSD_SPLIT_MB).
+        storage_dir: Asset pool root for workers (default backend/storage).
+        thumbnails: Service that renders thumbnails after each merge
+            (default: the process-wide one, or one for storage_dir).
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        split_bytes: Optional[int] = None,
+        storage_dir: Optional[str] = None,
+        thumbnails=None,
+    ):
+        from backend.core.thumbnail_service import ThumbnailService, get_thumbnail_service
+        self.max_workers = max_workers or default_workers()
+        self.split_bytes = split_bytes if split_bytes is not None else default_split_bytes()
+        self.storage_dir = storage_dir
+        self._owns_thumbnails = thumbnails is None and storage_dir is not None
+        if thumbnails is None:
+            thumbnails = ThumbnailService(storage_dir) if storage_dir else get_thumbnail_service()
+        self.thumbnails = thumbnails
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="psd-writer")
+        self._lock = threading.Lock()
+        self._batches: dict[str, list[IngestJob]] = {}
+        self._jobs: dict[str, IngestJob] = {}
+        self._progress_queue = None
+        self._drainer: Optional[threading.Thread] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: the server process has live threads, and Windows only has spawn anyway
+                ctx = multiprocessing.get_context("spawn")
+                if self._progress_queue is None:
+                    self._progress_queue = ctx.Queue()
+                    self._drainer = threading.Thread(
+                        target=self._drain_progress, args=(self._progress_queue,),
+                        name="psd-progress", daemon=True,
+                    )
+                    self._drainer.start()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(self.storage_dir, self._progress_queue),
+                )
+            return self._pool
+
+    # ── Progress ──
+
+    def _drain_progress(self, queue) -> None:
+        """Forward worker snapshots to their job's event loop (runs in a thread)."""
+        while True:
+            try:
+                item = queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, shard, snapshot = item
+            job = self._jobs.get(job_id)
+            if job is None or job._loop is None:
+                continue
+            try:
+                job._loop.call_soon_threadsafe(self._apply_progress, job, shard, snapshot)
+            except RuntimeError:
+                pass  # the job's loop has closed
+
+    def _apply_progress(self, job: IngestJob, shard: int, snapshot: dict) -> None:
+        if job.finished:
+            return
+        from backend.core.ingest_progress import merge_snapshots
+        job._shard_progress[shard] = snapshot
+        job.progress = merge_snapshots([job._shard_progress[k] for k in sorted(job._shard_progress)])
+        self._notify(job)
+
+    def _notify(self, job: IngestJob) -> None:
+        if job._on_progress is None:
+            return
+        try:
+            outcome = job._on_progress(job)
+            if asyncio.iscoroutine(outcome):
+                asyncio.ensure_future(outcome)
+        except Exception as e:
+            logger.warning(f"[Ingest] Progress callback failed for {job.filename}: {e}")
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        # A worker died (e.g. out of memory); later jobs get a fresh pool
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, job: IngestJob, fn, *args):
+        if job.cancelled:
+            raise IngestCancelled()
+        pool = self._get_pool()
+        try:
+            future: Future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            pool = self._get_pool()
+            future = pool.submit(fn, *args)
+        job._futures.append(future)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if job.cancelled:
+                raise IngestCancelled()
+            raise
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise
+
+    async def _extract(self, job: IngestJob) -> dict:
+        if job.pipeline == "v2":
+            job.shards = 1
+            return await self._run(job, _extract_v2, job.file_path, job.job_id)
+
+        from backend.core.psd_processor import combine_psd_results
+
+        shards = None
+        if os.path.getsize(job.file_path) >= self.split_bytes and self.max_workers > 1:
+            count = await self._run(job, _count_top_level_layers, job.file_path)
+            shards = plan_layer_shards(count, self.max_workers * 2)
+        if not shards or len(shards) == 1:
+            job.shards = 1
+            return await self._run(job, _extract_v1, job.file_path, None, job.job_id)
+
+        job.shards = len(shards)
+        logger.info(f"[Ingest] Splitting {job.filename} into {len(shards)} layer shards")
+        results = await asyncio.gather(*(
+            self._run(job, _extract_v1, job.file_path, s, job.job_id, i) for i, s in enumerate(shards)
+        ))
+        return combine_psd_results(list(results))
+
+    def _merge(self, job: IngestJob, extracted: dict):
+        start = time.perf_counter()
+        try:
+            if job.pipeline == "v2":
+                from backend.core.psd_processor_v2 import merge_psd_v2_result
+                return merge_psd_v2_result(extracted)
+            from backend.core.psd_processor import merge_psd_result
+            merge_psd_result(extracted)
+            return None
+        finally:
+            if job.progress is not None:
+                job.progress["timings"]["db"] = round(time.perf_counter() - start, 4)
+
+    def _queue_thumbnails(self, job: IngestJob, extracted: dict) -> None:
+        groups = extracted.get("layer_groups") or (extracted.get("char_entry") or {}).get("layer_groups") or {}
+        hashes = [layer["hash"] for layers in groups.values() for layer in layers if layer.get("hash")]
+        try:
+            self.thumbnails.prefetch(hashes)
+        except Exception as e:
+            logger.warning(f"[Ingest] Could not queue thumbnails for {job.filename}: {e}")
+
+    async def ingest(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        pipeline: str = "v1",
+        batch_id: Optional[str] = None,
+        cleanup: bool = True,
+        on_progress: Optional[Callable[[IngestJob], object]] = None,
+    ) -> IngestJob:
+        """Extract a PSD in the pool, then merge it into the databases.
+
+        Never raises for PSD errors: the returned job has status "error" or
+        "cancelled" instead. file_path is removed afterwards when cleanup.
+        on_progress(job) (plain function or coroutine) is called on the
+        event loop whenever job.progress changes during extraction.
+        """
+        loop = asyncio.get_running_loop()
+        job = IngestJob(
+            job_id=uuid.uuid4().hex,
+            filename=filename or os.path.basename(file_path),
+            file_path=file_path,
+            pipeline=pipeline,
+            batch_id=batch_id,
+            _on_progress=on_progress,
+            _loop=loop,
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            if batch_id:
+                self._batches.setdefault(batch_id, []).append(job)
+        try:
+            job.status = "extracting"
+            extracted = await self._extract(job)
+            if job.cancelled:
+                raise IngestCancelled()
+            if extracted.get("progress"):
+                # The final snapshot from the result, whatever queue messages are still in flight
+                from backend.core.ingest_progress import merge_snapshots
+                job.progress = merge_snapshots([extracted["progress"]])
+                self._notify(job)
+            job.status = "merging"
+            job.result = await loop.run_in_executor(self._writer, self._merge, job, extracted)
+            job.status = "done"
+            self._queue_thumbnails(job, extracted)
+            logger.info(f"[Ingest] {job.filename} ingested ({job.pipeline}, {job.shards} shard(s))")
+        except Exception as e:
+            if isinstance(e, IngestCancelled) or job.cancelled:
+                job.status = "cancelled"
+                job.error = "Cancelled"
+            else:
+                job.status = "error"
+                job.error = str(e) or type(e).__name__
+                logger.error(f"[Ingest] Error processing PSD {job.filename}: {job.error}")
+        finally:
+            for future in job._futures:
+                future.cancel()
+            job._futures.clear()
+            if cleanup and os.path.exists(file_path):
+                os.remove(file_path)
+            with self._lock:
+                self._jobs.pop(job.job_id, None)
+                if batch_id:
+                    jobs = self._batches.get(batch_id, [])
+                    if job in jobs:
+                        jobs.remove(job)
+                    if not jobs:
+                        self._batches.pop(batch_id, None)
+        return job
+
+    def cancel(self, batch_id: str) -> int:
+        """Cancel unfinished jobs of a batch. Returns how many were cancelled.
+
+        Queued work is dropped; shards already running in a worker finish
+        but their results are discarded (nothing is merged). Jobs already
+        being merged complete normally.
+        """
+        with self._lock:
+            jobs = [job for job in self._batches.get(batch_id, []) if job.status in ("queued", "extracting")]
+        for job in jobs:
+            job.cancelled = True
+            for future in list(job._futures):
+                future.cancel()
+        if jobs:
+            logger.info(f"[Ingest] Cancelled {len(jobs)} job(s) in batch {batch_id}")
+        return len(jobs)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            queue, self._progress_queue = self._progress_queue, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if queue is not None:
+            queue.put(None)
+        self._writer.shutdown(wait=False)
+        if self._owns_thumbnails:
+            self.thumbnails.shutdown()
+
+
+_engine: Optional[PsdIngestEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_ingest_engine() -> PsdIngestEngine:
+    """The process-wide ingest engine shared by the v1 and v2 upload routes."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = PsdIngestEngine()
+    return _engine
+
+
+def shutdown_ingest_engine() -> None:
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        engine.shutdown()
@@ -1,17 +1,21 @@
 import os
-import json
-import uuid
 import re
 import logging
-from PIL import Image
+from contextlib import nullcontext
 from psd_tools import PSDImage
-from backend.core.image_hasher import calculate_hash_from_image
+from sqlalchemy import func, or_
+from backend.core import character_store
+from backend.core.image_hasher import calculate_hash_from_layer
+from backend.core.ingest_progress import IngestProgress, merge_snapshots
+from backend.core.layer_image import crop_layer_image
+from backend.core.layer_manifest import MANIFEST_NAME, LayerManifest, save_manifest
 from backend.core.database import SessionLocal
-from backend.core.models import Asset, AssetVersion
+from backend.core.models import Asset, AssetVersion, generate_uuid
 
 logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Legacy JSON library, imported into character_store once at startup
 DB_PATH = os.path.join(BASE_DIR, "data", "database.json")
 STORAGE_DIR = os.path.join(BASE_DIR, "storage")
 EXTRACTED_DIR = os.path.join(STORAGE_DIR, "extracted_psds")
@@ -20,18 +24,13 @@ THUMBNAILS_DIR = os.path.join(STORAGE_DIR, "thumbnails")
 os.makedirs(EXTRACTED_DIR, exist_ok=True)
 os.makedirs(THUMBNAILS_DIR, exist_ok=True)
 
-def load_db():
-    if not os.path.exists(DB_PATH):
-        return []
-    try:
-        with open(DB_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
+def load_db(limit=None, offset=0):
+    """The v1 character library (formerly database.json), optionally one page."""
+    return character_store.list_characters("v1", limit, offset)
 
 def save_db(data):
-    with open(DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    """Replace the whole v1 character library. Prefer the targeted character_store writes."""
+    character_store.replace_characters("v1", data)
 
 def extract_name_from_filename(filename):
     name = os.path.splitext(os.path.basename(filename))[0]
@@ -44,7 +43,178 @@ def sanitize_filename(name):
         name = name.replace(char, '_')
     return name.strip()
 
-def export_layer_recursive(layer, current_path_parts, current_fs_path, char_name, layer_groups, group_order, psd_width, psd_height):
+def _chunked(values, size=500):
+    """Split values for IN (...) queries (SQLite caps bound parameters)."""
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def register_assets(records):
+    """Insert/version the Asset rows for one PSD in a single transaction.
+
+    Each record is a dict built by export_layer_recursive (hash, name,
+    character_name, category, file_path, thumbnail_path, width, height,
+    file_size). Existing hashes and prior (name, character) rows are
+    prefetched in bulk, then records are applied in order exactly as the
+    old per-layer commits did:
+      - hash already known (hash_sha256 or pixel_hash) → nothing to do
+      - same name+character with another hash → snapshot the old row as
+        an AssetVersion and point the row at the new hash
+      - otherwise → insert a new Asset
+    Returns {"inserted", "versioned", "existing"} counts.
+    """
+    counts = {"inserted": 0, "versioned": 0, "existing": 0}
+    if not records:
+        return counts
+
+    db_session = SessionLocal()
+    try:
+        hashes = {r["hash"] for r in records}
+        by_hash = {}
+        for chunk in _chunked(hashes):
+            for asset in db_session.query(Asset).filter(
+                or_(Asset.hash_sha256.in_(chunk), Asset.pixel_hash.in_(chunk))
+            ):
+                by_hash[asset.hash_sha256] = asset
+                if asset.pixel_hash:
+                    by_hash[asset.pixel_hash] = asset
+
+        # Candidate prior versions, keyed by (name, character)
+        by_name = {}
+        names = {r["name"] for r in records}
+        characters = {r["character_name"] for r in records}
+        for chunk in _chunked(names):
+            for asset in db_session.query(Asset).filter(
+                Asset.original_name.in_(chunk),
+                Asset.character_name.in_(characters),
+            ):
+                by_name.setdefault((asset.original_name, asset.character_name), []).append(asset)
+
+        latest_version = {}
+        candidate_ids = [a.id for assets in by_name.values() for a in assets]
+        for chunk in _chunked(candidate_ids):
+            rows = db_session.query(AssetVersion.asset_id, func.max(AssetVersion.version)).filter(
+                AssetVersion.asset_id.in_(chunk)
+            ).group_by(AssetVersion.asset_id)
+            latest_version.update(dict(rows))
+
+        for record in records:
+            img_hash = record["hash"]
+            if img_hash in by_hash:
+                counts["existing"] += 1
+                continue
+            key = (record["name"], record["character_name"])
+            prior = next((a for a in by_name.get(key, []) if a.hash_sha256 != img_hash), None)
+            if prior:
+                # Snapshot the old asset as a version before overwriting
+                next_version = latest_version.get(prior.id, 0) + 1
+                latest_version[prior.id] = next_version
+                db_session.add(AssetVersion(
+                    asset_id=prior.id,
+                    version=next_version,
+                    hash_sha256=prior.hash_sha256,
+                    file_path=prior.file_path,
+                ))
+                for old_hash in (prior.hash_sha256, prior.pixel_hash):
+                    if by_hash.get(old_hash) is prior:
+                        del by_hash[old_hash]
+                # Update the canonical asset row to the new hash
+                prior.hash_sha256 = img_hash
+                prior.pixel_hash = img_hash
+                prior.file_path = record["file_path"]
+                prior.thumbnail_path = record["thumbnail_path"]
+                prior.file_size = record["file_size"]
+                by_hash[img_hash] = prior
+                counts["versioned"] += 1
+                logger.info(f"Versioned asset {record['name']} (char={record['character_name']}): v{next_version} saved, new hash={img_hash}")
+            else:
+                new_asset = Asset(
+                    id=generate_uuid(),
+                    hash_sha256=img_hash,
+                    pixel_hash=img_hash,
+                    original_name=record["name"],
+                    file_path=record["file_path"],
+                    thumbnail_path=record["thumbnail_path"],
+                    width=record["width"],
+                    height=record["height"],
+                    file_size=record["file_size"],
+                    category=record["category"],
+                    character_name=record["character_name"],
+                )
+                db_session.add(new_asset)
+                by_hash[img_hash] = new_asset
+                by_name.setdefault(key, []).append(new_asset)
+                counts["inserted"] += 1
+
+        db_session.commit()
+        logger.info(
+            f"Registered {len(records)} layer assets in SQLite: "
+            f"{counts['inserted']} new, {counts['versioned']} versioned, {counts['existing']} existing"
+        )
+    except Exception as e:
+        db_session.rollback()
+        logger.warning(f"Failed to insert/version assets in SQLite: {e}")
+    finally:
+        db_session.close()
+    return counts
+
+def _phase(progress, name):
+    return progress.phase(name) if progress is not None else nullcontext()
+
+def _extract_layer_asset(layer, safe_name, psd_width, psd_height, progress=None):
+    """Composite, crop, hash and save one leaf layer. Returns (hash, bbox) or None.
+
+    Thumbnails are rendered later by the thumbnail service, not here.
+    """
+    with _phase(progress, "composite"):
+        try:
+            image = layer.composite(force=True)
+        except Exception:
+            try:
+                image = layer.topil()
+            except Exception as e:
+                logger.warning(f"Could not extract layer {safe_name}: {e}")
+                return None
+        if not image:
+            return None
+
+        # Keep only the layer's visible pixels; bbox records where they go on the canvas
+        layer_img = crop_layer_image(image, layer.left, layer.top, psd_width, psd_height)
+        cropped_img = layer_img.image
+
+    # Global asset deduplication logic
+    with _phase(progress, "hash"):
+        img_hash = calculate_hash_from_layer(cropped_img, layer_img.left, layer_img.top)
+    filename = f"{img_hash}.png"
+    
+    # Save the file to the global asset pool
+    asset_dir = os.path.join(STORAGE_DIR, "assets")
+    save_path = os.path.join(asset_dir, filename)
+    
+    if not os.path.exists(save_path):
+        with _phase(progress, "save"):
+            cropped_img.save(save_path)
+        if progress is not None:
+            progress.add_bytes(os.path.getsize(save_path))
+        logger.info(f"Saved deduplicated asset pool layer: {filename}")
+
+    return img_hash, layer_img.bbox
+
+def count_leaf_layers(layer):
+    """Leaf layers under layer that extraction will visit (non-empty pixels)."""
+    if layer.is_group():
+        return sum(count_leaf_layers(child) for child in layer)
+    return 1 if layer.width and layer.height else 0
+
+def export_layer_recursive(layer, current_path_parts, current_fs_path, char_name, layer_groups, group_order, psd_width, psd_height, asset_records=None, manifest=None, progress=None):
+    """Extract a layer (or group) into the asset pool and layer_groups.
+
+    Asset rows are appended to asset_records for a single register_assets()
+    call per PSD; without a list each layer is registered on its own.
+    With a LayerManifest, layers unchanged since the last ingest reuse
+    their previous asset instead of being composited again. An
+    IngestProgress receives per-layer counts and phase timings.
+    """
     safe_name = sanitize_filename(layer.name)
     
     # Temporarily set BOTH groups and layers to visible, otherwise child elements render transparent
@@ -63,125 +233,82 @@ def export_layer_recursive(layer, current_path_parts, current_fs_path, char_name
             layer_groups[top_group] = []
             
         for child in layer:
-            export_layer_recursive(child, new_path_parts, new_fs_path, char_name, layer_groups, group_order, psd_width, psd_height)
+            export_layer_recursive(child, new_path_parts, new_fs_path, char_name, layer_groups, group_order, psd_width, psd_height, asset_records, manifest, progress)
     else:
         if layer.width == 0 or layer.height == 0:
             if hasattr(layer, "visible"):
                 layer.visible = was_visible
             return
             
-        try:
-            image = layer.composite(force=True)
-        except Exception:
-            try:
-                image = layer.topil()
-            except Exception as e:
-                logger.warning(f"Could not extract layer {safe_name}: {e}")
+        fingerprint = manifest.fingerprint(layer) if manifest is not None else None
+        cached = manifest.lookup(fingerprint) if manifest is not None else None
+        if cached:
+            # Unchanged since the last ingest — reuse its asset without compositing
+            img_hash, bbox = cached
+        else:
+            extracted = _extract_layer_asset(layer, safe_name, psd_width, psd_height, progress)
+            if extracted is None:
+                if progress is not None:
+                    progress.layer_done(current_path_parts[0] if current_path_parts else "Root")
                 if hasattr(layer, "visible"):
                     layer.visible = was_visible
                 return
-                
-        if image:
-            # Create a transparent canvas of the full PSD size and paste the layer onto it securely.
-            padded_img = Image.new("RGBA", (psd_width, psd_height), (0,0,0,0))
-            padded_img.paste(image, (layer.left, layer.top))
-            
-            # Global asset deduplication logic
-            img_hash = calculate_hash_from_image(padded_img)
-            filename = f"{img_hash}.png"
-            
-            # Save the file to the global asset pool
-            asset_dir = os.path.join(STORAGE_DIR, "assets")
-            save_path = os.path.join(asset_dir, filename)
-            
-            if not os.path.exists(save_path):
-                padded_img.save(save_path)
-                logger.info(f"Saved deduplicated asset pool layer: {filename}")
-            
-            # Generate 128x128 thumbnail (Roadmap 2.3)
-            thumb_path = os.path.join(THUMBNAILS_DIR, f"{img_hash}_thumb.png")
-            if not os.path.exists(thumb_path):
-                try:
-                    thumb = padded_img.copy()
-                    thumb.thumbnail((128, 128), Image.LANCZOS)
-                    thumb.save(thumb_path)
-                except Exception as e:
-                    logger.warning(f"Failed to generate thumbnail for {filename}: {e}")
-
-            # ── P1-2.1: Asset Versioning — Insert/version Asset record in SQLite ──
-            try:
-                db_session = SessionLocal()
-                existing_asset = db_session.query(Asset).filter(Asset.hash_sha256 == img_hash).first()
-                if not existing_asset:
-                    # Check if a prior version of this layer already exists (same name+character, different hash)
-                    prior = db_session.query(Asset).filter(
-                        Asset.original_name == safe_name,
-                        Asset.character_name == char_name,
-                        Asset.hash_sha256 != img_hash,
-                    ).first()
-                    if prior:
-                        # Snapshot the old asset as a version before overwriting
-                        latest_version = db_session.query(AssetVersion).filter(
-                            AssetVersion.asset_id == prior.id
-                        ).order_by(AssetVersion.version.desc()).first()
-                        next_version = (latest_version.version + 1) if latest_version else 1
-                        version_record = AssetVersion(
-                            asset_id=prior.id,
-                            version=next_version,
-                            hash_sha256=prior.hash_sha256,
-                            file_path=prior.file_path,
-                        )
-                        db_session.add(version_record)
-                        # Update the canonical asset row to the new hash
-                        prior.hash_sha256 = img_hash
-                        prior.file_path = f"assets/{filename}"
-                        prior.thumbnail_path = f"thumbnails/{img_hash}_thumb.png"
-                        prior.file_size = os.path.getsize(save_path) if os.path.exists(save_path) else 0
-                        db_session.commit()
-                        logger.info(f"Versioned asset {safe_name} (char={char_name}): v{next_version} saved, new hash={img_hash}")
-                    else:
-                        file_size_bytes = os.path.getsize(save_path) if os.path.exists(save_path) else 0
-                        top_group_name = current_path_parts[0] if current_path_parts else "Root"
-                        new_asset = Asset(
-                            hash_sha256=img_hash,
-                            original_name=safe_name,
-                            file_path=f"assets/{filename}",
-                            thumbnail_path=f"thumbnails/{img_hash}_thumb.png",
-                            width=psd_width,
-                            height=psd_height,
-                            file_size=file_size_bytes,
-                            category=top_group_name,
-                            character_name=char_name,
-                        )
-                        db_session.add(new_asset)
-                        db_session.commit()
-                        logger.info(f"Inserted asset into SQLite: {img_hash} ({safe_name})")
-                db_session.close()
-            except Exception as e:
-                logger.warning(f"Failed to insert/version asset in SQLite: {e}")
-
-            top_group = current_path_parts[0] if current_path_parts else "Root"
-            if top_group not in group_order:
-                group_order.append(top_group)
-                layer_groups[top_group] = []
-                
-            # Database references the shared static route
-            url_path = f"assets/{filename}"
+            img_hash, bbox = extracted
+        if manifest is not None:
+            manifest.record("/".join(current_path_parts + [safe_name]), fingerprint, img_hash, bbox, reused=cached is not None)
+
+        filename = f"{img_hash}.png"
+        save_path = os.path.join(STORAGE_DIR, "assets", filename)
+
+        # ── P1-2.1: Asset Versioning — record for the batched SQLite upsert ──
+        record = {
+            "hash": img_hash,
+            "name": safe_name,
+            "character_name": char_name,
+            "category": current_path_parts[0] if current_path_parts else "Root",
+            "file_path": f"assets/{filename}",
+            "thumbnail_path": f"thumbnails/{img_hash}_thumb.png",
+            "width": bbox[2],
+            "height": bbox[3],
+            "file_size": os.path.getsize(save_path) if os.path.exists(save_path) else 0,
+        }
+        if asset_records is not None:
+            asset_records.append(record)
+        else:
+            register_assets([record])
+
+        top_group = current_path_parts[0] if current_path_parts else "Root"
+        if progress is not None:
+            progress.layer_done(top_group, reused=cached is not None)
+        if top_group not in group_order:
+            group_order.append(top_group)
+            layer_groups[top_group] = []
             
-            existing_layer = next((l for l in layer_groups[top_group] if l["hash"] == img_hash), None)
-            if not existing_layer:
-                layer_groups[top_group].append({
-                    "name": safe_name,
-                    "path": url_path,
-                    "hash": img_hash,
-                    "bbox": [layer.left, layer.top, layer.width, layer.height]
-                })
+        # Database references the shared static route
+        url_path = f"assets/{filename}"
+        
+        existing_layer = next((l for l in layer_groups[top_group] if l["hash"] == img_hash), None)
+        if not existing_layer:
+            layer_groups[top_group].append({
+                "name": safe_name,
+                "path": url_path,
+                "hash": img_hash,
+                "bbox": list(bbox),
+                "cropped": True,
+            })
 
     # Restore visibility before returning
     if hasattr(layer, "visible"):
         layer.visible = was_visible
 
-def process_psd(file_path):
+def extract_psd(file_path, layer_indices=None, progress_sink=None):
+    """Extract a PSD's layers into the asset pool without touching the databases.
+
+    Safe to run in a worker process. layer_indices limits extraction to
+    those top-level layers (one shard of a huge PSD). progress_sink is
+    called with IngestProgress snapshots. Returns a picklable result for
+    merge_psd_result().
+    """
     char_name = extract_name_from_filename(file_path)
     
     logger.info(f"Opening PSD: {file_path}")
@@ -197,43 +324,85 @@ def process_psd(file_path):
     
     layer_groups = {}
     group_order = []
+    asset_records = []
+    wanted = set(layer_indices) if layer_indices is not None else None
+    manifest = LayerManifest.load(os.path.join(char_fs_path, MANIFEST_NAME), STORAGE_DIR, (psd.width, psd.height))
+    layers = [layer for index, layer in enumerate(psd) if wanted is None or index in wanted]
+    progress = IngestProgress(sum(count_leaf_layers(layer) for layer in layers), sink=progress_sink)
     
     try:
-        for layer in psd:
-            export_layer_recursive(layer, [], char_fs_path, sanitize_filename(char_name), layer_groups, group_order, psd.width, psd.height)
+        for layer in layers:
+            export_layer_recursive(layer, [], char_fs_path, sanitize_filename(char_name), layer_groups, group_order, psd.width, psd.height, asset_records, manifest, progress)
     except Exception as e:
         logger.error(f"Error during recursive extraction of PSD layers: {e}", exc_info=True)
         raise RuntimeError(f"Failed to extract layers from PSD: {e}")
-        
-    db_data = load_db()
-    
-    existing_char = next((c for c in db_data if c["name"] == char_name), None)
-    
-    if existing_char:
-        # Check if group order exists for backward compatibility if old format exists
-        if "group_order" not in existing_char:
-            existing_char["group_order"] = []
-            existing_char["layer_groups"] = {}
-            
-        for g in group_order:
-            if g not in existing_char["group_order"]:
-                existing_char["group_order"].append(g)
-                existing_char["layer_groups"][g] = []
-                
-            for new_layer in layer_groups.get(g, []):
-                existing_layers = existing_char["layer_groups"][g]
-                if not any(l["hash"] == new_layer["hash"] for l in existing_layers):
-                    existing_layers.append(new_layer)
-        logger.info(f"Updated existing character: {char_name}")
-    else:
-        new_char = {
-            "id": str(uuid.uuid4()),
-            "name": char_name,
-            "group_order": group_order,
-            "layer_groups": layer_groups
-        }
-        db_data.append(new_char)
-        logger.info(f"Created new character: {char_name}")
-        
-    save_db(db_data)
+    progress.finish()
+
+    if manifest.reused:
+        logger.info(f"Reused {manifest.reused} unchanged layers of {char_name} (extracted {manifest.extracted})")
+
+    return {
+        "char_name": char_name,
+        "canvas_size": [psd.width, psd.height],
+        "group_order": group_order,
+        "layer_groups": layer_groups,
+        "asset_records": asset_records,
+        # Written by merge_psd_result once the PSD is fully ingested
+        "manifest_path": manifest.path,
+        "manifest_entries": manifest.entries,
+        "reused_layers": manifest.reused,
+        "progress": progress.snapshot(),
+    }
+
+def combine_psd_results(results):
+    """Join shard results of one PSD (in top-level layer order) into one result."""
+    combined = {
+        "char_name": results[0]["char_name"],
+        "canvas_size": results[0]["canvas_size"],
+        "group_order": [],
+        "layer_groups": {},
+        "asset_records": [],
+        "manifest_path": results[0].get("manifest_path"),
+        "manifest_entries": {},
+        "reused_layers": 0,
+        "progress": merge_snapshots([r["progress"] for r in results if r.get("progress")]),
+    }
+    for result in results:
+        for g in result["group_order"]:
+            if g not in combined["group_order"]:
+                combined["group_order"].append(g)
+                combined["layer_groups"][g] = []
+            layers = combined["layer_groups"][g]
+            for layer in result["layer_groups"].get(g, []):
+                if not any(l["hash"] == layer["hash"] for l in layers):
+                    layers.append(layer)
+        combined["asset_records"].extend(result["asset_records"])
+        for key, entry in result.get("manifest_entries", {}).items():
+            unique, n = key, 1
+            while unique in combined["manifest_entries"]:
+                n += 1
+                unique = f"{key}#{n}"
+            combined["manifest_entries"][unique] = entry
+        combined["reused_layers"] += result.get("reused_layers", 0)
+    return combined
+
+def merge_psd_result(result):
+    """Register a PSD's assets in SQLite and merge its character into the v1 character store.
+
+    Only the character's own rows are touched, in one transaction; the
+    ingest engine still runs merges in a single writer.
+    """
+    char_name = result["char_name"]
+    group_order = result["group_order"]
+    layer_groups = result["layer_groups"]
+    canvas_size = list(result["canvas_size"])
+
+    register_assets(result["asset_records"])
+    character_store.merge_character_layers("v1", char_name, canvas_size, group_order, layer_groups)
+
+    if result.get("manifest_path"):
+        save_manifest(result["manifest_path"], canvas_size, result["manifest_entries"])
+
+def process_psd(file_path):
+    merge_psd_result(extract_psd(file_path))
 
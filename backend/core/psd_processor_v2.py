@@ -2,20 +2,22 @@
 PSD Processor V2 — Jointed-limb aware processing.
 
 Uses psd_smart_parser to auto-detect PSD structure and extract
-body parts, expressions, viewpoints. Stores results in a separate
-v2 database (database_v2.json) to avoid conflicts with v1.
+body parts, expressions, viewpoints. Stores results as the "v2"
+pipeline of the character store, separate from v1 characters.
 
 v1 (psd_processor.py) remains untouched and fully functional.
 """
 
 import os
-import json
 import uuid
 import logging
 from datetime import datetime, timezone
 
 from psd_tools import PSDImage
 
+from backend.core import character_store
+from backend.core.ingest_progress import IngestProgress
+from backend.core.layer_manifest import LayerManifest, save_manifest
 from backend.core.psd_smart_parser import (
     detect_psd_type,
     parse_jointed_psd,
@@ -25,29 +27,25 @@ from backend.core.psd_smart_parser import (
 logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Legacy JSON library, imported into character_store once at startup
 DB_V2_PATH = os.path.join(BASE_DIR, "data", "database_v2.json")
 STORAGE_DIR = os.path.join(BASE_DIR, "storage")
+# v1 and v2 extract the same character into the same folder; keep separate manifests
+MANIFEST_V2_NAME = "layer_manifest_v2.json"
 
 os.makedirs(os.path.join(BASE_DIR, "data"), exist_ok=True)
 
 
 # ── V2 Database helpers ──────────────────────────────────────
 
-def load_db_v2() -> list:
-    """Load the v2 character database."""
-    if not os.path.exists(DB_V2_PATH):
-        return []
-    try:
-        with open(DB_V2_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
+def load_db_v2(limit: int | None = None, offset: int = 0) -> list:
+    """Load the v2 characters (optionally one page)."""
+    return character_store.list_characters("v2", limit, offset)
 
 
 def save_db_v2(data: list):
-    """Save the v2 character database."""
-    with open(DB_V2_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Replace all v2 characters. Prefer character_store.upsert_character."""
+    character_store.replace_characters("v2", data)
 
 
 # ── Name extraction ──────────────────────────────────────────
@@ -86,10 +84,22 @@ def process_psd_v2(file_path: str) -> dict:
     - Jointed: uses psd_smart_parser for body-part/expression/viewpoint extraction
     - Flat: still processes it but wraps in v2 data model with psd_type="flat"
 
-    Results are stored in database_v2.json (separate from v1).
+    Results are stored in the v2 character store (separate from v1).
 
     Returns the character dict that was stored.
     """
+    return merge_psd_v2_result(extract_psd_v2(file_path))
+
+
+def extract_psd_v2(file_path: str, progress_sink=None) -> dict:
+    """
+    Extract a PSD through the V2 pipeline without touching the databases.
+
+    Safe to run in a worker process. Returns {"char_entry", "asset_records",
+    "manifest_*"} for merge_psd_v2_result(). Layers unchanged since the last
+    upload of this character are reused via its layer manifest.
+    progress_sink is called with IngestProgress snapshots.
+    """
     char_name = _extract_char_name(file_path)
     safe_name = _sanitize_name(char_name)
 
@@ -104,32 +114,60 @@ def process_psd_v2(file_path: str) -> dict:
     psd_type = detect_psd_type(psd)
     logger.info(f"[V2] Detected type: {psd_type} for '{char_name}'")
 
+    manifest_path = os.path.join(STORAGE_DIR, "extracted_psds", safe_name, MANIFEST_V2_NAME)
+    manifest = LayerManifest.load(manifest_path, STORAGE_DIR, (psd.width, psd.height))
+
+    asset_records = []
+    progress = IngestProgress(sink=progress_sink)
     if psd_type == "jointed":
-        char_entry = _process_jointed(psd, char_name, safe_name)
+        char_entry = _process_jointed(psd, char_name, safe_name, manifest, progress)
     else:
-        char_entry = _process_flat_v2(psd, char_name, safe_name)
+        char_entry = _process_flat_v2(psd, char_name, safe_name, asset_records, manifest, progress)
+    progress.finish()
 
-    # ── Persist to v2 database ──
-    db = load_db_v2()
-    existing = next((c for c in db if c["name"] == char_name), None)
+    if manifest.reused:
+        logger.info(f"[V2] Reused {manifest.reused} unchanged layers of '{char_name}' (extracted {manifest.extracted})")
 
-    if existing:
-        # Merge: replace with new data but keep the same ID
-        char_entry["id"] = existing["id"]
-        idx = db.index(existing)
-        db[idx] = char_entry
-        logger.info(f"[V2] Updated existing character: {char_name}")
-    else:
-        db.append(char_entry)
+    return {
+        "char_entry": char_entry,
+        "asset_records": asset_records,
+        # Written by merge_psd_v2_result once the PSD is fully ingested
+        "manifest_path": manifest_path,
+        "manifest_entries": manifest.entries,
+        "reused_layers": manifest.reused,
+        "progress": progress.snapshot(),
+    }
+
+
+def merge_psd_v2_result(result: dict) -> dict:
+    """
+    Register extracted assets and persist the character to the v2 character store.
+
+    Must only run in one writer at a time (the ingest engine serializes it).
+    Returns the character dict that was stored.
+    """
+    from backend.core.psd_processor import register_assets
+
+    char_entry = result["char_entry"]
+    char_name = char_entry["name"]
+    register_assets(result["asset_records"])
+
+    # ── Persist to v2 store: replaces a same-named character, keeping its ID ──
+    new_id = char_entry["id"]
+    character_store.upsert_character("v2", char_entry)
+    if char_entry["id"] == new_id:
         logger.info(f"[V2] Created new character: {char_name}")
+    else:
+        logger.info(f"[V2] Updated existing character: {char_name}")
 
-    save_db_v2(db)
+    if result.get("manifest_path"):
+        save_manifest(result["manifest_path"], char_entry.get("canvas_size", [0, 0]), result["manifest_entries"])
     return char_entry
 
 
-def _process_jointed(psd: PSDImage, char_name: str, safe_name: str) -> dict:
+def _process_jointed(psd: PSDImage, char_name: str, safe_name: str, manifest=None, progress=None) -> dict:
     """Process a jointed-limb PSD."""
-    jointed_char = parse_jointed_psd(psd, safe_name, STORAGE_DIR)
+    jointed_char = parse_jointed_psd(psd, safe_name, STORAGE_DIR, manifest=manifest, progress=progress)
     jointed_dict = jointed_char_to_dict(jointed_char)
 
     return {
@@ -148,12 +186,14 @@ def _process_jointed(psd: PSDImage, char_name: str, safe_name: str) -> dict:
     }
 
 
-def _process_flat_v2(psd: PSDImage, char_name: str, safe_name: str) -> dict:
+def _process_flat_v2(psd: PSDImage, char_name: str, safe_name: str, asset_records: list | None = None,
+                     manifest=None, progress=None) -> dict:
     """
     Process a flat PSD through v2 pipeline.
     Still extracts layers the same way as v1 but wraps in v2 format.
+    Asset rows go to asset_records when given, else are registered here.
     """
-    from backend.core.psd_processor import export_layer_recursive, sanitize_filename
+    from backend.core.psd_processor import count_leaf_layers, export_layer_recursive, register_assets, sanitize_filename
 
     EXTRACTED_DIR = os.path.join(STORAGE_DIR, "extracted_psds")
     os.makedirs(EXTRACTED_DIR, exist_ok=True)
@@ -163,12 +203,19 @@ def _process_flat_v2(psd: PSDImage, char_name: str, safe_name: str) -> dict:
 
     layer_groups = {}
     group_order = []
+    register_now = asset_records is None
+    if register_now:
+        asset_records = []
 
+    if progress is not None:
+        progress.total_layers += sum(count_leaf_layers(layer) for layer in psd)
     for layer in psd:
         export_layer_recursive(
             layer, [], char_fs_path, sanitize_filename(char_name),
-            layer_groups, group_order, psd.width, psd.height
+            layer_groups, group_order, psd.width, psd.height, asset_records, manifest, progress
         )
+    if register_now:
+        register_assets(asset_records)
 
     return {
         "id": str(uuid.uuid4()),
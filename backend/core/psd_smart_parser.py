@@ -10,12 +10,16 @@ import os
 import re
 import uuid
 import logging
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field, asdict
 from typing import Optional
 from PIL import Image
 from psd_tools import PSDImage
 
-from backend.core.image_hasher import calculate_hash_from_image
+from backend.core.image_hasher import calculate_hash_from_layer
+from backend.core.layer_image import LayerImage, composite_layers, crop_layer_image
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +52,7 @@ class PartVariant:
     hash: str = ""
     asset_path: str = ""  # relative path to extracted PNG
     visible: bool = False
+    cropped: bool = True  # PNG covers bbox only (composite at its offset)
 
 
 @dataclass
@@ -113,14 +118,18 @@ def _sanitize_filename(name: str) -> str:
     return name.strip()
 
 
-def _extract_layer_image(layer, psd_width: int, psd_height: int) -> Optional[Image.Image]:
-    """Extract a single layer as a full-canvas-sized RGBA image."""
+def _extract_layer_image(layer, psd_width: int, psd_height: int, force_visible: bool = True) -> Optional[LayerImage]:
+    """Extract a single layer cropped to its visible pixels (with canvas offset).
+
+    force_visible=False when the caller already made the layer visible
+    (the extraction plan does, so workers never write layer state).
+    """
     if layer.width == 0 or layer.height == 0:
         return None
 
     # Temporarily force visible
     was_visible = getattr(layer, 'visible', True)
-    if hasattr(layer, 'visible'):
+    if force_visible and hasattr(layer, 'visible'):
         layer.visible = True
 
     try:
@@ -134,47 +143,55 @@ def _extract_layer_image(layer, psd_width: int, psd_height: int) -> Optional[Ima
                 return None
 
         if image:
-            padded = Image.new("RGBA", (psd_width, psd_height), (0, 0, 0, 0))
-            padded.paste(image, (layer.left, layer.top))
-            return padded
+            return crop_layer_image(image, layer.left, layer.top, psd_width, psd_height)
         return None
     finally:
-        if hasattr(layer, 'visible'):
+        if force_visible and hasattr(layer, 'visible'):
             layer.visible = was_visible
 
 
-def _extract_group_composite(group, psd_width: int, psd_height: int) -> Optional[Image.Image]:
+def _extract_group_composite(group, psd_width: int, psd_height: int, force_visible: bool = True) -> Optional[LayerImage]:
     """
     Composite all visible children of a group into a single image.
     Used for pre-composed expression groups that contain multiple sub-layers.
+    The result only covers the union of the children's bounding boxes.
     """
-    canvas = Image.new("RGBA", (psd_width, psd_height), (0, 0, 0, 0))
-    has_content = False
-
+    layers = []
     for child in group:
         if child.is_group():
-            sub_img = _extract_group_composite(child, psd_width, psd_height)
-            if sub_img:
-                canvas = Image.alpha_composite(canvas, sub_img)
-                has_content = True
+            layers.append(_extract_group_composite(child, psd_width, psd_height, force_visible))
         else:
-            img = _extract_layer_image(child, psd_width, psd_height)
-            if img:
-                canvas = Image.alpha_composite(canvas, img)
-                has_content = True
+            layers.append(_extract_layer_image(child, psd_width, psd_height, force_visible))
+    return composite_layers(layers)
 
-    return canvas if has_content else None
+
+def _save_png(image: Image.Image, path: str) -> None:
+    """Write a PNG via a temp file so concurrent writers of the same hash never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _phase(progress, name):
+    return progress.phase(name) if progress is not None else nullcontext()
 
 
 def _save_variant_image(
-    image: Image.Image,
+    layer_image: LayerImage,
     char_name: str,
     part_path: str,
     variant_name: str,
     storage_dir: str,
+    progress=None,
 ) -> tuple:
-    """Save a variant image and return (hash, relative_path)."""
-    img_hash = calculate_hash_from_image(image)
+    """Save a cropped variant image and return (hash, relative_path)."""
+    image = layer_image.image
+    with _phase(progress, "hash"):
+        img_hash = calculate_hash_from_layer(image, layer_image.left, layer_image.top)
     filename = f"{img_hash}.png"
 
     asset_dir = os.path.join(storage_dir, "assets")
@@ -182,22 +199,199 @@ def _save_variant_image(
     save_path = os.path.join(asset_dir, filename)
 
     if not os.path.exists(save_path):
-        image.save(save_path)
+        with _phase(progress, "save"):
+            _save_png(image, save_path)
+        if progress is not None:
+            progress.add_bytes(os.path.getsize(save_path))
         logger.info(f"Saved jointed variant: {part_path}/{variant_name} -> {filename}")
 
-    # Thumbnail
-    thumb_dir = os.path.join(storage_dir, "thumbnails")
-    os.makedirs(thumb_dir, exist_ok=True)
-    thumb_path = os.path.join(thumb_dir, f"{img_hash}_thumb.png")
-    if not os.path.exists(thumb_path):
+    # Thumbnails are rendered afterwards by the thumbnail service
+    return img_hash, f"assets/{filename}"
+
+
+# ── Extraction plan ───────────────────────────────────────────
+#
+# Parsing walks the layer tree once and only *plans* variants: each
+# variant becomes a _VariantTask placeholder in its target list. The plan
+# then runs composite → hash → save for all tasks on a thread pool (PNG
+# encoding, hashing and numpy compositing release the GIL) and finally
+# swaps every placeholder for its PartVariant in plan order, so the
+# resulting JointedCharacter is identical whatever order workers finish in.
+
+def default_extract_workers() -> int:
+    """Extraction threads per PSD: PSD_EXTRACT_WORKERS env var, default min(8, CPUs)."""
+    env = os.environ.get("PSD_EXTRACT_WORKERS", "")
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+    return min(8, os.cpu_count() or 1)
+
+
+def _has_pixels(layer) -> bool:
+    """Whether extracting layer can yield an image (non-empty leaf somewhere)."""
+    if layer.is_group():
+        return any(_has_pixels(child) for child in layer)
+    return layer.width > 0 and layer.height > 0
+
+
+def _leaf_layers(layer):
+    if layer.is_group():
+        for child in layer:
+            yield from _leaf_layers(child)
+    else:
+        yield layer
+
+
+@dataclass
+class _VariantTask:
+    """A planned variant extraction; `variant` is filled in by the plan run."""
+    layer: object
+    part_path: str
+    name: str
+    layer_path: str
+    visible: bool
+    variant: Optional[PartVariant] = None
+    fingerprint: Optional[str] = None
+    reused: bool = False
+
+
+class _ExtractionPlan:
+    """Variant extractions collected while walking the layer tree.
+
+    With a LayerManifest, variants whose layers are unchanged since the
+    last ingest are resolved at plan time from the stored hash and bbox.
+    """
+
+    def __init__(self, manifest=None, progress=None):
+        self.manifest = manifest
+        self.progress = progress
+        self.tasks: list[_VariantTask] = []
+        # (container dict, key, BodyPart) for single-layer parts — dropped if extraction fails
+        self.single_parts: list[tuple] = []
+
+    def variant(self, layer, part_path: str, layer_path: str) -> Optional[_VariantTask]:
+        """Plan extraction of layer (a leaf or a group to composite)."""
+        if not _has_pixels(layer):
+            return None
+        task = _VariantTask(
+            layer=layer,
+            part_path=part_path,
+            name=layer.name.strip(),
+            layer_path=layer_path,
+            visible=getattr(layer, 'visible', False),
+        )
+        if self.manifest is not None:
+            task.fingerprint = self.manifest.fingerprint(layer)
+            cached = self.manifest.lookup(task.fingerprint)
+            if cached:
+                img_hash, bbox = cached
+                task.reused = True
+                task.variant = PartVariant(
+                    name=task.name,
+                    layer_path=layer_path,
+                    bbox=bbox,
+                    hash=img_hash, asset_path=f"assets/{img_hash}.png",
+                    visible=task.visible,
+                )
+        self.tasks.append(task)
+        return task
+
+    def single_part(self, container: dict, layer, part_path: str, layer_path: str, z_order: int) -> bool:
+        """Plan a BodyPart made of one layer; stores it in container. Returns whether planned."""
+        task = self.variant(layer, part_path, layer_path)
+        if task is None:
+            return False
+        bp = BodyPart(name=task.name, z_order=z_order)
+        bp.variants.append(task)
+        container[task.name] = bp
+        self.single_parts.append((container, task.name, bp))
+        return True
+
+    def _run_task(self, task: _VariantTask, psd_width: int, psd_height: int,
+                  storage_dir: str, char_name: str) -> None:
         try:
-            thumb = image.copy()
-            thumb.thumbnail((128, 128), Image.LANCZOS)
-            thumb.save(thumb_path)
-        except Exception as e:
-            logger.warning(f"Failed to generate thumbnail: {e}")
+            self._extract_task(task, psd_width, psd_height, storage_dir, char_name)
+        finally:
+            if self.progress is not None:
+                self.progress.layer_done(task.part_path.split("/")[0])
+
+    def _extract_task(self, task: _VariantTask, psd_width: int, psd_height: int,
+                      storage_dir: str, char_name: str) -> None:
+        with _phase(self.progress, "composite"):
+            if task.layer.is_group():
+                img = _extract_group_composite(task.layer, psd_width, psd_height, force_visible=False)
+            else:
+                img = _extract_layer_image(task.layer, psd_width, psd_height, force_visible=False)
+        if img is None:
+            return
+        h, p = _save_variant_image(img, char_name, task.part_path, task.name, storage_dir, self.progress)
+        task.variant = PartVariant(
+            name=task.name,
+            layer_path=task.layer_path,
+            bbox=img.bbox,
+            hash=h, asset_path=p,
+            visible=task.visible,
+        )
 
-    return img_hash, f"assets/{filename}"
+    def run(self, psd_width: int, psd_height: int, storage_dir: str, char_name: str, workers: int) -> None:
+        """Extract, hash and save every planned variant not reused from the manifest."""
+        pending = [task for task in self.tasks if not task.reused]
+        if self.progress is not None:
+            self.progress.total_layers += len(self.tasks)
+            for task in self.tasks:
+                if task.reused:
+                    self.progress.layer_done(task.part_path.split("/")[0], reused=True)
+        # Make every extracted leaf visible up front (and restore after), so
+        # workers only read layer state while compositing in parallel
+        leaves = [leaf for task in pending for leaf in _leaf_layers(task.layer) if hasattr(leaf, 'visible')]
+        was_visible = [leaf.visible for leaf in leaves]
+        for leaf in leaves:
+            leaf.visible = True
+        try:
+            args = (psd_width, psd_height, storage_dir, char_name)
+            if workers <= 1 or len(pending) <= 1:
+                for task in pending:
+                    self._run_task(task, *args)
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="psd-extract") as pool:
+                    for future in [pool.submit(self._run_task, task, *args) for task in pending]:
+                        future.result()
+        finally:
+            for leaf, visible in zip(leaves, was_visible):
+                leaf.visible = visible
+
+        if self.manifest is not None:
+            for task in self.tasks:
+                if task.variant is not None:
+                    self.manifest.record(task.layer_path, task.fingerprint, task.variant.hash,
+                                         task.variant.bbox, reused=task.reused)
+
+    def resolve(self, result: "JointedCharacter") -> None:
+        """Replace placeholders with their PartVariants (plan order), dropping failures."""
+        def _resolve_list(items: list) -> None:
+            items[:] = [
+                item.variant if isinstance(item, _VariantTask) else item
+                for item in items
+                if not isinstance(item, _VariantTask) or item.variant is not None
+            ]
+
+        def _resolve_head(head: Optional[HeadData]) -> None:
+            if head is None:
+                return
+            for items in (head.face_shapes, head.hairstyles, head.mouths, head.eyes,
+                          head.eyebrows, head.expressions, head.merged_expressions):
+                _resolve_list(items)
+
+        for bp in result.body_parts.values():
+            _resolve_list(bp.variants)
+        _resolve_head(result.head)
+        for vp in result.viewpoints.values():
+            for bp in vp.body_parts.values():
+                _resolve_list(bp.variants)
+            _resolve_head(vp.head)
+
+        for container, key, bp in self.single_parts:
+            if not bp.variants and container.get(key) is bp:
+                del container[key]
 
 
 # ── Detection logic ───────────────────────────────────────────
@@ -260,55 +454,20 @@ def detect_psd_type(psd: PSDImage) -> str:
 
 # ── Parsing logic ─────────────────────────────────────────────
 
-def _parse_body_part(group, psd_width: int, psd_height: int, storage_dir: str,
-                     char_name: str, part_path: str, z_order: int) -> BodyPart:
-    """Parse a body part group into a BodyPart with extracted variants."""
+def _parse_body_part(group, plan: _ExtractionPlan, part_path: str, z_order: int) -> BodyPart:
+    """Parse a body part group into a BodyPart with planned variants."""
     part = BodyPart(name=group.name.strip(), z_order=z_order)
 
     for child in group:
-        variant_name = child.name.strip()
-
-        if child.is_group():
-            # Sub-group within body part — composite all children
-            img = _extract_group_composite(child, psd_width, psd_height)
-        else:
-            img = _extract_layer_image(child, psd_width, psd_height)
-
-        if img is None:
-            continue
-
-        img_hash, asset_path = _save_variant_image(
-            img, char_name, part_path, variant_name, storage_dir
-        )
-
-        bbox = _get_layer_bbox(child, psd_width, psd_height)
-
-        variant = PartVariant(
-            name=variant_name,
-            layer_path=f"{part_path}/{variant_name}",
-            bbox=bbox,
-            hash=img_hash,
-            asset_path=asset_path,
-            visible=getattr(child, 'visible', False),
-        )
-        part.variants.append(variant)
+        # Sub-groups within a body part are composited into one variant
+        task = plan.variant(child, part_path, f"{part_path}/{child.name.strip()}")
+        if task:
+            part.variants.append(task)
 
     return part
 
 
-def _get_layer_bbox(layer, psd_width, psd_height) -> tuple:
-    """Get actual bounding box of a layer/group as (left, top, width, height)."""
-    try:
-        if hasattr(layer, 'bbox') and layer.bbox:
-            left, top, right, bottom = layer.bbox
-            if right > left and bottom > top:
-                return (left, top, right - left, bottom - top)
-    except Exception:
-        pass
-    return (0, 0, psd_width, psd_height)
-
-
-def _parse_lower_body(group, psd_width, psd_height, storage_dir, char_name, part_path, z_order) -> dict:
+def _parse_lower_body(group, plan: _ExtractionPlan, part_path, z_order) -> dict:
     """
     Parse 下身 group. If it contains sub-groups for left/right legs,
     split into separate BodyPart entries. Otherwise treat as single part.
@@ -330,35 +489,30 @@ def _parse_lower_body(group, psd_width, psd_height, storage_dir, char_name, part
         for child in children:
             child_name = child.name.strip()
             if child.is_group():
-                bp = _parse_body_part(child, psd_width, psd_height, storage_dir,
-                                     char_name, f"{part_path}/{child_name}", sub_z)
+                bp = _parse_body_part(child, plan, f"{part_path}/{child_name}", sub_z)
                 result[child_name] = bp
                 sub_z += 1
             else:
                 # Single layer under 下身 (e.g. shared element)
-                img = _extract_layer_image(child, psd_width, psd_height)
-                if img:
-                    h, p = _save_variant_image(img, char_name, part_path, child_name, storage_dir)
-                    bp = BodyPart(name=child_name, z_order=sub_z)
-                    bp.variants.append(PartVariant(
-                        name=child_name,
-                        layer_path=f"{part_path}/{child_name}",
-                        bbox=_get_layer_bbox(child, psd_width, psd_height),
-                        hash=h, asset_path=p,
-                        visible=getattr(child, 'visible', False),
-                    ))
-                    result[child_name] = bp
+                if plan.single_part(result, child, part_path, f"{part_path}/{child_name}", sub_z):
                     sub_z += 1
     else:
         # No leg split — treat 下身 as single body part
-        bp = _parse_body_part(group, psd_width, psd_height, storage_dir, char_name, part_path, z_order)
+        bp = _parse_body_part(group, plan, part_path, z_order)
         result[group.name.strip()] = bp
     
     return result
 
 
-def _parse_head(head_group, psd_width: int, psd_height: int,
-                storage_dir: str, char_name: str, part_path: str) -> HeadData:
+def _plan_variants(group, plan: _ExtractionPlan, part_path: str, target_list: list) -> None:
+    """Plan every child of group (leaf or composited sub-group) into target_list."""
+    for child in group:
+        task = plan.variant(child, part_path, f"{part_path}/{child.name.strip()}")
+        if task:
+            target_list.append(task)
+
+
+def _parse_head(head_group, plan: _ExtractionPlan, part_path: str) -> HeadData:
     """Parse the 头 group into HeadData."""
     head = HeadData()
 
@@ -368,38 +522,12 @@ def _parse_head(head_group, psd_width: int, psd_height: int,
         if child_name == "脸型":
             # Face shapes
             if child.is_group():
-                for face in child:
-                    if face.is_group():
-                        img = _extract_group_composite(face, psd_width, psd_height)
-                    else:
-                        img = _extract_layer_image(face, psd_width, psd_height)
-                    if img:
-                        h, p = _save_variant_image(img, char_name, f"{part_path}/脸型", face.name.strip(), storage_dir)
-                        head.face_shapes.append(PartVariant(
-                            name=face.name.strip(),
-                            layer_path=f"{part_path}/脸型/{face.name.strip()}",
-                            bbox=_get_layer_bbox(face, psd_width, psd_height),
-                            hash=h, asset_path=p,
-                            visible=getattr(face, 'visible', False),
-                        ))
+                _plan_variants(child, plan, f"{part_path}/脸型", head.face_shapes)
 
         elif child_name == "发型":
             # Hairstyles
             if child.is_group():
-                for hair in child:
-                    if hair.is_group():
-                        img = _extract_group_composite(hair, psd_width, psd_height)
-                    else:
-                        img = _extract_layer_image(hair, psd_width, psd_height)
-                    if img:
-                        h, p = _save_variant_image(img, char_name, f"{part_path}/发型", hair.name.strip(), storage_dir)
-                        head.hairstyles.append(PartVariant(
-                            name=hair.name.strip(),
-                            layer_path=f"{part_path}/发型/{hair.name.strip()}",
-                            bbox=_get_layer_bbox(hair, psd_width, psd_height),
-                            hash=h, asset_path=p,
-                            visible=getattr(hair, 'visible', False),
-                        ))
+                _plan_variants(child, plan, f"{part_path}/发型", head.hairstyles)
 
         elif child_name == "表情":
             # Detect expression type
@@ -407,33 +535,19 @@ def _parse_head(head_group, psd_width: int, psd_height: int,
             head.expression_type = expr_type
 
             if expr_type == "combinable":
-                _parse_combinable_expressions(head, child, psd_width, psd_height, storage_dir, char_name, part_path)
+                _parse_combinable_expressions(head, child, plan, part_path)
             else:
-                _parse_precomposed_expressions(head, child, psd_width, psd_height, storage_dir, char_name, part_path)
+                _parse_precomposed_expressions(head, child, plan, part_path)
 
         elif "表情" in child_name and "合并" in child_name:
             # 表情（合并）— merged expressions (single-layer pre-rendered)
             if child.is_group():
-                for expr in child:
-                    if expr.is_group():
-                        img = _extract_group_composite(expr, psd_width, psd_height)
-                    else:
-                        img = _extract_layer_image(expr, psd_width, psd_height)
-                    if img:
-                        h, p = _save_variant_image(img, char_name, f"{part_path}/表情合并", expr.name.strip(), storage_dir)
-                        head.merged_expressions.append(PartVariant(
-                            name=expr.name.strip(),
-                            layer_path=f"{part_path}/表情合并/{expr.name.strip()}",
-                            bbox=_get_layer_bbox(expr, psd_width, psd_height),
-                            hash=h, asset_path=p,
-                            visible=getattr(expr, 'visible', False),
-                        ))
+                _plan_variants(child, plan, f"{part_path}/表情合并", head.merged_expressions)
 
     return head
 
 
-def _parse_combinable_expressions(head: HeadData, expr_group, psd_width, psd_height,
-                                   storage_dir, char_name, part_path):
+def _parse_combinable_expressions(head: HeadData, expr_group, plan: _ExtractionPlan, part_path):
     """Parse combinable expressions (嘴 × 眼睛 × 眉毛)."""
     for child in expr_group:
         child_name = child.name.strip()
@@ -457,46 +571,15 @@ def _parse_combinable_expressions(head: HeadData, expr_group, psd_width, psd_hei
         if target_list is None:
             continue
 
-        for item in child:
-            item_name = item.name.strip()
-            if item.is_group():
-                img = _extract_group_composite(item, psd_width, psd_height)
-            else:
-                img = _extract_layer_image(item, psd_width, psd_height)
-            if img:
-                h, p = _save_variant_image(img, char_name, f"{part_path}/表情/{sub_path}", item_name, storage_dir)
-                target_list.append(PartVariant(
-                    name=item_name,
-                    layer_path=f"{part_path}/表情/{sub_path}/{item_name}",
-                    bbox=_get_layer_bbox(item, psd_width, psd_height),
-                    hash=h, asset_path=p,
-                    visible=getattr(item, 'visible', False),
-                ))
-
-
-def _parse_precomposed_expressions(head: HeadData, expr_group, psd_width, psd_height,
-                                    storage_dir, char_name, part_path):
-    """Parse pre-composed expressions (each child group is a complete expression)."""
-    for child in expr_group:
-        child_name = child.name.strip()
+        _plan_variants(child, plan, f"{part_path}/表情/{sub_path}", target_list)
 
-        if child.is_group():
-            img = _extract_group_composite(child, psd_width, psd_height)
-        else:
-            img = _extract_layer_image(child, psd_width, psd_height)
 
-        if img:
-            h, p = _save_variant_image(img, char_name, f"{part_path}/表情", child_name, storage_dir)
-            head.expressions.append(PartVariant(
-                name=child_name,
-                layer_path=f"{part_path}/表情/{child_name}",
-                bbox=_get_layer_bbox(child, psd_width, psd_height),
-                hash=h, asset_path=p,
-                visible=getattr(child, 'visible', False),
-            ))
+def _parse_precomposed_expressions(head: HeadData, expr_group, plan: _ExtractionPlan, part_path):
+    """Parse pre-composed expressions (each child group is a complete expression)."""
+    _plan_variants(expr_group, plan, f"{part_path}/表情", head.expressions)
 
 
-def _parse_viewpoint(vp_group, psd_width, psd_height, storage_dir, char_name) -> ViewpointData:
+def _parse_viewpoint(vp_group, plan: _ExtractionPlan) -> ViewpointData:
     """Parse a viewpoint group (e.g. 正面, 侧面)."""
     vp_name = vp_group.name.strip()
     vp = ViewpointData(name=vp_name)
@@ -507,24 +590,13 @@ def _parse_viewpoint(vp_group, psd_width, psd_height, storage_dir, char_name) ->
         child_name = child.name.strip()
 
         if child_name == "头" and child.is_group():
-            vp.head = _parse_head(child, psd_width, psd_height, storage_dir, char_name, f"{vp_path}/头")
+            vp.head = _parse_head(child, plan, f"{vp_path}/头")
         elif child.is_group():
-            bp = _parse_body_part(child, psd_width, psd_height, storage_dir, char_name, f"{vp_path}/{child_name}", z_order)
+            bp = _parse_body_part(child, plan, f"{vp_path}/{child_name}", z_order)
             vp.body_parts[child_name] = bp
         else:
             # Single layer under viewpoint
-            img = _extract_layer_image(child, psd_width, psd_height)
-            if img:
-                h, p = _save_variant_image(img, char_name, vp_path, child_name, storage_dir)
-                bp = BodyPart(name=child_name, z_order=z_order)
-                bp.variants.append(PartVariant(
-                    name=child_name,
-                    layer_path=f"{vp_path}/{child_name}",
-                    bbox=_get_layer_bbox(child, psd_width, psd_height),
-                    hash=h, asset_path=p,
-                    visible=getattr(child, 'visible', False),
-                ))
-                vp.body_parts[child_name] = bp
+            plan.single_part(vp.body_parts, child, vp_path, f"{vp_path}/{child_name}", z_order)
         z_order += 1
 
     return vp
@@ -532,12 +604,20 @@ def _parse_viewpoint(vp_group, psd_width, psd_height, storage_dir, char_name) ->
 
 # ── Main parse function ──────────────────────────────────────
 
-def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str) -> JointedCharacter:
+def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str,
+                      workers: Optional[int] = None, manifest=None,
+                      progress=None) -> JointedCharacter:
     """
     Parse a jointed-limb PSD into a JointedCharacter data model.
     
     This function auto-detects body roots, viewpoints, expression types,
     and extracts all variants as individual PNG files.
+
+    The layer tree is walked first to build an extraction plan; variants
+    are then composited, hashed and saved on `workers` threads (default
+    PSD_EXTRACT_WORKERS) and put back in tree order. With a LayerManifest,
+    unchanged layers reuse their previous assets and are not extracted.
+    An IngestProgress counts variants and times each extraction phase.
     """
     result = JointedCharacter(
         id=str(uuid.uuid4()),
@@ -546,6 +626,7 @@ def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str) -> Jointe
         canvas_width=psd.width,
         canvas_height=psd.height,
     )
+    plan = _ExtractionPlan(manifest, progress)
 
     # Z-order mapping for standard body parts
     BODY_Z_ORDER = {"后手": 0, "下身": 1, "左腿": 1, "右腿": 2, "上身": 3, "头": 4, "衣服": 5, "配饰": 6, "鞋子": 7, "前手": 8}
@@ -556,7 +637,7 @@ def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str) -> Jointe
         if _is_viewpoint_group(top_layer):
             # Viewpoint group (正面, 侧面, etc.)
             logger.info(f"Detected viewpoint: {top_name}")
-            vp = _parse_viewpoint(top_layer, psd.width, psd.height, storage_dir, char_name)
+            vp = _parse_viewpoint(top_layer, plan)
             result.viewpoints[top_name] = vp
 
         elif _is_body_root(top_layer):
@@ -574,7 +655,7 @@ def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str) -> Jointe
                 for child in top_layer:
                     child_name = child.name.strip()
                     if _is_viewpoint_group(child):
-                        vp = _parse_viewpoint(child, psd.width, psd.height, storage_dir, char_name)
+                        vp = _parse_viewpoint(child, plan)
                         result.viewpoints[child_name] = vp
                         # Use first viewpoint as default body_parts + head
                         if not result.body_parts and vp.body_parts:
@@ -585,15 +666,9 @@ def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str) -> Jointe
                         # Non-viewpoint groups at body-root level (e.g. shared layers)
                         z_order = BODY_Z_ORDER.get(child_name, 10)
                         if child_name == "头" and child.is_group():
-                            result.head = _parse_head(
-                                child, psd.width, psd.height, storage_dir,
-                                char_name, f"{top_name}/头"
-                            )
+                            result.head = _parse_head(child, plan, f"{top_name}/头")
                         else:
-                            bp = _parse_body_part(
-                                child, psd.width, psd.height, storage_dir,
-                                char_name, f"{top_name}/{child_name}", z_order
-                            )
+                            bp = _parse_body_part(child, plan, f"{top_name}/{child_name}", z_order)
                             result.body_parts[child_name] = bp
             else:
                 # Normal body root — parse flat
@@ -602,37 +677,17 @@ def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str) -> Jointe
                     z_order = BODY_Z_ORDER.get(child_name, 10)
 
                     if child_name == "头" and child.is_group():
-                        result.head = _parse_head(
-                            child, psd.width, psd.height, storage_dir,
-                            char_name, f"{top_name}/头"
-                        )
+                        result.head = _parse_head(child, plan, f"{top_name}/头")
                     elif child_name == "下身" and child.is_group():
                         # Special handling: check for left/right leg split
-                        lower_parts = _parse_lower_body(
-                            child, psd.width, psd.height, storage_dir,
-                            char_name, f"{top_name}/下身", z_order
-                        )
+                        lower_parts = _parse_lower_body(child, plan, f"{top_name}/下身", z_order)
                         result.body_parts.update(lower_parts)
                     elif child.is_group():
-                        bp = _parse_body_part(
-                            child, psd.width, psd.height, storage_dir,
-                            char_name, f"{top_name}/{child_name}", z_order
-                        )
+                        bp = _parse_body_part(child, plan, f"{top_name}/{child_name}", z_order)
                         result.body_parts[child_name] = bp
                     else:
                         # Single layer under body root (e.g. clothing elements)
-                        img = _extract_layer_image(child, psd.width, psd.height)
-                        if img:
-                            h, p = _save_variant_image(img, char_name, top_name, child_name, storage_dir)
-                            bp = BodyPart(name=child_name, z_order=z_order)
-                            bp.variants.append(PartVariant(
-                                name=child_name,
-                                layer_path=f"{top_name}/{child_name}",
-                                bbox=_get_layer_bbox(child, psd.width, psd.height),
-                                hash=h, asset_path=p,
-                                visible=getattr(child, 'visible', False),
-                            ))
-                            result.body_parts[child_name] = bp
+                        plan.single_part(result.body_parts, child, top_name, f"{top_name}/{child_name}", z_order)
         
         elif top_layer.is_group():
             # Unknown top-level group — check if it's a body-root candidate
@@ -646,31 +701,18 @@ def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str) -> Jointe
                     
                     if child_name == "头" and child.is_group():
                         if result.head is None or not result.head.face_shapes:
-                            result.head = _parse_head(
-                                child, psd.width, psd.height, storage_dir,
-                                char_name, f"{top_name}/头"
-                            )
+                            result.head = _parse_head(child, plan, f"{top_name}/头")
                     elif child.is_group():
-                        bp = _parse_body_part(
-                            child, psd.width, psd.height, storage_dir,
-                            char_name, f"{top_name}/{child_name}", z_order
-                        )
+                        bp = _parse_body_part(child, plan, f"{top_name}/{child_name}", z_order)
                         if child_name not in result.body_parts:
                             result.body_parts[child_name] = bp
-                    else:
-                        img = _extract_layer_image(child, psd.width, psd.height)
-                        if img:
-                            h, p = _save_variant_image(img, char_name, top_name, child_name, storage_dir)
-                            bp = BodyPart(name=child_name, z_order=z_order)
-                            bp.variants.append(PartVariant(
-                                name=child_name,
-                                layer_path=f"{top_name}/{child_name}",
-                                bbox=_get_layer_bbox(child, psd.width, psd.height),
-                                hash=h, asset_path=p,
-                                visible=getattr(child, 'visible', False),
-                            ))
-                            if child_name not in result.body_parts:
-                                result.body_parts[child_name] = bp
+                    elif child_name not in result.body_parts:
+                        plan.single_part(result.body_parts, child, top_name, f"{top_name}/{child_name}", z_order)
+
+    # ── Extract planned variants in parallel, then reassemble in tree order ──
+    workers = workers if workers is not None else default_extract_workers()
+    plan.run(psd.width, psd.height, storage_dir, char_name, workers)
+    plan.resolve(result)
 
     # ── Generate backward-compat fields ──
     _generate_compat_fields(result)
@@ -679,7 +721,8 @@ def parse_jointed_psd(psd: PSDImage, char_name: str, storage_dir: str) -> Jointe
         f"Parsed jointed PSD: {char_name}, "
         f"body_parts={list(result.body_parts.keys())}, "
         f"viewpoints={list(result.viewpoints.keys())}, "
-        f"expression_type={result.head.expression_type if result.head else 'none'}"
+        f"expression_type={result.head.expression_type if result.head else 'none'}, "
+        f"variants={len(plan.tasks)} ({sum(t.reused for t in plan.tasks)} reused) on {max(1, workers)} worker(s)"
     )
 
     return result
@@ -699,7 +742,7 @@ def _generate_compat_fields(result: JointedCharacter):
     for part_name, part in sorted_parts:
         group_order.append(part_name)
         layer_groups[part_name] = [
-            {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox)}
+            {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox), "cropped": v.cropped}
             for v in part.variants
         ]
 
@@ -709,19 +752,19 @@ def _generate_compat_fields(result: JointedCharacter):
             if result.head.mouths:
                 group_order.append("嘴")
                 layer_groups["嘴"] = [
-                    {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox)}
+                    {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox), "cropped": v.cropped}
                     for v in result.head.mouths
                 ]
             if result.head.eyes:
                 group_order.append("眼睛")
                 layer_groups["眼睛"] = [
-                    {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox)}
+                    {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox), "cropped": v.cropped}
                     for v in result.head.eyes
                 ]
             if result.head.eyebrows:
                 group_order.append("眉毛")
                 layer_groups["眉毛"] = [
-                    {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox)}
+                    {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox), "cropped": v.cropped}
                     for v in result.head.eyebrows
                 ]
         else:
@@ -730,7 +773,7 @@ def _generate_compat_fields(result: JointedCharacter):
             if exprs:
                 group_order.append("表情")
                 layer_groups["表情"] = [
-                    {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox)}
+                    {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox), "cropped": v.cropped}
                     for v in exprs
                 ]
 
@@ -738,13 +781,13 @@ def _generate_compat_fields(result: JointedCharacter):
         if result.head.face_shapes:
             group_order.append("脸型")
             layer_groups["脸型"] = [
-                {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox)}
+                {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox), "cropped": v.cropped}
                 for v in result.head.face_shapes
             ]
         if result.head.hairstyles:
             group_order.append("发型")
             layer_groups["发型"] = [
-                {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox)}
+                {"name": v.name, "path": v.asset_path, "hash": v.hash, "bbox": list(v.bbox), "cropped": v.cropped}
                 for v in result.head.hairstyles
             ]
 
@@ -764,6 +807,7 @@ def jointed_char_to_dict(jc: JointedCharacter) -> dict:
             "hash": v.hash,
             "asset_path": v.asset_path,
             "visible": v.visible,
+            "cropped": v.cropped,
         }
 
     def _body_part_to_dict(bp: BodyPart) -> dict:
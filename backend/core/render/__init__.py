@@ -0,0 +1,37 @@
+"""
+Render — Server-side (headless) rendering of scenes to video frames.
+
+Turns a SceneGraph / VideoProject into RGBA frames without a browser so
+exports aren't bounded by a single client tab.
+"""
+
+from backend.core.render.compositor import (
+    FrameRenderer,
+    collect_asset_urls,
+    frame_count,
+    resolve_asset_path,
+)
+from backend.core.render.parallel import (
+    FrameShard,
+    plan_shards,
+    stream_shard_frames,
+    render_to_directory,
+    iter_frames_parallel,
+    render_to_video,
+)
+from backend.core.render.ffmpeg_pipe import FFmpegPipeWriter, FFmpegPipeError
+
+__all__ = [
+    "FrameRenderer",
+    "collect_asset_urls",
+    "frame_count",
+    "resolve_asset_path",
+    "FrameShard",
+    "plan_shards",
+    "stream_shard_frames",
+    "render_to_directory",
+    "iter_frames_parallel",
+    "render_to_video",
+    "FFmpegPipeWriter",
+    "FFmpegPipeError",
+]
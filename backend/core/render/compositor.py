@@ -0,0 +1,648 @@
+"""
+Compositor — Headless frame renderer for SceneGraph / VideoProject.
+
+Renders frames on the server with Pillow + NumPy, mirroring what the
+browser's SceneRenderer.tsx draws with PixiJS so an exported MP4 matches
+the editor preview:
+
+    stage (back → front)
+    ├── background colour / placeholder (when no background layers)
+    ├── background layers  — "cover" scaled, parallax vs. camera
+    ├── scene container    — characters (pose + face), camera pan/zoom
+    ├── subtitles          — text nodes, NOT affected by camera
+    └── transition overlay — fade / dissolve / wipe between scenes
+
+Coordinates follow the frontend: world units × ppu = pixels, characters are
+anchored at (0.5, 0.85) of their pose/face images, and the camera pivots
+the scene container around its position onto the canvas centre.
+
+Editor-only affordances (character name labels, selection) are not drawn.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+from collections import OrderedDict
+from typing import Iterator, Optional, Union
+from urllib.parse import urlparse, unquote
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.core.image_cache import ImageCache, get_image_cache
+from backend.core.scene_graph.scene import SceneGraph
+from backend.core.scene_graph.specialized_nodes import (
+    BackgroundLayerNode,
+    CameraNode,
+    CharacterNode,
+    TextNode,
+)
+from backend.core.scene_graph.video_project import VideoProject
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STORAGE_DIR = os.path.join(BASE_DIR, "storage")
+
+# Same values as SceneRenderer.tsx / TransitionRenderer.ts
+STAGE_COLOR = (0x0D, 0x0D, 0x14, 255)
+CHARACTER_ANCHOR = (0.5, 0.85)
+SUBTITLE_FONT_SIZE = 36
+SUBTITLE_BOTTOM_MARGIN = 40
+SUBTITLE_WRAP_RATIO = 0.85
+
+# Fonts tried in order for subtitles (CJK first — dialogue is Chinese)
+SUBTITLE_FONTS = [
+    "NotoSansSC-Regular.otf",
+    "NotoSansCJK-Regular.ttc",
+    "msyh.ttc",
+    "simhei.ttf",
+    "wqy-microhei.ttc",
+    "arial.ttf",
+    "DejaVuSans.ttf",
+]
+
+# Maps URL prefixes served by main.py to directories under STORAGE_DIR
+_URL_MOUNTS = {
+    "/static/": "",
+    "/assets/": "assets",
+    "/s_assets/": "assets",
+    "/thumbnails/": "thumbnails",
+}
+
+
+def resolve_asset_path(url: str, storage_dir: str = STORAGE_DIR) -> Optional[str]:
+    """Map an asset URL used by the frontend to a file on disk.
+
+    Accepts "/static/...", "/assets/...", full "http://host/static/..."
+    URLs and storage-relative paths like "assets/<hash>.png".
+    Returns None if the URL can't be mapped or points outside storage_dir
+    (URLs come from client-supplied project JSON).
+    """
+    if not url:
+        return None
+    path = unquote(urlparse(url).path) if "://" in url else unquote(url)
+
+    for prefix, subdir in _URL_MOUNTS.items():
+        if path.startswith(prefix):
+            rel = path[len(prefix):]
+            return _inside_storage(os.path.join(storage_dir, subdir, rel), storage_dir)
+
+    if not path.startswith("/"):
+        return _inside_storage(os.path.join(storage_dir, path), storage_dir)
+    return None
+
+
+def _inside_storage(path: str, storage_dir: str) -> Optional[str]:
+    """normpath(path) if it resolves (symlinks included) inside storage_dir, else None."""
+    path = os.path.normpath(path)
+    root = os.path.realpath(storage_dir)
+    if os.path.commonpath([os.path.realpath(path), root]) != root:
+        logger.warning(f"[Render] Refusing asset path outside storage: {path}")
+        return None
+    return path
+
+
+# ══════════════════════════════════════════════
+#  AFFINE HELPERS (2×3 matrices, screen = M · [x, y, 1])
+# ══════════════════════════════════════════════
+
+def _mat(a: float, b: float, c: float, d: float, e: float, f: float) -> np.ndarray:
+    return np.array([[a, b, c], [d, e, f], [0.0, 0.0, 1.0]])
+
+
+def _translate(tx: float, ty: float) -> np.ndarray:
+    return _mat(1, 0, tx, 0, 1, ty)
+
+
+def _scale(sx: float, sy: float) -> np.ndarray:
+    return _mat(sx, 0, 0, 0, sy, 0)
+
+
+def _rotate(radians: float) -> np.ndarray:
+    c, s = math.cos(radians), math.sin(radians)
+    return _mat(c, -s, 0, s, c, 0)
+
+
+class FrameRenderer:
+    """Renders SceneGraph / VideoProject frames to RGBA Pillow images.
+
+    Decoded images and per-scale resampled sprites are cached on the
+    renderer, so reuse one instance for a whole export.
+
+    Args:
+        storage_dir: Root that "/static/..." asset URLs resolve against.
+        sprite_cache_size: Max resampled sprites kept (LRU).
+        image_cache: Decoded-image cache (default: the process-wide one).
+    """
+
+    def __init__(
+        self,
+        storage_dir: str = STORAGE_DIR,
+        sprite_cache_size: int = 64,
+        image_cache: Optional[ImageCache] = None,
+    ):
+        self.storage_dir = storage_dir
+        self.image_cache = image_cache or get_image_cache()
+        self.sprite_cache_size = sprite_cache_size
+        self._images: dict[str, Optional[Image.Image]] = {}
+        self._sprites: OrderedDict[tuple, Image.Image] = OrderedDict()
+        self._fonts: dict[int, ImageFont.ImageFont] = {}
+
+    # ══════════════════════════════════════════════
+    #  ASSET LOADING
+    # ══════════════════════════════════════════════
+
+    def load_image(self, url: str) -> Optional[Image.Image]:
+        """Load and decode an asset as RGBA (cached). None if missing.
+
+        Decoding goes through the process-wide image cache, so every
+        renderer in the process (and workers attached to shared memory)
+        decodes a given file only once.
+        """
+        if url in self._images:
+            return self._images[url]
+
+        image = None
+        path = resolve_asset_path(url, self.storage_dir)
+        if path and os.path.isfile(path):
+            try:
+                image = self.image_cache.get_image(path)
+            except Exception as e:
+                logger.warning(f"[Render] Failed to decode {path}: {e}")
+        else:
+            logger.warning(f"[Render] Asset not found: {url}")
+
+        self._images[url] = image
+        return image
+
+    def preload(self, target: Union[SceneGraph, VideoProject]) -> int:
+        """Decode every image a scene/project references up front.
+
+        Returns the number of images available afterwards.
+        """
+        for url in collect_asset_urls(target):
+            self.load_image(url)
+        return sum(1 for image in self._images.values() if image is not None)
+
+    def _get_font(self, size: int) -> ImageFont.ImageFont:
+        font = self._fonts.get(size)
+        if font is None:
+            for name in SUBTITLE_FONTS:
+                try:
+                    font = ImageFont.truetype(name, size)
+                    break
+                except OSError:
+                    continue
+            else:
+                font = ImageFont.load_default(size)
+            self._fonts[size] = font
+        return font
+
+    def _resized(self, url: str, image: Image.Image, width: int, height: int) -> Image.Image:
+        """Resample an image to (width, height), cached per target size."""
+        if (width, height) == image.size:
+            return image
+        key = (url, width, height)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = image.resize((width, height), Image.BILINEAR)
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.sprite_cache_size:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(key)
+        return sprite
+
+    # ══════════════════════════════════════════════
+    #  DRAWING PRIMITIVES
+    # ══════════════════════════════════════════════
+
+    def _draw_sprite(
+        self,
+        canvas: Image.Image,
+        url: str,
+        matrix: np.ndarray,
+        alpha: float,
+    ) -> None:
+        """Composite an image onto the canvas through an affine matrix.
+
+        matrix maps image pixel coordinates to canvas pixel coordinates.
+        """
+        if alpha <= 0.0:
+            return
+        image = self.load_image(url)
+        if image is None:
+            return
+
+        (a, b, tx), (d, e, ty) = matrix[0], matrix[1]
+        w, h = image.size
+        cw, ch = canvas.size
+
+        if abs(b) < 1e-9 and abs(d) < 1e-9:
+            out_w, out_h = max(1, round(abs(a) * w)), max(1, round(abs(e) * h))
+            left = round(min(tx, tx + a * w))
+            top = round(min(ty, ty + e * h))
+            if out_w * out_h <= cw * ch:
+                # Axis-aligned sprite: resample once (cached) and paste — the
+                # common case for characters at a fixed scale
+                sprite = self._resized(url, image, out_w, out_h)
+            else:
+                # Larger than the canvas (zoomed backgrounds): resample only
+                # the visible part, straight from the source region
+                x0, y0 = max(left, 0), max(top, 0)
+                x1, y1 = min(left + out_w, cw), min(top + out_h, ch)
+                if x1 <= x0 or y1 <= y0:
+                    return
+                u0, u1 = sorted(((x0 - tx) / a, (x1 - tx) / a))
+                v0, v1 = sorted(((y0 - ty) / e, (y1 - ty) / e))
+                box = (max(u0, 0.0), max(v0, 0.0), min(u1, w), min(v1, h))
+                sprite = image.resize((x1 - x0, y1 - y0), Image.BILINEAR, box=box)
+                left, top = x0, y0
+                if a < 0:
+                    sprite = sprite.transpose(Image.FLIP_LEFT_RIGHT)
+                if e < 0:
+                    sprite = sprite.transpose(Image.FLIP_TOP_BOTTOM)
+                self._paste(canvas, sprite, left, top, alpha)
+                return
+            if a < 0:
+                sprite = sprite.transpose(Image.FLIP_LEFT_RIGHT)
+            if e < 0:
+                sprite = sprite.transpose(Image.FLIP_TOP_BOTTOM)
+        else:
+            # Rotated: pre-shrink to the matrix's scale so bilinear doesn't
+            # alias, then apply the remaining rotation/shear.
+            s = math.sqrt(abs(a * e - b * d))
+            src = image
+            if s < 0.75:
+                src = self._resized(url, image, max(1, round(w * s)), max(1, round(h * s)))
+                matrix = matrix @ _scale(w / src.width, h / src.height)
+                (a, b, tx), (d, e, ty) = matrix[0], matrix[1]
+            sw, sh = src.size
+            corners = matrix @ np.array([[0, sw, 0, sw], [0, 0, sh, sh], [1, 1, 1, 1]])
+            left = math.floor(corners[0].min())
+            top = math.floor(corners[1].min())
+            right = math.ceil(corners[0].max())
+            bottom = math.ceil(corners[1].max())
+            # Clip the output box to the canvas before resampling
+            left_c, top_c = max(left, 0), max(top, 0)
+            right_c, bottom_c = min(right, cw), min(bottom, ch)
+            if right_c <= left_c or bottom_c <= top_c:
+                return
+            inv = np.linalg.inv(matrix) @ _translate(left_c, top_c)
+            sprite = src.transform(
+                (right_c - left_c, bottom_c - top_c),
+                Image.AFFINE,
+                tuple(inv[:2].flatten()),
+                resample=Image.BILINEAR,
+            )
+            left, top = left_c, top_c
+
+        self._paste(canvas, sprite, left, top, alpha)
+
+    @staticmethod
+    def _paste(canvas: Image.Image, sprite: Image.Image, left: int, top: int, alpha: float) -> None:
+        """Alpha-composite sprite at (left, top), clipped to the canvas."""
+        cw, ch = canvas.size
+        sw, sh = sprite.size
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + sw, cw), min(top + sh, ch)
+        if x1 <= x0 or y1 <= y0:
+            return
+        if (x0, y0, x1, y1) != (left, top, left + sw, top + sh):
+            sprite = sprite.crop((x0 - left, y0 - top, x1 - left, y1 - top))
+        if alpha < 1.0:
+            sprite = sprite.copy()
+            sprite.putalpha(sprite.getchannel("A").point(lambda v: round(v * alpha)))
+        canvas.alpha_composite(sprite, dest=(x0, y0))
+
+    @staticmethod
+    def _draw_placeholder(canvas: Image.Image) -> None:
+        """Placeholder landscape drawn when a scene has no background layers."""
+        w, h = canvas.size
+        draw = ImageDraw.Draw(canvas)
+        draw.rectangle((0, 0, w, h * 0.65), fill=(0x1A, 0x1C, 0x2E, 255))
+        draw.rectangle((0, h * 0.65, w, h), fill=(0x3D, 0x5A, 0x32, 255))
+        hills = [(0, h * 0.5)]
+        for x in range(0, w + 1, 40):
+            hills.append((x, h * 0.4 + math.sin(x * 0.008) * 60 + math.sin(x * 0.015) * 30))
+        hills += [(w, h * 0.65), (0, h * 0.65)]
+        draw.polygon(hills, fill=(0x2D, 0x26, 0x50, 255))
+
+    def _draw_subtitle(self, canvas: Image.Image, content: str, alpha: float) -> None:
+        """Bottom-centre subtitle with a translucent bar (SubtitleDisplayObject)."""
+        if alpha <= 0.0 or not content:
+            return
+        w, h = canvas.size
+        font = self._get_font(SUBTITLE_FONT_SIZE)
+        layer = Image.new("RGBA", canvas.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+
+        # Wrap per character — dialogue is mostly CJK without spaces
+        max_width = w * SUBTITLE_WRAP_RATIO
+        lines, current = [], ""
+        for char in content:
+            if char == "\n" or (current and draw.textlength(current + char, font=font) > max_width):
+                lines.append(current)
+                current = "" if char == "\n" else char
+            else:
+                current += char
+        lines.append(current)
+        text = "\n".join(lines)
+
+        stroke = 5
+        bbox = draw.multiline_textbbox(
+            (w / 2, h - SUBTITLE_BOTTOM_MARGIN), text, font=font,
+            anchor="md", align="center", stroke_width=stroke,
+        )
+        text_w, text_h = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        pad_x, pad_y = 30, 12
+        bar_w = min(text_w + pad_x * 2, w)
+        bar_x = (w - bar_w) / 2
+        bar_y = h - SUBTITLE_BOTTOM_MARGIN - text_h - pad_y
+        draw.rounded_rectangle(
+            (bar_x, bar_y, bar_x + bar_w, bar_y + text_h + pad_y * 2),
+            radius=8, fill=(0, 0, 0, round(255 * 0.6)),
+        )
+        draw.multiline_text(
+            (w / 2, h - SUBTITLE_BOTTOM_MARGIN), text, font=font, anchor="md",
+            align="center", fill=(255, 255, 255, 255),
+            stroke_width=stroke, stroke_fill=(0, 0, 0, 255),
+        )
+        self._paste(canvas, layer, 0, 0, alpha)
+
+    # ══════════════════════════════════════════════
+    #  SCENE RENDERING
+    # ══════════════════════════════════════════════
+
+    def render_scene(
+        self,
+        graph: SceneGraph,
+        time: float,
+        snapshot: Optional[dict[str, dict]] = None,
+    ) -> Image.Image:
+        """Render one SceneGraph frame at a local time.
+
+        Args:
+            graph: The scene.
+            time: Scene-local time in seconds.
+            snapshot: Pre-evaluated node properties (as from
+                graph.get_snapshot_at_time or TimelineEvaluation.snapshot);
+                evaluated here if omitted.
+
+        Returns:
+            RGBA image of graph.canvas_width × graph.canvas_height.
+        """
+        if snapshot is None:
+            snapshot = graph.get_snapshot_at_time(time)
+        width, height = graph.canvas_width, graph.canvas_height
+        ppu = graph.ppu or 100
+        canvas = Image.new("RGBA", (width, height), STAGE_COLOR)
+
+        order = {node_id: i for i, node_id in enumerate(graph.nodes)}
+
+        def sort_key(node_id: str) -> tuple:
+            return (snapshot[node_id]["z_index"], order[node_id])
+
+        camera = None
+        backgrounds, characters, texts = [], [], []
+        for node_id, node in graph.nodes.items():
+            if node_id not in snapshot:
+                continue
+            if isinstance(node, CameraNode):
+                if camera is None:
+                    camera = snapshot[node_id]
+            elif isinstance(node, BackgroundLayerNode):
+                backgrounds.append(node_id)
+            elif isinstance(node, CharacterNode):
+                characters.append(node_id)
+            elif isinstance(node, TextNode):
+                texts.append(node_id)
+
+        if not backgrounds:
+            self._draw_placeholder(canvas)
+
+        # ── Background layers (parallax against the camera) ──
+        for node_id in sorted(backgrounds, key=sort_key):
+            node = graph.nodes[node_id]
+            snap = snapshot[node_id]
+            if not node.visible or not node.asset_path:
+                continue
+            image = self.load_image(node.asset_path)
+            if image is None:
+                continue
+            cover = max(width / image.width, height / image.height)
+            matrix = _scale(cover, cover)
+            p = node.parallax_speed
+            if camera is not None and p > 0:
+                cx, cy = camera["x"] * ppu, camera["y"] * ppu
+                eff_s = 1 + ((camera["scale_x"] or 1) - 1) * p
+                eff_r = -math.radians(camera["rotation"] or 0) * p
+                px = cx + (width / 2 - cx) * p
+                py = cy + (height / 2 - cy) * p
+                matrix = (
+                    _translate(px, py) @ _rotate(eff_r) @ _scale(eff_s, eff_s)
+                    @ _translate(-cx, -cy) @ matrix
+                )
+            self._draw_sprite(canvas, node.asset_path, matrix, snap["opacity"])
+
+        # ── Scene container (camera pivot → canvas centre) ──
+        if camera is not None:
+            view = (
+                _translate(width / 2, height / 2)
+                @ _rotate(-math.radians(camera["rotation"] or 0))
+                @ _scale(camera["scale_x"] or 1, camera["scale_y"] or 1)
+                @ _translate(-camera["x"] * ppu, -camera["y"] * ppu)
+            )
+        else:
+            view = np.eye(3)
+
+        for node_id in sorted(characters, key=sort_key):
+            node = graph.nodes[node_id]
+            snap = snapshot[node_id]
+            if not node.visible or snap["opacity"] <= 0:
+                continue
+            world = (
+                view
+                @ _translate(snap["x"] * ppu, snap["y"] * ppu)
+                @ _rotate(math.radians(snap["rotation"] or 0))
+                @ _scale(snap["scale_x"], snap["scale_y"])
+            )
+            for url, placement in self._character_layers(node, time):
+                image = self.load_image(url)
+                if image is None:
+                    continue
+                if placement is None:
+                    anchor = _translate(
+                        -CHARACTER_ANCHOR[0] * image.width, -CHARACTER_ANCHOR[1] * image.height
+                    )
+                else:
+                    # Cropped layer: anchor on the full PSD canvas, draw at its offset
+                    left, top, canvas_w, canvas_h = placement
+                    anchor = _translate(
+                        left - CHARACTER_ANCHOR[0] * canvas_w, top - CHARACTER_ANCHOR[1] * canvas_h
+                    )
+                self._draw_sprite(canvas, url, world @ anchor, snap["opacity"])
+
+        # ── Subtitles (screen space) ──
+        for node_id in sorted(texts, key=sort_key):
+            node = graph.nodes[node_id]
+            if node.visible:
+                self._draw_subtitle(canvas, node.content, snapshot[node_id]["opacity"])
+
+        return canvas
+
+    @staticmethod
+    def _character_layers(node: CharacterNode, time: float) -> list[tuple[str, Optional[tuple]]]:
+        """Pose then face (url, placement) for the layers active at time.
+
+        Same fallbacks as the editor. placement is (left, top, canvas_w,
+        canvas_h) for cropped layer files (entry has "cropped" + "bbox" and a
+        "canvasSize" on the entry or node metadata), else None for images
+        that cover the whole character canvas.
+        """
+        layers = node.get_layers_at_time(time)
+        meta = node.metadata
+        result = []
+        for kind, urls_key, url_key in (("pose", "poseUrls", "poseUrl"), ("face", "faceUrls", "faceUrl")):
+            entry = (meta.get(urls_key) or {}).get(layers.get(kind, "")) or {}
+            url = entry.get("url") or meta.get(url_key, "")
+            if not url:
+                continue
+            placement = None
+            canvas_size = entry.get("canvasSize") or meta.get("canvasSize")
+            bbox = entry.get("bbox")
+            if entry.get("url") and entry.get("cropped") and bbox and canvas_size:
+                placement = (bbox[0], bbox[1], canvas_size[0], canvas_size[1])
+            result.append((url, placement))
+        return result
+
+    # ══════════════════════════════════════════════
+    #  PROJECT RENDERING (multi-scene + transitions)
+    # ══════════════════════════════════════════════
+
+    @staticmethod
+    def transition_overlay_alpha(project: VideoProject, global_time: float) -> tuple[str, float]:
+        """Transition type and black-overlay alpha at a global time.
+
+        Mirrors findTransitionAtTime() + TransitionRenderer.ts: the
+        transition plays over the last `duration` seconds of scene i,
+        and only between two existing scenes. Returns ("", 0.0) if none.
+        """
+        t = 0.0
+        for i, scene in enumerate(project.scenes):
+            scene_end = t + scene.duration
+            t = scene_end
+            if i >= len(project.transitions) or i + 1 >= len(project.scenes):
+                continue
+            trans = project.transitions[i]
+            if trans.type == "cut" or trans.duration <= 0:
+                continue
+            start = scene_end - trans.duration
+            if start <= global_time < scene_end:
+                progress = max(0.0, min(1.0, (global_time - start) / trans.duration))
+                if trans.type == "wipe":
+                    return "wipe", progress
+                if trans.type == "dissolve":
+                    if progress < 0.4:
+                        alpha = progress / 0.4 * 0.7
+                    elif progress > 0.6:
+                        alpha = (1 - progress) / 0.4 * 0.7
+                    else:
+                        alpha = 0.7
+                else:
+                    alpha = progress * 2 if progress < 0.5 else (1 - progress) * 2
+                # TransitionRenderer.easeInOut
+                alpha = 2 * alpha * alpha if alpha < 0.5 else 1 - (-2 * alpha + 2) ** 2 / 2
+                return trans.type, max(0.0, min(1.0, alpha))
+        return "", 0.0
+
+    def _apply_transition(self, canvas: Image.Image, kind: str, value: float) -> None:
+        if not kind:
+            return
+        w, h = canvas.size
+        if kind == "wipe":
+            overlay = Image.new("RGBA", (max(1, round(value * w)), h), (0, 0, 0, round(255 * 0.95)))
+            if value > 0:
+                canvas.alpha_composite(overlay)
+        elif value > 0:
+            canvas.alpha_composite(Image.new("RGBA", canvas.size, (0, 0, 0, round(255 * value))))
+
+    def render_project(self, project: VideoProject, global_time: float) -> Image.Image:
+        """Render one frame of a multi-scene project at a global time."""
+        scene_index, local_time = project.get_scene_at_time(global_time)
+        canvas = self.render_scene(project.scenes[scene_index], local_time)
+        self._apply_transition(canvas, *self.transition_overlay_alpha(project, global_time))
+        return canvas
+
+    def iter_frames(
+        self,
+        target: Union[SceneGraph, VideoProject],
+        fps: Optional[float] = None,
+        start_frame: int = 0,
+        end_frame: Optional[int] = None,
+    ) -> Iterator[Image.Image]:
+        """Yield RGBA frames [start_frame, end_frame) of a scene or project.
+
+        Node properties are evaluated per scene in one batch with
+        SceneGraph.evaluate_range() instead of per frame.
+        """
+        if isinstance(target, SceneGraph):
+            project = VideoProject(name=target.name, scenes=[target])
+        else:
+            project = target
+        if not project.scenes:
+            return
+        fps = fps or project.scenes[0].fps
+        total = frame_count(project, fps)
+        end_frame = total if end_frame is None else min(end_frame, total)
+
+        frame = start_frame
+        while frame < end_frame:
+            scene_index, _ = project.get_scene_at_time(frame / fps)
+            bounds = project.get_scene_boundaries()[scene_index]
+            scene = project.scenes[scene_index]
+            # Frames of this scene within the requested range
+            last = end_frame
+            if scene_index < len(project.scenes) - 1:
+                last = min(end_frame, math.ceil(bounds["end"] * fps - 1e-9))
+            count = max(1, last - frame)
+            t0 = frame / fps - bounds["start"]
+            timeline = scene.evaluate_range(t0, t0 + count / fps, fps=fps)
+
+            for i in range(timeline.frame_count):
+                local_time = min(float(timeline.times[i]), scene.duration)
+                snapshot = timeline.snapshot(i)
+                canvas = self.render_scene(scene, local_time, snapshot=snapshot)
+                global_time = (frame + i) / fps
+                self._apply_transition(canvas, *self.transition_overlay_alpha(project, global_time))
+                yield canvas
+            frame += timeline.frame_count or 1
+
+
+def frame_count(target: Union[SceneGraph, VideoProject], fps: float) -> int:
+    """Number of frames needed to cover a scene/project at fps."""
+    duration = target.duration if isinstance(target, SceneGraph) else target.total_duration
+    return max(0, math.ceil(duration * fps - 1e-9))
+
+
+def collect_asset_urls(target: Union[SceneGraph, VideoProject]) -> list[str]:
+    """All image URLs a scene/project can draw (backgrounds, poses, faces)."""
+    scenes = [target] if isinstance(target, SceneGraph) else target.scenes
+    urls: dict[str, None] = {}
+    for scene in scenes:
+        for node in scene.nodes.values():
+            if isinstance(node, BackgroundLayerNode) and node.asset_path:
+                urls[node.asset_path] = None
+            elif isinstance(node, CharacterNode):
+                meta = node.metadata
+                for key in ("poseUrls", "faceUrls"):
+                    for entry in (meta.get(key) or {}).values():
+                        if isinstance(entry, dict) and entry.get("url"):
+                            urls[entry["url"]] = None
+                for key in ("poseUrl", "faceUrl"):
+                    if meta.get(key):
+                        urls[meta[key]] = None
+    return list(urls)
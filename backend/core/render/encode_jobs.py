@@ -0,0 +1,258 @@
+"""
+Encode jobs — Background FFmpeg encoding with bounded concurrency and progress.
+
+Encodes used to run as a blocking subprocess.run() inside the request
+handler, freezing the whole event loop for the duration (and capped at 5
+minutes). Jobs here run as asyncio tasks: at most `max_concurrent` encode
+at once (the rest wait queued), FFmpeg is driven with
+asyncio.create_subprocess_exec and its `-progress pipe:1` output is parsed
+into frame counts, so status can be polled while other API calls stay
+responsive.
+
+    manager = EncodeJobManager(max_concurrent=2)
+    job = manager.submit_sequence(job_id, job_dir, fps, total_frames, output_path, ffmpeg_path)
+    manager.get(job_id).to_dict()      # poll
+    await manager.wait(job_id)         # or wait for it
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from backend.core.render.ffmpeg_pipe import OUTPUT_ARGS
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for status/download lookups
+MAX_FINISHED_JOBS = 100
+
+
+def default_max_concurrent() -> int:
+    """Concurrent encodes: EXPORT_MAX_ENCODES env var, default 2."""
+    env = os.environ.get("EXPORT_MAX_ENCODES", "")
+    return int(env) if env.isdigit() and int(env) > 0 else 2
+
+
+@dataclass
+class EncodeJob:
+    """State of one background encode."""
+
+    job_id: str
+    total_frames: int = 0
+    output_path: str = ""
+    status: str = "queued"  # queued → encoding → done | error
+    frames_done: int = 0
+    speed: str = ""
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def progress(self) -> float:
+        if self.status == "done":
+            return 1.0
+        if self.total_frames <= 0:
+            return 0.0
+        return min(1.0, self.frames_done / self.total_frames)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    def to_dict(self) -> dict:
+        elapsed = None
+        if self.started_at:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {
+            "renderJobId": self.job_id,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "framesDone": self.frames_done,
+            "totalFrames": self.total_frames,
+            "speed": self.speed,
+            "elapsed": elapsed,
+            "error": self.error,
+        }
+
+
+def parse_progress_line(job: EncodeJob, line: str) -> None:
+    """Apply one `key=value` line of FFmpeg -progress output to a job."""
+    key, _, value = line.strip().partition("=")
+    if key == "frame" and value.isdigit():
+        job.frames_done = int(value)
+    elif key == "speed":
+        job.speed = value.strip()
+    elif key == "progress" and value == "end" and job.total_frames:
+        job.frames_done = max(job.frames_done, job.total_frames)
+
+
+class EncodeJobManager:
+    """Runs encode jobs as asyncio tasks behind a semaphore."""
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        self.max_concurrent = max_concurrent or default_max_concurrent()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._jobs: dict[str, EncodeJob] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def get(self, job_id: str) -> Optional[EncodeJob]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list[EncodeJob]:
+        return list(self._jobs.values())
+
+    def submit(
+        self,
+        job_id: str,
+        runner: Callable[[EncodeJob], Awaitable[str]],
+        total_frames: int = 0,
+    ) -> EncodeJob:
+        """Queue a job. runner(job) does the work, updates job.frames_done,
+        and returns the output path.
+
+        If a job with this id is still queued or encoding, that job is
+        returned and runner is not started: a retried /finish must not
+        start a second FFmpeg on the same frames and output file.
+        """
+        existing = self._jobs.get(job_id)
+        if existing is not None and not existing.finished:
+            logger.info(f"[Encode {job_id}] Already {existing.status}; not submitting again")
+            return existing
+        job = EncodeJob(job_id=job_id, total_frames=total_frames)
+        self._jobs[job_id] = job
+        self._tasks[job_id] = asyncio.get_running_loop().create_task(self._run(job, runner))
+        self._prune()
+        return job
+
+    async def _run(self, job: EncodeJob, runner: Callable[[EncodeJob], Awaitable[str]]) -> None:
+        try:
+            async with self._get_semaphore():
+                job.status = "encoding"
+                job.started_at = time.time()
+                job.output_path = await runner(job)
+                job.status = "done"
+                logger.info(f"[Encode {job.job_id}] Done in {time.time() - job.started_at:.1f}s: {job.output_path}")
+        except Exception as e:
+            job.status = "error"
+            job.error = str(e)[:1000]
+            logger.error(f"[Encode {job.job_id}] Failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job._done.set()
+            self._tasks.pop(job.job_id, None)
+
+    async def wait(self, job_id: str) -> EncodeJob:
+        job = self._jobs[job_id]
+        await job._done.wait()
+        return job
+
+    def _prune(self) -> None:
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.finished_at or 0)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._jobs.pop(job.job_id, None)
+
+    # ══════════════════════════════════════════════
+    #  PNG SEQUENCE → MP4
+    # ══════════════════════════════════════════════
+
+    def submit_sequence(
+        self,
+        job_id: str,
+        job_dir: str,
+        fps: int,
+        total_frames: int,
+        output_path: str,
+        ffmpeg_path: str,
+        cleanup: bool = True,
+    ) -> EncodeJob:
+        """Queue encoding of job_dir/frame_%04d.png into output_path.
+
+        The frame directory is removed when the encode finishes (cleanup).
+        """
+        cmd = [
+            ffmpeg_path, "-y", "-nostats", "-loglevel", "error",
+            "-progress", "pipe:1",
+            "-framerate", str(fps),
+            "-i", os.path.join(job_dir, "frame_%04d.png"),
+            *OUTPUT_ARGS,
+            output_path,
+        ]
+
+        async def runner(job: EncodeJob) -> str:
+            try:
+                await run_ffmpeg_with_progress(cmd, job)
+                return output_path
+            finally:
+                if cleanup:
+                    shutil.rmtree(job_dir, ignore_errors=True)
+
+        return self.submit(job_id, runner, total_frames=total_frames)
+
+
+async def run_ffmpeg_with_progress(cmd: list[str], job: EncodeJob) -> None:
+    """Run FFmpeg (with `-progress pipe:1` in cmd) and track progress on job.
+
+    Uses asyncio subprocesses; on event loops without subprocess support
+    (e.g. a Selector loop on Windows) falls back to a reader thread.
+    """
+    stderr_tail: deque[str] = deque(maxlen=40)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except NotImplementedError:
+        await asyncio.get_running_loop().run_in_executor(None, _run_ffmpeg_blocking, cmd, job)
+        return
+
+    async def read_progress():
+        async for raw in process.stdout:
+            parse_progress_line(job, raw.decode("utf-8", "replace"))
+
+    async def read_stderr():
+        async for raw in process.stderr:
+            stderr_tail.append(raw.decode("utf-8", "replace").rstrip())
+
+    await asyncio.gather(read_progress(), read_stderr())
+    return_code = await process.wait()
+    if return_code != 0:
+        raise RuntimeError(f"FFmpeg exited with {return_code}: {chr(10).join(stderr_tail)[-500:]}")
+
+
+def _run_ffmpeg_blocking(cmd: list[str], job: EncodeJob) -> None:
+    process = subprocess.Popen(
+        cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    stderr_tail: deque[str] = deque(maxlen=40)
+
+    def drain_stderr():
+        for line in process.stderr:
+            stderr_tail.append(line.rstrip())
+
+    reader = threading.Thread(target=drain_stderr, daemon=True)
+    reader.start()
+    for line in process.stdout:
+        parse_progress_line(job, line)
+    return_code = process.wait()
+    reader.join(timeout=5)
+    if return_code != 0:
+        raise RuntimeError(f"FFmpeg exited with {return_code}: {chr(10).join(stderr_tail)[-500:]}")
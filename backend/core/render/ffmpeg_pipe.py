@@ -0,0 +1,170 @@
+"""
+FFmpeg pipe — Stream frames into an FFmpeg encoder over stdin.
+
+Instead of writing every frame to temp_render/<job>/frame_%04d.png and
+encoding afterwards, frames are fed to a running FFmpeg process as they
+are produced, so encoding overlaps rendering/uploading and nothing but
+the final MP4 touches the disk.
+
+Two input formats:
+    "rawvideo" — raw RGBA bytes (server-side renderer, no PNG round trip)
+    "png"      — concatenated PNG files (browser-rendered chunks)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import subprocess
+import threading
+from collections import deque
+from typing import Optional, Union
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FFMPEG_PATH = os.path.join(BACKEND_DIR, "bin", "ffmpeg", "ffmpeg.exe")
+
+# Output settings shared with the PNG-sequence export path
+OUTPUT_ARGS = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "fast"]
+
+
+class FFmpegPipeError(RuntimeError):
+    """FFmpeg exited with an error (message carries the stderr tail)."""
+
+
+class FFmpegPipeWriter:
+    """Feeds frames to an FFmpeg process through its stdin.
+
+    Usage:
+        with FFmpegPipeWriter(out, 1920, 1080, fps=30) as writer:
+            for frame in frames:
+                writer.write(frame)
+
+    Args:
+        output_path: Destination video file.
+        width, height: Frame size (required for rawvideo input).
+        fps: Frame rate.
+        input_format: "rawvideo" (RGBA bytes / Pillow images) or "png".
+        ffmpeg_path: FFmpeg executable.
+        extra_output_args: Replaces OUTPUT_ARGS if given.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        width: int = 0,
+        height: int = 0,
+        fps: float = 30,
+        input_format: str = "rawvideo",
+        ffmpeg_path: str = FFMPEG_PATH,
+        extra_output_args: Optional[list[str]] = None,
+    ):
+        if input_format not in ("rawvideo", "png"):
+            raise ValueError(f"Unsupported input format: {input_format}")
+        if input_format == "rawvideo" and (width <= 0 or height <= 0):
+            raise ValueError("rawvideo input needs width and height")
+
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.input_format = input_format
+        self.ffmpeg_path = ffmpeg_path
+        self.output_args = extra_output_args if extra_output_args is not None else OUTPUT_ARGS
+        self.frames_written = 0
+
+        self._process: Optional[subprocess.Popen] = None
+        self._stderr_tail: deque[str] = deque(maxlen=40)
+        self._stderr_thread: Optional[threading.Thread] = None
+
+    @property
+    def frame_size(self) -> int:
+        """Bytes per raw RGBA frame."""
+        return self.width * self.height * 4
+
+    def build_command(self) -> list[str]:
+        if self.input_format == "rawvideo":
+            source = [
+                "-f", "rawvideo",
+                "-pix_fmt", "rgba",
+                "-s", f"{self.width}x{self.height}",
+                "-r", str(self.fps),
+            ]
+        else:
+            source = ["-f", "image2pipe", "-c:v", "png", "-framerate", str(self.fps)]
+        return [self.ffmpeg_path, "-y", "-loglevel", "error", *source, "-i", "-", *self.output_args, self.output_path]
+
+    def start(self) -> FFmpegPipeWriter:
+        """Launch FFmpeg. Called automatically by the context manager."""
+        if self._process is not None:
+            return self
+        self._process = subprocess.Popen(
+            self.build_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        # Drain stderr so a chatty FFmpeg can never block on a full pipe
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+        return self
+
+    def _drain_stderr(self) -> None:
+        for line in iter(self._process.stderr.readline, b""):
+            self._stderr_tail.append(line.decode("utf-8", "replace").rstrip())
+
+    def _stderr_text(self) -> str:
+        return "\n".join(self._stderr_tail)
+
+    def write(self, frame: Union[bytes, bytearray, memoryview, Image.Image]) -> None:
+        """Write one frame (raw RGBA bytes, a Pillow image, or PNG bytes)."""
+        if self._process is None:
+            self.start()
+        if isinstance(frame, Image.Image):
+            if self.input_format != "rawvideo":
+                raise ValueError("Pillow images need rawvideo input")
+            frame = frame.convert("RGBA").tobytes()
+        elif self.input_format == "rawvideo" and len(frame) != self.frame_size:
+            raise ValueError(f"Expected {self.frame_size} bytes per frame, got {len(frame)}")
+
+        try:
+            self._process.stdin.write(frame)
+        except (BrokenPipeError, OSError) as e:
+            self._process.wait()
+            raise FFmpegPipeError(f"FFmpeg stopped accepting frames ({e}): {self._stderr_text()[-500:]}") from e
+        self.frames_written += 1
+
+    def close(self, timeout: Optional[float] = None) -> str:
+        """Finish the stream and wait for FFmpeg. Returns the output path."""
+        if self._process is None:
+            raise FFmpegPipeError("FFmpeg was never started")
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        return_code = self._process.wait(timeout=timeout)
+        if self._stderr_thread:
+            self._stderr_thread.join(timeout=5)
+        if return_code != 0:
+            raise FFmpegPipeError(f"FFmpeg exited with {return_code}: {self._stderr_text()[-500:]}")
+        return self.output_path
+
+    def abort(self) -> None:
+        """Kill FFmpeg and remove the partial output."""
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+    def __enter__(self) -> FFmpegPipeWriter:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,281 @@
+"""
+Parallel — Multi-process frame rendering with frame-range sharding.
+
+Frames are independent, so a VideoProject is split into contiguous frame
+ranges ("shards") that never cross a scene boundary, and each shard is
+rendered by a worker process. The parent decodes the asset set once into
+shared memory (core/image_cache.py); every worker builds the project and
+attaches those pixels in the pool initializer, then renders its shards
+in order.
+
+    render_to_directory()   — workers write frame_%04d.png straight to disk
+    iter_frames_parallel()  — raw RGBA frames streamed back in frame order
+    render_to_video()       — those frames piped straight into FFmpeg
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, Union
+
+from backend.core.image_cache import get_image_cache
+from backend.core.render.compositor import STORAGE_DIR, FrameRenderer, collect_asset_urls, frame_count, resolve_asset_path
+from backend.core.scene_graph.scene import SceneGraph
+from backend.core.scene_graph.video_project import VideoProject
+
+logger = logging.getLogger(__name__)
+
+# Shards per worker — more than one so a slow scene doesn't leave cores idle
+SHARDS_PER_WORKER = 4
+MIN_SHARD_FRAMES = 8
+# Streamed shards in flight per worker (one rendering, one queued)
+STREAM_SHARDS_PER_WORKER = 2
+DEFAULT_STREAM_BUFFER_MB = 512
+
+
+@dataclass
+class FrameShard:
+    """A contiguous frame range [start, end) inside one scene."""
+
+    scene_index: int
+    start: int
+    end: int
+
+    @property
+    def count(self) -> int:
+        return self.end - self.start
+
+
+def default_workers() -> int:
+    """Worker count: RENDER_WORKERS env var, else one per CPU core."""
+    env = os.environ.get("RENDER_WORKERS", "")
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+    return os.cpu_count() or 1
+
+
+def default_stream_buffer_bytes() -> int:
+    """Raw frame bytes iter_frames_parallel() may hold in flight:
+    RENDER_STREAM_BUFFER_MB env var, default 512 MB."""
+    env = os.environ.get("RENDER_STREAM_BUFFER_MB", "")
+    mb = int(env) if env.isdigit() and int(env) > 0 else DEFAULT_STREAM_BUFFER_MB
+    return mb * 1024 * 1024
+
+
+def stream_shard_frames(frame_bytes: int, workers: int, buffer_bytes: Optional[int] = None) -> int:
+    """Frames per streamed shard so that every shard in flight (plus the one
+    being consumed) fits in buffer_bytes; never less than one frame."""
+    buffer_bytes = buffer_bytes or default_stream_buffer_bytes()
+    in_flight = workers * STREAM_SHARDS_PER_WORKER + 1
+    return max(1, buffer_bytes // (max(1, frame_bytes) * in_flight))
+
+
+def _as_project(target: Union[SceneGraph, VideoProject]) -> VideoProject:
+    if isinstance(target, SceneGraph):
+        return VideoProject(name=target.name, scenes=[target])
+    return target
+
+
+def plan_shards(
+    target: Union[SceneGraph, VideoProject],
+    fps: float,
+    workers: int,
+    shard_frames: Optional[int] = None,
+) -> list[FrameShard]:
+    """Split a project's frames into shards along scene boundaries.
+
+    Each scene's frame range is cut into pieces of at most shard_frames
+    (default: enough pieces for SHARDS_PER_WORKER per worker), so both
+    many short scenes and one long scene spread across the pool.
+    """
+    project = _as_project(target)
+    total = frame_count(project, fps)
+    if shard_frames is None:
+        shard_frames = max(MIN_SHARD_FRAMES, math.ceil(total / max(1, workers * SHARDS_PER_WORKER)))
+
+    shards: list[FrameShard] = []
+    boundaries = project.get_scene_boundaries()
+    for bounds in boundaries:
+        index = bounds["scene_index"]
+        first = math.ceil(bounds["start"] * fps - 1e-9)
+        last = total if index == len(boundaries) - 1 else math.ceil(bounds["end"] * fps - 1e-9)
+        for start in range(first, min(last, total), shard_frames):
+            shards.append(FrameShard(index, start, min(start + shard_frames, last, total)))
+    return shards
+
+
+# ══════════════════════════════════════════════
+#  WORKER PROCESS
+# ══════════════════════════════════════════════
+
+# Per-process state, filled once by _init_worker
+_worker: dict = {}
+
+
+def _init_worker(project_data: dict, fps: float, storage_dir: str, shared_images: Optional[dict] = None) -> None:
+    project = VideoProject.from_dict(project_data)
+    if shared_images:
+        get_image_cache().attach(shared_images)
+    renderer = FrameRenderer(storage_dir=storage_dir)
+    loaded = renderer.preload(project)
+    _worker.update(project=project, fps=fps, renderer=renderer)
+    logger.debug(f"[Render worker {os.getpid()}] Ready with {loaded} decoded assets")
+
+
+def _render_shard_to_dir(shard: FrameShard, out_dir: str) -> int:
+    renderer: FrameRenderer = _worker["renderer"]
+    frames = renderer.iter_frames(_worker["project"], fps=_worker["fps"], start_frame=shard.start, end_frame=shard.end)
+    written = 0
+    for offset, frame in enumerate(frames):
+        path = os.path.join(out_dir, f"frame_{shard.start + offset:04d}.png")
+        frame.convert("RGB").save(path, compress_level=1)
+        written += 1
+    return written
+
+
+def _render_shard_raw(shard: FrameShard) -> list[bytes]:
+    renderer: FrameRenderer = _worker["renderer"]
+    frames = renderer.iter_frames(_worker["project"], fps=_worker["fps"], start_frame=shard.start, end_frame=shard.end)
+    return [frame.tobytes() for frame in frames]
+
+
+def _share_assets(project: VideoProject, storage_dir: str) -> dict:
+    """Decode the project's assets once in this process and publish them
+    in shared memory for the workers. Returns the manifest."""
+    paths = []
+    for url in collect_asset_urls(project):
+        path = resolve_asset_path(url, storage_dir)
+        if path and os.path.isfile(path):
+            paths.append(path)
+    return get_image_cache().share(paths)
+
+
+@contextmanager
+def _make_pool(project: VideoProject, fps: float, workers: int, storage_dir: str) -> Iterator[ProcessPoolExecutor]:
+    shared_images = _share_assets(project, storage_dir)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(project.to_dict(), fps, storage_dir, shared_images),
+        ) as pool:
+            yield pool
+    finally:
+        get_image_cache().release_shared(shared_images)
+
+
+# ══════════════════════════════════════════════
+#  PUBLIC API
+# ══════════════════════════════════════════════
+
+def render_to_directory(
+    target: Union[SceneGraph, VideoProject],
+    out_dir: str,
+    fps: Optional[float] = None,
+    workers: Optional[int] = None,
+    storage_dir: str = STORAGE_DIR,
+) -> int:
+    """Render every frame as out_dir/frame_%04d.png using a process pool.
+
+    Returns the number of frames written.
+    """
+    project = _as_project(target)
+    if not project.scenes:
+        return 0
+    fps = fps or project.scenes[0].fps
+    workers = workers or default_workers()
+    shards = plan_shards(project, fps, workers)
+    os.makedirs(out_dir, exist_ok=True)
+
+    if workers <= 1:
+        # No pool overhead for a single worker
+        _init_worker(project.to_dict(), fps, storage_dir)
+        return sum(_render_shard_to_dir(shard, out_dir) for shard in shards)
+
+    logger.info(f"[Render] {sum(s.count for s in shards)} frames in {len(shards)} shards on {workers} workers")
+    with _make_pool(project, fps, workers, storage_dir) as pool:
+        return sum(pool.map(_render_shard_to_dir, shards, [out_dir] * len(shards)))
+
+
+def iter_frames_parallel(
+    target: Union[SceneGraph, VideoProject],
+    fps: Optional[float] = None,
+    workers: Optional[int] = None,
+    storage_dir: str = STORAGE_DIR,
+    buffer_bytes: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Yield raw RGBA frame bytes in frame order, rendered by a process pool.
+
+    Workers return whole shards, so shards are sized by bytes rather than
+    by frame count: STREAM_SHARDS_PER_WORKER shards per worker in flight,
+    plus the one being yielded, fit in buffer_bytes (default:
+    RENDER_STREAM_BUFFER_MB). At 1080p that is a few frames per shard;
+    the floor is one frame per shard, i.e. ~2 frames per worker.
+    """
+    project = _as_project(target)
+    if not project.scenes:
+        return
+    fps = fps or project.scenes[0].fps
+    workers = workers or default_workers()
+    frame_bytes = max(s.canvas_width * s.canvas_height * 4 for s in project.scenes)
+    shards = plan_shards(project, fps, workers,
+                         shard_frames=stream_shard_frames(frame_bytes, workers, buffer_bytes))
+
+    if workers <= 1:
+        renderer = FrameRenderer(storage_dir=storage_dir)
+        for frame in renderer.iter_frames(project, fps=fps):
+            yield frame.tobytes()
+        return
+
+    with _make_pool(project, fps, workers, storage_dir) as pool:
+        pending = []
+        next_shard = 0
+        while next_shard < len(shards) or pending:
+            while next_shard < len(shards) and len(pending) < workers * STREAM_SHARDS_PER_WORKER:
+                pending.append(pool.submit(_render_shard_raw, shards[next_shard]))
+                next_shard += 1
+            for frame in pending.pop(0).result():
+                yield frame
+
+
+def render_to_video(
+    target: Union[SceneGraph, VideoProject],
+    output_path: str,
+    fps: Optional[float] = None,
+    workers: Optional[int] = None,
+    storage_dir: str = STORAGE_DIR,
+    ffmpeg_path: Optional[str] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Render a scene/project straight into a video file.
+
+    Frames go from the worker pool to FFmpeg's stdin as raw RGBA — no PNG
+    files, no temp directory — so encoding overlaps rendering.
+    on_progress(frames_written) is called after every frame.
+    Returns the number of frames encoded.
+    """
+    from backend.core.render.ffmpeg_pipe import FFMPEG_PATH, FFmpegPipeWriter
+
+    project = _as_project(target)
+    if not project.scenes:
+        return 0
+    fps = fps or project.scenes[0].fps
+    sizes = {(s.canvas_width, s.canvas_height) for s in project.scenes}
+    if len(sizes) != 1:
+        raise ValueError(f"All scenes must share one canvas size, got {sorted(sizes)}")
+    width, height = sizes.pop()
+    if frame_count(project, fps) == 0:
+        return 0
+
+    writer = FFmpegPipeWriter(output_path, width, height, fps=fps, ffmpeg_path=ffmpeg_path or FFMPEG_PATH)
+    with writer:
+        for frame in iter_frames_parallel(project, fps=fps, workers=workers, storage_dir=storage_dir):
+            writer.write(frame)
+            if on_progress:
+                on_progress(writer.frames_written)
+    return writer.frames_written
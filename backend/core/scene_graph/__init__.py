@@ -14,7 +14,13 @@ Architecture inspired by:
 """
 
 from backend.core.scene_graph.transform import Transform, BoundingBox
-from backend.core.scene_graph.keyframe import Keyframe, interpolate_keyframes, Easing
+from backend.core.scene_graph.keyframe import (
+    Keyframe,
+    interpolate_keyframes,
+    Easing,
+    CompiledTrack,
+    compile_track,
+)
 from backend.core.scene_graph.node import SceneNode
 from backend.core.scene_graph.specialized_nodes import (
     CharacterNode,
@@ -33,6 +39,8 @@ __all__ = [
     "Keyframe",
     "interpolate_keyframes",
     "Easing",
+    "CompiledTrack",
+    "compile_track",
     "SceneNode",
     "CharacterNode",
     "BackgroundLayerNode",
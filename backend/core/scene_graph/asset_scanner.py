@@ -22,15 +22,34 @@ Directory structure expected:
         │   └── ...
         └── 豆豆眼表情/     ← alternative face style (optional)
             └── ...
+
+Refreshes are incremental: each character folder's signature (its mtime
+and those of its pose/face subfolders — adding, removing or renaming a
+file changes them) is remembered, and refresh() only re-lists folders whose
+signature changed. The registry can be saved as a snapshot and loaded at
+startup without walking the tree, kept current by a RegistryWatcher
+(watchdog events when installed, else polling), and fed by ingest:
+characters merged into the character store are added from their layer
+groups (pose/face groups → /static/assets/<hash>.png). Those pool files are
+cropped to the layer's bbox, so each asset keeps its bbox and the character
+its canvas size for placement.
+
+Name lookups (find_character, search_characters, resolve_names) go through
+a CharacterIndex that is rebuilt only when the character set changes.
 """
 
 from __future__ import annotations
 
 import os
 import re
+import json
+import time
 import logging
+import threading
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Iterable, Optional
+
+from backend.core.scene_graph.character_index import DEFAULT_MIN_SCORE, CharacterIndex, CharacterMatch
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +60,9 @@ FACE_FOLDER_NAMES = {"表情", "face", "faces", "expression", "expressions", "
 # File name pattern: <name>_<hash>.png → extract <name>
 ASSET_NAME_PATTERN = re.compile(r"^(.+?)_[a-z0-9]{6}\.png$", re.IGNORECASE)
 
+SNAPSHOT_VERSION = 2
+GROUP_ATTRS = {"pose": "poses", "face": "faces", "face_dot_eye": "faces_dot_eye"}
+
 
 @dataclass
 class CharacterAsset:
@@ -51,6 +73,8 @@ class CharacterAsset:
     relative_path: str  # Relative to storage dir (for URL building)
     group: str  # "pose", "face", or "face_dot_eye"
     full_path: str  # Absolute filesystem path
+    bbox: Optional[list] = None  # [left, top, width, height] on the character canvas
+    cropped: bool = False  # File covers bbox only (ingested pool assets), not the whole canvas
 
     @property
     def url_path(self) -> str:
@@ -58,6 +82,14 @@ class CharacterAsset:
         # /static/extracted_psds/CharName/动作/站立_xxxx.png
         return f"/static/{self.relative_path}".replace("\\", "/")
 
+    def to_dict(self) -> dict:
+        """URL entry for poseUrls/faceUrls; cropped assets carry their placement."""
+        entry = {"filename": self.filename, "url": self.url_path}
+        if self.cropped and self.bbox:
+            entry["bbox"] = list(self.bbox)
+            entry["cropped"] = True
+        return entry
+
 
 @dataclass
 class CharacterInfo:
@@ -70,6 +102,7 @@ class CharacterInfo:
     poses: dict[str, CharacterAsset] = field(default_factory=dict)  # name → asset
     faces: dict[str, CharacterAsset] = field(default_factory=dict)  # name → asset
     faces_dot_eye: dict[str, CharacterAsset] = field(default_factory=dict)  # name → asset
+    canvas_size: Optional[list] = None  # PSD [width, height] that cropped assets' bboxes refer to
 
     @property
     def pose_names(self) -> list[str]:
@@ -114,18 +147,10 @@ class CharacterInfo:
             "id": self.id,
             "name": self.name,
             "folder": self.relative_folder,
-            "poses": {
-                name: {"filename": a.filename, "url": a.url_path}
-                for name, a in self.poses.items()
-            },
-            "faces": {
-                name: {"filename": a.filename, "url": a.url_path}
-                for name, a in self.faces.items()
-            },
-            "faces_dot_eye": {
-                name: {"filename": a.filename, "url": a.url_path}
-                for name, a in self.faces_dot_eye.items()
-            },
+            "poses": {name: a.to_dict() for name, a in self.poses.items()},
+            "faces": {name: a.to_dict() for name, a in self.faces.items()},
+            "faces_dot_eye": {name: a.to_dict() for name, a in self.faces_dot_eye.items()},
+            "canvas_size": self.canvas_size,
             "total_assets": self.total_assets,
             "default_pose": self.default_pose,
             "default_face": self.default_face,
@@ -253,6 +278,108 @@ def scan_character_folder(
     return None
 
 
+def folder_signature(char_folder: str) -> Optional[list]:
+    """Change key of a character folder: its mtime plus its pose/face subfolders' mtimes.
+
+    None if the folder is gone. File contents are not part of it — the
+    registry only records names and paths.
+    """
+    try:
+        mtime = os.stat(char_folder).st_mtime_ns
+        subfolders = sorted(
+            [entry.name, entry.stat().st_mtime_ns]
+            for entry in os.scandir(char_folder)
+            if entry.is_dir() and _classify_folder(entry.name)
+        )
+    except OSError:
+        return None
+    return [mtime, subfolders]
+
+
+def character_from_layer_groups(
+    folder_name: str,
+    layer_groups: dict,
+    storage_dir: str,
+    canvas_size: Optional[list] = None,
+) -> Optional[CharacterInfo]:
+    """Build a character from ingested layer groups (group name → layer dicts).
+
+    Pose/face groups are classified like folders; assets point at the
+    shared pool (layer["path"], e.g. "assets/<hash>.png") and keep the
+    layer's bbox/cropped, with canvas_size the PSD size they refer to.
+    """
+    rel_folder = os.path.join("extracted_psds", folder_name)
+    char = CharacterInfo(
+        id=_sanitize_id(folder_name),
+        name=folder_name,
+        folder_path=os.path.join(storage_dir, rel_folder),
+        relative_folder=rel_folder,
+        canvas_size=list(canvas_size) if canvas_size else None,
+    )
+    for group_name, layers in layer_groups.items():
+        group = _classify_folder(group_name)
+        if group is None:
+            continue
+        target = getattr(char, GROUP_ATTRS[group])
+        for layer in layers:
+            rel_path = layer.get("path")
+            if not rel_path:
+                continue
+            target[layer["name"]] = CharacterAsset(
+                name=layer["name"],
+                filename=os.path.basename(rel_path),
+                relative_path=rel_path,
+                group=group,
+                full_path=os.path.join(storage_dir, rel_path),
+                bbox=layer.get("bbox"),
+                cropped=bool(layer.get("cropped")),
+            )
+    return char if char.total_assets > 0 else None
+
+
+def _asset_to_json(asset: CharacterAsset) -> list:
+    # [filename, relative_path] plus the bbox for cropped assets
+    if asset.cropped and asset.bbox:
+        return [asset.filename, asset.relative_path, list(asset.bbox)]
+    return [asset.filename, asset.relative_path]
+
+
+def _character_to_json(char: CharacterInfo) -> dict:
+    return {
+        "id": char.id,
+        "name": char.name,
+        "folder": char.relative_folder,
+        "canvas_size": char.canvas_size,
+        "assets": {
+            group: {name: _asset_to_json(a) for name, a in getattr(char, attr).items()}
+            for group, attr in GROUP_ATTRS.items()
+        },
+    }
+
+
+def _character_from_json(data: dict, storage_dir: str) -> CharacterInfo:
+    char = CharacterInfo(
+        id=data["id"],
+        name=data["name"],
+        folder_path=os.path.join(storage_dir, data["folder"]),
+        relative_folder=data["folder"],
+        canvas_size=data.get("canvas_size"),
+    )
+    for group, attr in GROUP_ATTRS.items():
+        target = getattr(char, attr)
+        for name, (filename, rel_path, *bbox) in data["assets"].get(group, {}).items():
+            target[name] = CharacterAsset(
+                name=name,
+                filename=filename,
+                relative_path=rel_path,
+                group=group,
+                full_path=os.path.join(storage_dir, rel_path),
+                bbox=bbox[0] if bbox else None,
+                cropped=bool(bbox),
+            )
+    return char
+
+
 class AssetRegistry:
     """Registry of all available characters and their assets.
 
@@ -260,45 +387,220 @@ class AssetRegistry:
     that can be queried by the AI agents and the frontend.
 
     Usage:
-        registry = AssetRegistry("backend/storage")
-        registry.scan()
+        registry = AssetRegistry("backend/storage", snapshot_path="data/asset_registry.json")
+        if not registry.load_snapshot():
+            registry.scan()
+        registry.refresh()                      # later: only changed folders
         print(registry.list_characters())
         char = registry.get_character("q版花店姐姐长裙_1761648249312")
     """
 
-    def __init__(self, storage_dir: str):
+    def __init__(self, storage_dir: str, snapshot_path: Optional[str] = None):
         self.storage_dir = os.path.abspath(storage_dir)
         self.extracted_dir = os.path.join(self.storage_dir, "extracted_psds")
+        self.snapshot_path = snapshot_path
         self.characters: dict[str, CharacterInfo] = {}
+        # folder name → {"signature": folder_signature(), "id": character id or None}
+        self._folders: dict[str, dict] = {}
+        self._scanned: dict[str, CharacterInfo] = {}    # from folders, by id
+        self._ingested: dict[str, CharacterInfo] = {}   # pushed by ingest, by id
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._index: Optional[tuple[dict, CharacterIndex]] = None
+
+    def _rebuild(self) -> None:
+        # Folder scans win over ingested layer groups for the same id; readers
+        # keep iterating the previous dict while the new one is swapped in
+        characters = {
+            self._scanned[state["id"]].id: self._scanned[state["id"]]
+            for _, state in sorted(self._folders.items())
+            if state["id"] in self._scanned
+        }
+        for char_id, char in self._ingested.items():
+            characters.setdefault(char_id, char)
+        self.characters = characters
+        self._dirty = True
+
+    def _drop_folder(self, folder_name: str) -> None:
+        state = self._folders.pop(folder_name, None)
+        if state and state["id"]:
+            self._scanned.pop(state["id"], None)
 
     def scan(self) -> int:
-        """Scan the extracted_psds directory for characters.
+        """Full rescan of the extracted_psds directory.
 
         Returns:
             Number of characters discovered.
         """
-        self.characters.clear()
-
-        if not os.path.isdir(self.extracted_dir):
-            logger.warning(f"Extracted PSDs directory not found: {self.extracted_dir}")
-            return 0
-
-        for folder_name in sorted(os.listdir(self.extracted_dir)):
-            folder_path = os.path.join(self.extracted_dir, folder_name)
-            if not os.path.isdir(folder_path):
-                continue
-
-            char = scan_character_folder(folder_path, self.storage_dir)
-            if char:
-                self.characters[char.id] = char
+        with self._lock:
+            self._folders.clear()
+            self._scanned.clear()
+            self.refresh()
+            for char in self._scanned.values():
                 logger.info(
                     f"Found character: {char.name} "
                     f"({len(char.poses)} poses, {len(char.faces)} faces)"
                 )
-
         logger.info(f"Asset scan complete: {len(self.characters)} characters found")
         return len(self.characters)
 
+    def refresh(self, folders: Optional[Iterable[str]] = None) -> dict:
+        """Re-list only character folders whose signature changed.
+
+        folders limits the check to those folder names (e.g. from watcher
+        events); by default every folder is checked and vanished ones are
+        dropped. Returns {"added", "updated", "removed", "unchanged"}.
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            if not os.path.isdir(self.extracted_dir):
+                logger.warning(f"Extracted PSDs directory not found: {self.extracted_dir}")
+                counts["removed"] = sum(1 for state in self._folders.values() if state["id"])
+                self._folders.clear()
+                self._scanned.clear()
+                self._rebuild()
+                return counts
+
+            if folders is None:
+                names = set(os.listdir(self.extracted_dir))
+                for gone in set(self._folders) - names:
+                    counts["removed"] += 1 if self._folders[gone]["id"] else 0
+                    self._drop_folder(gone)
+            else:
+                names = set(folders)
+
+            for folder_name in sorted(names):
+                folder_path = os.path.join(self.extracted_dir, folder_name)
+                signature = folder_signature(folder_path) if os.path.isdir(folder_path) else None
+                state = self._folders.get(folder_name)
+                if signature is None:
+                    if state is not None:
+                        counts["removed"] += 1 if state["id"] else 0
+                        self._drop_folder(folder_name)
+                    continue
+                if state is not None and state["signature"] == signature:
+                    counts["unchanged"] += 1
+                    continue
+                had_character = bool(state and state["id"])
+                self._drop_folder(folder_name)
+                char = scan_character_folder(folder_path, self.storage_dir)
+                if char:
+                    self._scanned[char.id] = char
+                    counts["updated" if had_character else "added"] += 1
+                elif had_character:
+                    counts["removed"] += 1
+                self._folders[folder_name] = {"signature": signature, "id": char.id if char else None}
+
+            if counts["added"] or counts["updated"] or counts["removed"]:
+                self._rebuild()
+        return counts
+
+    # ── Ingest ──
+
+    def add_ingested(
+        self, folder_name: str, layer_groups: dict, canvas_size: Optional[list] = None,
+    ) -> Optional[CharacterInfo]:
+        """Add or replace a character built from ingested layer groups."""
+        with self._lock:
+            char = self._set_ingested(folder_name, layer_groups, canvas_size)
+            self._rebuild()
+        return char
+
+    def _set_ingested(
+        self, folder_name: str, layer_groups: dict, canvas_size: Optional[list] = None,
+    ) -> Optional[CharacterInfo]:
+        char = character_from_layer_groups(folder_name, layer_groups, self.storage_dir, canvas_size)
+        if char is None:
+            self._ingested.pop(_sanitize_id(folder_name), None)
+        else:
+            self._ingested[char.id] = char
+        return char
+
+    def attach_character_store(self) -> None:
+        """Follow character_store writes, so ingested characters appear without a rescan."""
+        from backend.core import character_store
+
+        def on_change(change: dict) -> None:
+            if change["pipeline"] != "v1":
+                return
+            if change.get("name"):
+                stored = character_store.get_character("v1", name=change["name"])
+                if stored:
+                    self._add_stored(stored)
+                return
+            self.sync_character_store()  # purges / bulk replaces
+
+        character_store.changes.subscribe(on_change)
+
+    def sync_character_store(self) -> int:
+        """Replace every ingested character with the current v1 library."""
+        from backend.core import character_store
+        from backend.core.psd_processor import sanitize_filename
+
+        stored_characters = character_store.list_characters("v1")
+        with self._lock:
+            self._ingested.clear()
+            for stored in stored_characters:
+                self._set_ingested(
+                    sanitize_filename(stored["name"]), stored.get("layer_groups") or {}, stored.get("canvas_size"),
+                )
+            self._rebuild()
+            return len(self._ingested)
+
+    def _add_stored(self, stored: dict) -> None:
+        from backend.core.psd_processor import sanitize_filename
+        self.add_ingested(
+            sanitize_filename(stored["name"]), stored.get("layer_groups") or {}, stored.get("canvas_size"),
+        )
+
+    # ── Snapshot ──
+
+    def save_snapshot(self, force: bool = False) -> bool:
+        """Write the registry to snapshot_path (only if it changed, unless force)."""
+        if not self.snapshot_path:
+            return False
+        with self._lock:
+            if not (self._dirty or force):
+                return False
+            data = {
+                "version": SNAPSHOT_VERSION,
+                "storage_dir": self.storage_dir,
+                "saved_at": time.time(),
+                "folders": self._folders,
+                "scanned": [_character_to_json(c) for c in self._scanned.values()],
+                "ingested": [_character_to_json(c) for c in self._ingested.values()],
+            }
+            self._dirty = False
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        return True
+
+    def load_snapshot(self) -> bool:
+        """Restore the registry from snapshot_path without walking the tree."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION or data.get("storage_dir") != self.storage_dir:
+                return False
+            scanned = [_character_from_json(c, self.storage_dir) for c in data["scanned"]]
+            ingested = [_character_from_json(c, self.storage_dir) for c in data["ingested"]]
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable asset registry snapshot {self.snapshot_path}: {e}")
+            return False
+        with self._lock:
+            self._folders = data["folders"]
+            self._scanned = {c.id: c for c in scanned}
+            self._ingested = {c.id: c for c in ingested}
+            self._rebuild()
+            self._dirty = False
+        logger.info(f"Asset registry loaded from snapshot: {len(self.characters)} characters")
+        return True
+
     def list_characters(self) -> list[dict]:
         """List all characters with summary info."""
         return [
@@ -318,13 +620,41 @@ class AssetRegistry:
         """Get character info by ID."""
         return self.characters.get(char_id)
 
+    @property
+    def index(self) -> CharacterIndex:
+        """Search index over the current characters, rebuilt when they change."""
+        characters = self.characters
+        cached = self._index
+        if cached is None or cached[0] is not characters or len(cached[1]) != len(characters):
+            cached = (characters, CharacterIndex(characters.values()))
+            self._index = cached
+        return cached[1]
+
+    def search_characters(
+        self,
+        query: str,
+        limit: int = 5,
+        min_score: float = DEFAULT_MIN_SCORE,
+    ) -> list[CharacterMatch]:
+        """Ranked matches for a character id or (partial, fuzzy) name."""
+        return self.index.search(query, limit=limit, min_score=min_score)
+
     def find_character(self, query: str) -> Optional[CharacterInfo]:
-        """Find character by partial name match."""
-        query_lower = query.lower()
-        for char in self.characters.values():
-            if query_lower in char.name.lower() or query_lower in char.id:
-                return char
-        return None
+        """Find character by id, or the best name match."""
+        return self.characters.get(query) or self.index.best(query)
+
+    def resolve_names(
+        self,
+        names: Iterable[str],
+        min_score: float = DEFAULT_MIN_SCORE,
+    ) -> dict[str, Optional[CharacterInfo]]:
+        """Best match for each script name (each distinct name searched once)."""
+        index = self.index
+        resolved: dict[str, Optional[CharacterInfo]] = {}
+        for name in names:
+            if name not in resolved:
+                resolved[name] = self.characters.get(name) or index.best(name, min_score)
+        return resolved
 
     def describe_all(self) -> str:
         """AI-readable description of all available characters."""
@@ -343,3 +673,100 @@ class AssetRegistry:
             char_id: char.to_dict()
             for char_id, char in self.characters.items()
         }
+
+
+# ══════════════════════════════════════════════
+#  WATCHER
+# ══════════════════════════════════════════════
+
+def default_watch_interval() -> float:
+    """Seconds between registry refreshes (ASSET_REGISTRY_WATCH_SECONDS, 0 = no watcher)."""
+    try:
+        return max(0.0, float(os.environ.get("ASSET_REGISTRY_WATCH_SECONDS", "0")))
+    except ValueError:
+        return 0.0
+
+
+class RegistryWatcher:
+    """Keeps an AssetRegistry current in a background thread.
+
+    With watchdog installed, filesystem events mark the touched character
+    folders and only those are refreshed; otherwise every tick runs a full
+    (signature-only) refresh(). Each tick also saves the snapshot if the
+    registry changed.
+    """
+
+    def __init__(self, registry: AssetRegistry, interval: Optional[float] = None):
+        self.registry = registry
+        self.interval = interval if interval is not None else (default_watch_interval() or 5.0)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self._pending: set[str] = set()
+        self._pending_lock = threading.Lock()
+
+    def start(self) -> "RegistryWatcher":
+        os.makedirs(self.registry.extracted_dir, exist_ok=True)
+        self._observer = self._start_observer()
+        self._thread = threading.Thread(target=self._run, name="asset-registry-watch", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Asset registry watcher started "
+            f"({'watchdog' if self._observer else 'polling'}, every {self.interval}s)"
+        )
+        return self
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    watcher._mark(path)
+
+        observer = Observer()
+        observer.schedule(_Handler(), self.registry.extracted_dir, recursive=True)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def _mark(self, path) -> None:
+        if not path:
+            return
+        rel = os.path.relpath(os.fsdecode(path), self.registry.extracted_dir)
+        folder_name = rel.split(os.sep, 1)[0]
+        if folder_name and folder_name not in (".", ".."):
+            with self._pending_lock:
+                self._pending.add(folder_name)
+
+    def tick(self) -> dict:
+        """One refresh + snapshot save; returns refresh() counts."""
+        if self._observer is not None:
+            with self._pending_lock:
+                folders, self._pending = self._pending, set()
+            counts = self.registry.refresh(folders) if folders else {}
+        else:
+            counts = self.registry.refresh()
+        self.registry.save_snapshot()
+        return counts
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.warning(f"Asset registry refresh failed: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
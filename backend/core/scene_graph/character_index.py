@@ -0,0 +1,151 @@
+"""
+Character Index — Prebuilt lookups for resolving script names to characters.
+
+Built once per registry change and shared by every caller that turns a
+name from a script ("Hoa", "Bà Lan", "花店姐姐") into a character:
+
+- exact id            "hoa_nusinh"
+- normalized name     "Hoà_NữSinh" → "hoa nusinh" (case, diacritics, đ→d,
+                      full-width forms and separators folded)
+- name tokens         "hoa", "nusinh"
+- character bigrams   "ho", "oa", "nu", ... / "花店", "店姐", ... — fuzzy
+                      matching for CJK and Vietnamese names, which have no
+                      reliable word boundaries or spelling
+
+search() only scores characters sharing a token or bigram with the query,
+so resolving a name costs a few dict lookups, not a registry scan.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from backend.core.scene_graph.asset_scanner import CharacterInfo
+
+# Scores per match kind; fuzzy and substring scores scale below their cap
+SCORE_ID = 1.0
+SCORE_NAME = 0.95
+SCORE_TOKENS = 0.9
+SCORE_SUBSTRING = 0.85
+SCORE_FUZZY = 0.8
+DEFAULT_MIN_SCORE = 0.35
+
+_SEPARATORS = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_name(text: str) -> str:
+    """Fold a name for matching: 'Bà_Lan-２' → 'ba lan 2'."""
+    text = unicodedata.normalize("NFKD", text.casefold()).replace("đ", "d")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_SEPARATORS.sub(" ", text).split())
+
+
+def name_bigrams(normalized: str) -> set[str]:
+    """Character bigrams of each token (single-character tokens as-is)."""
+    grams = set()
+    for token in normalized.split():
+        if len(token) == 1:
+            grams.add(token)
+        grams.update(token[i:i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+@dataclass
+class CharacterMatch:
+    """One ranked search result."""
+    character: CharacterInfo
+    score: float
+    kind: str  # "id", "name", "tokens", "substring" or "fuzzy"
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.character.id,
+            "name": self.character.name,
+            "score": round(self.score, 3),
+            "match": self.kind,
+        }
+
+
+class CharacterIndex:
+    """Immutable id / name / token / bigram index over a set of characters."""
+
+    def __init__(self, characters: Iterable[CharacterInfo]):
+        self.by_id: dict[str, CharacterInfo] = {}
+        self.by_name: dict[str, str] = {}
+        self.by_token: dict[str, set[str]] = {}
+        self.by_gram: dict[str, set[str]] = {}
+        self._names: dict[str, str] = {}
+        self._tokens: dict[str, frozenset[str]] = {}
+        self._gram_counts: dict[str, int] = {}
+
+        for char in characters:
+            normalized = normalize_name(char.name)
+            tokens = frozenset(normalized.split())
+            grams = name_bigrams(normalized)
+            self.by_id[char.id] = char
+            self.by_name.setdefault(normalized, char.id)
+            self._names[char.id] = normalized
+            self._tokens[char.id] = tokens
+            self._gram_counts[char.id] = len(grams)
+            for token in tokens:
+                self.by_token.setdefault(token, set()).add(char.id)
+            for gram in grams:
+                self.by_gram.setdefault(gram, set()).add(char.id)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def search(self, query: str, limit: int = 5, min_score: float = DEFAULT_MIN_SCORE) -> list[CharacterMatch]:
+        """Characters matching query, best first."""
+        normalized = normalize_name(query)
+        if not normalized and query.strip() not in self.by_id:
+            return []
+
+        scores: dict[str, tuple[float, str]] = {}
+
+        def offer(char_id: str, score: float, kind: str) -> None:
+            if score > scores.get(char_id, (0.0, ""))[0]:
+                scores[char_id] = (score, kind)
+
+        for candidate in (query.strip(), query.strip().lower(), normalized.replace(" ", "_")):
+            if candidate in self.by_id:
+                offer(candidate, SCORE_ID, "id")
+        if normalized in self.by_name:
+            offer(self.by_name[normalized], SCORE_NAME, "name")
+
+        query_tokens = set(normalized.split())
+        token_hits: Counter = Counter()
+        for token in query_tokens:
+            token_hits.update(self.by_token.get(token, ()))
+        for char_id, shared in token_hits.items():
+            union = len(query_tokens | self._tokens[char_id])
+            offer(char_id, SCORE_TOKENS * (0.75 + 0.25 * shared / union), "tokens")
+
+        query_grams = name_bigrams(normalized)
+        gram_hits: Counter = Counter()
+        for gram in query_grams:
+            gram_hits.update(self.by_gram.get(gram, ()))
+        for char_id, shared in gram_hits.items():
+            name = self._names[char_id]
+            if normalized in name or name in normalized:
+                shorter, longer = sorted((len(normalized), len(name)))
+                offer(char_id, SCORE_SUBSTRING * (0.6 + 0.4 * shorter / longer), "substring")
+            dice = 2 * shared / (len(query_grams) + self._gram_counts[char_id])
+            offer(char_id, SCORE_FUZZY * dice, "fuzzy")
+
+        ranked = sorted(
+            (CharacterMatch(self.by_id[char_id], score, kind)
+             for char_id, (score, kind) in scores.items() if score >= min_score),
+            key=lambda m: (-m.score, len(m.character.name), m.character.id),
+        )
+        return ranked[:limit]
+
+    def best(self, query: str, min_score: float = DEFAULT_MIN_SCORE) -> Optional[CharacterInfo]:
+        """The top match for query, or None."""
+        found = self.search(query, limit=1, min_score=min_score)
+        return found[0].character if found else None
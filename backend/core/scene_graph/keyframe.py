@@ -15,8 +15,10 @@ keyframes using the specified easing function.
 from __future__ import annotations
 
 import math
+from bisect import bisect_left
 from dataclasses import dataclass, field
 from enum import Enum
+from typing import Callable
 
 
 class Easing(str, Enum):
@@ -32,33 +34,83 @@ class Easing(str, Enum):
     STEP = "step"  # Instant jump — useful for pose/face swaps
 
 
+# Backend code (automation, agents) writes snake_case easing names, the
+# frontend normalizes them in SceneGraphManager.ts — accept both here too.
+_EASING_ALIASES: dict[str, Easing] = {
+    "ease_in": Easing.EASE_IN,
+    "ease_out": Easing.EASE_OUT,
+    "ease_in_out": Easing.EASE_IN_OUT,
+    "ease_in_cubic": Easing.EASE_IN_CUBIC,
+    "ease_out_cubic": Easing.EASE_OUT_CUBIC,
+    "ease_in_out_cubic": Easing.EASE_IN_OUT_CUBIC,
+}
+
+
+def resolve_easing(name: str | Easing) -> Easing:
+    """Resolve an easing name (camelCase or snake_case) to an Easing.
+
+    Unknown names fall back to LINEAR, matching the frontend.
+    """
+    if isinstance(name, Easing):
+        return name
+    try:
+        return Easing(name)
+    except ValueError:
+        return _EASING_ALIASES.get(name, Easing.LINEAR)
+
+
+def _ease_linear(t: float) -> float:
+    return t
+
+
+def _ease_in(t: float) -> float:
+    return t * t
+
+
+def _ease_out(t: float) -> float:
+    return 1 - (1 - t) * (1 - t)
+
+
+def _ease_in_out(t: float) -> float:
+    return 3 * t * t - 2 * t * t * t  # smoothstep
+
+
+def _ease_in_cubic(t: float) -> float:
+    return t * t * t
+
+
+def _ease_out_cubic(t: float) -> float:
+    inv = 1 - t
+    return 1 - inv * inv * inv
+
+
+def _ease_in_out_cubic(t: float) -> float:
+    if t < 0.5:
+        return 4 * t * t * t
+    inv = -2 * t + 2
+    return 1 - inv * inv * inv / 2
+
+
+def _ease_step(t: float) -> float:
+    return 0.0 if t < 1.0 else 1.0
+
+
+EASING_FUNCTIONS: dict[Easing, Callable[[float], float]] = {
+    Easing.LINEAR: _ease_linear,
+    Easing.EASE_IN: _ease_in,
+    Easing.EASE_OUT: _ease_out,
+    Easing.EASE_IN_OUT: _ease_in_out,
+    Easing.EASE_IN_CUBIC: _ease_in_cubic,
+    Easing.EASE_OUT_CUBIC: _ease_out_cubic,
+    Easing.EASE_IN_OUT_CUBIC: _ease_in_out_cubic,
+    Easing.STEP: _ease_step,
+}
+
+
 def _apply_easing(t: float, easing: Easing) -> float:
     """Apply easing function to normalized time t (0.0 → 1.0)."""
     t = max(0.0, min(1.0, t))
-
-    if easing == Easing.LINEAR:
-        return t
-    elif easing == Easing.EASE_IN:
-        return t * t
-    elif easing == Easing.EASE_OUT:
-        return 1 - (1 - t) * (1 - t)
-    elif easing == Easing.EASE_IN_OUT:
-        return 3 * t * t - 2 * t * t * t  # smoothstep
-    elif easing == Easing.EASE_IN_CUBIC:
-        return t * t * t
-    elif easing == Easing.EASE_OUT_CUBIC:
-        inv = 1 - t
-        return 1 - inv * inv * inv
-    elif easing == Easing.EASE_IN_OUT_CUBIC:
-        if t < 0.5:
-            return 4 * t * t * t
-        else:
-            inv = -2 * t + 2
-            return 1 - inv * inv * inv / 2
-    elif easing == Easing.STEP:
-        return 0.0 if t < 1.0 else 1.0
-    else:
-        return t
+    return EASING_FUNCTIONS.get(easing, _ease_linear)(t)
 
 
 @dataclass
@@ -135,12 +187,7 @@ def interpolate_keyframes(keyframes: list[Keyframe], time: float) -> float:
             local_t = (time - kf_a.time) / segment_duration
 
             # Apply easing (from kf_a's easing)
-            try:
-                easing = Easing(kf_a.easing)
-            except ValueError:
-                easing = Easing.LINEAR
-
-            eased_t = _apply_easing(local_t, easing)
+            eased_t = _apply_easing(local_t, resolve_easing(kf_a.easing))
 
             # Lerp between values
             return kf_a.value + (kf_b.value - kf_a.value) * eased_t
@@ -149,6 +196,87 @@ def interpolate_keyframes(keyframes: list[Keyframe], time: float) -> float:
     return keyframes[-1].value
 
 
+# ══════════════════════════════════════════════
+#  COMPILED TRACKS — Fast repeated evaluation
+# ══════════════════════════════════════════════
+
+
+class CompiledTrack:
+    """A keyframe track flattened for fast repeated evaluation.
+
+    Times and values live in parallel lists and each segment's easing is
+    resolved to its function once, at compile time. Lookups bisect into
+    the time list (O(log n)) and remember the last segment, so sequential
+    playback usually resolves in O(1) without searching at all.
+
+    Produces exactly the same values as interpolate_keyframes() on a
+    time-sorted track.
+    """
+
+    __slots__ = ("times", "values", "easings", "_easing_fns", "_cursor")
+
+    def __init__(self, keyframes: list[Keyframe]):
+        # Stable sort: keyframes sharing a time keep their list order
+        ordered = sorted(keyframes, key=lambda kf: kf.time)
+        self.times: list[float] = [kf.time for kf in ordered]
+        self.values: list[float] = [kf.value for kf in ordered]
+        self.easings: list[Easing] = [resolve_easing(kf.easing) for kf in ordered]
+        self._easing_fns = [EASING_FUNCTIONS[e] for e in self.easings]
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def segment_index(self, time: float) -> int:
+        """Index i of the segment [times[i], times[i+1]] containing time.
+
+        Only meaningful for times strictly inside the track. Picks the
+        first segment whose end is >= time, like interpolate_keyframes().
+        """
+        times = self.times
+        i = self._cursor
+        # Fast path: same segment as last lookup, or the one right after
+        if i + 1 < len(times) and times[i] < time <= times[i + 1]:
+            return i
+        if i + 2 < len(times) and times[i + 1] < time <= times[i + 2]:
+            self._cursor = i + 1
+            return i + 1
+
+        i = bisect_left(times, time) - 1
+        self._cursor = i
+        return i
+
+    def evaluate(self, time: float) -> float:
+        """Evaluate the track at a given time (hold before/after the ends)."""
+        times = self.times
+        if not times:
+            return 0.0
+        if time <= times[0]:
+            return self.values[0]
+        if time >= times[-1]:
+            return self.values[-1]
+
+        i = self.segment_index(time)
+        t_a = times[i]
+        duration = times[i + 1] - t_a
+        v_a = self.values[i]
+        v_b = self.values[i + 1]
+        if duration <= 0:
+            return v_b
+
+        local_t = (time - t_a) / duration
+        eased_t = self._easing_fns[i](max(0.0, min(1.0, local_t)))
+        return v_a + (v_b - v_a) * eased_t
+
+    def __repr__(self) -> str:
+        return f"CompiledTrack({len(self.times)} keys)"
+
+
+def compile_track(keyframes: list[Keyframe]) -> CompiledTrack:
+    """Compile a keyframe list into a CompiledTrack."""
+    return CompiledTrack(keyframes)
+
+
 # ══════════════════════════════════════════════
 #  ANIMATABLE PROPERTIES — Standard property names
 # ══════════════════════════════════════════════
@@ -21,7 +21,7 @@ from typing import Any, Optional
 from backend.core.scene_graph.transform import Transform, BoundingBox
 from backend.core.scene_graph.keyframe import (
     Keyframe,
-    interpolate_keyframes,
+    CompiledTrack,
     ANIMATABLE_PROPERTIES,
 )
 
@@ -66,6 +66,11 @@ class SceneNode:
     # ── Auto-computed (like Manim bounding_box) ──
     bounding_box: Optional[BoundingBox] = None
 
+    # ── Evaluation cache: property → (track list, length, CompiledTrack) ──
+    _compiled_tracks: dict[str, tuple[list[Keyframe], int, CompiledTrack]] = field(
+        default_factory=dict, init=False, repr=False, compare=False,
+    )
+
     def __post_init__(self):
         if not self.id:
             self.id = f"{self.node_type}-{uuid.uuid4().hex[:8]}"
@@ -130,6 +135,7 @@ class SceneNode:
         track.sort(key=lambda kf: kf.time)
 
         self.keyframes[property_name] = track
+        self._compiled_tracks.pop(property_name, None)
 
     def remove_keyframe(self, property_name: str, time: float) -> None:
         """Remove a keyframe at a specific time."""
@@ -138,6 +144,33 @@ class SceneNode:
                 kf for kf in self.keyframes[property_name]
                 if abs(kf.time - time) > 0.001
             ]
+            self._compiled_tracks.pop(property_name, None)
+
+    def get_compiled_track(self, property_name: str) -> Optional[CompiledTrack]:
+        """Get the compiled form of a property's keyframe track.
+
+        Compiled tracks are cached and rebuilt automatically when the
+        track list is replaced or grows/shrinks. Code that edits a
+        Keyframe's fields in place must call invalidate_tracks().
+        """
+        track = self.keyframes.get(property_name)
+        if not track:
+            return None
+
+        cached = self._compiled_tracks.get(property_name)
+        if cached is not None and cached[0] is track and cached[1] == len(track):
+            return cached[2]
+
+        compiled = CompiledTrack(track)
+        self._compiled_tracks[property_name] = (track, len(track), compiled)
+        return compiled
+
+    def invalidate_tracks(self, property_name: Optional[str] = None) -> None:
+        """Drop cached compiled tracks (all, or just one property)."""
+        if property_name is None:
+            self._compiled_tracks.clear()
+        else:
+            self._compiled_tracks.pop(property_name, None)
 
     def get_value_at_time(self, property_name: str, time: float) -> float:
         """Get interpolated property value at a given time.
@@ -145,8 +178,9 @@ class SceneNode:
         If the property has keyframes, interpolate. Otherwise return
         the current static value.
         """
-        if property_name in self.keyframes and self.keyframes[property_name]:
-            return interpolate_keyframes(self.keyframes[property_name], time)
+        compiled = self.get_compiled_track(property_name)
+        if compiled is not None:
+            return compiled.evaluate(time)
 
         # Fall back to static value
         return self._get_static_value(property_name)
@@ -214,6 +214,26 @@ class SceneGraph:
             snapshots[node_id] = snapshot
         return snapshots
 
+    def evaluate_range(
+        self,
+        t0: float,
+        t1: float,
+        fps: Optional[float] = None,
+        properties: Optional[list[str]] = None,
+        node_ids: Optional[list[str]] = None,
+    ):
+        """Evaluate all nodes over every frame in [t0, t1) in one pass.
+
+        Batch counterpart of get_snapshot_at_time() for export/review
+        consumers. See backend.core.scene_graph.timeline.
+
+        Returns:
+            TimelineEvaluation with values of shape (nodes, properties, frames).
+        """
+        from backend.core.scene_graph.timeline import evaluate_range
+
+        return evaluate_range(self, t0, t1, fps=fps, properties=properties, node_ids=node_ids)
+
     # ══════════════════════════════════════════════
     #  AI DESCRIPTION (for LLM consumption)
     # ══════════════════════════════════════════════
@@ -497,10 +497,8 @@ class SceneToolExecutor:
         # Look up character info from asset registry to get pose/face URLs
         char_info = None
         if self.asset_registry:
-            char_info = self.asset_registry.get_character(char_id)
-            if not char_info:
-                # Try fuzzy match by name
-                char_info = self.asset_registry.find_character(char_id)
+            # Exact id first, then the ranked name index
+            char_info = self.asset_registry.find_character(char_id)
         
         # Build metadata with asset URLs for frontend rendering
         metadata = {}
@@ -508,19 +506,19 @@ class SceneToolExecutor:
         available_layers = {}
         
         if char_info:
-            # Pose URLs: { "站立": { "url": "/static/..." }, ... }
-            pose_urls = {}
-            for name, asset in char_info.poses.items():
-                pose_urls[name] = {"url": asset.url_path, "filename": asset.filename}
+            # Pose URLs: { "站立": { "url": "/static/...", "bbox": [...], "cropped": true }, ... }
+            # (bbox/cropped only for ingested pool assets cropped to their layer)
+            pose_urls = {name: asset.to_dict() for name, asset in char_info.poses.items()}
             
             # Face URLs
-            face_urls = {}
-            for name, asset in char_info.faces.items():
-                face_urls[name] = {"url": asset.url_path, "filename": asset.filename}
+            face_urls = {name: asset.to_dict() for name, asset in char_info.faces.items()}
             
             metadata["poseUrls"] = pose_urls
             metadata["faceUrls"] = face_urls
             metadata["characterFolder"] = char_info.relative_folder
+            if char_info.canvas_size:
+                # Canvas the cropped layers' bboxes refer to
+                metadata["canvasSize"] = list(char_info.canvas_size)
             
             # Set default pose/face
             if char_info.default_pose:
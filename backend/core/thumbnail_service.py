@@ -0,0 +1,280 @@
+"""
+Thumbnail Service — deferred, batched, multi-size asset thumbnails.
+
+Ingest used to render a 128×128 LANCZOS thumbnail for every extracted
+layer inline, in both psd_processor and psd_smart_parser. Thumbnails are
+now derived from the (already cropped) asset PNG in storage/assets, off
+the ingest path:
+
+    service = get_thumbnail_service()
+    service.prefetch(hashes)                         # after ingest, fire and forget
+    path = await asyncio.wrap_future(service.request(h, 256, "webp"))
+
+Requests for the same (hash, size, format) are coalesced into one render.
+Queued requests are rendered in batches on a thread pool (Pillow resizes
+and encodes with the GIL released); a batch opens each source image once
+for all the sizes asked of it. Results are cached on disk:
+
+    thumbnails/<hash>_thumb.png        128px PNG (the name clients already use)
+    thumbnails/<hash>_<size>.<png|webp>
+"""
+
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORAGE_DIR = os.path.join(BASE_DIR, "storage")
+
+DEFAULT_SIZE = 128
+MIN_SIZE = 16
+MAX_SIZE = 1024
+FORMATS = {"png": "PNG", "webp": "WEBP"}
+
+_NAME_RE = re.compile(r"^([0-9A-Za-z]+)_(thumb|\d+)\.(png|webp)$")
+
+
+def default_thumbnail_workers() -> int:
+    """Render threads: THUMBNAIL_WORKERS env var, default min(4, CPUs)."""
+    env = os.environ.get("THUMBNAIL_WORKERS", "")
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+    return min(4, os.cpu_count() or 1)
+
+
+def thumbnail_filename(img_hash: str, size: int = DEFAULT_SIZE, fmt: str = "png") -> str:
+    if size == DEFAULT_SIZE and fmt == "png":
+        return f"{img_hash}_thumb.png"
+    return f"{img_hash}_{size}.{fmt}"
+
+
+def parse_thumbnail_name(name: str) -> Optional[tuple[str, int, str]]:
+    """(hash, size, format) for a thumbnail filename, or None if it isn't one."""
+    match = _NAME_RE.match(name)
+    if not match:
+        return None
+    img_hash, size, fmt = match.groups()
+    return img_hash, DEFAULT_SIZE if size == "thumb" else int(size), fmt
+
+
+def render_thumbnail(image: Image.Image, dest_path: str, size: int, fmt: str) -> None:
+    """Write a size×size-bounded thumbnail of image (via a temp file)."""
+    thumb = image.copy()
+    thumb.thumbnail((size, size), Image.LANCZOS)
+    tmp_path = f"{dest_path}.{threading.get_ident()}.tmp"
+    try:
+        if fmt == "webp":
+            thumb.save(tmp_path, format="WEBP", quality=85, method=4)
+        else:
+            thumb.save(tmp_path, format="PNG")
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ThumbnailService:
+    """Coalescing, batching thumbnail renderer with a disk cache.
+
+    Args:
+        storage_dir: Storage root holding assets/ and thumbnails/.
+        workers: Render threads (default THUMBNAIL_WORKERS).
+        batch_size: Most requests handed to one render task.
+        batch_delay: Seconds to wait for more requests before dispatching.
+    """
+
+    def __init__(
+        self,
+        storage_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_size: int = 32,
+        batch_delay: float = 0.02,
+    ):
+        self.storage_dir = storage_dir or STORAGE_DIR
+        self.thumbnails_dir = os.path.join(self.storage_dir, "thumbnails")
+        self.workers = workers or default_thumbnail_workers()
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.rendered = 0
+        self._cond = threading.Condition()
+        # (hash, size, fmt) → Future; queued keys wait in _queue until dispatched
+        self._inflight: dict[tuple, Future] = {}
+        self._queue: OrderedDict[tuple, None] = OrderedDict()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ── Paths ──
+
+    def path(self, img_hash: str, size: int = DEFAULT_SIZE, fmt: str = "png") -> str:
+        return os.path.join(self.thumbnails_dir, thumbnail_filename(img_hash, size, fmt))
+
+    def source_path(self, img_hash: str) -> str:
+        return os.path.join(self.storage_dir, "assets", f"{img_hash}.png")
+
+    # ── Requests ──
+
+    def request(self, img_hash: str, size: int = DEFAULT_SIZE, fmt: str = "png") -> Future:
+        """Future resolving to the thumbnail's path once it exists on disk.
+
+        Fails with FileNotFoundError if the asset is not in the pool, and
+        ValueError for an unsupported size or format.
+        """
+        if fmt not in FORMATS or not MIN_SIZE <= size <= MAX_SIZE:
+            future: Future = Future()
+            future.set_exception(ValueError(f"Unsupported thumbnail {size}px {fmt}"))
+            return future
+        dest = self.path(img_hash, size, fmt)
+        if os.path.exists(dest):
+            future = Future()
+            future.set_result(dest)
+            return future
+
+        key = (img_hash, size, fmt)
+        with self._cond:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if self._closed:
+                raise RuntimeError("Thumbnail service is shut down")
+            future = Future()
+            self._inflight[key] = future
+            self._queue[key] = None
+            self._ensure_dispatcher()
+            self._cond.notify()
+        return future
+
+    def prefetch(self, hashes: Iterable[str], size: int = DEFAULT_SIZE, fmt: str = "png") -> int:
+        """Queue thumbnails in the background. Returns how many were not cached yet."""
+        queued = 0
+        for img_hash in dict.fromkeys(hashes):
+            if not os.path.exists(self.path(img_hash, size, fmt)):
+                self.request(img_hash, size, fmt)
+                queued += 1
+        return queued
+
+    def ensure(self, img_hash: str, size: int = DEFAULT_SIZE, fmt: str = "png",
+               timeout: Optional[float] = None) -> str:
+        """Blocking request(): the thumbnail path, rendering it first if needed."""
+        return self.request(img_hash, size, fmt).result(timeout)
+
+    def remove(self, img_hash: str) -> int:
+        """Delete every cached size of an asset's thumbnail. Returns files removed."""
+        removed = 0
+        for path in glob.glob(os.path.join(self.thumbnails_dir, f"{glob.escape(img_hash)}_*")):
+            if parse_thumbnail_name(os.path.basename(path)):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    # ── Dispatch ──
+
+    def _ensure_dispatcher(self) -> None:
+        # Called with _cond held
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnail")
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="thumbnail-dispatch", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            # Let a burst of requests (a whole PSD, a sidebar page) accumulate
+            time.sleep(self.batch_delay)
+            with self._cond:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    key, _ = self._queue.popitem(last=False)
+                    batch.append(key)
+                pool = self._pool
+            if batch and pool is not None:
+                try:
+                    pool.submit(self._render_batch, batch)
+                except RuntimeError:
+                    self._fail(batch, RuntimeError("Thumbnail service is shut down"))
+
+    def _render_batch(self, batch: list[tuple]) -> None:
+        by_hash: dict[str, list[tuple]] = {}
+        for key in batch:
+            by_hash.setdefault(key[0], []).append(key)
+        os.makedirs(self.thumbnails_dir, exist_ok=True)
+        for img_hash, keys in by_hash.items():
+            source = self.source_path(img_hash)
+            try:
+                with Image.open(source) as img:
+                    img.load()
+                    for key in keys:
+                        dest = self.path(*key)
+                        if not os.path.exists(dest):
+                            render_thumbnail(img, dest, key[1], key[2])
+                            self.rendered += 1
+                        self._resolve(key, result=dest)
+            except FileNotFoundError:
+                self._fail(keys, FileNotFoundError(f"Asset {img_hash} not found"))
+            except Exception as e:
+                logger.warning(f"Failed to generate thumbnail for {img_hash}: {e}")
+                self._fail(keys, e)
+
+    def _resolve(self, key: tuple, result=None, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            future = self._inflight.pop(key, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _fail(self, keys: list[tuple], error: BaseException) -> None:
+        for key in keys:
+            self._resolve(key, error=error)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            pending = list(self._queue)
+            self._queue.clear()
+            pool, self._pool = self._pool, None
+            self._cond.notify_all()
+        self._fail(pending, RuntimeError("Thumbnail service is shut down"))
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+_service: Optional[ThumbnailService] = None
+_service_lock = threading.Lock()
+
+
+def get_thumbnail_service() -> ThumbnailService:
+    """The process-wide thumbnail service for backend/storage."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ThumbnailService()
+    return _service
+
+
+def shutdown_thumbnail_service() -> None:
+    global _service
+    with _service_lock:
+        service, _service = _service, None
+    if service is not None:
+        service.shutdown()
@@ -0,0 +1,229 @@
+"""
+TTS Cache — persistent, content-addressed cache of synthesized lines.
+
+Scripts are edited and re-run many times, and every run used to
+re-synthesize every line. Segments are now stored once per
+
+    blake2b(API version | speaker | language | normalized text)
+
+    tts_cache/<key>.mp3     the audio Volcengine returned
+    tts_cache/<key>.json    {"duration": 1.234, "bytes": 18432, "text": "..."}
+
+so regenerating a script after changing one line synthesizes only that
+line. The measured duration is kept next to the audio, sparing the
+ffprobe call on hits. The cache is bounded (TTS_CACHE_MB env var, default
+512) and evicts least recently used segments; a hit bumps the segment's
+mtime, which is how recency survives restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORAGE_DIR = os.path.join(BASE_DIR, "storage")
+
+# Bump when the upstream API or the request format changes the audio
+TTS_API_VERSION = 1
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _default_max_bytes() -> int:
+    env = os.environ.get("TTS_CACHE_MB", "")
+    return int(env) * 1024 * 1024 if env.isdigit() else DEFAULT_MAX_BYTES
+
+
+def normalize_text(text: str) -> str:
+    """NFC with whitespace collapsed: what the synthesized audio depends on."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text: str, speaker: str, language: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{TTS_API_VERSION}|{speaker}|{language}|{normalize_text(text)}".encode("utf-8"))
+    return h.hexdigest()
+
+
+@dataclass
+class CachedSegment:
+    key: str
+    path: str
+    size: int
+    duration: Optional[float] = None
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class TTSCache:
+    """Size-bounded LRU disk cache of synthesized segments.
+
+    Args:
+        cache_dir: Segment directory (created if missing).
+        max_bytes: Audio byte budget (default: TTS_CACHE_MB).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes if max_bytes is not None else _default_max_bytes()
+        self._entries: OrderedDict[str, CachedSegment] = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.mp3", f"{base}.json"
+
+    def _load(self) -> None:
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".mp3"):
+                continue
+            key = entry.name[:-4]
+            meta_path = self._paths(key)[1]
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                st = entry.stat()
+            except (OSError, ValueError):
+                self._delete_files(key)  # half-written segment
+                continue
+            found.append((st.st_mtime, CachedSegment(key, entry.path, st.st_size, meta.get("duration"))))
+        for _, segment in sorted(found, key=lambda item: item[0]):
+            self._entries[segment.key] = segment
+            self.current_bytes += segment.size
+        with self._lock:
+            self._evict()
+        if found:
+            logger.info(f"[TTSCache] {len(self._entries)} segments, {self.current_bytes / 1e6:.1f} MB")
+
+    def _delete_files(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes and self._entries:
+            key, segment = self._entries.popitem(last=False)
+            self.current_bytes -= segment.size
+            self.evictions += 1
+            self._delete_files(key)
+
+    def get(self, text: str, speaker: str, language: str) -> Optional[CachedSegment]:
+        """The cached segment for a line, or None (counted as a miss)."""
+        key = cache_key(text, speaker, language)
+        with self._lock:
+            segment = self._entries.get(key)
+            if segment is None or not os.path.exists(segment.path):
+                if segment is not None:
+                    self._entries.pop(key)
+                    self.current_bytes -= segment.size
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(segment.path)
+        except OSError:
+            pass
+        return segment
+
+    def put(
+        self,
+        text: str,
+        speaker: str,
+        language: str,
+        audio: bytes,
+        duration: Optional[float] = None,
+    ) -> CachedSegment:
+        """Store a freshly synthesized line."""
+        key = cache_key(text, speaker, language)
+        audio_path, meta_path = self._paths(key)
+        tmp_path = f"{audio_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, audio_path)
+        self._write_meta(meta_path, text, len(audio), duration)
+
+        segment = CachedSegment(key, audio_path, len(audio), duration)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+            self._entries[key] = segment
+            self.current_bytes += segment.size
+            self._evict()
+        return segment
+
+    def set_duration(self, key: str, duration: float) -> None:
+        """Record a segment's measured duration."""
+        with self._lock:
+            segment = self._entries.get(key)
+            if segment is None or segment.duration == duration:
+                return
+            segment.duration = duration
+        meta_path = self._paths(key)[1]
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self._write_meta(meta_path, meta.get("text", ""), segment.size, duration)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[TTSCache] Could not record duration for {key}: {e}")
+
+    def _write_meta(self, meta_path: str, text: str, size: int, duration: Optional[float]) -> None:
+        tmp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"duration": duration, "bytes": size, "text": text, "created": time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._delete_files(key)
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+_cache: Optional[TTSCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """The process-wide cache under storage/tts_cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache(os.path.join(STORAGE_DIR, "tts_cache"))
+        return _cache
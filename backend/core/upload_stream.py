@@ -0,0 +1,172 @@
+"""
+Upload Stream — write multipart file uploads to disk as the bytes arrive.
+
+FastAPI's `UploadFile` parameters are only available once the whole
+multipart body has been received (and spooled to temp files), and the
+PSD routes then copied every spooled file again with
+shutil.copyfileobj on the event loop. For multi-gigabyte batches nothing
+started until the last byte of the last file was in.
+
+`iter_uploaded_files(request, dest_dir)` parses the request body with
+python-multipart's streaming parser, writes each file part to disk in a
+worker thread chunk by chunk, and yields it the moment that part is
+complete — so the caller can start processing file 1 while file 2 is
+still uploading.
+
+    async for part in iter_uploaded_files(request, UPLOADS_DIR, accept=is_psd):
+        if part.path:
+            asyncio.create_task(ingest(part.path))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UploadedPart:
+    """A completed file part. path is None when the file was not accepted."""
+
+    field_name: str
+    filename: str
+    path: Optional[str] = None
+    size: int = 0
+
+
+class UploadStreamError(ValueError):
+    """The request body is not a parsable multipart/form-data upload."""
+
+
+class _PartWriter:
+    def __init__(self, field_name: str, filename: str, path: Optional[str]):
+        self.part = UploadedPart(field_name=field_name, filename=filename, path=path)
+        self.tmp_path = f"{path}.part" if path else None
+        self.file = open(self.tmp_path, "wb") if self.tmp_path else None
+
+    def write(self, data: bytes) -> None:
+        self.part.size += len(data)
+        if self.file is not None:
+            self.file.write(data)
+
+    def finish(self) -> UploadedPart:
+        if self.file is not None:
+            self.file.close()
+            os.replace(self.tmp_path, self.part.path)
+        return self.part
+
+    def abort(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+def _content_disposition(headers: dict) -> tuple[str, Optional[str]]:
+    _, options = parse_options_header(headers.get(b"content-disposition", b""))
+    name = options.get(b"name", b"").decode("utf-8", "replace")
+    filename = options.get(b"filename")
+    return name, filename.decode("utf-8", "replace") if filename is not None else None
+
+
+async def iter_uploaded_files(
+    request,
+    dest_dir: str,
+    accept: Optional[Callable[[str], bool]] = None,
+    name_prefix: str = "",
+) -> AsyncIterator[UploadedPart]:
+    """Stream a multipart request's file parts to dest_dir, yielding each when complete.
+
+    Files are saved as dest_dir/<name_prefix><basename of the client
+    filename> (written to a ".part" file first). Parts rejected by
+    accept(filename) are drained without being written and yielded with
+    path=None. Non-file form fields are ignored.
+
+    Raises UploadStreamError for a non-multipart body; a client disconnect
+    propagates after the partially written file is removed.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadStreamError("Expected a multipart/form-data upload")
+
+    # Parser callbacks only queue events; file I/O happens off the event loop below
+    events: list[tuple] = []
+    headers: dict[bytes, bytes] = {}
+    header_field = bytearray()
+    header_value = bytearray()
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        events.append(("begin", dict(headers)))
+
+    def on_part_data(data, start, end):
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    os.makedirs(dest_dir, exist_ok=True)
+    current: Optional[_PartWriter] = None
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                parser.write(chunk)
+            pending, events[:] = list(events), []
+            buffered: list[bytes] = []
+            for kind, payload in pending:
+                if kind == "begin":
+                    name, filename = _content_disposition(payload)
+                    if filename is None:
+                        current = None  # plain form field
+                        continue
+                    filename = os.path.basename(filename.replace("\\", "/"))
+                    path = None
+                    if filename and (accept is None or accept(filename)):
+                        path = os.path.join(dest_dir, f"{name_prefix}{filename}")
+                    current = await asyncio.to_thread(_PartWriter, name, filename, path)
+                elif kind == "data" and current is not None:
+                    buffered.append(payload)
+                elif kind == "end" and current is not None:
+                    if buffered:
+                        await asyncio.to_thread(current.write, b"".join(buffered))
+                        buffered = []
+                    part = await asyncio.to_thread(current.finish)
+                    current = None
+                    yield part
+            if buffered and current is not None:
+                await asyncio.to_thread(current.write, b"".join(buffered))
+        parser.finalize()
+    finally:
+        if current is not None:
+            current.abort()
@@ -19,10 +19,9 @@ from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from backend.core.database import init_db
-from backend.core.psd_processor import load_db
 
 # Import routers
-from backend.routers import projects, psd, psd_v2, assets, library, export, ai, backgrounds, foregrounds, stages, tts, scene_graph, automation, auto_video
+from backend.routers import projects, psd, psd_v2, assets, library, export, ai, backgrounds, foregrounds, stages, tts, scene_graph, automation, auto_video, thumbnails, characters
 
 # Set up logging configuration
 logging.basicConfig(
@@ -53,15 +52,23 @@ async def lifespan(app: FastAPI):
     # Initialize database on startup
     init_db()
     logger.info("Database initialized successfully")
+    # One-time import of the legacy JSON character libraries
+    from backend.core import character_store, psd_processor, psd_processor_v2
+    character_store.migrate_json_db("v1", psd_processor.DB_PATH)
+    character_store.migrate_json_db("v2", psd_processor_v2.DB_V2_PATH)
     # Share asset registry with automation router
-    from backend.routers.scene_graph import _registry
+    from backend.routers.scene_graph import _registry, start_registry_sync, stop_registry_sync
     automation.set_registry(_registry)
     auto_video.set_registry(_registry)
     logger.info("Asset registry shared with automation + auto_video routers")
+    await start_registry_sync()
     yield
+    stop_registry_sync()
     # Cleanup
     psd.shutdown_psd_executor()
     psd_v2.shutdown_psd_v2_executor()
+    from backend.core.thumbnail_service import shutdown_thumbnail_service
+    shutdown_thumbnail_service()
 
 app = FastAPI(title="Anime Studio Builder API", lifespan=lifespan)
 
@@ -91,8 +98,7 @@ os.makedirs(os.path.join(STORAGE_DIR, "assets"), exist_ok=True)
 app.mount("/assets", StaticFiles(directory=os.path.join(STORAGE_DIR, "assets")), name="assets")
 app.mount("/s_assets", StaticFiles(directory=os.path.join(STORAGE_DIR, "assets")), name="s_assets_bypass")
 
-# Mount thumbnails
-app.mount("/thumbnails", StaticFiles(directory=THUMBNAILS_DIR), name="thumbnails")
+# Thumbnails (/thumbnails/<hash>_thumb.png, any size / WebP) are rendered on demand by the thumbnails router
 
 
 # ── Core endpoints (kept in main) ──
@@ -102,16 +108,11 @@ async def serve_frontend():
     """Serve the main frontend HTML file at the root URL."""
     return FileResponse(os.path.join(FRONTEND_DIR, "index.html"))
 
-@app.get("/api/characters/")
-async def get_characters():
-    """Returns the database.json array."""
-    data = load_db()
-    return JSONResponse(content=data)
-
 
 # ── Register all routers ──
 
 app.include_router(projects.router)
+app.include_router(characters.router)
 app.include_router(psd.router)
 app.include_router(psd_v2.router)
 app.include_router(assets.router)
@@ -125,6 +126,7 @@ app.include_router(tts.router)
 app.include_router(scene_graph.router)
 app.include_router(automation.router)
 app.include_router(auto_video.router)
+app.include_router(thumbnails.router)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+"""add_character_tables
+
+Revision ID: 7b2d4e91c6a3
+Revises: c3a9f1b27d40
+Create Date: 2026-10-17 14:03:27.518240
+
+Characters, their layer groups and layers move out of database.json /
+database_v2.json into indexed tables (core/character_store.py). The JSON
+files are imported into them at startup by character_store.migrate_json_db(),
+not here.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2d4e91c6a3'
+down_revision: Union[str, Sequence[str], None] = 'c3a9f1b27d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'characters',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('pipeline', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('pipeline', 'name', name='uq_characters_pipeline_name'),
+    )
+    op.create_index('ix_characters_pipeline_position', 'characters', ['pipeline', 'position'], unique=False)
+
+    op.create_table(
+        'character_layer_groups',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('character_id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['character_id'], ['characters.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_character_layer_groups_character_id'), 'character_layer_groups', ['character_id'], unique=False)
+
+    op.create_table(
+        'character_layers',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('character_id', sa.String(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('hash', sa.String(), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['group_id'], ['character_layer_groups.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['character_id'], ['characters.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_character_layers_character_id'), 'character_layers', ['character_id'], unique=False)
+    op.create_index(op.f('ix_character_layers_group_id'), 'character_layers', ['group_id'], unique=False)
+    op.create_index(op.f('ix_character_layers_hash'), 'character_layers', ['hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_character_layers_hash'), table_name='character_layers')
+    op.drop_index(op.f('ix_character_layers_group_id'), table_name='character_layers')
+    op.drop_index(op.f('ix_character_layers_character_id'), table_name='character_layers')
+    op.drop_table('character_layers')
+    op.drop_index(op.f('ix_character_layer_groups_character_id'), table_name='character_layer_groups')
+    op.drop_table('character_layer_groups')
+    op.drop_index('ix_characters_pipeline_position', table_name='characters')
+    op.drop_table('characters')
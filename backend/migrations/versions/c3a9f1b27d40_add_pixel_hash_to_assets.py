@@ -0,0 +1,78 @@
+"""add_pixel_hash_to_assets
+
+Revision ID: c3a9f1b27d40
+Revises: 41fd082d9804
+Create Date: 2026-10-17 10:12:41.208311
+
+Assets used to be keyed by the SHA-256 of a PNG re-encode of the layer;
+new ingests hash raw pixels instead (image_hasher.calculate_pixel_hash).
+This adds assets.pixel_hash and backfills it for existing rows from the
+stored files, so dedup lookups (hash_sha256 OR pixel_hash) keep matching
+old assets. Legacy files are full-canvas padded PNGs while new ingests
+hash the layer cropped to its visible pixels plus its canvas offset, so
+each file is cropped to its alpha bbox the same way before hashing.
+hash_sha256 itself is left untouched — it is also the asset filename
+referenced from the character databases.
+"""
+import logging
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9f1b27d40'
+down_revision: Union[str, Sequence[str], None] = '41fd082d9804'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger(__name__)
+
+STORAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "storage")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('assets', sa.Column('pixel_hash', sa.String(), nullable=True))
+    op.create_index(op.f('ix_assets_pixel_hash'), 'assets', ['pixel_hash'], unique=False)
+    backfill_pixel_hashes(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_assets_pixel_hash'), table_name='assets')
+    op.drop_column('assets', 'pixel_hash')
+
+
+def backfill_pixel_hashes(bind, storage_dir: str = STORAGE_DIR) -> int:
+    """Compute pixel_hash for rows that lack one. Missing/unreadable files are skipped.
+
+    Each stored image is treated as a layer padded to a canvas of its own
+    size and cropped with crop_layer_image(), so the hash equals the one a
+    re-ingest of the same layer produces (calculate_hash_from_layer).
+    """
+    from PIL import Image
+    from backend.core.image_hasher import calculate_hash_from_layer
+    from backend.core.layer_image import crop_layer_image
+
+    assets = sa.table('assets', sa.column('id', sa.String), sa.column('file_path', sa.String),
+                      sa.column('pixel_hash', sa.String))
+    rows = bind.execute(sa.select(assets.c.id, assets.c.file_path).where(assets.c.pixel_hash.is_(None))).fetchall()
+    updated = skipped = 0
+    for asset_id, file_path in rows:
+        path = os.path.join(storage_dir, file_path or "")
+        try:
+            with Image.open(path) as img:
+                layer = crop_layer_image(img, 0, 0, img.width, img.height)
+            pixel_hash = calculate_hash_from_layer(layer.image, layer.left, layer.top)
+        except Exception as e:
+            logger.debug(f"Skipping pixel hash for asset {asset_id} ({file_path}): {e}")
+            skipped += 1
+            continue
+        bind.execute(assets.update().where(assets.c.id == asset_id).values(pixel_hash=pixel_hash))
+        updated += 1
+    if skipped:
+        logger.warning(f"pixel_hash backfill: {skipped} assets skipped (file missing or unreadable)")
+    return updated
@@ -10,7 +10,6 @@ from sqlalchemy.orm import Session
 
 from backend.core.database import get_db
 from backend.core.models import Asset, AssetVersion
-from backend.core.psd_processor import load_db
 from backend.core.library_manager import load_library
 
 logger = logging.getLogger(__name__)
@@ -89,7 +88,7 @@ async def list_trash(db: Session = Depends(get_db)):
 async def purge_asset(asset_hash: str, db: Session = Depends(get_db)):
     """
     Permanently delete a trashed asset. Cascade removes:
-    - SQLite row, asset file, thumbnail, database.json refs, custom_library.json refs.
+    - SQLite row, asset file, thumbnail, character layer refs, custom_library.json refs.
     """
     asset = db.query(Asset).filter(Asset.hash_sha256 == asset_hash).first()
     if not asset:
@@ -105,26 +104,13 @@ async def purge_asset(asset_hash: str, db: Session = Depends(get_db)):
     if os.path.exists(asset_file):
         os.remove(asset_file)
 
-    # Remove thumbnail
-    thumb_file = os.path.join(THUMBNAILS_DIR, f"{asset_hash}_thumb.png")
-    if os.path.exists(thumb_file):
-        os.remove(thumb_file)
-
-    # Cascade remove from database.json (characters)
-    char_db = load_db()
-    modified = False
-    for char in char_db:
-        for group_name, layers in char.get("layer_groups", {}).items():
-            original_len = len(layers)
-            char["layer_groups"][group_name] = [
-                l for l in layers if l.get("hash") != asset_hash
-            ]
-            if len(char["layer_groups"][group_name]) < original_len:
-                modified = True
-
-    if modified:
-        from backend.core.psd_processor import save_db as save_char_db
-        save_char_db(char_db)
+    # Remove thumbnails (every cached size)
+    from backend.core.thumbnail_service import get_thumbnail_service
+    get_thumbnail_service().remove(asset_hash)
+
+    # Cascade remove from characters (indexed by hash)
+    from backend.core.character_store import remove_layers_by_hash
+    remove_layers_by_hash("v1", asset_hash)
 
     # Cascade remove from custom_library.json
     lib = load_library()
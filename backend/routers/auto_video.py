@@ -98,25 +98,16 @@ def _auto_map_characters(
     3. If no match, round-robin assign from available characters
     """
     char_map: dict[str, str] = {}
-    available_chars = registry.list_characters()
+    available_ids = list(registry.characters)
     
-    if not available_chars:
+    if not available_ids:
         logger.warning("[AutoVideo] No characters available in registry!")
         return char_map
 
-    # Build lookup index: lowercase name → char_id
-    char_index: dict[str, str] = {}
-    for info in available_chars:
-        char_id = info["id"]
-        char_name_lower = info["name"].lower().replace("_", " ")
-        char_index[char_name_lower] = char_id
-        # Also index by parts of name (e.g. "Hoa_NuSinh" → "hoa", "nusinh")
-        for part in char_name_lower.split():
-            if len(part) >= 2:
-                char_index[part] = char_id
+    # Ranked id / name / token / n-gram lookup, one index query per distinct name
+    matches = registry.resolve_names(name for name in script_names if name not in manual_map)
 
     used_chars = set()
-    available_ids = [c["id"] for c in available_chars]
     round_robin_idx = 0
 
     for name in script_names:
@@ -127,18 +118,10 @@ def _auto_map_characters(
             continue
 
         # 2. Exact/fuzzy match
-        name_lower = name.lower().strip()
-        matched = False
-        
-        # Try exact match first
-        for key, char_id in char_index.items():
-            if name_lower == key or name_lower in key or key in name_lower:
-                char_map[name] = char_id
-                used_chars.add(char_id)
-                matched = True
-                break
-        
-        if matched:
+        match = matches.get(name)
+        if match is not None:
+            char_map[name] = match.id
+            used_chars.add(match.id)
             continue
 
         # 3. Round-robin from unused characters
@@ -416,19 +399,26 @@ async def generate_auto_video(req: AutoVideoRequest):
         log_step("tts", "Generating TTS audio...")
 
         try:
-            # Generate TTS for each scene separately for proper timing
+            # Generate TTS for each scene separately for proper timing; scenes are
+            # requested together and the TTS engine bounds/rate-limits the lines
+            scene_texts: dict[int, list[str]] = {}
             for i, section in enumerate(sections):
-                scene_lines = section["lines"]
-                dialogue_texts = []
-                for line in scene_lines:
-                    text = line.text if isinstance(line, ScriptLine) else line["text"]
-                    dialogue_texts.append(text)
-
-                if not dialogue_texts:
+                dialogue_texts = [
+                    line.text if isinstance(line, ScriptLine) else line["text"]
+                    for line in section["lines"]
+                ]
+                if dialogue_texts:
+                    scene_texts[i] = dialogue_texts
+
+            scene_results = await asyncio.gather(*(
+                _generate_tts_batch("\n".join(texts), req.voice, req.pause_ms)
+                for texts in scene_texts.values()
+            ), return_exceptions=True)
+
+            for (i, dialogue_texts), tts_result in zip(scene_texts.items(), scene_results):
+                if isinstance(tts_result, Exception):
+                    log_step("tts", f"Scene {i+1}: TTS failed (continuing without audio): {tts_result}")
                     continue
-
-                all_text = "\n".join(dialogue_texts)
-                tts_result = await _generate_tts_batch(all_text, req.voice, req.pause_ms)
                 tts_results_per_scene[i] = tts_result.get("lines", [])
                 tts_lines_all.extend(tts_result.get("lines", []))
 
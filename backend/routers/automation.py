@@ -427,11 +427,12 @@ def build_scene_from_script(
                         return int(m.group(1)) if m else 0
                     element_files.sort(key=get_idx)
 
+                    from backend.core.image_cache import get_image_cache
+                    image_cache = get_image_cache()
                     layer_images = []
                     for fname in element_files:
                         fpath = os.path.join(STAGES_DIR, fname)
-                        with open(fpath, "rb") as f:
-                            img_b64 = b64mod.b64encode(f.read()).decode("utf-8")
+                        img_b64 = b64mod.b64encode(image_cache.get_bytes(fpath)).decode("utf-8")
                         idx = get_idx(fname)
                         layer_images.append({
                             "id": f"element_{idx}",
@@ -495,9 +496,7 @@ def build_scene_from_script(
             logger.warning(f"No mapping for character '{char_name}', skipping")
             continue
 
-        char_info = registry.get_character(char_id)
-        if not char_info:
-            char_info = registry.find_character(char_id)
+        char_info = registry.find_character(char_id)
         if not char_info:
             logger.warning(f"Character '{char_id}' not found in registry")
             continue
@@ -602,6 +601,8 @@ def build_scene_from_script(
 
     # ── Step 2: Cinematic staging per line ──
     current_time = 0.0
+    # TTS results carry their script line index; lines that failed synthesis are absent
+    tts_by_line = {tts.get("index", n): tts for n, tts in enumerate(tts_lines or [])}
     last_speaker = None
     line_idx_per_char: dict[str, int] = {}  # Count lines spoken per character
 
@@ -636,9 +637,10 @@ def build_scene_from_script(
             pose = _pick_available(pose_choice, available_poses)
 
         # ── Timing ──
-        if tts_lines and idx < len(tts_lines):
-            start_time = tts_lines[idx].get("start_time", current_time)
-            end_time = tts_lines[idx].get("end_time", start_time + 2.0)
+        tts_line = tts_by_line.get(idx)
+        if tts_line:
+            start_time = tts_line.get("start_time", current_time)
+            end_time = tts_line.get("end_time", start_time + 2.0)
         else:
             duration = max(1.5, len(line.text) * 0.1)
             start_time = current_time
@@ -0,0 +1,64 @@
+"""
+Character library API: cached listing with ETags, plus a change feed.
+
+Listings are served from character_store's pre-serialized cache, which is
+only rebuilt after an ingest or purge writes; clients that send the last
+ETag back in If-None-Match get a 304. Instead of polling the listing,
+clients can long-poll the change feed:
+
+    GET /api/characters/changes?since=0          → {"version": 12, "changes": []}
+    GET /api/characters/changes?since=12         → waits for the next write
+"""
+import logging
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import JSONResponse, Response
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["characters"])
+
+
+def characters_response(request: Request, pipeline: str, limit: int | None, offset: int) -> Response:
+    """Cached listing of one pipeline's characters, honouring If-None-Match."""
+    from backend.core.character_store import cached_listing
+
+    etag, body = cached_listing(pipeline, limit, offset)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/api/characters/")
+async def get_characters(
+    request: Request,
+    limit: int | None = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+):
+    """Returns the v1 characters (all, or one page with limit/offset)."""
+    return characters_response(request, "v1", limit, offset)
+
+
+@router.get("/api/characters/changes")
+async def get_character_changes(
+    since: int = Query(0, ge=0, description="Last version seen; 0 returns the current version at once"),
+    timeout: float = Query(25.0, ge=0, le=60, description="Seconds to wait for a change"),
+):
+    """
+    Long-poll the character change feed (v1 and v2).
+    Returns {version, changes: [{version, pipeline, op, name, id}], reset}.
+    reset=true means changes after `since` are no longer retained: refetch
+    the listings and continue from `version`.
+    """
+    from backend.core.character_store import changes
+
+    if since == 0:
+        return JSONResponse(content={"version": changes.version, "changes": [], "reset": False})
+    found = await changes.wait(since, timeout)
+    return JSONResponse(content={
+        "version": changes.version,
+        "changes": found or [],
+        "reset": found is None,
+    })
@@ -1,12 +1,32 @@
 """
 Video Export Engine: chunked frame upload + FFmpeg stitching.
+
+Two modes for browser-rendered frames:
+  - default:   chunks are written to temp_render/<job>/frame_%04d.png and
+               stitched by FFmpeg on /finish
+  - streaming: chunks are piped into a running FFmpeg as they arrive
+               (reordered by frame index) — no temp PNGs on disk
+
+Frames can be uploaded as JSON base64 (/chunk) or as raw binary frame
+records, over HTTP (/chunk-binary) or a WebSocket (/ws/{renderJobId}):
+
+    record = uint32 frame index | uint32 byte length | PNG bytes   (little-endian)
+
+Also renders VideoProject/SceneGraph JSON on the server (headless
+compositor) for exports that don't need a browser tab.
+
+Encodes run as background jobs (core/render/encode_jobs.py) so FFmpeg never
+blocks the event loop; progress is at /jobs/{id} and the MP4 at
+/jobs/{id}/download.
 """
+import asyncio
 import os
-import shutil
 import logging
-import subprocess
+import struct
+import time
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse, FileResponse
 from pydantic import BaseModel
 
@@ -26,6 +46,7 @@ router = APIRouter(prefix="/api/export", tags=["export"])
 class ExportStartRequest(BaseModel):
     totalFrames: int
     fps: int = 30
+    streaming: bool = False  # Pipe chunks straight into FFmpeg instead of temp PNGs
 
 
 class ExportChunkRequest(BaseModel):
@@ -38,6 +59,292 @@ class ExportChunkRequest(BaseModel):
 class ExportFinishRequest(BaseModel):
     renderJobId: str
     fps: int = 30
+    background: bool = False  # Return immediately; poll /jobs/{id} and fetch /jobs/{id}/download
+
+
+class ExportRenderRequest(BaseModel):
+    project: dict  # VideoProject JSON (as returned by /api/auto-video/generate) or a single SceneGraph
+    fps: Optional[int] = None  # Defaults to the first scene's fps
+    background: bool = False  # Same as ExportFinishRequest.background
+
+
+# ── Binary frame protocol ──
+
+FRAME_HEADER = struct.Struct("<II")  # frame index, payload length
+
+
+def parse_frame_records(data: bytes) -> list[tuple[int, bytes]]:
+    """Split a binary chunk into (frame_index, payload) records.
+
+    Raises ValueError on a truncated record.
+    """
+    view = memoryview(data)
+    records = []
+    pos = 0
+    while pos < len(view):
+        if pos + FRAME_HEADER.size > len(view):
+            raise ValueError(f"Truncated frame header at byte {pos}")
+        index, length = FRAME_HEADER.unpack_from(view, pos)
+        pos += FRAME_HEADER.size
+        if pos + length > len(view):
+            raise ValueError(f"Frame {index} truncated: expected {length} bytes, got {len(view) - pos}")
+        records.append((index, bytes(view[pos:pos + length])))
+        pos += length
+    return records
+
+
+def encode_frame_records(frames: list[tuple[int, bytes]]) -> bytes:
+    """Inverse of parse_frame_records (used by server-side clients and tests)."""
+    return b"".join(FRAME_HEADER.pack(index, len(data)) + data for index, data in frames)
+
+
+# ── Helpers ──
+
+def _load_render_target(data: dict):
+    """Build a VideoProject (multi-scene) or SceneGraph from JSON.
+
+    Returns (target, default_fps).
+    """
+    from backend.core.scene_graph.scene import SceneGraph
+    from backend.core.scene_graph.video_project import VideoProject
+
+    if "scenes" in data:
+        project = VideoProject.from_dict(data)
+        return project, (project.scenes[0].fps if project.scenes else 30)
+    graph = SceneGraph.from_dict(data)
+    return graph, graph.fps
+
+
+def default_stream_idle_seconds() -> float:
+    """Idle time before an abandoned streaming export is killed:
+    EXPORT_STREAM_IDLE_SECONDS env var, default 300."""
+    try:
+        value = float(os.environ.get("EXPORT_STREAM_IDLE_SECONDS", 300))
+    except ValueError:
+        return 300.0
+    return value if value > 0 else 300.0
+
+
+def default_stream_buffer_bytes() -> int:
+    """Out-of-order frame bytes a streaming export may buffer:
+    EXPORT_STREAM_BUFFER_MB env var, default 256 MB."""
+    env = os.environ.get("EXPORT_STREAM_BUFFER_MB", "")
+    mb = int(env) if env.isdigit() and int(env) > 0 else 256
+    return mb * 1024 * 1024
+
+
+class _StreamingJob:
+    """A browser export whose frames are piped into FFmpeg as chunks arrive.
+
+    Chunks may arrive out of order, so frames are buffered by global index
+    and only the contiguous run starting at next_frame is written. The
+    buffer is capped at max_buffer_bytes; a chunk that would overflow it is
+    rejected (409) and can be resent once the gap before it is filled.
+    A job that receives nothing for idle_seconds is killed and dropped,
+    so an abandoned export doesn't leak its FFmpeg process.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        total_frames: int,
+        fps: int,
+        idle_seconds: Optional[float] = None,
+        max_buffer_bytes: Optional[int] = None,
+    ):
+        from backend.core.render.ffmpeg_pipe import FFmpegPipeWriter
+
+        self.job_id = job_id
+        self.total_frames = total_frames
+        self.output_path = os.path.join(EXPORTS_DIR, f"export_{job_id}.mp4")
+        self.writer = FFmpegPipeWriter(self.output_path, fps=fps, input_format="png", ffmpeg_path=FFMPEG_PATH)
+        self.next_frame = 0
+        self.pending: dict[int, bytes] = {}
+        self.pending_bytes = 0
+        self.lock = asyncio.Lock()
+        self.idle_seconds = idle_seconds or default_stream_idle_seconds()
+        self.max_buffer_bytes = max_buffer_bytes or default_stream_buffer_bytes()
+        self.last_activity = time.monotonic()
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+
+    def start(self) -> None:
+        """Start FFmpeg and the idle timer (call from the event loop)."""
+        self.writer.start()
+        self._schedule_idle_check(self.idle_seconds)
+
+    def _schedule_idle_check(self, delay: float) -> None:
+        self._idle_timer = asyncio.get_running_loop().call_later(delay, self._check_idle)
+
+    def _check_idle(self) -> None:
+        idle = time.monotonic() - self.last_activity
+        if idle < self.idle_seconds or self.lock.locked():
+            # A chunk is being written right now: look again a full period later
+            self._schedule_idle_check(max(self.idle_seconds - idle, 0) or self.idle_seconds)
+            return
+        if _streaming_jobs.get(self.job_id) is not self:
+            return  # already finished or failed
+        _streaming_jobs.pop(self.job_id, None)
+        logger.warning(f"[Export {self.job_id}] No frames for {idle:.0f}s — aborting streaming export")
+        asyncio.get_running_loop().run_in_executor(None, self.abort)
+
+    def abort(self) -> None:
+        """Kill FFmpeg and drop buffered frames."""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        self.pending.clear()
+        self.pending_bytes = 0
+        self.writer.abort()
+
+    def _write_all(self, frames: list[bytes]) -> None:
+        for frame in frames:
+            self.writer.write(frame)
+
+    async def add_frames(self, frames: list[tuple[int, bytes]]) -> int:
+        """Buffer (index, PNG) frames and pipe every frame that is now in order. Returns frames encoded.
+
+        Raises HTTPException(409) if the out-of-order frames would exceed
+        max_buffer_bytes; none of the chunk's unwritten frames are kept then.
+        """
+        async with self.lock:
+            self.last_activity = time.monotonic()
+            added = []
+            for index, data in frames:
+                if index >= self.next_frame and index not in self.pending:
+                    self.pending[index] = data
+                    self.pending_bytes += len(data)
+                    added.append(index)
+            ready = []
+            while self.next_frame in self.pending:
+                data = self.pending.pop(self.next_frame)
+                self.pending_bytes -= len(data)
+                ready.append(data)
+                self.next_frame += 1
+            if self.pending_bytes > self.max_buffer_bytes:
+                for index in added:
+                    if index in self.pending:
+                        self.pending_bytes -= len(self.pending.pop(index))
+            if ready:
+                # stdin writes block while FFmpeg is busy — keep them off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, self._write_all, ready)
+                self.last_activity = time.monotonic()
+            if any(index >= self.next_frame and index not in self.pending for index in added):
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Too many frames buffered ahead of frame {self.next_frame}; resend after it arrives",
+                )
+            return len(ready)
+
+    def missing_frame_error(self) -> Optional[HTTPException]:
+        """The 400 for /finish while frames are still missing (call under lock)."""
+        if not self.pending:
+            return None
+        return HTTPException(
+            status_code=400,
+            detail=f"Frame {self.next_frame} never arrived ({len(self.pending)} frames buffered)",
+        )
+
+    async def finish(self) -> str:
+        async with self.lock:
+            error = self.missing_frame_error()
+            if error is not None:
+                raise error
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+            return await asyncio.get_running_loop().run_in_executor(None, self.writer.close)
+
+
+# Streaming export jobs by render job ID
+_streaming_jobs: dict[str, _StreamingJob] = {}
+
+
+def _decode_b64_frames(frame_offset: int, frames_b64: list[str]) -> list[tuple[int, bytes]]:
+    import base64
+
+    return [(frame_offset + i, base64.b64decode(data)) for i, data in enumerate(frames_b64)]
+
+
+def _write_frame_files(job_dir: str, frames: list[tuple[int, bytes]]) -> None:
+    for index, data in frames:
+        with open(os.path.join(job_dir, f"frame_{index:04d}.png"), "wb") as f:
+            f.write(data)
+
+
+async def _accept_frames(render_job_id: str, frames: list[tuple[int, bytes]]) -> dict:
+    """Route received frames to the job's FFmpeg pipe or its temp directory.
+
+    File writes and pipe writes run in the default executor so large
+    chunks never block the event loop. Returns counters for the response.
+    """
+    loop = asyncio.get_running_loop()
+
+    stream_job = _streaming_jobs.get(render_job_id)
+    if stream_job is not None:
+        try:
+            await stream_job.add_frames(frames)
+        except HTTPException:
+            raise
+        except Exception as e:
+            _streaming_jobs.pop(render_job_id, None)
+            await loop.run_in_executor(None, stream_job.abort)
+            logger.error(f"[Export {render_job_id}] Streaming failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Streaming export failed: {e}")
+        return {"framesWritten": len(frames), "framesEncoded": stream_job.next_frame}
+
+    job_dir = os.path.join(TEMP_RENDER_DIR, render_job_id)
+    if not os.path.exists(job_dir):
+        raise HTTPException(status_code=404, detail=f"Render job {render_job_id} not found")
+    await loop.run_in_executor(None, _write_frame_files, job_dir, frames)
+    return {"framesWritten": len(frames)}
+
+
+def _render_video(target, fps: int, output_path: str, on_progress=None) -> int:
+    """Render target on all CPU cores, piping raw frames into FFmpeg."""
+    from backend.core.render.parallel import render_to_video
+
+    return render_to_video(target, output_path, fps=fps, ffmpeg_path=FFMPEG_PATH, on_progress=on_progress)
+
+
+# ── Background encode jobs ──
+
+_encode_jobs = None
+
+
+def _get_encode_jobs():
+    """Process-wide encode job manager (bounded by EXPORT_MAX_ENCODES)."""
+    global _encode_jobs
+    if _encode_jobs is None:
+        from backend.core.render.encode_jobs import EncodeJobManager
+        _encode_jobs = EncodeJobManager()
+    return _encode_jobs
+
+
+def _job_payload(job) -> dict:
+    payload = job.to_dict()
+    payload["statusUrl"] = f"{router.prefix}/jobs/{job.job_id}"
+    payload["downloadUrl"] = f"{router.prefix}/jobs/{job.job_id}/download"
+    return payload
+
+
+def _download_response(job) -> FileResponse:
+    return FileResponse(
+        job.output_path,
+        media_type="video/mp4",
+        filename=f"animation_export_{job.job_id}.mp4"
+    )
+
+
+async def _respond_with_job(job, background: bool):
+    """Return the job's status right away (background) or wait and send the MP4.
+
+    Waiting here is an await on the job, not a blocking call, so the event
+    loop keeps serving other requests while FFmpeg runs.
+    """
+    if background:
+        return JSONResponse(content=_job_payload(job), status_code=202)
+    await _get_encode_jobs().wait(job.job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=f"Export failed: {job.error}")
+    return _download_response(job)
 
 
 # ── Endpoints ──
@@ -50,15 +357,26 @@ async def export_start(body: ExportStartRequest):
     """
     import uuid
     job_id = str(uuid.uuid4())[:12]
-    job_dir = os.path.join(TEMP_RENDER_DIR, job_id)
-    os.makedirs(job_dir, exist_ok=True)
 
-    logger.info(f"[Export {job_id}] Session started: {body.totalFrames} frames at {body.fps} FPS")
+    if body.streaming:
+        job = _StreamingJob(job_id, body.totalFrames, body.fps)
+        try:
+            job.start()
+        except OSError as e:
+            raise HTTPException(status_code=500, detail=f"Could not start FFmpeg: {e}")
+        _streaming_jobs[job_id] = job
+    else:
+        job_dir = os.path.join(TEMP_RENDER_DIR, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+    logger.info(f"[Export {job_id}] Session started: {body.totalFrames} frames at {body.fps} FPS"
+                f"{' (streaming)' if body.streaming else ''}")
 
     return JSONResponse(content={
         "renderJobId": job_id,
         "totalFrames": body.totalFrames,
         "fps": body.fps,
+        "streaming": body.streaming,
         "status": "ready"
     })
 
@@ -69,81 +387,171 @@ async def export_chunk(body: ExportChunkRequest):
     Phase 2: Receive a batch of Base64 frames, decode and write to disk immediately.
     Each chunk contains ~10-20 frames to keep memory usage minimal.
     """
-    import base64
-
-    job_dir = os.path.join(TEMP_RENDER_DIR, body.renderJobId)
-    if not os.path.exists(job_dir):
-        raise HTTPException(status_code=404, detail=f"Render job {body.renderJobId} not found")
+    loop = asyncio.get_running_loop()
+    frames = await loop.run_in_executor(None, _decode_b64_frames, body.frameOffset, body.frames)
+    counters = await _accept_frames(body.renderJobId, frames)
 
-    frames_written = 0
-    for i, frame_b64 in enumerate(body.frames):
-        global_index = body.frameOffset + i
-        frame_data = base64.b64decode(frame_b64)
-        frame_path = os.path.join(job_dir, f"frame_{global_index:04d}.png")
-        with open(frame_path, "wb") as f:
-            f.write(frame_data)
-        frames_written += 1
-
-    logger.info(f"[Export {body.renderJobId}] Chunk {body.chunkIndex}: wrote {frames_written} frames")
+    logger.info(f"[Export {body.renderJobId}] Chunk {body.chunkIndex}: wrote {counters['framesWritten']} frames")
 
     return JSONResponse(content={
         "renderJobId": body.renderJobId,
         "chunkIndex": body.chunkIndex,
-        "framesWritten": frames_written,
+        **counters,
         "status": "ok"
     })
 
 
+@router.post("/chunk-binary")
+async def export_chunk_binary(request: Request, renderJobId: str, chunkIndex: int = 0):
+    """
+    Phase 2 (binary): body is application/octet-stream frame records
+    (uint32 index, uint32 length, PNG bytes) — no base64, no JSON parsing.
+    """
+    body = await request.body()
+    try:
+        frames = parse_frame_records(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    counters = await _accept_frames(renderJobId, frames)
+
+    logger.info(f"[Export {renderJobId}] Binary chunk {chunkIndex}: wrote {counters['framesWritten']} frames")
+
+    return JSONResponse(content={
+        "renderJobId": renderJobId,
+        "chunkIndex": chunkIndex,
+        **counters,
+        "status": "ok"
+    })
+
+
+@router.websocket("/ws/{render_job_id}")
+async def export_frames_ws(websocket: WebSocket, render_job_id: str):
+    """
+    Phase 2 (WebSocket): each binary message carries one or more frame
+    records; the server answers every message with a JSON ack.
+    Call /finish over HTTP once all frames are sent.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_bytes()
+            try:
+                frames = parse_frame_records(message)
+                counters = await _accept_frames(render_job_id, frames)
+            except ValueError as e:
+                await websocket.send_json({"status": "error", "detail": str(e)})
+                continue
+            except HTTPException as e:
+                await websocket.send_json({"status": "error", "detail": e.detail})
+                await websocket.close(code=1011)
+                return
+            await websocket.send_json({"renderJobId": render_job_id, **counters, "status": "ok"})
+    except WebSocketDisconnect:
+        logger.info(f"[Export {render_job_id}] Frame WebSocket closed")
+
+
 @router.post("/finish")
 async def export_finish(body: ExportFinishRequest):
     """
-    Phase 3: All chunks received. Run FFmpeg to stitch PNGs into MP4.
-    Returns the MP4 file for download and cleans up temp frames.
+    Phase 3: All chunks received. Queue FFmpeg to stitch PNGs into MP4
+    (temp frames are cleaned up once it finishes).
+    Streaming jobs just close FFmpeg's input and wait for it to finish.
+
+    By default waits for the encode and returns the MP4; with
+    background=true returns 202 + job status/download URLs immediately.
     """
+    jobs = _get_encode_jobs()
+    running = jobs.get(body.renderJobId)
+    if running is not None and not running.finished:
+        # Retried or double-clicked /finish: follow the encode already running
+        return await _respond_with_job(running, body.background)
+
+    stream_job = _streaming_jobs.get(body.renderJobId)
+    if stream_job is not None:
+        async with stream_job.lock:
+            error = stream_job.missing_frame_error()
+            if error is not None:
+                raise error
+            _streaming_jobs.pop(body.renderJobId, None)
+
+        async def finish_stream(job) -> str:
+            job.frames_done = stream_job.next_frame
+            try:
+                return await stream_job.finish()
+            except Exception:
+                # abort() kills FFmpeg and waits for it — keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, stream_job.abort)
+                raise
+
+        job = jobs.submit(body.renderJobId, finish_stream, total_frames=stream_job.total_frames)
+        return await _respond_with_job(job, body.background)
+
     job_dir = os.path.join(TEMP_RENDER_DIR, body.renderJobId)
     if not os.path.exists(job_dir):
         raise HTTPException(status_code=404, detail=f"Render job {body.renderJobId} not found")
 
-    output_path = os.path.join(EXPORTS_DIR, f"export_{body.renderJobId}.mp4")
+    total_frames = sum(1 for f in os.listdir(job_dir) if f.endswith('.png'))
+    logger.info(f"[Export {body.renderJobId}] Encoding {total_frames} frames at {body.fps} FPS...")
+    job = jobs.submit_sequence(
+        body.renderJobId, job_dir, body.fps, total_frames,
+        output_path=os.path.join(EXPORTS_DIR, f"export_{body.renderJobId}.mp4"),
+        ffmpeg_path=FFMPEG_PATH,
+    )
+    return await _respond_with_job(job, body.background)
 
-    try:
-        # Count frames on disk
-        frame_files = sorted([f for f in os.listdir(job_dir) if f.endswith('.png')])
-        logger.info(f"[Export {body.renderJobId}] Rendering {len(frame_files)} frames at {body.fps} FPS...")
-
-        ffmpeg_cmd = [
-            FFMPEG_PATH, "-y",
-            "-framerate", str(body.fps),
-            "-i", os.path.join(job_dir, "frame_%04d.png"),
-            "-c:v", "libx264",
-            "-pix_fmt", "yuv420p",
-            "-preset", "fast",
-            output_path
-        ]
-        result = subprocess.run(
-            ffmpeg_cmd, capture_output=True, text=True, timeout=300
-        )
 
-        if result.returncode != 0:
-            logger.error(f"[Export {body.renderJobId}] FFmpeg error: {result.stderr}")
-            raise HTTPException(status_code=500, detail=f"FFmpeg failed: {result.stderr[:500]}")
+@router.get("/jobs/{render_job_id}")
+async def export_job_status(render_job_id: str):
+    """Encode status: queued | encoding | done | error, with frame progress."""
+    job = _get_encode_jobs().get(render_job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Encode job {render_job_id} not found")
+    return JSONResponse(content=_job_payload(job))
 
-        logger.info(f"[Export {body.renderJobId}] Export complete: {output_path}")
 
-        return FileResponse(
-            output_path,
-            media_type="video/mp4",
-            filename=f"animation_export_{body.renderJobId}.mp4"
-        )
+@router.get("/jobs/{render_job_id}/download")
+async def export_job_download(render_job_id: str):
+    """Download the finished MP4 of an encode job."""
+    job = _get_encode_jobs().get(render_job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Encode job {render_job_id} not found")
+    if job.status == "error":
+        raise HTTPException(status_code=500, detail=f"Export failed: {job.error}")
+    if job.status != "done" or not os.path.exists(job.output_path):
+        raise HTTPException(status_code=409, detail=f"Encode job {render_job_id} is {job.status}")
+    return _download_response(job)
+
+
+@router.post("/render")
+async def export_render(body: ExportRenderRequest):
+    """
+    Server-side export: render a VideoProject/SceneGraph JSON headlessly
+    (no browser) on all CPU cores, streaming frames straight into FFmpeg.
+    Returns the MP4 for download (or 202 + job URLs with background=true).
+    """
+    import uuid
+    from backend.core.render import frame_count
+
+    job_id = str(uuid.uuid4())[:12]
+    output_path = os.path.join(EXPORTS_DIR, f"export_{job_id}.mp4")
 
-    except subprocess.TimeoutExpired:
-        raise HTTPException(status_code=500, detail="FFmpeg timed out (5 min limit)")
-    except HTTPException:
-        raise
+    try:
+        target, default_fps = _load_render_target(body.project)
     except Exception as e:
-        logger.error(f"[Export {body.renderJobId}] Error: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
-    finally:
-        # Cleanup temp directory (frames only — MP4 stays until downloaded)
-        if os.path.exists(job_dir):
-            shutil.rmtree(job_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=f"Invalid project: {e}")
+    fps = body.fps or default_fps
+    total_frames = frame_count(target, fps)
+    if total_frames == 0:
+        raise HTTPException(status_code=400, detail="Project has no frames to render")
+
+    async def render(job) -> str:
+        def on_progress(done: int) -> None:
+            job.frames_done = done
+
+        loop = asyncio.get_running_loop()
+        frames = await loop.run_in_executor(None, _render_video, target, fps, output_path, on_progress)
+        logger.info(f"[Export {job_id}] Rendered and encoded {frames} frames server-side")
+        return output_path
+
+    job = _get_encode_jobs().submit(job_id, render, total_frames=total_frames)
+    return await _respond_with_job(job, body.background)
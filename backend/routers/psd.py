@@ -2,15 +2,13 @@
 PSD Upload endpoints with WebSocket progress reporting.
 """
 import os
-import shutil
 import logging
-from typing import List
-from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 
-from backend.core.psd_processor import process_psd
+from backend.core.psd_ingest import get_ingest_engine, shutdown_ingest_engine
+from backend.core.upload_stream import UploadStreamError, iter_uploaded_files
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +16,6 @@ BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 UPLOADS_DIR = os.path.join(BACKEND_DIR, "uploads")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
-# Thread pool for batch PSD processing
-psd_executor = ThreadPoolExecutor(max_workers=3)
-
 router = APIRouter(tags=["psd"])
 
 
@@ -66,6 +61,14 @@ async def upload_progress_ws(websocket: WebSocket, session_id: str):
     WebSocket endpoint for real-time batch upload progress.
     Connect before calling POST /api/upload-psd/?session_id=<id>
     Messages: { type: 'progress'|'done'|'error', filename, index, total, message }
+    progress/error also carry stage: 'uploaded' (file received, ingest started)
+    or 'processed' (ingest finished; index counts completions), and
+    totalFinal: whether total already counts every file in the request.
+    While a PSD is extracted, stage 'extracting' events report per-layer
+    progress: layersDone, layersTotal, layersReused, bytesWritten,
+    currentGroup, timings {composite, hash, save, db} (seconds),
+    elapsed, layersPerSec and bytesPerSec. 'processed' carries the final
+    figures (including the db merge time).
     """
     await websocket.accept()
     upload_progress_manager.register(session_id, websocket)
@@ -81,132 +84,120 @@ async def upload_progress_ws(websocket: WebSocket, session_id: str):
 # PSD UPLOAD
 # ============================================================
 
-def _process_single_psd(file_path: str, filename: str) -> dict:
-    """
-    Blocking helper: saves, processes a single PSD file, cleans up.
-    Runs inside ThreadPoolExecutor.
-    """
-    try:
-        process_psd(file_path)
-        logger.info(f"PSD processing completed successfully for: {filename}")
-        return {"filename": filename, "status": "success", "error": None}
-    except Exception as e:
-        logger.error(f"Error processing PSD {filename}: {str(e)}", exc_info=True)
-        return {"filename": filename, "status": "error", "error": str(e)}
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
-
 @router.post("/api/upload-psd/")
 async def upload_psd(
-    files: List[UploadFile] = File(None),
-    file: UploadFile | None = File(None),
+    request: Request,
     session_id: str | None = Query(None),
 ):
     """
     Receives one or more PSD files, saves and processes them.
-    Uses ThreadPoolExecutor for true parallel batch processing.
+    The multipart body is streamed to disk and each PSD's ingest job starts
+    as soon as that file's bytes are complete, while later files are still
+    uploading. Extraction runs in the PSD ingest process pool (one job per
+    PSD, or per layer shard for huge PSDs); results are merged by a single writer.
     Optional: pass ?session_id=<id> and connect to /ws/upload-progress/<id>
-    beforehand to receive real-time progress events.
+    beforehand to receive real-time progress events (in completion order), and
+    POST /api/upload-psd/cancel/<id> to cancel the batch.
     Accepts either 'files' (multiple) or 'file' (single) form field.
     """
     import asyncio
 
-    # Merge both field names into a single list for processing
-    all_files: List[UploadFile] = []
-    if files:
-        all_files.extend(files)
-    if file:
-        all_files.append(file)
-
-    if not all_files:
-        raise HTTPException(status_code=400, detail="No files provided. Use field name 'files' or 'file'.")
-
     results = []
     errors = []
-    total = sum(1 for f in all_files if f.filename and f.filename.endswith(".psd"))
-    index = 0
-
-    loop = asyncio.get_event_loop()
-    pending_tasks: list[tuple[asyncio.Future, str]] = []
-
-    for file in all_files:
-        if not file.filename.endswith(".psd"):
-            errors.append({"filename": file.filename, "error": "Only .psd files are allowed"})
-            continue
-
-        temp_file_path = os.path.join(UPLOADS_DIR, file.filename)
-
-        try:
-            with open(temp_file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            logger.info(f"Saved PSD to temporary path: {temp_file_path}")
-        except Exception as e:
-            errors.append({"filename": file.filename, "error": f"Failed to save: {str(e)}"})
-            continue
-
-        pending_tasks.append((
-            loop.run_in_executor(psd_executor, _process_single_psd, temp_file_path, file.filename),
-            file.filename,
-        ))
-
-    # Process tasks with sequential progress reporting
-    for fut, filename in pending_tasks:
-        index += 1
+    received = 0
+    completed = 0
+    upload_finished = False
+    engine = get_ingest_engine()
+    pending_tasks: list[asyncio.Task] = []
+
+    async def broadcast(message: dict):
         if session_id:
-            await upload_progress_manager.broadcast(session_id, {
+            await upload_progress_manager.broadcast(session_id, message)
+
+    async def ingest_and_report(path: str, filename: str, order: int):
+        nonlocal completed
+
+        async def report_layers(job):
+            layers = job.progress
+            await broadcast({
                 "type": "progress",
+                "stage": "extracting",
                 "filename": filename,
-                "index": index,
-                "total": total,
-                "message": f"Processing {filename} ({index}/{total})...",
+                "index": order,
+                "total": received,
+                "totalFinal": upload_finished,
+                **layers,
+                "message": f"{filename}: {layers['layersDone']}/{layers['layersTotal']} layers"
+                           + (f" ({layers['currentGroup']})" if layers.get("currentGroup") else ""),
             })
-        try:
-            result = await fut
-            if isinstance(result, Exception) or result.get("error"):
-                err = str(result) if isinstance(result, Exception) else result["error"]
-                errors.append({"filename": filename, "error": err})
-                if session_id:
-                    await upload_progress_manager.broadcast(session_id, {
-                        "type": "error",
-                        "filename": filename,
-                        "index": index,
-                        "total": total,
-                        "message": f"❌ {filename}: {err}",
-                    })
-            else:
-                results.append({"filename": result["filename"], "status": "success"})
-                if session_id:
-                    await upload_progress_manager.broadcast(session_id, {
-                        "type": "progress",
-                        "filename": filename,
-                        "index": index,
-                        "total": total,
-                        "message": f"✅ {filename} done",
-                    })
-        except Exception as e:
-            errors.append({"filename": filename, "error": str(e)})
-
-    if session_id:
-        await upload_progress_manager.broadcast(session_id, {
-            "type": "done",
-            "total": total,
-            "success": len(results),
-            "failed": len(errors),
-            "message": f"Upload complete: {len(results)}/{total} succeeded.",
-        })
+
+        on_progress = report_layers if session_id else None
+        job = await engine.ingest(path, filename, batch_id=session_id, on_progress=on_progress)
+        completed += 1
+        progress = {"filename": filename, "index": completed, "total": received, "totalFinal": upload_finished}
+        if job.error:
+            errors.append({"filename": filename, "error": job.error})
+            await broadcast({"type": "error", "stage": "processed", **progress, "message": f"❌ {filename}: {job.error}"})
+        else:
+            results.append((order, {"filename": job.filename, "status": "success"}))
+            await broadcast({
+                "type": "progress", "stage": "processed", **(job.progress or {}), **progress,
+                "message": f"✅ {filename} done",
+            })
+
+    try:
+        async for part in iter_uploaded_files(request, UPLOADS_DIR, accept=lambda name: name.endswith(".psd")):
+            if part.path is None:
+                errors.append({"filename": part.filename, "error": "Only .psd files are allowed"})
+                continue
+            received += 1
+            logger.info(f"Saved PSD to temporary path: {part.path} ({part.size} bytes)")
+            pending_tasks.append(asyncio.create_task(ingest_and_report(part.path, part.filename, received)))
+            await broadcast({
+                "type": "progress",
+                "stage": "uploaded",
+                "filename": part.filename,
+                "index": received,
+                "total": received,
+                "totalFinal": False,
+                "message": f"Processing {part.filename} (received {received})...",
+            })
+    except UploadStreamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    upload_finished = True
+
+    if not pending_tasks and not errors:
+        raise HTTPException(status_code=400, detail="No files provided. Use field name 'files' or 'file'.")
+
+    await asyncio.gather(*pending_tasks)
+    total = received
+
+    await broadcast({
+        "type": "done",
+        "total": total,
+        "success": len(results),
+        "failed": len(errors),
+        "message": f"Upload complete: {len(results)}/{total} succeeded.",
+    })
 
     if errors and not results:
         raise HTTPException(status_code=400, detail={"errors": errors})
 
     return JSONResponse(content={
         "message": "Upload complete",
-        "results": results,
+        # Upload order (progress events report completion order)
+        "results": [result for _, result in sorted(results, key=lambda r: r[0])],
         "errors": errors,
     })
 
 
+@router.post("/api/upload-psd/cancel/{session_id}")
+async def cancel_psd_upload(session_id: str):
+    """Cancel the unfinished PSDs of an upload batch started with ?session_id=<id>."""
+    cancelled = get_ingest_engine().cancel(session_id)
+    return {"sessionId": session_id, "cancelled": cancelled}
+
+
 def shutdown_psd_executor():
-    """Call during app shutdown to clean up the thread pool."""
-    psd_executor.shutdown(wait=False)
+    """Call during app shutdown to stop the PSD ingest process pool."""
+    shutdown_ingest_engine()
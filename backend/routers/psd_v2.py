@@ -3,18 +3,16 @@ PSD Upload V2 endpoints — jointed-limb aware processing.
 
 Separate from v1 (psd.py) to avoid any interference.
 Uploads through /api/v2/ are processed by psd_processor_v2
-and stored in database_v2.json.
+and stored as v2 characters in the character store.
 """
 import os
-import shutil
 import logging
-from typing import List
-from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 
-from backend.core.psd_processor_v2 import process_psd_v2, load_db_v2
+from backend.core.psd_ingest import get_ingest_engine, shutdown_ingest_engine
+from backend.core.upload_stream import UploadStreamError, iter_uploaded_files
 
 logger = logging.getLogger(__name__)
 
@@ -22,26 +20,27 @@ BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 UPLOADS_DIR = os.path.join(BACKEND_DIR, "uploads")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
-# Thread pool for batch V2 PSD processing
-psd_v2_executor = ThreadPoolExecutor(max_workers=2)
-
 router = APIRouter(prefix="/api/v2", tags=["psd-v2"])
 
 
 # ── V2 Characters list ──────────────────────────────────────
 
 @router.get("/characters/")
-async def get_characters_v2():
-    """Returns all V2 characters from database_v2.json."""
-    data = load_db_v2()
-    return JSONResponse(content=data)
+async def get_characters_v2(
+    request: Request,
+    limit: int | None = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+):
+    """Returns V2 characters (all, or one page with limit/offset), cached with an ETag."""
+    from backend.routers.characters import characters_response
+    return characters_response(request, "v2", limit, offset)
 
 
 @router.get("/characters/{char_id}")
 async def get_character_v2(char_id: str):
     """Returns a single V2 character by ID."""
-    data = load_db_v2()
-    char = next((c for c in data if c["id"] == char_id), None)
+    from backend.core.character_store import get_character
+    char = get_character("v2", char_id=char_id)
     if not char:
         raise HTTPException(status_code=404, detail=f"Character '{char_id}' not found in V2 database")
     return JSONResponse(content=char)
@@ -49,81 +48,66 @@ async def get_character_v2(char_id: str):
 
 # ── V2 Upload ────────────────────────────────────────────────
 
-def _process_single_psd_v2(file_path: str, filename: str) -> dict:
-    """
-    Blocking helper: processes a single PSD via V2 pipeline, then cleans up.
-    Runs inside ThreadPoolExecutor.
-    """
-    try:
-        result = process_psd_v2(file_path)
-        logger.info(f"[V2] PSD processing completed: {filename} -> type={result.get('psd_type')}")
-        return {
-            "filename": filename,
-            "status": "success",
-            "error": None,
-            "character_id": result.get("id"),
-            "psd_type": result.get("psd_type"),
-        }
-    except Exception as e:
-        logger.error(f"[V2] Error processing PSD {filename}: {str(e)}", exc_info=True)
-        return {"filename": filename, "status": "error", "error": str(e)}
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+def _job_result(job) -> dict:
+    """Upload response entry for a finished v2 ingest job."""
+    if job.error:
+        return {"filename": job.filename, "status": "error", "error": job.error}
+    char = job.result or {}
+    logger.info(f"[V2] PSD processing completed: {job.filename} -> type={char.get('psd_type')}")
+    return {
+        "filename": job.filename,
+        "status": "success",
+        "error": None,
+        "character_id": char.get("id"),
+        "psd_type": char.get("psd_type"),
+    }
 
 
 @router.post("/upload-psd/")
 async def upload_psd_v2(
-    files: List[UploadFile] = File(None),
-    file: UploadFile | None = File(None),
+    request: Request,
+    session_id: str | None = Query(None),
 ):
     """
     Upload one or more PSD files for V2 processing.
     
     Auto-detects jointed vs flat PSD and processes accordingly.
-    Results are stored in database_v2.json (separate from V1).
+    Results are stored as v2 characters (separate from V1).
+    Accepts either 'files' (multiple) or 'file' (single) form field; the
+    body is streamed to disk and each PSD starts extracting in the PSD
+    ingest process pool as soon as its bytes are complete. Pass
+    ?session_id=<id> to be able to cancel via POST /upload-psd/cancel/<id>.
     """
     import asyncio
 
-    # Merge both field names
-    all_files: List[UploadFile] = []
-    if files:
-        all_files.extend(files)
-    if file:
-        all_files.append(file)
+    results = []
+    errors = []
+    engine = get_ingest_engine()
+    pending_tasks: list[asyncio.Task] = []
 
-    if not all_files:
+    try:
+        async for part in iter_uploaded_files(
+            request, UPLOADS_DIR, accept=lambda name: name.endswith(".psd"), name_prefix="v2_",
+        ):
+            if part.path is None:
+                errors.append({"filename": part.filename or "(unknown)", "error": "Only .psd files are allowed"})
+                continue
+            logger.info(f"[V2] Saved PSD to temp: {part.path}")
+            pending_tasks.append(asyncio.create_task(
+                engine.ingest(part.path, part.filename, pipeline="v2", batch_id=session_id)
+            ))
+    except UploadStreamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not pending_tasks and not errors:
         raise HTTPException(status_code=400, detail="No files provided. Use field name 'files' or 'file'.")
 
-    results = []
-    errors = []
-    loop = asyncio.get_event_loop()
-
-    for f in all_files:
-        if not f.filename or not f.filename.endswith(".psd"):
-            errors.append({"filename": f.filename or "(unknown)", "error": "Only .psd files are allowed"})
-            continue
-
-        temp_file_path = os.path.join(UPLOADS_DIR, f"v2_{f.filename}")
-
-        try:
-            with open(temp_file_path, "wb") as buf:
-                shutil.copyfileobj(f.file, buf)
-            logger.info(f"[V2] Saved PSD to temp: {temp_file_path}")
-        except Exception as e:
-            errors.append({"filename": f.filename, "error": f"Failed to save: {str(e)}"})
-            continue
-
-        try:
-            result = await loop.run_in_executor(
-                psd_v2_executor, _process_single_psd_v2, temp_file_path, f.filename
-            )
-            if result.get("error"):
-                errors.append({"filename": f.filename, "error": result["error"]})
-            else:
-                results.append(result)
-        except Exception as e:
-            errors.append({"filename": f.filename, "error": str(e)})
+    for job in await asyncio.gather(*pending_tasks):
+        result = _job_result(job)
+        if result.get("error"):
+            errors.append({"filename": job.filename, "error": result["error"]})
+        else:
+            results.append(result)
 
     if errors and not results:
         raise HTTPException(status_code=400, detail={"errors": errors})
@@ -135,6 +119,13 @@ async def upload_psd_v2(
     })
 
 
+@router.post("/upload-psd/cancel/{session_id}")
+async def cancel_psd_upload_v2(session_id: str):
+    """Cancel the unfinished PSDs of a V2 upload batch started with ?session_id=<id>."""
+    cancelled = get_ingest_engine().cancel(session_id)
+    return {"sessionId": session_id, "cancelled": cancelled}
+
+
 def shutdown_psd_v2_executor():
-    """Call during app shutdown to clean up the v2 thread pool."""
-    psd_v2_executor.shutdown(wait=False)
+    """Call during app shutdown to stop the PSD ingest process pool."""
+    shutdown_ingest_engine()
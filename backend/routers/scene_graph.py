@@ -7,10 +7,11 @@ Provides endpoints for:
 """
 
 import os
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
-from backend.core.scene_graph.asset_scanner import AssetRegistry
+from backend.core.scene_graph.asset_scanner import AssetRegistry, RegistryWatcher, default_watch_interval
 from backend.core.scene_graph.scene import SceneGraph
 from backend.core.scene_graph.tools import SceneToolExecutor, TOOL_DEFINITIONS
 
@@ -20,9 +21,36 @@ router = APIRouter(prefix="/api/scene-graph", tags=["scene-graph"])
 
 # Initialize the asset registry
 # Path: backend/routers/scene_graph.py → backend/ → backend/storage
-STORAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage")
-_registry = AssetRegistry(STORAGE_DIR)
-_registry.scan()
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORAGE_DIR = os.path.join(BASE_DIR, "storage")
+REGISTRY_SNAPSHOT_PATH = os.path.join(BASE_DIR, "data", "asset_registry.json")
+_registry = AssetRegistry(STORAGE_DIR, snapshot_path=REGISTRY_SNAPSHOT_PATH)
+# A snapshot restores the registry without walking the tree; start_registry_sync()
+# then catches up with whatever changed while the server was down
+if not _registry.load_snapshot():
+    _registry.scan()
+_registry.attach_character_store()
+_watcher: RegistryWatcher | None = None
+
+
+async def start_registry_sync():
+    """Incremental refresh after startup, then the optional watcher (ASSET_REGISTRY_WATCH_SECONDS)."""
+    global _watcher
+    await asyncio.to_thread(_registry.sync_character_store)
+    counts = await asyncio.to_thread(_registry.refresh)
+    await asyncio.to_thread(_registry.save_snapshot)
+    logger.info(f"Asset registry refreshed: {counts}")
+    if default_watch_interval() > 0 and _watcher is None:
+        _watcher = RegistryWatcher(_registry).start()
+
+
+def stop_registry_sync():
+    """Stop the watcher and persist the registry snapshot."""
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+    _registry.save_snapshot()
 
 
 @router.get("/characters")
@@ -31,6 +59,15 @@ async def list_characters():
     return _registry.list_characters()
 
 
+@router.get("/characters/search")
+async def search_characters(
+    q: str = Query(..., min_length=1, description="Character id or (partial, fuzzy) name"),
+    limit: int = Query(5, ge=1, le=50),
+):
+    """Ranked character matches: [{id, name, score, match}]."""
+    return [match.to_dict() for match in _registry.search_characters(q, limit=limit)]
+
+
 @router.get("/characters/{char_id}")
 async def get_character(char_id: str):
     """Get detailed info for a specific character."""
@@ -50,10 +87,16 @@ async def describe_character(char_id: str):
 
 
 @router.post("/rescan")
-async def rescan_assets():
-    """Rescan the storage directory for new characters."""
-    count = _registry.scan()
-    return {"characters_found": count}
+async def rescan_assets(full: bool = Query(False, description="Walk every folder instead of only changed ones")):
+    """Rescan the storage directory for new characters (incremental unless full=true)."""
+    counts = {}
+    if full:
+        count = await asyncio.to_thread(_registry.scan)
+    else:
+        counts = await asyncio.to_thread(_registry.refresh)
+        count = len(_registry.characters)
+    await asyncio.to_thread(_registry.save_snapshot)
+    return {"characters_found": count, **counts}
 
 
 @router.get("/tools")
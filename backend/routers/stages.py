@@ -235,12 +235,13 @@ async def analyze_stage(stage_id: str):
 
     element_files.sort(key=get_idx)
 
-    # Read images as base64
+    # Read images as base64 (file bytes cached process-wide, keyed by mtime)
+    from backend.core.image_cache import get_image_cache
+    image_cache = get_image_cache()
     layer_images = []
     for fname in element_files:
         fpath = os.path.join(STAGES_DIR, fname)
-        with open(fpath, "rb") as f:
-            img_b64 = base64.b64encode(f.read()).decode("utf-8")
+        img_b64 = base64.b64encode(image_cache.get_bytes(fpath)).decode("utf-8")
         
         idx = get_idx(fname)
         layer_images.append({
@@ -0,0 +1,52 @@
+"""
+Thumbnail API: asset thumbnails in any size, rendered on first request.
+
+Replaces the static /thumbnails mount. Existing URLs keep working:
+
+    /thumbnails/<hash>_thumb.png                 128px PNG
+    /thumbnails/<hash>_256.webp                  256px WebP
+    /thumbnails/<hash>_thumb.png?size=64&format=webp
+"""
+import os
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+# Thumbnails are content-addressed: a URL's bytes never change
+CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+router = APIRouter(tags=["thumbnails"])
+
+
+@router.api_route("/thumbnails/{name}", methods=["GET", "HEAD"])
+async def get_thumbnail(
+    name: str,
+    size: int | None = Query(None, description="Longest side in px (16-1024); overrides the name"),
+    format: str | None = Query(None, description="png or webp; overrides the name"),
+):
+    """Serve a cached thumbnail, rendering it from the asset pool on a miss."""
+    from backend.core.thumbnail_service import get_thumbnail_service, parse_thumbnail_name
+
+    service = get_thumbnail_service()
+    parsed = parse_thumbnail_name(name)
+    if parsed is None:
+        # Anything else that was put in the thumbnails folder is served as-is
+        path = os.path.join(service.thumbnails_dir, os.path.basename(name))
+        if not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail="Thumbnail not found")
+        return FileResponse(path)
+
+    img_hash, name_size, name_fmt = parsed
+    fmt = (format or name_fmt).lower()
+    try:
+        path = await asyncio.wrap_future(service.request(img_hash, size or name_size, fmt))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FileResponse(path, media_type=MEDIA_TYPES[fmt], headers=CACHE_HEADERS)
@@ -4,13 +4,11 @@ TTS Router — Text-to-Speech using Volcengine API + ffmpeg for audio concatenat
 Endpoints:
   POST /api/tts/synthesize — Synthesize each line, concatenate with ffmpeg, return MP3 + SRT.
   GET  /api/tts/voices     — List available Vietnamese voices.
+  GET  /api/tts/cache      — Segment cache hit-rate metrics.
 """
-import asyncio
 import os
 import subprocess
 import uuid
-import wave
-import base64
 import logging
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse, JSONResponse
@@ -18,13 +16,16 @@ from pydantic import BaseModel
 
 import httpx
 
+from backend.core.mp3_info import mp3_info, parse_mp3
+from backend.core.tts_cache import CachedSegment, get_tts_cache
+from backend.core.tts_engine import TTSEngine, TTSError
+
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/tts", tags=["tts"])
 
 # ── ffmpeg path (bundled in project) ──
 BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 FFMPEG = os.path.join(BACKEND_DIR, "bin", "ffmpeg", "ffmpeg.exe")
-FFPROBE = os.path.join(BACKEND_DIR, "bin", "ffmpeg", "ffprobe.exe")
 
 if not os.path.exists(FFMPEG):
     logger.error(f"ffmpeg not found at {FFMPEG}")
@@ -41,15 +42,6 @@ VOICES = {
 
 DEFAULT_VOICE = "BV074"
 
-VOLCENGINE_URL = "https://translate.volcengine.com/crx/tts/v1/"
-VOLCENGINE_HEADERS = {
-    "authority": "translate.volcengine.com",
-    "origin": "chrome-extension://klgfhbdadaspgppeadghjjemk",
-    "accept": "application/json, text/plain, */*",
-    "cookie": "hasUserBehavior=1",
-    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/106.0.0.0 Safari/537.36",
-}
-
 # Storage
 STORAGE_DIR = os.path.join(BACKEND_DIR, "storage")
 TTS_DIR = os.path.join(STORAGE_DIR, "tts")
@@ -84,39 +76,71 @@ class TTSResponse(BaseModel):
 
 # ── ffmpeg helpers ──
 
-def ffprobe_duration(filepath: str) -> float:
-    """Get audio duration in seconds using ffprobe."""
-    try:
-        proc = subprocess.Popen(
-            [FFPROBE, "-v", "error", "-show_entries", "format=duration",
-             "-of", "default=noprint_wrappers=1:nokey=1", filepath],
-            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
-            stdin=subprocess.DEVNULL,
-        )
-        stdout, _ = proc.communicate(timeout=10)
-        return float(stdout.decode().strip())
-    except Exception as e:
-        logger.warning(f"ffprobe failed for {filepath}: {e}")
-        sz = os.path.getsize(filepath) if os.path.exists(filepath) else 0
-        return max(0.1, sz / (16 * 1024))
-
-
-def ffmpeg_mp3_to_pcm(mp3_path: str, wav_path: str):
-    """Decode MP3 → WAV (16-bit PCM, 44100Hz, mono) for clean concatenation."""
-    subprocess.run(
-        [FFMPEG, "-y", "-loglevel", "error",
-         "-i", mp3_path,
-         "-ar", "44100", "-ac", "1", "-sample_fmt", "s16",
-         wav_path],
-        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-        stdin=subprocess.DEVNULL, timeout=15,
-    )
+SAMPLE_RATE = 44100
+
 
+def segment_samples(duration: float, silence: float, sample_rate: int = SAMPLE_RATE) -> tuple[int, int]:
+    """(speech, trailing silence) of one segment in output samples — the mix and the timeline share this."""
+    return round(duration * sample_rate), round(silence * sample_rate)
 
-def generate_silence_pcm(duration_s: float, sample_rate: int = 44100) -> bytes:
-    """Generate raw silence PCM bytes (16-bit mono)."""
-    n_samples = int(sample_rate * duration_s)
-    return bytes(n_samples * 2)  # 2 bytes per sample, all zeros = silence
+
+def segment_timeline(
+    durations: list[float],
+    silence_durations: list[float],
+    sample_rate: int = SAMPLE_RATE,
+) -> tuple[list[tuple[float, float]], float]:
+    """Exact (start, end) seconds of each mixed segment, and the mix's total length."""
+    spans = []
+    position = 0
+    for i, duration in enumerate(durations):
+        length, silence = segment_samples(duration, silence_durations[i] if i < len(silence_durations) else 0, sample_rate)
+        spans.append((position / sample_rate, (position + length) / sample_rate))
+        position += length + silence
+    return spans, position / sample_rate
+
+
+def _filter_path(path: str) -> str:
+    """Escape a file name for use as a filtergraph option value."""
+    for ch in "\\':,;[]":
+        path = path.replace(ch, "\\" + ch)
+    return path
+
+
+def build_mix_graph(
+    segment_mp3s: list[str],
+    silence_durations: list[float],
+    batch_dir: str,
+    segment_durations: list[float | None],
+    sample_rate: int = SAMPLE_RATE,
+) -> str:
+    """
+    Filtergraph that decodes each segment (amovie), resamples to mono s16,
+    appends its trailing silence as an exact sample count (apad) and joins
+    everything with one concat filter → [out].
+    Unreadable segments contribute only their silence.
+    """
+    chains = []
+    for i, (mp3_path, duration) in enumerate(zip(segment_mp3s, segment_durations)):
+        length, silence = segment_samples(
+            duration or 0.0, silence_durations[i] if i < len(silence_durations) else 0, sample_rate
+        )
+        if duration is None:
+            chains.append(
+                f"anullsrc=r={sample_rate}:cl=mono,atrim=end_sample={max(1, silence)},"
+                f"aformat=sample_fmts=s16:channel_layouts=mono[a{i}]"
+            )
+            continue
+        rel_path = os.path.relpath(mp3_path, batch_dir).replace(os.sep, "/")
+        # Trim to the exact decoded length so the timeline matches the sample counts
+        chain = (
+            f"amovie={_filter_path(rel_path)},aresample={sample_rate},"
+            f"aformat=sample_fmts=s16:channel_layouts=mono,"
+            f"apad=whole_len={length + silence},atrim=end_sample={length + silence}"
+        )
+        chains.append(f"{chain}[a{i}]")
+    inputs = "".join(f"[a{i}]" for i in range(len(segment_mp3s)))
+    chains.append(f"{inputs}concat=n={len(segment_mp3s)}:v=0:a=1[out]")
+    return ";\n".join(chains)
 
 
 def concat_audio_segments(
@@ -124,75 +148,64 @@ def concat_audio_segments(
     silence_durations: list[float],
     output_mp3: str,
     batch_dir: str,
-):
+    segment_durations: list[float | None] | None = None,
+) -> list[float]:
     """
     Concatenate MP3 segments with silence gaps.
     
-    Strategy: decode each MP3 → raw PCM → join PCM + silence → encode once → MP3.
-    This avoids MP3 encoder delay artifacts at segment boundaries.
+    Strategy: one ffmpeg run decodes every segment, pads the silences with
+    exact sample counts and concatenates in a single filtergraph, then
+    encodes once → MP3. This avoids MP3 encoder delay artifacts at segment
+    boundaries and a decode process + temp WAV per line.
     
     Args:
         segment_mp3s: ordered list of MP3 file paths
         silence_durations: silence (seconds) AFTER each segment (same length as segment_mp3s)
         output_mp3: output combined MP3 path
-        batch_dir: temp directory for intermediate WAV files
+        batch_dir: directory holding the segments (ffmpeg's working directory)
+        segment_durations: decoded durations if already known (None = unreadable)
+
+    Returns:
+        Decoded duration (seconds) of each segment, from its MP3 frame count.
     """
-    SAMPLE_RATE = 44100
-    combined_wav = os.path.join(batch_dir, "_combined.wav")
-    
-    # Collect all PCM data
-    all_pcm = bytearray()
-    
-    for i, mp3_path in enumerate(segment_mp3s):
-        # Decode MP3 → WAV
-        wav_path = os.path.join(batch_dir, f"_seg_{i:03d}.wav")
-        ffmpeg_mp3_to_pcm(mp3_path, wav_path)
-        
-        if os.path.exists(wav_path):
-            # Read PCM data from WAV (skip header)
+    if segment_durations is None:
+        segment_durations = []
+        for mp3_path in segment_mp3s:
             try:
-                with wave.open(wav_path, "r") as wf:
-                    pcm = wf.readframes(wf.getnframes())
-                    all_pcm.extend(pcm)
-            except Exception as e:
-                logger.warning(f"Failed to read WAV {wav_path}: {e}")
-            finally:
-                os.remove(wav_path)
-        
-        # Add silence after this segment
-        if i < len(silence_durations) and silence_durations[i] > 0:
-            all_pcm.extend(generate_silence_pcm(silence_durations[i], SAMPLE_RATE))
-    
-    # Write combined WAV
-    with wave.open(combined_wav, "w") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(SAMPLE_RATE)
-        wf.writeframes(bytes(all_pcm))
-    
-    # Encode WAV → MP3 (single encode = no boundary artifacts)
-    subprocess.run(
-        [FFMPEG, "-y", "-loglevel", "error",
-         "-i", combined_wav,
-         "-c:a", "libmp3lame", "-b:a", "128k",
-         output_mp3],
-        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-        stdin=subprocess.DEVNULL, timeout=60,
-    )
-    
-    # Cleanup
-    if os.path.exists(combined_wav):
-        os.remove(combined_wav)
-    
+                segment_durations.append(mp3_info(mp3_path).duration)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable segment {mp3_path}: {e}")
+                segment_durations.append(None)
+
+    graph_path = os.path.join(batch_dir, "_mix.txt")
+    with open(graph_path, "w", encoding="utf-8") as f:
+        f.write(build_mix_graph(segment_mp3s, silence_durations, batch_dir, segment_durations))
+
+    try:
+        subprocess.run(
+            [FFMPEG, "-y", "-loglevel", "error",
+             "-filter_complex_script", graph_path,
+             "-map", "[out]",
+             "-c:a", "libmp3lame", "-b:a", "128k",
+             output_mp3],
+            cwd=batch_dir,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL, timeout=120,
+        )
+    finally:
+        if os.path.exists(graph_path):
+            os.remove(graph_path)
+
     if not os.path.exists(output_mp3):
         raise RuntimeError("ffmpeg encode failed — no output")
+    return [duration or 0.0 for duration in segment_durations]
 
 
 def format_srt_time(seconds: float) -> str:
-    h = int(seconds // 3600)
-    m = int((seconds % 3600) // 60)
-    s = int(seconds % 60)
-    ms = int((seconds % 1) * 1000)
+    total_ms = round(seconds * 1000)
+    h, rest = divmod(total_ms, 3_600_000)
+    m, rest = divmod(rest, 60_000)
+    s, ms = divmod(rest, 1000)
     return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
 
 
@@ -201,39 +214,10 @@ def format_srt_time(seconds: float) -> str:
 async def synthesize_line(
     client: httpx.AsyncClient, text: str, speaker: str, language: str, retries: int = 3
 ) -> bytes:
-    for attempt in range(retries):
-        try:
-            resp = await client.post(
-                VOLCENGINE_URL,
-                json={"text": text, "speaker": speaker, "language": language},
-                headers=VOLCENGINE_HEADERS,
-                timeout=30.0,
-            )
-            if resp.status_code != 200:
-                logger.warning(f"TTS HTTP {resp.status_code}, attempt {attempt+1}")
-                if attempt < retries - 1:
-                    await asyncio.sleep(1.5 * (attempt + 1))
-                    continue
-                raise HTTPException(500, f"API error: HTTP {resp.status_code}")
-
-            data = resp.json()
-            audio_b64 = data.get("audio", {}).get("data")
-            if not audio_b64:
-                logger.warning(f"No audio data, attempt {attempt+1}")
-                if attempt < retries - 1:
-                    await asyncio.sleep(1.0)
-                    continue
-                raise HTTPException(500, f"No audio data for: {text[:50]}")
-
-            return base64.b64decode(audio_b64)
-        except httpx.RequestError as e:
-            logger.warning(f"Network error, attempt {attempt+1}: {e}")
-            if attempt < retries - 1:
-                await asyncio.sleep(2.0 * (attempt + 1))
-                continue
-            raise HTTPException(500, f"Network error: {e}")
-
-    raise HTTPException(500, "All retries exhausted")
+    try:
+        return await TTSEngine(client, retries=retries).synthesize(text, speaker, language)
+    except TTSError as e:
+        raise HTTPException(500, str(e))
 
 
 # ── Endpoints ──
@@ -248,10 +232,10 @@ async def list_voices():
 @router.post("/synthesize")
 async def synthesize(req: TTSRequest):
     """
-    1. Synthesize each line → individual MP3 files
-    2. Generate silence MP3 for pauses via ffmpeg
-    3. Concatenate all via ffmpeg concat demuxer → combined.mp3
-    4. Measure durations via ffprobe → accurate SRT
+    1. Synthesize all lines concurrently (core.tts_engine) → individual MP3 files
+    2. Measure each line from its MP3 frame count (core.mp3_info), once
+    3. Mix lines + exact-length silences in one ffmpeg run → combined.mp3
+    4. SRT and line timings from the same sample counts as the mix
     """
     voice_info = VOICES.get(req.voice)
     if not voice_info:
@@ -286,90 +270,93 @@ async def synthesize(req: TTSRequest):
     # Synthesize each line → save individual MP3 files
     ordered_mp3s: list[str] = []      # MP3 file paths in order
     ordered_silences: list[float] = []  # silence AFTER each mp3
-    line_file_map: dict[int, str] = {}  # line_index → filepath
+    ordered_durations: list[float] = []  # decoded seconds of each mp3
+    ordered_lines: list[tuple[int, str]] = []  # (line_index, text) of each mp3
     line_idx = 0
 
-    async with httpx.AsyncClient() as client:
-        for i, line_text in enumerate(lines):
-            if line_text is None:
-                # Paragraph break: add extra silence to previous segment
-                if ordered_silences:
-                    ordered_silences[-1] += sil_long_dur
-                continue
-
-            logger.info(f"  [{line_idx+1}/{len(text_lines)}] {line_text[:60]}")
+    # Lines already synthesized with this voice come from the cache; the rest are
+    # requested all at once (bounded concurrency + per-voice rate limit, in line order)
+    cache = get_tts_cache()
+    results: list[CachedSegment | bytes | TTSError | None] = [
+        cache.get(text, speaker, req.language) for text in text_lines
+    ]
+    missing = [n for n, found in enumerate(results) if found is None]
+    if missing:
+        async with httpx.AsyncClient() as client:
+            fresh = await TTSEngine(client).synthesize_many(
+                [text_lines[n] for n in missing], speaker, req.language
+            )
+        for n, audio in zip(missing, fresh):
+            results[n] = audio
+    logger.info(f"  TTS cache: {len(text_lines) - len(missing)}/{len(text_lines)} lines reused")
+    synthesized = iter(results)
 
-            try:
-                audio_bytes = await synthesize_line(client, line_text, speaker, req.language)
+    for i, line_text in enumerate(lines):
+        if line_text is None:
+            # Paragraph break: add extra silence to previous segment
+            if ordered_silences:
+                ordered_silences[-1] += sil_long_dur
+            continue
 
-                fpath = os.path.join(batch_dir, f"line_{line_idx:03d}.mp3")
-                with open(fpath, "wb") as f:
-                    f.write(audio_bytes)
+        result = next(synthesized)
+        try:
+            if isinstance(result, TTSError):
+                raise result
+            if isinstance(result, CachedSegment):
+                audio_bytes, duration = result.read(), result.duration
+                if duration is None:
+                    duration = parse_mp3(audio_bytes).duration
+                    cache.set_duration(result.key, duration)
+            else:
+                audio_bytes = result
+                duration = parse_mp3(audio_bytes).duration
+                cache.put(line_text, speaker, req.language, audio_bytes, duration=duration)
+        except (TTSError, OSError, ValueError) as e:
+            logger.error(f"  [{line_idx+1}/{len(text_lines)}] ✗ {e}")
+            line_idx += 1
+            continue
 
-                logger.info(f"    ✓ {len(audio_bytes):,} bytes")
-                ordered_mp3s.append(fpath)
-                line_file_map[line_idx] = fpath
+        fpath = os.path.join(batch_dir, f"line_{line_idx:03d}.mp3")
+        with open(fpath, "wb") as f:
+            f.write(audio_bytes)
 
-                # Determine silence after this segment
-                remaining = lines[i+1:]
-                next_has_text = any(l is not None for l in remaining)
-                if next_has_text:
-                    ordered_silences.append(sil_short_dur)
-                else:
-                    ordered_silences.append(0)  # last segment, no trailing silence
+        logger.info(f"  [{line_idx+1}/{len(text_lines)}] ✓ {duration:.2f}s  {line_text[:60]}")
+        ordered_mp3s.append(fpath)
+        ordered_durations.append(duration)
+        ordered_lines.append((line_idx, line_text))
 
-            except HTTPException as he:
-                logger.error(f"    ✗ {he.detail}")
+        # Determine silence after this segment
+        remaining = lines[i+1:]
+        next_has_text = any(l is not None for l in remaining)
+        if next_has_text:
+            ordered_silences.append(sil_short_dur)
+        else:
+            ordered_silences.append(0)  # last segment, no trailing silence
 
-            line_idx += 1
-            if i < len(lines) - 1:
-                await asyncio.sleep(0.5)
+        line_idx += 1
 
     if not ordered_mp3s:
         raise HTTPException(500, "All lines failed")
 
     logger.info(f"  Synthesized {len(ordered_mp3s)}/{len(text_lines)} lines, concatenating...")
 
-    # Concatenate: decode all MP3→PCM, join with silence, encode once
+    # Mix: one ffmpeg run decodes, pads silences to the sample and encodes once
     audio_filename = f"{batch_id}.mp3"
     audio_path = os.path.join(batch_dir, audio_filename)
-    concat_audio_segments(ordered_mp3s, ordered_silences, audio_path, batch_dir)
-
-    # Measure durations with ffprobe for each line
-    line_results: list[TTSLineResult] = []
-    current_time = 0.0
-    result_idx = 0
+    concat_audio_segments(ordered_mp3s, ordered_silences, audio_path, batch_dir, ordered_durations)
 
-    for i, line_text in enumerate(lines):
-        if line_text is None:
-            current_time += sil_long_dur
-            continue
-
-        fpath = line_file_map.get(result_idx)
-        if fpath and os.path.exists(fpath):
-            dur = ffprobe_duration(fpath)
-        else:
-            result_idx += 1
-            continue
-
-        line_results.append(TTSLineResult(
+    # Timings from the same sample counts as the mix: no probing, no drift
+    spans, total_duration = segment_timeline(ordered_durations, ordered_silences)
+    line_results = [
+        TTSLineResult(
             index=result_idx,
             text=line_text,
-            start_time=round(current_time, 3),
-            end_time=round(current_time + dur, 3),
-            duration=round(dur, 3),
-        ))
-        current_time += dur
-
-        # Add silence (matches ordered_silences logic)
-        remaining = lines[i+1:]
-        next_has_text = any(l is not None for l in remaining)
-        if next_has_text:
-            current_time += sil_short_dur
-
-        result_idx += 1
-
-    total_duration = ffprobe_duration(audio_path)
+            start_time=round(start, 3),
+            end_time=round(end, 3),
+            duration=round(end - start, 3),
+        )
+        for (result_idx, line_text), (start, end) in zip(ordered_lines, spans)
+    ]
 
     # Generate SRT
     srt_entries = []
@@ -397,6 +384,12 @@ async def synthesize(req: TTSRequest):
     )
 
 
+@router.get("/cache")
+async def get_cache_stats():
+    """Synthesized-segment cache metrics: entries, bytes, hits, misses, hitRate."""
+    return JSONResponse(content=get_tts_cache().stats())
+
+
 @router.get("/audio/{batch_id}/{filename}")
 async def get_audio_file(batch_id: str, filename: str):
     filepath = os.path.join(TTS_DIR, batch_id, filename)
@@ -0,0 +1,133 @@
+"""
+Benchmark — parallel headless rendering scaling.
+
+Builds a synthetic 10-scene auto-video style project (parallax background
+layers + two characters with lip-sync style pose/face swaps and camera
+moves), then renders it with 1, 2, 4, ... N worker processes and reports
+frames/second and speedup over a single worker.
+
+Not collected by pytest. Run from the repo root:
+
+    python backend/tests/bench_render.py                 # raw RGBA frames
+    python backend/tests/bench_render.py --mode png      # PNG files on disk
+    python backend/tests/bench_render.py --scenes 4 --seconds 2 --workers 1 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from PIL import Image, ImageDraw
+
+from backend.core.render import iter_frames_parallel, render_to_directory, frame_count
+from backend.core.scene_graph.scene import SceneGraph
+from backend.core.scene_graph.specialized_nodes import BackgroundLayerNode, CameraNode, CharacterNode
+from backend.core.scene_graph.video_project import VideoProject, SceneTransition
+
+
+def make_assets(root: str) -> None:
+    """Write synthetic stage layers and character poses/faces under root."""
+    stages = os.path.join(root, "stages")
+    os.makedirs(stages, exist_ok=True)
+    for i in range(3):
+        img = Image.new("RGBA", (1920, 1080), (40 + i * 60, 80, 160 - i * 40, 255 if i == 0 else 0))
+        ImageDraw.Draw(img).ellipse((200 * i, 400, 200 * i + 900, 1080), fill=(90, 140 - i * 30, 60, 255))
+        img.save(os.path.join(stages, f"bench_element_{i + 1}_1.png"))
+
+    for name in ("a", "b"):
+        folder = os.path.join(root, "characters", name)
+        os.makedirs(folder, exist_ok=True)
+        for p in range(3):
+            pose = Image.new("RGBA", (800, 1400), (0, 0, 0, 0))
+            ImageDraw.Draw(pose).rounded_rectangle((150, 100 + p * 20, 650, 1400), 120, fill=(200, 60 + p * 50, 90, 255))
+            pose.save(os.path.join(folder, f"pose_{p}.png"))
+        for f in range(2):
+            face = Image.new("RGBA", (800, 1400), (0, 0, 0, 0))
+            ImageDraw.Draw(face).ellipse((300, 150, 500, 350 + f * 30), fill=(250, 220, 200, 255))
+            face.save(os.path.join(folder, f"face_{f}.png"))
+
+
+def make_project(scenes: int, seconds: float) -> VideoProject:
+    project = VideoProject(name="bench")
+    for s in range(scenes):
+        graph = SceneGraph(name=f"scene-{s}", duration=seconds, fps=30)
+        cam = CameraNode(id="camera_main", name="Main Camera")
+        cam.set_position(9.6, 5.4)
+        cam.add_keyframe("x", 0.0, 9.6, "easeInOut")
+        cam.add_keyframe("x", seconds, 8.0 + s * 0.3)
+        cam.add_keyframe("scale_x", 0.0, 1.0, "easeInOut")
+        cam.add_keyframe("scale_x", seconds, 1.3)
+        cam.add_keyframe("scale_y", 0.0, 1.0, "easeInOut")
+        cam.add_keyframe("scale_y", seconds, 1.3)
+        graph.add_node(cam)
+
+        for i in range(3):
+            graph.add_node(BackgroundLayerNode(
+                id=f"bg-{i}", name=f"layer {i}", z_index=-50 + 15 * i,
+                asset_path=f"/static/stages/bench_element_{i + 1}_1.png",
+                parallax_speed=0.3 + 0.35 * i,
+            ))
+
+        for c, name in enumerate(("a", "b")):
+            base = f"/static/characters/{name}"
+            node = CharacterNode(id=f"character-{name}", name=name, z_index=10 + c, metadata={
+                "poseUrls": {f"pose_{p}": {"url": f"{base}/pose_{p}.png"} for p in range(3)},
+                "faceUrls": {f"face_{f}": {"url": f"{base}/face_{f}.png"} for f in range(2)},
+            })
+            node.set_position(6.0 + 7.0 * c, 7.5)
+            node.set_scale_xy(0.25 if c == 0 else -0.25, 0.25)
+            node.add_keyframe("x", 0.0, node.transform.x - 1.0, "ease_out")
+            node.add_keyframe("x", seconds / 2, node.transform.x)
+            t = 0.0
+            while t < seconds:
+                node.add_frame(t, {"pose": f"pose_{int(t) % 3}", "face": f"face_{int(t * 4) % 2}"})
+                t += 0.25
+            graph.add_node(node)
+        project.scenes.append(graph)
+        if s:
+            project.transitions.append(SceneTransition(type="fade", duration=0.5))
+    return project
+
+
+def run(project: VideoProject, storage: str, workers: int, mode: str) -> float:
+    start = time.perf_counter()
+    if mode == "png":
+        with tempfile.TemporaryDirectory() as out_dir:
+            render_to_directory(project, out_dir, workers=workers, storage_dir=storage)
+    else:
+        for _ in iter_frames_parallel(project, workers=workers, storage_dir=storage):
+            pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each scene")
+    parser.add_argument("--mode", choices=["raw", "png"], default="raw")
+    parser.add_argument("--workers", type=int, nargs="*", help="Worker counts to try (default 1, 2, 4 … cores)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = args.workers or sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i < cores], cores})
+
+    with tempfile.TemporaryDirectory() as storage:
+        make_assets(storage)
+        project = make_project(args.scenes, args.seconds)
+        frames = frame_count(project, 30)
+        print(f"{args.scenes} scenes × {args.seconds}s = {frames} frames @1920×1080, mode={args.mode}, {cores} cores")
+        print(f"{'workers':>8} {'seconds':>9} {'fps':>8} {'speedup':>8}")
+
+        baseline = None
+        for workers in counts:
+            elapsed = run(project, storage, workers, args.mode)
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {frames / elapsed:>8.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Tests for batched Asset registration during PSD ingest.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend.core import psd_processor
+from backend.core.models import Asset, AssetVersion, Base
+
+
+# ── Helpers ──
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(psd_processor, "SessionLocal", factory)
+    factory.commits = commits
+    return factory
+
+
+def _record(img_hash, name, character="Hero", category="Body"):
+    return {
+        "hash": img_hash,
+        "name": name,
+        "character_name": character,
+        "category": category,
+        "file_path": f"assets/{img_hash}.png",
+        "thumbnail_path": f"thumbnails/{img_hash}_thumb.png",
+        "width": 4,
+        "height": 2,
+        "file_size": 10,
+    }
+
+
+# ── Tests ──
+
+def test_registers_psd_in_one_commit(session_factory):
+    records = [_record(f"h{i}", f"layer{i}") for i in range(50)] + [_record("h0", "dup")]
+    counts = psd_processor.register_assets(records)
+
+    assert counts == {"inserted": 50, "versioned": 0, "existing": 1}
+    assert len(session_factory.commits) == 1
+    with session_factory() as db:
+        assert db.query(Asset).count() == 50
+        assert db.query(Asset).filter_by(hash_sha256="h3").one().category == "Body"
+
+
+def test_versions_prior_rows(session_factory):
+    psd_processor.register_assets([_record("old", "mouth"), _record("keep", "eyes")])
+    psd_processor.register_assets([_record("new", "mouth"), _record("keep", "eyes")])
+    counts = psd_processor.register_assets([_record("newer", "mouth")])
+
+    assert counts["versioned"] == 1
+    with session_factory() as db:
+        mouth = db.query(Asset).filter_by(original_name="mouth").one()
+        assert (mouth.hash_sha256, mouth.pixel_hash) == ("newer", "newer")
+        assert mouth.file_path == "assets/newer.png"
+        versions = db.query(AssetVersion).order_by(AssetVersion.version).all()
+        assert [(v.version, v.hash_sha256) for v in versions] == [(1, "old"), (2, "new")]
+        assert all(v.asset_id == mouth.id for v in versions)
+
+
+def test_pixel_hash_and_same_batch_versions(session_factory):
+    with session_factory() as db:
+        db.add(Asset(hash_sha256="png-hash", pixel_hash="px", original_name="hair",
+                     file_path="assets/png-hash.png", character_name="Hero"))
+        db.commit()
+
+    # Known by pixel hash → untouched; a name repeated within one PSD chains versions
+    counts = psd_processor.register_assets([
+        _record("px", "hair"), _record("a", "arm"), _record("b", "arm"),
+    ])
+    assert counts == {"inserted": 1, "versioned": 1, "existing": 1}
+    with session_factory() as db:
+        arm = db.query(Asset).filter_by(original_name="arm").one()
+        assert arm.hash_sha256 == "b"
+        assert db.query(AssetVersion).filter_by(asset_id=arm.id).one().hash_sha256 == "a"
+        assert db.query(Asset).filter_by(original_name="hair").one().hash_sha256 == "png-hash"
@@ -0,0 +1,285 @@
+"""
+Tests for the incremental, snapshot-backed AssetRegistry.
+"""
+import sys
+import os
+import shutil
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+
+from backend.core import character_store
+from backend.core.character_store import ChangeFeed
+from backend.core.scene_graph.asset_scanner import AssetRegistry, RegistryWatcher, folder_signature
+
+
+# ── Helpers ──
+
+def _add_character(root, name, poses=("站立",), faces=("开心",)):
+    char_dir = root / "extracted_psds" / name
+    for folder, names in (("动作", poses), ("表情", faces)):
+        (char_dir / folder).mkdir(parents=True, exist_ok=True)
+        for asset in names:
+            (char_dir / folder / f"{asset}_abc123.png").write_bytes(b"png")
+    return char_dir
+
+
+def _touch(path, offset):
+    # Bump mtime explicitly: filesystems with coarse timestamps may not move it
+    stamp = time.time() + offset
+    os.utime(path, (stamp, stamp))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    root = tmp_path / "storage"
+    (root / "extracted_psds").mkdir(parents=True)
+    return root
+
+
+# ── Tests ──
+
+def test_refresh_only_rescans_changed_folders(storage, monkeypatch):
+    _add_character(storage, "Alice")
+    _add_character(storage, "Bob")
+    registry = AssetRegistry(str(storage))
+    assert registry.scan() == 2
+
+    from backend.core.scene_graph import asset_scanner
+    scanned = []
+    original = asset_scanner.scan_character_folder
+    monkeypatch.setattr(asset_scanner, "scan_character_folder",
+                        lambda path, root: scanned.append(os.path.basename(path)) or original(path, root))
+
+    assert registry.refresh() == {"added": 0, "updated": 0, "removed": 0, "unchanged": 2}
+    assert scanned == []
+
+    bob = _add_character(storage, "Bob", poses=("站立", "坐下"))
+    _touch(bob / "动作", 10)
+    _add_character(storage, "Carol")
+    counts = registry.refresh()
+
+    assert counts == {"added": 1, "updated": 1, "removed": 0, "unchanged": 1}
+    assert sorted(scanned) == ["Bob", "Carol"]
+    assert set(registry.get_character("bob").poses) == {"站立", "坐下"}
+
+    shutil.rmtree(storage / "extracted_psds" / "Alice")
+    assert registry.refresh()["removed"] == 1
+    assert registry.get_character("alice") is None
+
+
+def test_snapshot_restores_without_walking(storage, tmp_path, monkeypatch):
+    _add_character(storage, "Alice", faces=("开心", "生气"))
+    snapshot = str(tmp_path / "data" / "registry.json")
+    registry = AssetRegistry(str(storage), snapshot_path=snapshot)
+    registry.scan()
+    assert registry.save_snapshot()
+    assert not registry.save_snapshot()  # unchanged since the last save
+
+    from backend.core.scene_graph import asset_scanner
+    monkeypatch.setattr(asset_scanner, "scan_character_folder",
+                        lambda *a: pytest.fail("snapshot load must not scan folders"))
+    restored = AssetRegistry(str(storage), snapshot_path=snapshot)
+    assert restored.load_snapshot()
+    assert restored.to_dict() == registry.to_dict()
+    assert restored.refresh()["unchanged"] == 1
+
+    # A snapshot from another storage root is ignored
+    other = AssetRegistry(str(tmp_path / "elsewhere"), snapshot_path=snapshot)
+    assert not other.load_snapshot()
+
+
+def test_ingested_characters_are_pushed_in(storage, monkeypatch):
+    feed = ChangeFeed()
+    monkeypatch.setattr(character_store, "changes", feed)
+    stored = {
+        "id": "c1",
+        "name": "Dana",
+        "layer_groups": {
+            "动作": [{"name": "站立", "path": "assets/aaa.png"}],
+            "豆豆眼表情": [{"name": "眨眼", "path": "assets/bbb.png"}],
+            "其他": [{"name": "背景", "path": "assets/ccc.png"}],
+        },
+    }
+    monkeypatch.setattr(character_store, "get_character", lambda pipeline, name=None, char_id=None: stored)
+    registry = AssetRegistry(str(storage))
+    registry.scan()
+    registry.attach_character_store()
+
+    feed.record("v2", "upsert", "Ignored")
+    assert registry.characters == {}
+    feed.record("v1", "merge", "Dana")
+
+    dana = registry.get_character("dana")
+    assert dana is not None
+    assert dana.poses["站立"].relative_path == "assets/aaa.png"
+    assert set(dana.faces_dot_eye) == {"眨眼"}
+    assert dana.total_assets == 2
+
+    # Once extracted files exist on disk, the folder scan takes precedence
+    _add_character(storage, "Dana", poses=("跑步",))
+    registry.refresh()
+    assert set(registry.get_character("dana").poses) == {"跑步"}
+
+
+def test_polling_watcher_tick(storage):
+    registry = AssetRegistry(str(storage))
+    registry.scan()
+    watcher = RegistryWatcher(registry, interval=60)
+    watcher._observer = None  # force polling mode regardless of installed packages
+
+    _add_character(storage, "Eve")
+    assert watcher.tick()["added"] == 1
+    assert registry.find_character("eve") is not None
+    assert folder_signature(str(storage / "extracted_psds" / "missing")) is None
+
+
+def test_refresh_is_fast_for_many_characters(storage):
+    for i in range(1000):
+        _add_character(storage, f"char{i:04d}", poses=("p",), faces=())
+    registry = AssetRegistry(str(storage))
+    registry.scan()
+
+    start = time.perf_counter()
+    counts = registry.refresh()
+    assert counts["unchanged"] == 1000
+    assert time.perf_counter() - start < 1.0
+
+
+def test_sync_character_store_replaces_ingested(storage, monkeypatch):
+    library = [{"name": "Fay", "layer_groups": {"表情": [{"name": "笑", "path": "assets/f.png"}]}}]
+    monkeypatch.setattr(character_store, "list_characters", lambda pipeline: list(library))
+    registry = AssetRegistry(str(storage))
+    assert registry.sync_character_store() == 1
+    assert registry.get_character("fay").faces["笑"].filename == "f.png"
+
+    library.clear()
+    assert registry.sync_character_store() == 0
+    assert registry.characters == {}
+
+
+def test_search_ranks_id_name_tokens_and_fuzzy(storage):
+    for name in ("Hoa_NuSinh", "Bà Lan", "q版花店姐姐长裙_1761648249312", "Hoang"):
+        _add_character(storage, name)
+    registry = AssetRegistry(str(storage))
+    registry.scan()
+
+    assert registry.search_characters("hoa_nusinh")[0].kind == "id"
+    assert registry.find_character("ba lan").name == "Bà Lan"              # diacritics folded
+    assert registry.find_character("Hoa").id == "hoa_nusinh"              # name token
+    assert registry.find_character("花店姐姐").name.startswith("q版花店")    # CJK substring
+    assert registry.find_character("Hoàng").id == "hoang"
+    assert registry.find_character("xyz") is None
+
+    ranked = registry.search_characters("hoa", limit=5)
+    assert [m.character.id for m in ranked][:2] == ["hoa_nusinh", "hoang"]
+    assert ranked[0].score > ranked[1].score
+
+
+def test_resolve_names_searches_each_name_once(storage, monkeypatch):
+    _add_character(storage, "Hoa_NuSinh")
+    _add_character(storage, "Minh")
+    registry = AssetRegistry(str(storage))
+    registry.scan()
+    index = registry.index
+    calls = []
+    best = index.best
+    monkeypatch.setattr(index, "best", lambda name, *a: calls.append(name) or best(name, *a))
+
+    resolved = registry.resolve_names(["Hoa", "Minh", "Hoa", "Nobody"] * 50)
+
+    assert sorted(calls) == ["Hoa", "Minh", "Nobody"]
+    assert resolved["Hoa"].id == "hoa_nusinh" and resolved["Nobody"] is None
+    # The index is only rebuilt when the character set changes
+    assert registry.index is index
+    _add_character(storage, "Lan")
+    registry.refresh()
+    assert registry.index is not index
+
+
+def test_auto_map_uses_registry_index(storage):
+    from backend.routers.auto_video import _auto_map_characters
+
+    _add_character(storage, "Hoa_NuSinh")
+    _add_character(storage, "Minh")
+    registry = AssetRegistry(str(storage))
+    registry.scan()
+
+    mapped = _auto_map_characters(["Hoa", "Minh", "Stranger"], registry, {"Boss": "minh"})
+    assert mapped == {"Hoa": "hoa_nusinh", "Minh": "minh", "Stranger": "hoa_nusinh"}
+
+
+def test_cropped_ingest_renders_at_layer_offset(tmp_path, monkeypatch):
+    import asyncio
+
+    from PIL import Image
+    from psd_tools import PSDImage
+    from psd_tools.api.layers import Group, PixelLayer
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from backend.core import psd_processor
+    from backend.core.models import Base
+    from backend.core.psd_ingest import PsdIngestEngine
+    from backend.core.render import FrameRenderer
+    from backend.core.scene_graph.scene import SceneGraph
+    from backend.core.scene_graph.specialized_nodes import CameraNode
+    from backend.core.scene_graph.tools import SceneToolExecutor
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(psd_processor, "SessionLocal", factory)
+    monkeypatch.setattr(character_store, "SessionLocal", factory)
+    monkeypatch.setattr(character_store, "changes", ChangeFeed())
+
+    storage = tmp_path / "storage"
+    registry = AssetRegistry(str(storage))
+    registry.scan()
+    registry.attach_character_store()
+
+    # 64×48 PSD: a red body at (10, 4) and a green face at (30, 20)
+    # (psd-tools writes layer names as Mac Roman, hence the English group names)
+    layers = {"pose": ("idle", (255, 0, 0, 255), (10, 4), (20, 40)), "face": ("smile", (0, 255, 0, 255), (30, 20), (8, 6))}
+    psd = PSDImage.new("RGBA", (64, 48))
+    for group_name, (name, color, (left, top), size) in layers.items():
+        PixelLayer.frompil(Image.new("RGBA", size, color), Group.new(psd, group_name), name, left=left, top=top)
+    psd.save(str(tmp_path / "Mai.psd"))
+
+    ingest = PsdIngestEngine(max_workers=1, storage_dir=str(storage))
+    try:
+        assert asyncio.run(ingest.ingest(str(tmp_path / "Mai.psd"), "Mai.psd")).status == "done"
+    finally:
+        ingest.shutdown()
+
+    mai = registry.get_character("mai")
+    assert mai.canvas_size == [64, 48]
+    assert mai.poses["idle"].to_dict()["bbox"] == [10, 4, 20, 40]
+
+    graph = SceneGraph(name="Ingested", duration=1.0, fps=10)
+    camera = CameraNode(id="camera_main", name="Main Camera")
+    camera.set_position(9.6, 5.4)
+    graph.add_node(camera)
+    tools = SceneToolExecutor(graph, asset_registry=registry)
+    assert tools.execute("add_character", {"character_id": "mai", "name": "Mai", "x": 9.6, "y": 5.4}).success
+    node = next(n for n in graph.nodes.values() if n.metadata.get("poseUrls"))
+    assert node.metadata["canvasSize"] == [64, 48]
+    assert node.metadata["faceUrls"]["smile"]["cropped"] is True
+    cropped = FrameRenderer(storage_dir=str(storage)).render_scene(graph, 0.0)
+
+    # Reference: the same layers as legacy full-canvas PNGs
+    for group_name, (name, color, (left, top), size) in layers.items():
+        padded = Image.new("RGBA", (64, 48), (0, 0, 0, 0))
+        padded.paste(Image.new("RGBA", size, color), (left, top))
+        padded.save(storage / f"padded_{name}.png")
+    node.metadata.pop("canvasSize")
+    node.metadata["poseUrls"] = {"idle": {"url": "/static/padded_idle.png"}}
+    node.metadata["faceUrls"] = {"smile": {"url": "/static/padded_smile.png"}}
+    node.metadata["poseUrl"], node.metadata["faceUrl"] = "/static/padded_idle.png", "/static/padded_smile.png"
+    padded = FrameRenderer(storage_dir=str(storage)).render_scene(graph, 0.0)
+
+    assert cropped.tobytes() == padded.tobytes()
+    assert {color for _, color in cropped.getcolors(1 << 20)} >= {(255, 0, 0, 255), (0, 255, 0, 255)}
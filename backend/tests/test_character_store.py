@@ -0,0 +1,170 @@
+"""
+Tests for the SQLite character store that replaced database.json / database_v2.json.
+"""
+import sys
+import os
+import json
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.core import character_store
+from backend.core.models import Base
+
+
+# ── Helpers ──
+
+def _layer(name, img_hash):
+    return {"name": name, "path": f"assets/{img_hash}.png", "hash": img_hash, "bbox": [0, 0, 4, 4], "cropped": True}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # File-backed so concurrent writers use separate connections, like the app
+    engine = create_engine(f"sqlite:///{tmp_path / 'store.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(character_store, "SessionLocal", sessionmaker(bind=engine))
+    return character_store
+
+
+# ── Tests ──
+
+def test_merge_keeps_json_shape(store):
+    store.merge_character_layers("v1", "Hero", [64, 48], ["Body", "Face"], {
+        "Body": [_layer("arm", "a1"), _layer("leg", "l1")],
+        "Face": [_layer("eyes", "e1")],
+    })
+    store.merge_character_layers("v1", "Hero", [128, 96], ["Body", "Hair"], {
+        "Body": [_layer("arm", "a1"), _layer("arm", "a2")],
+        "Hair": [_layer("bangs", "b1")],
+    })
+
+    [hero] = store.list_characters("v1")
+    assert list(hero) == ["id", "name", "canvas_size", "group_order", "layer_groups"]
+    assert hero["canvas_size"] == [128, 96]
+    assert hero["group_order"] == ["Body", "Face", "Hair"]
+    assert [l["hash"] for l in hero["layer_groups"]["Body"]] == ["a1", "l1", "a2"]
+    assert hero["layer_groups"]["Hair"] == [_layer("bangs", "b1")]
+    assert store.get_character("v1", name="Hero") == hero
+    assert store.list_characters("v2") == []
+
+
+def test_upsert_replaces_and_keeps_id(store):
+    first = store.upsert_character("v2", {
+        "id": "c1", "name": "Hero", "psd_type": "jointed", "canvas_size": [10, 10],
+        "group_order": ["Body"], "layer_groups": {"Body": [_layer("arm", "a1")]}, "head": None,
+    })
+    again = store.upsert_character("v2", {
+        "id": "c2", "name": "Hero", "psd_type": "flat", "canvas_size": [20, 20],
+        "group_order": ["Face"], "layer_groups": {"Face": [_layer("eyes", "e1")]}, "head": None,
+    })
+
+    assert first["id"] == again["id"] == "c1"
+    stored = store.get_character("v2", char_id="c1")
+    assert stored == again
+    assert list(stored) == ["id", "name", "psd_type", "canvas_size", "group_order", "layer_groups", "head"]
+
+
+def test_pages_and_purge(store):
+    for i in range(5):
+        store.merge_character_layers("v1", f"C{i}", [1, 1], ["G"], {"G": [_layer("x", "shared"), _layer("y", f"h{i}")]})
+
+    assert [c["name"] for c in store.list_characters("v1", limit=2, offset=1)] == ["C1", "C2"]
+    assert [c["name"] for c in store.list_characters("v1", offset=3)] == ["C3", "C4"]
+    assert store.count_characters("v1") == 5
+
+    assert store.remove_layers_by_hash("v1", "shared") == 5
+    assert [l["hash"] for l in store.get_character("v1", name="C0")["layer_groups"]["G"]] == ["h0"]
+
+
+def test_concurrent_merges_do_not_lose_characters(store):
+    errors = []
+
+    def ingest(i):
+        try:
+            store.merge_character_layers("v1", f"C{i}", [1, 1], ["G"], {"G": [_layer("x", f"h{i}")]})
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=ingest, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert sorted(c["name"] for c in store.list_characters("v1")) == [f"C{i}" for i in range(8)]
+
+
+def test_migrate_json_db_once(store, tmp_path):
+    legacy = [
+        {"id": "x1", "name": "Old", "canvas_size": [5, 5], "group_order": ["G"], "layer_groups": {"G": [_layer("a", "h")]}},
+        {"id": "x2", "name": "Older"},
+    ]
+    path = tmp_path / "database.json"
+    path.write_text(json.dumps(legacy), encoding="utf-8")
+
+    assert store.migrate_json_db("v1", str(path)) == 2
+    assert store.list_characters("v1") == legacy
+    assert not path.exists() and (tmp_path / "database.json.migrated").exists()
+
+    path.write_text(json.dumps(legacy), encoding="utf-8")
+    assert store.migrate_json_db("v1", str(path)) == 0
+    assert store.count_characters("v1") == 2
+
+
+def test_listing_cache_etag_and_invalidation(store, monkeypatch):
+    from backend.routers import characters
+
+    store.merge_character_layers("v1", "Hero", [1, 1], ["G"], {"G": [_layer("x", "h1")]})
+    loads = []
+    list_characters = store.list_characters
+    monkeypatch.setattr(store, "list_characters", lambda *a: loads.append(a) or list_characters(*a))
+    app = FastAPI()
+    app.include_router(characters.router)
+
+    with TestClient(app) as client:
+        first = client.get("/api/characters/")
+        again = client.get("/api/characters/", headers={"If-None-Match": first.headers["etag"]})
+        store.merge_character_layers("v1", "Hero", [1, 1], ["G"], {"G": [_layer("y", "h2")]})
+        store.upsert_character("v2", {"name": "Other"})
+        changed = client.get("/api/characters/", headers={"If-None-Match": first.headers["etag"]})
+        page = client.get("/api/characters/", params={"limit": 1})
+
+    assert first.status_code == 200 and first.json()[0]["name"] == "Hero"
+    assert again.status_code == 304 and again.content == b""
+    assert changed.status_code == 200 and changed.headers["etag"] != first.headers["etag"]
+    assert [l["hash"] for l in changed.json()[0]["layer_groups"]["G"]] == ["h1", "h2"]
+    assert page.json() == changed.json()
+    # One build per (version, page): the 304 and v2 write did not rebuild the v1 listing
+    assert loads == [("v1", None, 0), ("v1", None, 0), ("v1", 1, 0)]
+
+
+def test_change_feed_long_poll():
+    feed = character_store.ChangeFeed(max_changes=2)
+
+    async def run():
+        waiter = asyncio.create_task(feed.wait(0, timeout=5))
+        await asyncio.sleep(0.01)
+        threading.Thread(target=feed.record, args=("v1", "merge", "Hero", "c1")).start()
+        woke = await waiter
+        idle = await feed.wait(feed.version, timeout=0.01)
+        return woke, idle
+
+    woke, idle = asyncio.run(run())
+    assert [(c["version"], c["op"], c["name"]) for c in woke] == [(1, "merge", "Hero")]
+    assert idle == []
+
+    feed.record("v1", "purge")
+    feed.record("v2", "upsert", "Other", "c2")
+    assert [c["version"] for c in feed.since(1)] == [2, 3]
+    # Older changes fell out of the log, and versions from before a restart are unknown
+    assert feed.since(0) is None
+    assert feed.since(99) is None
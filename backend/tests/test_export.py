@@ -0,0 +1,327 @@
+"""
+Tests for the export router and FFmpeg pipe streaming.
+
+FFmpeg itself isn't needed: a tiny stand-in script records everything it
+reads from stdin into the output path, which lets the tests check exactly
+which bytes would have been encoded and in what order.
+"""
+import sys
+import os
+import asyncio
+import base64
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.core.render.encode_jobs import EncodeJob, EncodeJobManager, parse_progress_line
+from backend.core.render.ffmpeg_pipe import FFmpegPipeWriter, FFmpegPipeError
+from backend.routers import export
+
+
+FAKE_FFMPEG = """#!{python}
+import glob, os, sys
+if "--fail" in sys.argv:
+    sys.stderr.write("boom\\n")
+    sys.exit(3)
+source = sys.argv[sys.argv.index("-i") + 1]
+with open(sys.argv[-1], "wb") as out:
+    if source == "-":
+        out.write(sys.stdin.buffer.read())
+    else:
+        # PNG sequence: concatenate the frames and report -progress output
+        frames = sorted(glob.glob(os.path.join(os.path.dirname(source), "frame_*.png")))
+        for i, path in enumerate(frames):
+            with open(path, "rb") as f:
+                out.write(f.read())
+            print(f"frame={{i + 1}}\\nspeed=2.0x\\nprogress=continue", flush=True)
+        print("progress=end", flush=True)
+"""
+
+
+# ── Helpers ──
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    path = tmp_path / "ffmpeg"
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def client(fake_ffmpeg, tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "FFMPEG_PATH", fake_ffmpeg)
+    monkeypatch.setattr(export, "EXPORTS_DIR", str(tmp_path / "exports"))
+    monkeypatch.setattr(export, "TEMP_RENDER_DIR", str(tmp_path / "temp_render"))
+    os.makedirs(export.EXPORTS_DIR)
+    monkeypatch.setattr(export, "_encode_jobs", None)
+    app = FastAPI()
+    app.include_router(export.router)
+    # Context manager keeps one event loop alive for background encode tasks
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+# ── Tests ──
+
+def test_pipe_writer_raw_frames(fake_ffmpeg, tmp_path):
+    out = str(tmp_path / "out.mp4")
+    with FFmpegPipeWriter(out, 4, 2, fps=30, ffmpeg_path=fake_ffmpeg) as writer:
+        cmd = writer.build_command()
+        assert cmd[cmd.index("-s") + 1] == "4x2"
+        assert cmd[cmd.index("-i") + 1] == "-"
+        writer.write(b"\x01" * 32)
+        writer.write(b"\x02" * 32)
+        with pytest.raises(ValueError):
+            writer.write(b"short")
+    assert writer.frames_written == 2
+    with open(out, "rb") as f:
+        assert f.read() == b"\x01" * 32 + b"\x02" * 32
+
+
+def test_pipe_writer_reports_ffmpeg_errors(fake_ffmpeg, tmp_path):
+    writer = FFmpegPipeWriter(
+        str(tmp_path / "out.mp4"), input_format="png",
+        ffmpeg_path=fake_ffmpeg, extra_output_args=["--fail"],
+    )
+    writer.start()
+    with pytest.raises(FFmpegPipeError, match="boom"):
+        try:
+            writer.write(b"png")
+        finally:
+            writer.close()
+
+
+def test_streaming_export_reorders_chunks(client):
+    start = client.post("/api/export/start", json={"totalFrames": 4, "fps": 30, "streaming": True}).json()
+    job_id = start["renderJobId"]
+    assert start["streaming"] is True
+
+    def b64(data):
+        return base64.b64encode(data).decode()
+
+    # Second chunk arrives first — nothing can be encoded yet
+    r = client.post("/api/export/chunk", json={
+        "renderJobId": job_id, "chunkIndex": 1, "frameOffset": 2, "frames": [b64(b"C"), b64(b"D")],
+    })
+    assert r.json()["framesEncoded"] == 0
+    r = client.post("/api/export/chunk", json={
+        "renderJobId": job_id, "chunkIndex": 0, "frameOffset": 0, "frames": [b64(b"A"), b64(b"B")],
+    })
+    assert r.json()["framesEncoded"] == 4
+
+    r = client.post("/api/export/finish", json={"renderJobId": job_id, "fps": 30})
+    assert r.status_code == 200
+    assert r.content == b"ABCD"
+    assert not os.path.exists(os.path.join(export.TEMP_RENDER_DIR, job_id))
+
+
+def test_streaming_export_missing_frame(client):
+    job_id = client.post("/api/export/start", json={"totalFrames": 2, "streaming": True}).json()["renderJobId"]
+    client.post("/api/export/chunk", json={
+        "renderJobId": job_id, "chunkIndex": 1, "frameOffset": 1, "frames": [base64.b64encode(b"B").decode()],
+    })
+    r = client.post("/api/export/finish", json={"renderJobId": job_id})
+    assert r.status_code == 400
+    export._streaming_jobs.pop(job_id).abort()
+
+
+def test_streaming_export_caps_buffered_frames(client, monkeypatch):
+    monkeypatch.setattr(export, "default_stream_buffer_bytes", lambda: 4)
+    job_id = client.post("/api/export/start", json={"totalFrames": 4, "streaming": True}).json()["renderJobId"]
+
+    def chunk(offset, *frames):
+        return client.post("/api/export/chunk", json={
+            "renderJobId": job_id, "chunkIndex": offset, "frameOffset": offset,
+            "frames": [base64.b64encode(f).decode() for f in frames],
+        })
+
+    assert chunk(1, b"BB", b"CC").json()["framesEncoded"] == 0
+    # 6 bytes ahead of frame 0 would exceed the 4-byte buffer: rejected, nothing kept
+    assert chunk(3, b"DD").status_code == 409
+    assert export._streaming_jobs[job_id].pending_bytes == 4
+    assert chunk(0, b"AA").json()["framesEncoded"] == 3
+    assert chunk(3, b"DD").json()["framesEncoded"] == 4
+
+    r = client.post("/api/export/finish", json={"renderJobId": job_id})
+    assert r.content == b"AABBCCDD"
+
+
+def test_abandoned_streaming_export_is_reaped(client, monkeypatch):
+    monkeypatch.setenv("EXPORT_STREAM_IDLE_SECONDS", "0.2")
+    job_id = client.post("/api/export/start", json={"totalFrames": 2, "streaming": True}).json()["renderJobId"]
+    process = export._streaming_jobs[job_id].writer._process
+
+    deadline = time.monotonic() + 5
+    while job_id in export._streaming_jobs and time.monotonic() < deadline:
+        client.get("/api/export/jobs/none")  # let the app's event loop run
+        time.sleep(0.05)
+    assert job_id not in export._streaming_jobs
+    while process.poll() is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert process.poll() is not None
+    r = client.post("/api/export/chunk", json={"renderJobId": job_id, "chunkIndex": 0, "frameOffset": 0, "frames": []})
+    assert r.status_code == 404
+
+
+def test_png_sequence_export_still_default(client):
+    start = client.post("/api/export/start", json={"totalFrames": 1}).json()
+    assert start["streaming"] is False
+    job_dir = os.path.join(export.TEMP_RENDER_DIR, start["renderJobId"])
+    assert os.path.isdir(job_dir)
+
+
+def test_server_render_streams_raw_frames(client, monkeypatch):
+    from backend.core.scene_graph.scene import SceneGraph
+
+    monkeypatch.setenv("RENDER_WORKERS", "1")
+    graph = SceneGraph(name="Empty", duration=2.0, fps=1, canvas_width=64, canvas_height=36)
+    r = client.post("/api/export/render", json={"project": {"scenes": [graph.to_dict()], "transitions": []}})
+    assert r.status_code == 200
+    assert len(r.content) == 2 * 64 * 36 * 4
+
+
+def test_frame_record_roundtrip():
+    frames = [(0, b"\x89PNG-a"), (7, b""), (1, b"x" * 1000)]
+    assert export.parse_frame_records(export.encode_frame_records(frames)) == frames
+    with pytest.raises(ValueError):
+        export.parse_frame_records(export.encode_frame_records(frames)[:-1])
+    with pytest.raises(ValueError):
+        export.parse_frame_records(b"\x00\x00")
+
+
+def test_binary_chunk_to_disk(client):
+    job_id = client.post("/api/export/start", json={"totalFrames": 2}).json()["renderJobId"]
+    payload = export.encode_frame_records([(0, b"first"), (1, b"second")])
+    r = client.post(
+        f"/api/export/chunk-binary?renderJobId={job_id}&chunkIndex=0",
+        content=payload, headers={"Content-Type": "application/octet-stream"},
+    )
+    assert r.status_code == 200
+    assert r.json()["framesWritten"] == 2
+    with open(os.path.join(export.TEMP_RENDER_DIR, job_id, "frame_0001.png"), "rb") as f:
+        assert f.read() == b"second"
+
+    r = client.post(f"/api/export/chunk-binary?renderJobId={job_id}", content=payload[:-3])
+    assert r.status_code == 400
+    r = client.post("/api/export/chunk-binary?renderJobId=nope", content=payload)
+    assert r.status_code == 404
+
+
+def test_websocket_frames_streaming(client):
+    job_id = client.post("/api/export/start", json={"totalFrames": 3, "streaming": True}).json()["renderJobId"]
+    with client.websocket_connect(f"/api/export/ws/{job_id}") as ws:
+        ws.send_bytes(export.encode_frame_records([(1, b"B"), (2, b"C")]))
+        assert ws.receive_json()["framesEncoded"] == 0
+        ws.send_bytes(b"\x01")
+        assert ws.receive_json()["status"] == "error"
+        ws.send_bytes(export.encode_frame_records([(0, b"A")]))
+        assert ws.receive_json()["framesEncoded"] == 3
+
+    r = client.post("/api/export/finish", json={"renderJobId": job_id})
+    assert r.content == b"ABC"
+
+
+def test_png_sequence_finish_waits_for_encode(client):
+    job_id = client.post("/api/export/start", json={"totalFrames": 2}).json()["renderJobId"]
+    client.post(f"/api/export/chunk-binary?renderJobId={job_id}", content=export.encode_frame_records([(0, b"A"), (1, b"B")]))
+    r = client.post("/api/export/finish", json={"renderJobId": job_id})
+    assert r.status_code == 200
+    assert r.content == b"AB"
+    assert not os.path.exists(os.path.join(export.TEMP_RENDER_DIR, job_id))
+
+    status = client.get(f"/api/export/jobs/{job_id}").json()
+    assert status["status"] == "done"
+    assert status["framesDone"] == 2 and status["progress"] == 1.0
+    assert status["speed"] == "2.0x"
+
+
+def test_background_finish_and_download(client):
+    job_id = client.post("/api/export/start", json={"totalFrames": 3}).json()["renderJobId"]
+    client.post(f"/api/export/chunk-binary?renderJobId={job_id}",
+                content=export.encode_frame_records([(0, b"x"), (1, b"y"), (2, b"z")]))
+    r = client.post("/api/export/finish", json={"renderJobId": job_id, "background": True})
+    assert r.status_code == 202
+    assert r.json()["downloadUrl"] == f"/api/export/jobs/{job_id}/download"
+
+    deadline = time.time() + 10
+    while client.get(f"/api/export/jobs/{job_id}").json()["status"] != "done":
+        assert time.time() < deadline
+        time.sleep(0.05)
+    assert client.get(f"/api/export/jobs/{job_id}/download").content == b"xyz"
+    assert client.get("/api/export/jobs/nope").status_code == 404
+
+
+def test_duplicate_finish_reuses_running_encode(client, monkeypatch):
+    from backend.core.render import encode_jobs
+
+    runs = []
+
+    async def slow_ffmpeg(cmd, job):
+        runs.append(cmd)
+        await asyncio.sleep(0.3)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"mp4")
+
+    monkeypatch.setattr(encode_jobs, "run_ffmpeg_with_progress", slow_ffmpeg)
+    job_id = client.post("/api/export/start", json={"totalFrames": 1}).json()["renderJobId"]
+    client.post(f"/api/export/chunk-binary?renderJobId={job_id}", content=export.encode_frame_records([(0, b"A")]))
+
+    first = client.post("/api/export/finish", json={"renderJobId": job_id, "background": True})
+    # A retry while the first encode runs follows it instead of starting FFmpeg again
+    retry = client.post("/api/export/finish", json={"renderJobId": job_id})
+    assert (first.status_code, retry.status_code) == (202, 200)
+    assert retry.content == b"mp4"
+    assert len(runs) == 1
+
+
+def test_background_streaming_failure_reported(client, monkeypatch):
+    job_id = client.post("/api/export/start", json={"totalFrames": 1, "streaming": True}).json()["renderJobId"]
+    client.post(f"/api/export/chunk-binary?renderJobId={job_id}", content=export.encode_frame_records([(0, b"A")]))
+
+    async def broken_finish():
+        raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(export._streaming_jobs[job_id], "finish", broken_finish)
+    r = client.post("/api/export/finish", json={"renderJobId": job_id})
+    assert r.status_code == 500
+    assert "encoder crashed" in r.json()["detail"]
+    assert client.get(f"/api/export/jobs/{job_id}").json()["status"] == "error"
+    assert client.get(f"/api/export/jobs/{job_id}/download").status_code == 500
+
+
+def test_progress_line_parsing():
+    job = EncodeJob(job_id="j", total_frames=10)
+    for line in ["frame=4\n", "fps=30.0\n", "speed=1.5x\n", "progress=continue\n"]:
+        parse_progress_line(job, line)
+    assert job.frames_done == 4 and job.speed == "1.5x"
+    parse_progress_line(job, "progress=end")
+    assert job.frames_done == 10
+
+
+def test_encode_jobs_bounded_concurrency():
+    async def scenario():
+        manager = EncodeJobManager(max_concurrent=2)
+        running = []
+        peak = []
+
+        async def runner(job):
+            running.append(job.job_id)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(job.job_id)
+            return f"{job.job_id}.mp4"
+
+        jobs = [manager.submit(f"job{i}", runner) for i in range(5)]
+        assert all(job.status == "queued" for job in jobs)
+        for job in jobs:
+            await manager.wait(job.job_id)
+        return jobs, max(peak)
+
+    jobs, peak = asyncio.run(scenario())
+    assert peak == 2
+    assert [job.output_path for job in jobs] == [f"job{i}.mp4" for i in range(5)]
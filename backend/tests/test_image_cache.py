@@ -0,0 +1,109 @@
+"""
+Tests for the content-addressed decoded-image cache.
+"""
+import sys
+import os
+import shutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.core.image_cache import ImageCache
+
+
+# ── Helpers ──
+
+def _write_png(path, color, size=(8, 4)):
+    Image.new("RGBA", size, color).save(path)
+    return str(path)
+
+
+# ── Tests ──
+
+def test_decodes_each_content_once(tmp_path):
+    cache = ImageCache()
+    a = _write_png(tmp_path / "站立.png", (255, 0, 0, 255))
+    b = str(tmp_path / "copy.png")
+    shutil.copy(a, b)
+
+    first = cache.get_array(a)
+    assert first.shape == (4, 8, 4)
+    assert not first.flags.writeable
+    assert cache.get_array(a) is first
+    # Identical bytes under another path share the decoded array
+    assert cache.get_array(b) is first
+    assert (cache.misses, cache.hits) == (1, 2)
+    assert cache.get_image(a).getpixel((0, 0)) == (255, 0, 0, 255)
+
+
+def test_changed_file_is_redecoded(tmp_path):
+    cache = ImageCache()
+    path = _write_png(tmp_path / "face.png", (0, 0, 255, 255))
+    assert cache.get_array(path)[0, 0, 2] == 255
+
+    _write_png(path, (0, 255, 0, 255), size=(9, 4))
+    os.utime(path, ns=(1, 1))
+    assert cache.get_array(path).shape == (4, 9, 4)
+    assert cache.misses == 2
+
+    with pytest.raises(OSError):
+        cache.get_array(str(tmp_path / "missing.png"))
+
+
+def test_byte_budget_evicts_lru(tmp_path):
+    frame_bytes = 8 * 4 * 4
+    cache = ImageCache(max_bytes=frame_bytes * 2)
+    paths = [_write_png(tmp_path / f"{i}.png", (i, 0, 0, 255)) for i in range(3)]
+    for path in paths:
+        cache.get_array(path)
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert stats["bytes"] <= frame_bytes * 2
+
+    cache.get_array(paths[0])
+    assert cache.misses == 4
+
+
+def test_evicted_hash_drops_its_paths(tmp_path):
+    frame_bytes = 8 * 4 * 4
+    cache = ImageCache(max_bytes=frame_bytes)
+    paths = [_write_png(tmp_path / f"{i}.png", (i, 0, 0, 255)) for i in range(20)]
+    for path in paths:
+        cache.get_array(path)
+    # Only the surviving entry's path keeps its stat → hash mapping
+    assert set(cache._paths) == {os.path.abspath(paths[-1])}
+    assert len(cache._digest_paths) == 1
+
+    big = _write_png(tmp_path / "big.png", (9, 9, 9, 255), size=(64, 64))
+    cache.get_array(big)
+    assert os.path.abspath(big) not in cache._paths
+
+
+def test_raw_bytes(tmp_path):
+    cache = ImageCache()
+    path = _write_png(tmp_path / "element_1.png", (1, 2, 3, 255))
+    with open(path, "rb") as f:
+        raw = f.read()
+    assert cache.get_bytes(path) == raw
+    assert cache.get_bytes(path) is cache.get_bytes(path)
+    assert cache.hits == 2
+
+
+def test_shared_memory_attach(tmp_path):
+    parent = ImageCache()
+    path = _write_png(tmp_path / "pose.png", (10, 20, 30, 255))
+    manifest = parent.share([path, str(tmp_path / "missing.png")])
+    assert list(manifest) == [os.path.abspath(path)]
+
+    try:
+        worker = ImageCache()
+        assert worker.attach(manifest) == 1
+        array = worker.get_array(path)
+        assert worker.misses == 0
+        assert np.array_equal(array, parent.get_array(path))
+        assert worker.stats()["shared"] == 1
+    finally:
+        parent.release_shared(manifest)
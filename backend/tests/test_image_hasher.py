@@ -0,0 +1,62 @@
+"""
+Tests for pixel-content hashing and the pixel_hash backfill.
+"""
+import sys
+import os
+import types
+import importlib.util
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import sqlalchemy as sa
+from PIL import Image
+
+from backend.core.image_hasher import calculate_hash_from_layer, calculate_pixel_hash
+from backend.core.layer_image import crop_layer_image
+
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), "..", "migrations", "versions", "c3a9f1b27d40_add_pixel_hash_to_assets.py"
+)
+
+
+# ── Helpers ──
+
+def _load_migration(monkeypatch):
+    # Only backfill_pixel_hashes is exercised; alembic's op isn't needed
+    monkeypatch.setitem(sys.modules, "alembic", types.SimpleNamespace(op=None))
+    spec = importlib.util.spec_from_file_location("pixel_hash_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ── Tests ──
+
+def test_pixel_hash_identity():
+    img = Image.new("RGBA", (16, 8), (10, 20, 30, 255))
+    assert calculate_pixel_hash(img) == calculate_pixel_hash(img.copy())
+    # Same pixels, different layout or placement → different identity
+    assert calculate_pixel_hash(img) != calculate_pixel_hash(Image.new("RGBA", (8, 16), (10, 20, 30, 255)))
+    assert calculate_pixel_hash(img) != calculate_pixel_hash(img, 1, 0)
+    assert calculate_pixel_hash(img.convert("P")) == calculate_pixel_hash(img)
+    assert calculate_hash_from_layer(img, 4, 2) == calculate_pixel_hash(img, 4, 2)
+
+
+def test_backfill_pixel_hashes(tmp_path, monkeypatch):
+    migration = _load_migration(monkeypatch)
+    (tmp_path / "assets").mkdir()
+    # Legacy layout: the layer padded to the full canvas
+    legacy = Image.new("RGBA", (40, 30), (0, 0, 0, 0))
+    legacy.paste(Image.new("RGBA", (4, 4), (9, 9, 9, 255)), (12, 7))
+    legacy.save(tmp_path / "assets" / "a.png")
+    # What a re-ingest of the same layer hashes: cropped pixels + canvas offset
+    layer = crop_layer_image(Image.new("RGBA", (4, 4), (9, 9, 9, 255)), 12, 7, 40, 30)
+
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE assets (id VARCHAR PRIMARY KEY, file_path VARCHAR, pixel_hash VARCHAR)")
+        conn.exec_driver_sql("INSERT INTO assets VALUES ('1', 'assets/a.png', NULL), ('2', 'assets/missing.png', NULL)")
+        assert migration.backfill_pixel_hashes(conn, str(tmp_path)) == 1
+        rows = dict(conn.exec_driver_sql("SELECT id, pixel_hash FROM assets").fetchall())
+    assert rows == {"1": calculate_hash_from_layer(layer.image, layer.left, layer.top), "2": None}
+    assert rows["1"] == calculate_pixel_hash(Image.new("RGBA", (4, 4), (9, 9, 9, 255)), 12, 7)
@@ -0,0 +1,145 @@
+"""
+Tests for structured per-layer PSD ingest progress.
+"""
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from PIL import Image
+from psd_tools import PSDImage
+from psd_tools.api.layers import Group, PixelLayer
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.core import character_store, psd_processor
+from backend.core.ingest_progress import PHASES, IngestProgress, merge_snapshots
+from backend.core.models import Base
+from backend.core.psd_ingest import PsdIngestEngine
+from backend.core.psd_smart_parser import parse_jointed_psd
+
+
+# ── Helpers ──
+
+def _write_psd(path):
+    psd = PSDImage.new("RGBA", (64, 48))
+    body = Group.new(psd, "Body")
+    PixelLayer.frompil(Image.new("RGBA", (8, 6), (255, 0, 0, 255)), body, "arm", top=2, left=3)
+    PixelLayer.frompil(Image.new("RGBA", (5, 9), (0, 255, 0, 255)), body, "leg", top=20, left=10)
+    face = Group.new(psd, "Face")
+    PixelLayer.frompil(Image.new("RGBA", (4, 4), (0, 0, 255, 255)), face, "eyes", top=5, left=30)
+    psd.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    root = tmp_path / "storage"
+    for sub in ("assets", "thumbnails", "extracted_psds"):
+        (root / sub).mkdir(parents=True)
+    monkeypatch.setattr(psd_processor, "STORAGE_DIR", str(root))
+    monkeypatch.setattr(psd_processor, "EXTRACTED_DIR", str(root / "extracted_psds"))
+    monkeypatch.setattr(psd_processor, "THUMBNAILS_DIR", str(root / "thumbnails"))
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(psd_processor, "SessionLocal", factory)
+    monkeypatch.setattr(character_store, "SessionLocal", factory)
+    return root
+
+
+# ── Tests ──
+
+def test_tracker_throttles_and_finishes():
+    sent = []
+    progress = IngestProgress(total_layers=3, sink=sent.append, min_interval=60)
+    with progress.phase("composite"):
+        pass
+    progress.add_bytes(100)
+    progress.layer_done("Body")
+    progress.layer_done("Body", reused=True)
+    progress.layer_done("Face")
+    progress.finish()
+
+    # First layer emits, the rest fall inside min_interval, finish() always emits
+    assert [snap["layersDone"] for snap in sent] == [1, 3]
+    final = sent[-1]
+    assert final["layersTotal"] == 3
+    assert final["layersReused"] == 1
+    assert final["bytesWritten"] == 100
+    assert final["currentGroup"] == "Face"
+    assert set(final["timings"]) == set(PHASES)
+
+
+def test_merge_snapshots_sums_shards():
+    a = {"layersDone": 2, "layersTotal": 4, "layersReused": 1, "bytesWritten": 300,
+         "currentGroup": "Body", "timings": {"composite": 0.5}, "elapsed": 1.0}
+    b = {"layersDone": 2, "layersTotal": 2, "layersReused": 0, "bytesWritten": 100,
+         "currentGroup": "Face", "timings": {"composite": 0.25, "save": 0.1}, "elapsed": 2.0}
+    merged = merge_snapshots([a, b])
+
+    assert merged["layersDone"] == 4
+    assert merged["layersTotal"] == 6
+    assert merged["bytesWritten"] == 400
+    assert merged["timings"]["composite"] == 0.75
+    assert merged["timings"]["save"] == 0.1
+    assert merged["elapsed"] == 2.0
+    assert merged["layersPerSec"] == 2.0
+    assert merged["bytesPerSec"] == 200
+
+
+def test_extract_psd_reports_every_layer(storage, tmp_path):
+    path = _write_psd(tmp_path / "Hero.psd")
+    sent = []
+    result = psd_processor.extract_psd(path, progress_sink=sent.append)
+
+    final = result["progress"]
+    assert sent[-1]["layersDone"] == final["layersDone"] == 3
+    assert final["layersTotal"] == 3
+    assert final["currentGroup"] == "Face"
+    assert final["bytesWritten"] > 0
+    assert all(final["timings"][name] > 0 for name in ("composite", "hash", "save"))
+
+    # Second ingest of the same PSD reuses every layer from the manifest
+    psd_processor.merge_psd_result(result)
+    again = psd_processor.extract_psd(path)["progress"]
+    assert again["layersDone"] == again["layersReused"] == 3
+    assert again["bytesWritten"] == 0
+
+
+def test_jointed_parse_counts_variants(tmp_path):
+    psd = PSDImage.new("RGBA", (40, 30))
+    root = Group.new(psd, "body")
+    for name in ("front_arm", "back_arm"):
+        group = Group.new(root, name)
+        for i in range(2):
+            PixelLayer.frompil(Image.new("RGBA", (6, 4), (i * 90, 20, 30, 255)), group, f"{name}{i}", top=i, left=i)
+    progress = IngestProgress()
+    parse_jointed_psd(psd, "hero", str(tmp_path / "storage"), workers=2, progress=progress)
+
+    snap = progress.snapshot()
+    assert snap["layersTotal"] == snap["layersDone"] > 0
+    assert snap["timings"]["composite"] > 0
+
+
+def test_engine_streams_progress(storage, tmp_path):
+    path = _write_psd(tmp_path / "Hero.psd")
+    engine = PsdIngestEngine(max_workers=1, storage_dir=str(storage))
+    seen = []
+
+    async def on_progress(job):
+        seen.append(dict(job.progress))
+
+    try:
+        job = asyncio.run(engine.ingest(path, "Hero.psd", on_progress=on_progress))
+    finally:
+        engine.shutdown()
+
+    assert job.status == "done"
+    assert job.progress["layersDone"] == job.progress["layersTotal"] == 3
+    assert job.progress["timings"]["db"] > 0
+    assert job.to_dict()["progress"] == job.progress
+    assert seen and seen[-1]["layersTotal"] == 3
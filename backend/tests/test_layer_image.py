@@ -0,0 +1,59 @@
+"""
+Tests for cropped PSD layer storage (backend.core.layer_image).
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from PIL import Image
+
+from backend.core.image_hasher import calculate_hash_from_layer
+from backend.core.layer_image import LayerImage, composite_layers, crop_layer_image
+
+
+# ── Helpers ──
+
+def _patch(size, box, color=(255, 0, 0, 255)):
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    img.paste(color, box)
+    return img
+
+
+# ── Tests ──
+
+def test_crop_trims_transparent_margins():
+    layer = crop_layer_image(_patch((50, 40), (10, 5, 20, 15)), 100, 200, 3000, 4000)
+    assert layer.bbox == (110, 205, 10, 10)
+    assert layer.image.getpixel((0, 0)) == (255, 0, 0, 255)
+
+
+def test_crop_clips_to_canvas():
+    layer = crop_layer_image(Image.new("RGBA", (40, 40), (0, 0, 255, 255)), -10, 90, 100, 100)
+    assert layer.bbox == (0, 90, 30, 10)
+    empty = crop_layer_image(Image.new("RGBA", (40, 40), (0, 0, 0, 0)), 5, 5, 100, 100)
+    assert empty.image.size == (1, 1)
+
+
+def test_roundtrip_matches_padded_layout():
+    source = _patch((30, 30), (5, 5, 25, 25))
+    padded = Image.new("RGBA", (200, 100), (0, 0, 0, 0))
+    padded.paste(source, (60, 10))
+    layer = crop_layer_image(source, 60, 10, 200, 100)
+    assert layer.to_canvas(200, 100).tobytes() == padded.tobytes()
+
+
+def test_composite_covers_union():
+    a = LayerImage(Image.new("RGBA", (10, 10), (255, 0, 0, 255)), 0, 0)
+    b = LayerImage(Image.new("RGBA", (10, 10), (0, 255, 0, 255)), 20, 5)
+    merged = composite_layers([a, None, b])
+    assert merged.bbox == (0, 0, 30, 15)
+    assert merged.image.getpixel((25, 10)) == (0, 255, 0, 255)
+    assert merged.image.getpixel((15, 2)) == (0, 0, 0, 0)
+    assert composite_layers([None]) is None
+
+
+def test_hash_includes_offset():
+    img = Image.new("RGBA", (4, 4), (1, 2, 3, 255))
+    assert calculate_hash_from_layer(img, 0, 0) != calculate_hash_from_layer(img, 1, 0)
+    assert calculate_hash_from_layer(img, 3, 7) == calculate_hash_from_layer(img.copy(), 3, 7)
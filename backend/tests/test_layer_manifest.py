@@ -0,0 +1,124 @@
+"""
+Tests for incremental PSD re-ingest via per-PSD layer manifests.
+"""
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from PIL import Image
+from psd_tools import PSDImage
+from psd_tools.api.layers import Group, PixelLayer
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.core import character_store, psd_processor, psd_smart_parser
+from backend.core.layer_manifest import LayerManifest, layer_fingerprint, save_manifest
+from backend.core.models import Base
+
+
+# ── Helpers ──
+
+def _write_psd(path, arm_color=(255, 0, 0, 255)):
+    psd = PSDImage.new("RGBA", (64, 48))
+    body = Group.new(psd, "Body")
+    PixelLayer.frompil(Image.new("RGBA", (8, 6), arm_color), body, "arm", top=2, left=3)
+    PixelLayer.frompil(Image.new("RGBA", (5, 9), (0, 255, 0, 255)), body, "leg", top=20, left=10)
+    face = Group.new(psd, "Face")
+    PixelLayer.frompil(Image.new("RGBA", (4, 4), (0, 0, 255, 255)), face, "eyes", top=5, left=30)
+    psd.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    root = tmp_path / "storage"
+    for sub in ("assets", "thumbnails", "extracted_psds"):
+        (root / sub).mkdir(parents=True)
+    monkeypatch.setattr(psd_processor, "STORAGE_DIR", str(root))
+    monkeypatch.setattr(psd_processor, "EXTRACTED_DIR", str(root / "extracted_psds"))
+    monkeypatch.setattr(psd_processor, "THUMBNAILS_DIR", str(root / "thumbnails"))
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(psd_processor, "SessionLocal", factory)
+    monkeypatch.setattr(character_store, "SessionLocal", factory)
+
+    calls = []
+    extract = psd_processor._extract_layer_asset
+    monkeypatch.setattr(psd_processor, "_extract_layer_asset", lambda layer, *a: calls.append(layer.name) or extract(layer, *a))
+    return root, calls
+
+
+def _ingest(path):
+    result = psd_processor.extract_psd(path)
+    psd_processor.merge_psd_result(result)
+    return result
+
+
+# ── Tests ──
+
+def test_reingest_skips_unchanged_layers(tmp_path, storage):
+    root, calls = storage
+    first = _ingest(_write_psd(tmp_path / "Hero.psd"))
+    assert sorted(calls) == ["arm", "eyes", "leg"] and first["reused_layers"] == 0
+    manifest_path = root / "extracted_psds" / "Hero" / "layer_manifest.json"
+    with open(manifest_path, encoding="utf-8") as f:
+        assert set(json.load(f)["layers"]) == {"Body/arm", "Body/leg", "Face/eyes"}
+
+    calls.clear()
+    second = _ingest(_write_psd(tmp_path / "Hero.psd"))
+    assert calls == [] and second["reused_layers"] == 3
+    assert second["layer_groups"] == first["layer_groups"]
+    assert second["asset_records"] == first["asset_records"]
+
+    # Only the edited layer is composited again
+    third = _ingest(_write_psd(tmp_path / "Hero.psd", arm_color=(1, 2, 3, 255)))
+    assert calls == ["arm"] and third["reused_layers"] == 2
+    assert third["layer_groups"]["Body"][0]["hash"] != first["layer_groups"]["Body"][0]["hash"]
+
+    # A manifest entry whose asset left the pool is extracted again
+    calls.clear()
+    os.remove(root / third["layer_groups"]["Face"][0]["path"])
+    _ingest(_write_psd(tmp_path / "Hero.psd", arm_color=(1, 2, 3, 255)))
+    assert calls == ["eyes"]
+
+
+def test_fingerprint_tracks_layer_data(tmp_path):
+    a = PSDImage.open(_write_psd(tmp_path / "a.psd"))
+    b = PSDImage.open(_write_psd(tmp_path / "b.psd", arm_color=(1, 2, 3, 255)))
+    arm_a, leg_a = a[0][0], a[0][1]
+    arm_b, leg_b = b[0][0], b[0][1]
+    assert layer_fingerprint(leg_a, (64, 48)) == layer_fingerprint(leg_b, (64, 48))
+    assert layer_fingerprint(arm_a, (64, 48)) != layer_fingerprint(arm_b, (64, 48))
+    assert layer_fingerprint(leg_a, (64, 48)) != layer_fingerprint(leg_a, (65, 48))
+    # Groups fingerprint their children
+    assert layer_fingerprint(a[0], (64, 48)) != layer_fingerprint(b[0], (64, 48))
+    assert layer_fingerprint(a[1], (64, 48)) == layer_fingerprint(b[1], (64, 48))
+
+
+def test_jointed_parse_reuses_variants(tmp_path, monkeypatch):
+    psd_path = tmp_path / "hero.psd"
+    psd = PSDImage.new("RGBA", (64, 48))
+    root = Group.new(psd, "Hero")
+    for i, part in enumerate(("前手", "后手", "上身")):
+        group = Group.new(root, part)
+        for j in range(2):
+            PixelLayer.frompil(Image.new("RGBA", (6, 4), (i * 80, j * 80, 9, 255)), group, f"{part}{j}", top=i * 5, left=j * 9)
+    storage_dir = str(tmp_path / "storage")
+    manifest_path = str(tmp_path / "manifest.json")
+
+    manifest = LayerManifest.load(manifest_path, storage_dir, (64, 48))
+    first = psd_smart_parser.parse_jointed_psd(psd, "hero", storage_dir, manifest=manifest)
+    assert (manifest.reused, manifest.extracted) == (0, 6)
+    save_manifest(manifest_path, (64, 48), manifest.entries)
+
+    monkeypatch.setattr(psd_smart_parser, "_extract_layer_image", lambda *a, **k: pytest.fail("re-extracted"))
+    manifest = LayerManifest.load(manifest_path, storage_dir, (64, 48))
+    second = psd_smart_parser.parse_jointed_psd(psd, "hero", storage_dir, manifest=manifest)
+    assert (manifest.reused, manifest.extracted) == (6, 0)
+    strip = lambda jc: {k: v for k, v in psd_smart_parser.jointed_char_to_dict(jc).items() if k != "id"}
+    assert strip(second) == strip(first)
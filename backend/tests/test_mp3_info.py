@@ -0,0 +1,113 @@
+"""
+Tests for MP3 frame counting and the single-process TTS mix.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+
+from backend.core.mp3_info import parse_frame_header, parse_mp3
+
+
+# ── Helpers ──
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, mono: 417-byte frames of 1152 samples
+MPEG1_HEADER = bytes([0xFF, 0xFB, 0x90, 0xC4])
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono: 96-byte frames of 576 samples
+MPEG2_HEADER = bytes([0xFF, 0xF3, 0x44, 0xC4])
+
+
+def _frames(header, count, length):
+    return (header + bytes(length - 4)) * count
+
+
+def _info_frame(delay, padding):
+    frame = bytearray(MPEG1_HEADER + bytes(413))
+    tag = 4 + 17  # side info of an MPEG-1 mono frame
+    frame[tag:tag + 8] = b"Info" + (0).to_bytes(4, "big")
+    lame = tag + 8
+    frame[lame:lame + 9] = b"LAME3.100"
+    frame[lame + 21:lame + 24] = ((delay << 12) | padding).to_bytes(3, "big")
+    return bytes(frame)
+
+
+# ── Tests ──
+
+def test_frame_headers():
+    mpeg1 = parse_frame_header(MPEG1_HEADER, 0)
+    assert (mpeg1.sample_rate, mpeg1.channels, mpeg1.length, mpeg1.samples) == (44100, 1, 417, 1152)
+    mpeg2 = parse_frame_header(MPEG2_HEADER, 0)
+    assert (mpeg2.sample_rate, mpeg2.length, mpeg2.samples) == (24000, 96, 576)
+    assert parse_frame_header(b"\xff\xfb\xf0\xc4", 0) is None  # bad bitrate index
+
+
+def test_counts_frames_past_tags_and_garbage():
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"abcde"
+    data = id3 + b"\x00\xff\x12" + _frames(MPEG2_HEADER, 50, 96) + b"TAG" + bytes(125)
+    info = parse_mp3(data)
+
+    assert info.frames == 50
+    assert info.samples == 50 * 576
+    assert info.duration == pytest.approx(1.2)
+
+    with pytest.raises(ValueError):
+        parse_mp3(b"not audio at all")
+
+
+def test_gapless_info_tag_trims_delay_and_padding():
+    data = _info_frame(delay=576, padding=1000) + _frames(MPEG1_HEADER, 10, 417)
+    info = parse_mp3(data)
+
+    assert info.frames == 10  # the Info frame carries no audio
+    assert (info.encoder_delay, info.encoder_padding) == (576, 1000)
+    assert info.samples == 10 * 1152 - 576 - 1000
+
+
+def test_concat_runs_one_ffmpeg_with_exact_silences(tmp_path, monkeypatch):
+    from backend.routers import tts
+
+    paths = []
+    for i, frames in enumerate((50, 25)):
+        path = tmp_path / f"line_{i:03d}.mp3"
+        path.write_bytes(_frames(MPEG2_HEADER, frames, 96))
+        paths.append(str(path))
+    (tmp_path / "line_002.mp3").write_bytes(b"broken")
+    paths.append(str(tmp_path / "line_002.mp3"))
+
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        graph = open(cmd[cmd.index("-filter_complex_script") + 1], encoding="utf-8").read()
+        calls.append((cmd, kwargs, graph))
+        open(cmd[-1], "wb").close()
+
+    monkeypatch.setattr(tts.subprocess, "run", fake_run)
+    out = str(tmp_path / "mix.mp3")
+    durations = tts.concat_audio_segments(paths, [0.5, 0.25, 0], out, str(tmp_path))
+
+    assert durations == [pytest.approx(1.2), pytest.approx(0.6), 0.0]
+    assert len(calls) == 1
+    cmd, kwargs, graph = calls[0]
+    assert kwargs["cwd"] == str(tmp_path)
+    assert "amovie=line_000.mp3" in graph
+    # 1.2s of speech + 0.5s of silence at 44.1 kHz, to the sample
+    assert f"atrim=end_sample={round(1.2 * 44100) + 22050}" in graph
+    assert "anullsrc" in graph and "concat=n=3:v=0:a=1[out]" in graph
+    assert not os.path.exists(tmp_path / "_mix.txt")
+
+
+def test_timeline_matches_mix_sample_counts():
+    from backend.routers.tts import format_srt_time, segment_timeline
+
+    spans, total = segment_timeline([1.2, 0.6, 0.35], [0.5, 1.5, 0])
+    assert spans == [(0.0, 1.2), (1.7, 2.3), (3.8, pytest.approx(4.15))]
+    assert total == pytest.approx(4.15)
+
+    # Segment lengths are rounded to whole output samples, as in the mix graph
+    spans, _ = segment_timeline([1 / 3, 1 / 3], [0, 0])
+    assert spans[1][0] == round(44100 / 3) / 44100
+
+    assert format_srt_time(1.001) == "00:00:01,001"
+    assert format_srt_time(3723.9996) == "01:02:04,000"
@@ -0,0 +1,126 @@
+"""
+Tests for the process-pool PSD ingest engine.
+"""
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from PIL import Image
+from psd_tools import PSDImage
+from psd_tools.api.layers import Group, PixelLayer
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.core import character_store, psd_processor
+from backend.core.models import Asset, Base
+from backend.core.psd_ingest import PsdIngestEngine, plan_layer_shards
+
+
+# ── Helpers ──
+
+def _write_psd(path, groups):
+    """groups: [(group name, [(layer name, color), ...])] — top-level groups in order."""
+    psd = PSDImage.new("RGBA", (64, 48))
+    offset = 0
+    for group_name, layers in groups:
+        group = Group.new(psd, group_name)
+        for name, color in layers:
+            offset += 3
+            PixelLayer.frompil(Image.new("RGBA", (8, 6), color), group, name, top=offset, left=offset)
+    psd.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(psd_processor, "SessionLocal", factory)
+    monkeypatch.setattr(character_store, "SessionLocal", factory)
+    return tmp_path, factory
+
+
+# ── Tests ──
+
+def test_plan_layer_shards():
+    assert plan_layer_shards(0, 4) == []
+    assert plan_layer_shards(3, 8) == [[0], [1], [2]]
+    assert plan_layer_shards(5, 2) == [[0, 1, 2], [3, 4]]
+
+
+def test_split_ingest_matches_single_job(env):
+    tmp_path, factory = env
+    groups = [
+        ("Body", [("arm", (255, 0, 0, 255)), ("leg", (0, 255, 0, 255))]),
+        ("Face", [("eyes", (0, 0, 255, 255))]),
+        ("Hair", [("bangs", (9, 9, 9, 255))]),
+    ]
+    split = _write_psd(tmp_path / "Hero.psd", groups)
+    single = _write_psd(tmp_path / "Twin.psd", groups)
+
+    engine = PsdIngestEngine(max_workers=2, split_bytes=0, storage_dir=str(tmp_path / "storage"))
+
+    async def run():
+        return await asyncio.gather(
+            engine.ingest(split, "Hero.psd"),
+            engine.ingest(single, "Twin.psd", cleanup=False),
+        )
+
+    try:
+        # Split every PSD into layer shards, then check against one unsplit job
+        hero, _ = asyncio.run(run())
+        engine.split_bytes = 1 << 40
+        twin = asyncio.run(engine.ingest(single, "Twin.psd"))
+    finally:
+        engine.shutdown()
+
+    assert (hero.status, hero.shards, twin.shards) == ("done", 3, 1)
+    assert not os.path.exists(split) and not os.path.exists(single)
+    chars = {c["name"]: c for c in character_store.list_characters("v1")}
+    assert chars["Hero"]["group_order"] == ["Body", "Face", "Hair"]
+    assert chars["Hero"]["layer_groups"] == chars["Twin"]["layer_groups"]
+    assert [l["name"] for l in chars["Hero"]["layer_groups"]["Body"]] == ["arm", "leg"]
+    for layers in chars["Hero"]["layer_groups"].values():
+        for layer in layers:
+            assert os.path.exists(tmp_path / "storage" / layer["path"])
+    with factory() as db:
+        # Identical pixels in both PSDs are deduplicated to one row each
+        assert db.query(Asset).count() == 4
+
+
+def test_errors_and_cancel(env):
+    tmp_path, _ = env
+    bad = tmp_path / "broken.psd"
+    bad.write_bytes(b"not a psd")
+    engine = PsdIngestEngine(max_workers=1, storage_dir=str(tmp_path / "storage"))
+
+    async def run():
+        good = _write_psd(tmp_path / "Later.psd", [("Body", [("arm", (1, 2, 3, 255))])])
+        first = asyncio.create_task(engine.ingest(str(bad), batch_id="batch"))
+        second = asyncio.create_task(engine.ingest(good, batch_id="batch"))
+        await asyncio.sleep(0)
+        cancelled = engine.cancel("batch")
+        return cancelled, await first, await second
+
+    try:
+        cancelled, first, second = asyncio.run(run())
+    finally:
+        engine.shutdown()
+
+    # The running job's worker can't be interrupted, but its outcome is discarded
+    assert cancelled == 2
+    assert (first.status, second.status) == ("cancelled", "cancelled")
+    assert character_store.list_characters("v1") == []
+
+    engine = PsdIngestEngine(max_workers=1, storage_dir=str(tmp_path / "storage"))
+    bad.write_bytes(b"not a psd")
+    try:
+        job = asyncio.run(engine.ingest(str(bad)))
+    finally:
+        engine.shutdown()
+    assert job.status == "error" and "Corrupted" in job.error
@@ -0,0 +1,85 @@
+"""
+Tests for jointed PSD parsing with planned, parallel variant extraction.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from PIL import Image
+from psd_tools import PSDImage
+from psd_tools.api.layers import Group, PixelLayer
+
+from backend.core.psd_smart_parser import detect_psd_type, jointed_char_to_dict, parse_jointed_psd
+
+
+# ── Helpers ──
+
+def _build_jointed_psd():
+    psd = PSDImage.new("RGBA", (120, 90))
+    count = [0]
+
+    def px(parent, name, color, size=(10, 8), visible=True):
+        count[0] += 1
+        layer = PixelLayer.frompil(Image.new("RGBA", size, color), parent, name,
+                                   top=count[0] % 60, left=(count[0] * 7) % 100)
+        layer.visible = visible
+        return layer
+
+    root = Group.new(psd, "角色")
+    for part in ("后手", "上身", "前手"):
+        group = Group.new(root, part)
+        for i in range(6):
+            px(group, f"{part}{i}", (i * 30, 10, 200, 255), visible=(i == 0))
+    lower = Group.new(root, "下身")
+    for leg in ("左腿", "右腿"):
+        px(Group.new(lower, leg), f"{leg}1", (9, 9, 9, 255))
+    px(lower, "裙摆", (8, 8, 8, 255))
+    head = Group.new(root, "头")
+    face = Group.new(head, "脸型")
+    px(face, "圆脸", (250, 200, 180, 255))
+    px(face, "方脸", (240, 190, 170, 255))
+    expressions = Group.new(head, "表情")
+    for name in ("开心", "难过"):
+        expression = Group.new(expressions, name)
+        px(expression, "嘴", (200, 0, 0, 255), size=(4, 3))
+        px(expression, "眼", (0, 0, 0, 255), size=(6, 2))
+    side = Group.new(psd, "侧面")
+    px(Group.new(side, "前手"), "侧手", (50, 50, 50, 255))
+    px(side, "影子", (0, 0, 0, 128))
+    return psd
+
+
+def _parse(tmp_path, workers):
+    psd = _build_jointed_psd()
+    storage = tmp_path / f"storage{workers}"
+    data = jointed_char_to_dict(parse_jointed_psd(psd, "hero", str(storage), workers=workers))
+    data.pop("id")
+    return data, [layer.visible for layer in psd.descendants()], storage
+
+
+# ── Tests ──
+
+def test_parallel_matches_serial(tmp_path):
+    serial, serial_visible, _ = _parse(tmp_path, 1)
+    parallel, parallel_visible, storage = _parse(tmp_path, 4)
+
+    assert parallel == serial
+    # Visibility forced on for extraction is restored afterwards
+    assert parallel_visible == serial_visible
+    assert serial_visible.count(False) == 15
+
+    assert detect_psd_type(_build_jointed_psd()) == "jointed"
+    assert [v["name"] for v in parallel["body_parts"]["前手"]["variants"]] == [f"前手{i}" for i in range(6)]
+    assert [v["visible"] for v in parallel["body_parts"]["后手"]["variants"]] == [True] + [False] * 5
+    assert list(parallel["body_parts"]) == ["后手", "上身", "前手", "左腿", "右腿", "裙摆"]
+    assert [e["name"] for e in parallel["head"]["expressions"]] == ["开心", "难过"]
+    assert [f["name"] for f in parallel["head"]["face_shapes"]] == ["圆脸", "方脸"]
+    assert list(parallel["viewpoints"]["侧面"]["body_parts"]) == ["前手", "影子"]
+
+    for group in parallel["layer_groups"].values():
+        for layer in group:
+            assert os.path.exists(storage / layer["path"])
+    # Thumbnails are left to the thumbnail service
+    assert not os.path.exists(storage / "thumbnails")
+    assert not [name for name in os.listdir(storage / "assets") if name.endswith(".tmp")]
@@ -0,0 +1,218 @@
+"""
+Tests for the headless frame renderer (backend.core.render).
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from PIL import Image
+
+from backend.core.render import FrameRenderer, frame_count, resolve_asset_path
+from backend.core.scene_graph.scene import SceneGraph
+from backend.core.scene_graph.specialized_nodes import (
+    BackgroundLayerNode,
+    CameraNode,
+    CharacterNode,
+    TextNode,
+)
+from backend.core.scene_graph.video_project import VideoProject, SceneTransition
+
+
+# ── Helpers ──
+
+@pytest.fixture
+def storage(tmp_path):
+    """Storage dir with a red 960×540 background, a 100×200 blue pose and a green face patch."""
+    stages = tmp_path / "stages"
+    chars = tmp_path / "characters" / "hero"
+    stages.mkdir()
+    chars.mkdir(parents=True)
+    Image.new("RGBA", (960, 540), (255, 0, 0, 255)).save(stages / "bg.png")
+    Image.new("RGBA", (100, 200), (0, 0, 255, 255)).save(chars / "pose.png")
+    face = Image.new("RGBA", (100, 200), (0, 0, 0, 0))
+    face.paste((0, 255, 0, 255), (40, 20, 60, 40))
+    face.save(chars / "face.png")
+    return str(tmp_path)
+
+
+def make_scene(duration=2.0, with_bg=True):
+    graph = SceneGraph(name="Render", duration=duration, fps=10)
+    camera = CameraNode(id="camera_main", name="Main Camera")
+    camera.set_position(9.6, 5.4)
+    graph.add_node(camera)
+
+    if with_bg:
+        graph.add_node(BackgroundLayerNode(
+            id="bg-1", name="BG", asset_path="/static/stages/bg.png",
+            parallax_speed=0.0, z_index=-50,
+        ))
+
+    hero = CharacterNode(
+        id="character-hero", name="Hero", z_index=10,
+        metadata={"poseUrl": "/static/characters/hero/pose.png",
+                  "faceUrl": "/static/characters/hero/face.png"},
+    )
+    hero.set_position(9.6, 5.4)
+    graph.add_node(hero)
+    return graph
+
+
+# ── Tests ──
+
+def test_resolve_asset_path(tmp_path):
+    root = str(tmp_path)
+    assert resolve_asset_path("/static/stages/a.png", root) == os.path.join(root, "stages", "a.png")
+    assert resolve_asset_path("/assets/abc.png", root) == os.path.join(root, "assets", "abc.png")
+    assert resolve_asset_path("http://localhost:8000/static/x%20y.png", root) == os.path.join(root, "x y.png")
+    assert resolve_asset_path("assets/abc.png", root) == os.path.join(root, "assets", "abc.png")
+    assert resolve_asset_path("/api/other", root) is None
+
+
+def test_resolve_asset_path_rejects_traversal(tmp_path):
+    root = str(tmp_path / "storage")
+    os.makedirs(root)
+    (tmp_path / "secret.png").write_bytes(b"x")
+    os.symlink(tmp_path, os.path.join(root, "escape"))
+
+    assert resolve_asset_path("/static/../secret.png", root) is None
+    assert resolve_asset_path("/assets/../../secret.png", root) is None
+    assert resolve_asset_path("http://host/static/%2E%2E/secret.png", root) is None
+    assert resolve_asset_path("../secret.png", root) is None
+    assert resolve_asset_path("escape/secret.png", root) is None
+    assert resolve_asset_path("/static/stages/../a.png", root) == os.path.join(root, "a.png")
+
+
+def test_background_cover_and_character_anchor(storage):
+    renderer = FrameRenderer(storage_dir=storage)
+    frame = renderer.render_scene(make_scene(), 0.0)
+
+    assert frame.size == (1920, 1080)
+    assert frame.getpixel((10, 10)) == (255, 0, 0, 255)        # cover-scaled background
+    # Pose 100×200 anchored at (0.5, 0.85) on (960, 540)
+    assert frame.getpixel((960, 540 - 160)) == (0, 0, 255, 255)
+    assert frame.getpixel((960, 540 + 20)) == (0, 0, 255, 255)
+    assert frame.getpixel((960, 540 + 40)) == (255, 0, 0, 255)
+    assert frame.getpixel((1020, 540)) == (255, 0, 0, 255)
+    # Face overlay drawn above the pose
+    assert frame.getpixel((955, 540 - 170 + 30)) == (0, 255, 0, 255)
+
+
+def test_camera_zoom_and_character_keyframes(storage):
+    graph = make_scene()
+    graph.get_node("camera_main").add_keyframe("scale_x", 0.0, 2.0)
+    graph.get_node("camera_main").add_keyframe("scale_y", 0.0, 2.0)
+    hero = graph.get_node("character-hero")
+    hero.add_keyframe("opacity", 0.0, 0.0)
+    hero.add_keyframe("opacity", 1.0, 1.0)
+
+    renderer = FrameRenderer(storage_dir=storage)
+    hidden = renderer.render_scene(graph, 0.0)
+    assert hidden.getpixel((960, 500)) == (255, 0, 0, 255)
+
+    shown = renderer.render_scene(graph, 1.0)
+    # 2× zoom around the camera: pose spans 200px wide, 400px tall
+    assert shown.getpixel((960 - 90, 540 - 300)) == (0, 0, 255, 255)
+    assert shown.getpixel((960 - 110, 540 - 300)) == (255, 0, 0, 255)
+
+
+def test_placeholder_and_subtitle(storage):
+    graph = make_scene(with_bg=False)
+    graph.add_node(TextNode(id="sub-1", content="Hello", z_index=9999))
+
+    frame = FrameRenderer(storage_dir=storage).render_scene(graph, 0.0)
+    assert frame.getpixel((5, 5)) == (0x1A, 0x1C, 0x2E, 255)
+    assert frame.getpixel((5, 1075)) == (0x3D, 0x5A, 0x32, 255)
+    # Subtitle bar darkens the bottom centre
+    r, g, b, _ = frame.getpixel((960, 1080 - 40 - 4))
+    assert (r, g, b) != (0x3D, 0x5A, 0x32)
+
+
+def test_project_frames_and_fade(storage):
+    project = VideoProject(
+        scenes=[make_scene(duration=1.0), make_scene(duration=1.0, with_bg=False)],
+        transitions=[SceneTransition(type="fade", duration=0.4)],
+    )
+    assert frame_count(project, 10) == 20
+
+    renderer = FrameRenderer(storage_dir=storage)
+    frames = list(renderer.iter_frames(project, fps=10))
+    assert len(frames) == 20
+
+    assert frames[0].getpixel((10, 10)) == (255, 0, 0, 255)
+    # Transition midpoint (t=0.8 → progress 0.5) is fully black
+    assert frames[8].getpixel((10, 10)) == (0, 0, 0, 255)
+    # Second scene has no background → placeholder sky
+    assert frames[15].getpixel((5, 5)) == (0x1A, 0x1C, 0x2E, 255)
+
+    kind, alpha = renderer.transition_overlay_alpha(project, 1.5)
+    assert kind == "" and alpha == 0.0
+
+    # Frame iteration matches single-frame rendering
+    assert frames[3].tobytes() == renderer.render_project(project, 0.3).tobytes()
+
+
+def test_plan_shards_respects_scene_boundaries():
+    from backend.core.render import plan_shards
+
+    project = VideoProject(scenes=[make_scene(duration=1.0), make_scene(duration=2.5), make_scene(duration=0.3)])
+    shards = plan_shards(project, fps=10, workers=2, shard_frames=8)
+
+    assert [s.start for s in shards] == [0, 8, 10, 18, 26, 34, 35]
+    assert sum(s.count for s in shards) == frame_count(project, 10)
+    assert all(s.end <= 10 for s in shards if s.scene_index == 0)
+    assert {s.scene_index for s in shards if s.start >= 35} == {2}
+
+
+def test_stream_shards_are_bounded_by_bytes():
+    from backend.core.render import stream_shard_frames
+
+    frame_bytes = 1920 * 1080 * 4
+    buffer_bytes = 512 * 1024 * 1024
+    frames = stream_shard_frames(frame_bytes, workers=8, buffer_bytes=buffer_bytes)
+    # 16 shards in flight + the one being consumed stay inside the buffer
+    assert frames == 3 and frames * frame_bytes * 17 <= buffer_bytes
+    assert stream_shard_frames(frame_bytes, workers=64, buffer_bytes=buffer_bytes) == 1
+    assert stream_shard_frames(100 * 200 * 4, workers=2, buffer_bytes=buffer_bytes) > 1000
+
+
+def test_parallel_matches_serial(storage, tmp_path):
+    from backend.core.render import iter_frames_parallel, render_to_directory
+
+    project = VideoProject(
+        scenes=[make_scene(duration=0.5), make_scene(duration=0.5, with_bg=False)],
+        transitions=[SceneTransition(type="fade", duration=0.2)],
+    )
+    serial = [f.tobytes() for f in FrameRenderer(storage_dir=storage).iter_frames(project, fps=10)]
+
+    parallel = list(iter_frames_parallel(project, fps=10, workers=2, storage_dir=storage))
+    assert parallel == serial
+    # A buffer smaller than one frame streams single-frame shards
+    assert list(iter_frames_parallel(project, fps=10, workers=2, storage_dir=storage, buffer_bytes=1)) == serial
+
+    out_dir = tmp_path / "frames"
+    assert render_to_directory(project, str(out_dir), fps=10, workers=2, storage_dir=storage) == 10
+    assert sorted(os.listdir(out_dir))[0] == "frame_0000.png"
+    with Image.open(out_dir / "frame_0007.png") as img:
+        assert img.convert("RGBA").tobytes() == serial[7]
+
+
+def test_cropped_layer_composites_at_offset(storage):
+    # Same green patch as face.png, stored cropped with its offset on the 100×200 canvas
+    Image.new("RGBA", (20, 20), (0, 255, 0, 255)).save(os.path.join(storage, "characters", "hero", "face_crop.png"))
+    padded = FrameRenderer(storage_dir=storage).render_scene(make_scene(), 0.0)
+
+    graph = make_scene()
+    hero = graph.nodes["character-hero"]
+    hero.metadata["canvasSize"] = [100, 200]
+    hero.metadata["faceUrls"] = {"smile": {
+        "url": "/static/characters/hero/face_crop.png", "bbox": [40, 20, 20, 20], "cropped": True,
+    }}
+    hero.add_frame(0.0, {"face": "smile"})
+    cropped = FrameRenderer(storage_dir=storage).render_scene(graph, 0.0)
+
+    # Pose top-left lands at (910, 370); the patch covers (950..970, 390..410)
+    assert padded.getpixel((955, 395)) == (0, 255, 0, 255)
+    assert cropped.getpixel((955, 395)) == (0, 255, 0, 255)
+    assert cropped.tobytes() == padded.tobytes()
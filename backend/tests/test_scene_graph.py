@@ -20,7 +20,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 
 from backend.core.scene_graph.transform import Transform, BoundingBox
 from backend.core.scene_graph.keyframe import (
-    Keyframe, interpolate_keyframes, Easing, _apply_easing
+    Keyframe, interpolate_keyframes, Easing, _apply_easing,
+    CompiledTrack, resolve_easing,
 )
 from backend.core.scene_graph.node import SceneNode
 from backend.core.scene_graph.specialized_nodes import (
@@ -125,6 +126,53 @@ def test_keyframe_interpolation():
         assert abs(val_1 - 1.0) < 0.001, f"{easing} failed at t=1"
 
 
+def test_compiled_track():
+    """Test CompiledTrack parity with interpolate_keyframes and caching."""
+    print("  ✓ Parity with interpolate_keyframes...")
+    kfs = [
+        Keyframe(time=0.0, value=0.0, easing="easeIn"),
+        Keyframe(time=1.0, value=10.0, easing="step"),
+        Keyframe(time=1.0, value=20.0, easing="easeInOutCubic"),  # duplicate time
+        Keyframe(time=2.5, value=-5.0, easing="bogus"),
+        Keyframe(time=4.0, value=3.0),
+    ]
+    track = CompiledTrack(kfs)
+    samples = [i * 0.05 - 0.5 for i in range(110)]
+    for t in samples + list(reversed(samples)) + [1.0, 0.3, 3.9, 1.0]:
+        assert track.evaluate(t) == interpolate_keyframes(kfs, t), f"mismatch at t={t}"
+
+    print("  ✓ Empty and single-key tracks...")
+    assert CompiledTrack([]).evaluate(1.0) == 0.0
+    assert CompiledTrack([Keyframe(time=1.0, value=5.0)]).evaluate(0.0) == 5.0
+
+    print("  ✓ Snake_case easing names...")
+    assert resolve_easing("ease_out") == Easing.EASE_OUT
+    assert resolve_easing("easeOut") == Easing.EASE_OUT
+    assert resolve_easing("nope") == Easing.LINEAR
+    kfs = [Keyframe(0.0, 0.0, "ease_in"), Keyframe(1.0, 10.0)]
+    assert abs(interpolate_keyframes(kfs, 0.5) - 2.5) < 0.001
+
+    print("  ✓ SceneNode compiled track cache...")
+    node = SceneNode(name="Cached")
+    node.add_keyframe("x", 0.0, 0.0)
+    node.add_keyframe("x", 1.0, 10.0)
+    compiled = node.get_compiled_track("x")
+    assert node.get_compiled_track("x") is compiled
+    assert abs(node.get_value_at_time("x", 0.5) - 5.0) < 0.001
+
+    node.add_keyframe("x", 2.0, 0.0)
+    assert node.get_compiled_track("x") is not compiled
+    assert abs(node.get_value_at_time("x", 1.5) - 5.0) < 0.001
+
+    # Direct appends (as automation does) are picked up too
+    node.keyframes["x"].append(Keyframe(time=3.0, value=100.0))
+    assert abs(node.get_value_at_time("x", 2.5) - 50.0) < 0.001
+
+    node.keyframes["x"][-1].value = 200.0
+    node.invalidate_tracks()
+    assert abs(node.get_value_at_time("x", 2.5) - 100.0) < 0.001
+
+
 def test_scene_node():
     """Test SceneNode CRUD and animation."""
     print("  ✓ SceneNode creation...")
@@ -514,6 +562,7 @@ if __name__ == "__main__":
         ("Transform", test_transform),
         ("BoundingBox", test_bounding_box),
         ("Keyframe Interpolation", test_keyframe_interpolation),
+        ("Compiled Track", test_compiled_track),
         ("SceneNode", test_scene_node),
         ("CharacterNode", test_character_node),
         ("BackgroundLayerNode", test_background_layer),
@@ -0,0 +1,103 @@
+"""
+Tests for the deferred, batched thumbnail service and its /thumbnails route.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from PIL import Image
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.core import thumbnail_service
+from backend.core.thumbnail_service import ThumbnailService, parse_thumbnail_name, thumbnail_filename
+
+
+# ── Helpers ──
+
+def _add_asset(root, img_hash, size=(300, 150)):
+    (root / "assets").mkdir(parents=True, exist_ok=True)
+    Image.new("RGBA", size, (255, 0, 0, 255)).save(root / "assets" / f"{img_hash}.png")
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = ThumbnailService(str(tmp_path), workers=2, batch_delay=0.05)
+    yield svc
+    svc.shutdown()
+
+
+# ── Tests ──
+
+def test_filenames_round_trip():
+    assert thumbnail_filename("abc") == "abc_thumb.png"
+    assert thumbnail_filename("abc", 256, "webp") == "abc_256.webp"
+    assert parse_thumbnail_name("abc_thumb.png") == ("abc", 128, "png")
+    assert parse_thumbnail_name("abc_64.webp") == ("abc", 64, "webp")
+    assert parse_thumbnail_name("../abc_64.webp") is None
+    assert parse_thumbnail_name("abc.png") is None
+
+
+def test_sizes_and_formats(service, tmp_path):
+    _add_asset(tmp_path, "aa")
+    default = service.ensure("aa", timeout=10)
+    webp = service.ensure("aa", 64, "webp", timeout=10)
+
+    assert default.endswith("aa_thumb.png")
+    with Image.open(default) as img:
+        assert img.size == (128, 64)
+    with Image.open(webp) as img:
+        assert img.format == "WEBP" and img.size == (64, 32)
+
+    with pytest.raises(ValueError):
+        service.ensure("aa", 4096)
+    with pytest.raises(FileNotFoundError):
+        service.ensure("missing", timeout=10)
+
+    assert service.remove("aa") == 2
+    assert os.listdir(tmp_path / "thumbnails") == []
+
+
+def test_requests_coalesce_into_batches(service, tmp_path, monkeypatch):
+    for name in ("h1", "h2", "h3"):
+        _add_asset(tmp_path, name)
+    batches = []
+    render_batch = service._render_batch
+    monkeypatch.setattr(service, "_render_batch", lambda batch: batches.append(list(batch)) or render_batch(batch))
+
+    futures = [service.request(h) for h in ("h1", "h2", "h1", "h3")]
+    assert futures[0] is futures[2]
+    assert [f.result(10) for f in futures][1].endswith("h2_thumb.png")
+
+    assert sorted(key for batch in batches for key in batch) == [("h1", 128, "png"), ("h2", 128, "png"), ("h3", 128, "png")]
+    assert service.rendered == 3
+    # Cached on disk: no more renders
+    assert service.prefetch(["h1", "h2", "h3"]) == 0
+
+
+def test_route_renders_on_first_request(tmp_path, monkeypatch):
+    from backend.routers import thumbnails
+
+    _add_asset(tmp_path, "bb", size=(40, 80))
+    svc = ThumbnailService(str(tmp_path), workers=1)
+    monkeypatch.setattr(thumbnail_service, "get_thumbnail_service", lambda: svc)
+    app = FastAPI()
+    app.include_router(thumbnails.router)
+
+    try:
+        with TestClient(app) as client:
+            first = client.get("/thumbnails/bb_thumb.png")
+            webp = client.get("/thumbnails/bb_thumb.png", params={"size": 32, "format": "webp"})
+            missing = client.get("/thumbnails/cc_thumb.png")
+            too_big = client.get("/thumbnails/bb_5000.png")
+    finally:
+        svc.shutdown()
+
+    assert first.status_code == 200 and first.headers["content-type"] == "image/png"
+    assert "immutable" in first.headers["cache-control"]
+    assert webp.status_code == 200 and webp.headers["content-type"] == "image/webp"
+    assert os.path.exists(tmp_path / "thumbnails" / "bb_32.webp")
+    assert missing.status_code == 404
+    assert too_big.status_code == 400
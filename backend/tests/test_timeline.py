@@ -0,0 +1,110 @@
+"""
+Tests for batch timeline evaluation (SceneGraph.evaluate_range).
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import numpy as np
+import pytest
+
+from backend.core.scene_graph.keyframe import Keyframe, CompiledTrack, Easing
+from backend.core.scene_graph.node import SceneNode
+from backend.core.scene_graph.specialized_nodes import CharacterNode, CameraNode
+from backend.core.scene_graph.scene import SceneGraph
+from backend.core.scene_graph.timeline import (
+    evaluate_track_array,
+    frame_times,
+    SNAPSHOT_PROPERTIES,
+)
+
+
+# ── Helpers ──
+
+def make_scene():
+    graph = SceneGraph(name="Timeline", duration=6.0, fps=30)
+
+    cam = CameraNode(name="Camera")
+    cam.set_position(9.6, 5.4)
+    cam.add_keyframe("scale_x", 1.0, 1.0, "easeInOut")
+    cam.add_keyframe("scale_x", 3.0, 1.4, "step")
+    cam.add_keyframe("scale_x", 4.0, 1.0)
+    graph.add_node(cam)
+
+    hero = CharacterNode(name="Hero")
+    hero.set_position(5.0, 7.5)
+    hero.set_z_index(10)
+    hero.add_keyframe("x", 0.0, -4.0, "linear")
+    hero.add_keyframe("x", 1.0, 5.0, "ease_out")
+    hero.add_keyframe("x", 2.5, 8.0, "easeInOutCubic")
+    hero.add_keyframe("x", 5.0, 2.0)
+    hero.add_keyframe("opacity", 0.5, 0.0, "easeIn")
+    hero.add_keyframe("opacity", 1.5, 1.0)
+    hero.add_keyframe("z_index", 2.0, 10, "step")
+    hero.add_keyframe("z_index", 3.0, 25)
+    graph.add_node(hero)
+
+    graph.add_node(SceneNode(name="Static", node_type="prop"))
+    return graph
+
+
+# ── Tests ──
+
+def test_frame_times_half_open():
+    times = frame_times(0.0, 1.0, 30)
+    assert len(times) == 30
+    assert times[0] == 0.0
+    assert times[-1] < 1.0
+    assert len(frame_times(2.0, 2.0, 30)) == 0
+    with pytest.raises(ValueError):
+        frame_times(0.0, 1.0, 0)
+
+
+def test_track_array_matches_scalar():
+    kfs = [
+        Keyframe(0.0, 0.0, "easeIn"),
+        Keyframe(1.0, 10.0, "step"),
+        Keyframe(1.0, 20.0, "easeInOutCubic"),
+        Keyframe(2.5, -5.0, "easeOutCubic"),
+        Keyframe(4.0, 3.0),
+    ]
+    track = CompiledTrack(kfs)
+    times = np.linspace(-1.0, 5.0, 601)
+    batch = evaluate_track_array(track, times)
+    scalar = np.array([track.evaluate(float(t)) for t in times])
+    np.testing.assert_allclose(batch, scalar, rtol=0, atol=1e-12)
+
+
+def test_every_easing_vectorized():
+    for easing in Easing:
+        track = CompiledTrack([Keyframe(0.0, 0.0, easing.value), Keyframe(1.0, 1.0)])
+        times = np.linspace(0.0, 1.0, 101)
+        batch = evaluate_track_array(track, times)
+        scalar = [track.evaluate(float(t)) for t in times]
+        np.testing.assert_allclose(batch, scalar, atol=1e-12, err_msg=easing.value)
+
+
+def test_evaluate_range_matches_snapshots():
+    graph = make_scene()
+    result = graph.evaluate_range(0.0, graph.duration)
+
+    assert result.values.shape == (3, len(result.properties), 180)
+    for frame in (0, 17, 45, 60, 75, 90, 119, 179):
+        t = float(result.times[frame])
+        expected = graph.get_snapshot_at_time(t)
+        actual = result.snapshot(frame)
+        for node_id, snap in expected.items():
+            for prop in SNAPSHOT_PROPERTIES:
+                assert actual[node_id][prop] == pytest.approx(snap[prop], abs=1e-9), (node_id, prop, t)
+
+
+def test_evaluate_range_subset_and_get():
+    graph = make_scene()
+    hero = graph.get_node_by_name("Hero")
+    result = graph.evaluate_range(1.0, 2.0, fps=10, properties=["x"], node_ids=[hero.id])
+
+    assert result.values.shape == (1, 1, 10)
+    xs = result.get(hero.id, "x")
+    assert xs[0] == pytest.approx(5.0)
+    assert np.all(np.diff(xs) > 0)  # easing toward 8.0
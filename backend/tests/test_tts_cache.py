@@ -0,0 +1,94 @@
+"""
+Tests for the persistent TTS segment cache and its use in /api/tts/synthesize.
+"""
+import sys
+import os
+import base64
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.core.tts_cache import TTSCache, cache_key
+
+SPEAKER = "tts.other.BV074_streaming"
+# One 96-byte MPEG-2 Layer III frame (32 kbps, 24 kHz, mono): 576 samples
+MPEG2_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
+
+
+# ── Helpers ──
+
+@pytest.fixture
+def cache(tmp_path):
+    return TTSCache(str(tmp_path / "tts_cache"), max_bytes=1024)
+
+
+# ── Tests ──
+
+def test_hits_misses_and_normalized_keys(cache):
+    assert cache.get("Xin chào", SPEAKER, "vi") is None
+    cache.put("Xin chào", SPEAKER, "vi", b"audio", duration=1.25)
+
+    hit = cache.get("  Xin   chào ", SPEAKER, "vi")
+    assert hit.read() == b"audio" and hit.duration == 1.25
+    assert cache.get("Xin chào", "tts.other.BV075_streaming", "vi") is None
+    assert cache_key("Xin chào", SPEAKER, "vi") != cache_key("Xin chào", SPEAKER, "en")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hitRate"] == pytest.approx(1 / 3, abs=1e-3)
+
+
+def test_lru_eviction_and_reload(cache, tmp_path):
+    for name in ("a", "b", "c"):
+        cache.put(name, SPEAKER, "vi", bytes(400))
+    # 1200 bytes > 1024: the least recently used segment ("a") is gone
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("a", SPEAKER, "vi") is None
+    assert not os.path.exists(os.path.join(cache.cache_dir, cache_key("a", SPEAKER, "vi") + ".mp3"))
+
+    cache.get("b", SPEAKER, "vi")
+    cache.set_duration(cache_key("c", SPEAKER, "vi"), 2.5)
+
+    reloaded = TTSCache(cache.cache_dir, max_bytes=1024)
+    assert reloaded.stats()["entries"] == 2
+    assert reloaded.get("c", SPEAKER, "vi").duration == 2.5
+
+
+def test_resynthesizes_only_changed_lines(tmp_path, monkeypatch):
+    from backend.routers import tts
+
+    requested = []
+
+    def volcengine(request):
+        text = json.loads(request.content)["text"]
+        requested.append(text)
+        # 0.6s (25 frames) of audio per word
+        audio = MPEG2_FRAME * 25 * len(text.split())
+        return httpx.Response(200, json={"audio": {"data": base64.b64encode(audio).decode()}})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(tts.httpx, "AsyncClient",
+                        lambda **kw: real_client(transport=httpx.MockTransport(volcengine)))
+    monkeypatch.setattr(tts, "TTS_DIR", str(tmp_path / "tts"))
+    segment_cache = TTSCache(str(tmp_path / "tts_cache"))
+    monkeypatch.setattr(tts, "get_tts_cache", lambda: segment_cache)
+    monkeypatch.setattr(tts, "concat_audio_segments", lambda mp3s, silences, out, batch_dir, durations: open(out, "wb").close())
+    monkeypatch.setenv("TTS_RATE_PER_SEC", "1000")
+    app = FastAPI()
+    app.include_router(tts.router)
+
+    with TestClient(app) as client:
+        first = client.post("/api/tts/synthesize", json={"text": "Một\nHai\nBa"})
+        second = client.post("/api/tts/synthesize", json={"text": "Một\nHai đã sửa\nBa"})
+        stats = client.get("/api/tts/cache").json()
+
+    assert first.status_code == second.status_code == 200
+    assert requested == ["Một", "Hai", "Ba", "Hai đã sửa"]
+    assert [line["duration"] for line in second.json()["lines"]] == [0.6, 1.8, 0.6]
+    assert all(segment_cache.get(text, SPEAKER, "vi").duration for text in ("Một", "Hai đã sửa", "Ba"))
+    assert stats["hits"] == 2 and stats["entries"] == 4
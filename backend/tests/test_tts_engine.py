@@ -0,0 +1,136 @@
+"""
+Tests for concurrent, rate-limited TTS synthesis against a stub Volcengine.
+"""
+import sys
+import os
+import asyncio
+import base64
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import httpx
+import pytest
+
+from backend.core import tts_engine
+from backend.core.tts_engine import TokenBucket, TTSEngine, TTSError
+
+
+# ── Helpers ──
+
+class StubVolcengine:
+    """In-process stand-in for the Volcengine TTS endpoint."""
+
+    def __init__(self, delay=0.0, failures=None, null_audio=()):
+        self.delay = delay
+        self.failures = dict(failures or {})  # text → number of 500s before succeeding
+        self.null_audio = set(null_audio)  # texts answered with "audio": null
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body["text"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Later lines answer first, so ordering is not an accident of timing
+            await asyncio.sleep(self.delay / (1 + len(self.requests) % 3))
+            if self.failures.get(body["text"], 0) > 0:
+                self.failures[body["text"]] -= 1
+                return httpx.Response(500)
+            if body["text"] in self.null_audio:
+                return httpx.Response(200, json={"audio": None})
+            audio = base64.b64encode(f"mp3:{body['text']}".encode()).decode()
+            return httpx.Response(200, json={"audio": {"data": audio}})
+        finally:
+            self.in_flight -= 1
+
+
+def _run(stub, texts, **kwargs):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(stub)) as client:
+            engine = TTSEngine(client, buckets={}, backoff=0.01, **kwargs)
+            return await engine.synthesize_many(texts, "tts.other.BV074_streaming")
+    return asyncio.run(main())
+
+
+@pytest.fixture(autouse=True)
+def generous_rate(monkeypatch):
+    monkeypatch.setenv("TTS_RATE_PER_SEC", "1000")
+    monkeypatch.setenv("TTS_RATE_BURST", "1000")
+
+
+# ── Tests ──
+
+def test_lines_run_concurrently_in_order():
+    stub = StubVolcengine(delay=0.05)
+    texts = [f"line {i}" for i in range(12)]
+
+    start = time.perf_counter()
+    results = _run(stub, texts, concurrency=4)
+    elapsed = time.perf_counter() - start
+
+    assert results == [f"mp3:{t}".encode() for t in texts]
+    assert stub.max_in_flight == 4
+    assert elapsed < 12 * 0.05  # well under the serial time
+
+
+def test_engines_share_the_process_wide_bound(monkeypatch):
+    monkeypatch.setenv("TTS_CONCURRENCY", "3")
+    stub = StubVolcengine(delay=0.05)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(stub)) as client:
+            # One engine per request / scene, as /api/tts/synthesize and auto-video create them
+            return await asyncio.gather(*(
+                TTSEngine(client, buckets={}).synthesize_many([f"s{s} l{i}" for i in range(4)], "tts.other.BV074_streaming")
+                for s in range(3)
+            ))
+
+    results = asyncio.run(main())
+    assert [len(r) for r in results] == [4, 4, 4]
+    assert stub.max_in_flight == 3
+
+
+def test_retries_with_backoff_then_reports_failure():
+    stub = StubVolcengine(failures={"flaky": 2, "broken": 10})
+    results = _run(stub, ["ok", "flaky", "broken"], retries=3)
+
+    assert results[0] == b"mp3:ok"
+    assert results[1] == b"mp3:flaky"
+    assert isinstance(results[2], TTSError) and "HTTP 500" in str(results[2])
+    assert stub.requests.count("flaky") == 3
+    assert stub.requests.count("broken") == 3
+
+
+def test_null_audio_is_a_line_failure():
+    stub = StubVolcengine(null_audio={"silent"})
+    results = _run(stub, ["ok", "silent"], retries=2)
+
+    assert results[0] == b"mp3:ok"
+    assert isinstance(results[1], TTSError) and "No audio data" in str(results[1])
+    assert stub.requests.count("silent") == 2
+
+
+def test_token_bucket_spaces_requests(monkeypatch):
+    monkeypatch.setenv("TTS_VOICE_RATES", "BV074=20:1")
+    assert tts_engine.voice_rate_limit("tts.other.BV074_streaming") == (20.0, 1)
+    assert tts_engine.voice_rate_limit("tts.other.BV075_streaming") == (1000.0, 1000)
+    monkeypatch.setenv("TTS_VOICE_RATES", "BV074=0,BV074=x")
+    assert tts_engine.voice_rate_limit("tts.other.BV074_streaming") == (1000.0, 1000)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    monkeypatch.setenv("TTS_VOICE_RATES", "BV074=20:1")
+
+    bucket = TokenBucket(rate=20, burst=2)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == pytest.approx([0.05, 0.10, 0.15], abs=0.01)
+
+    stub = StubVolcengine()
+    start = time.perf_counter()
+    _run(stub, [f"l{i}" for i in range(5)])
+    assert time.perf_counter() - start >= 0.18  # 4 waits of 1/20s after the first token
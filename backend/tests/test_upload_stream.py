@@ -0,0 +1,139 @@
+"""
+Tests for streaming multipart PSD uploads.
+"""
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.core.upload_stream import UploadStreamError, iter_uploaded_files
+from backend.routers import psd
+
+
+# ── Helpers ──
+
+BOUNDARY = "----psdboundary"
+
+
+def _multipart(parts):
+    """parts: [(field, filename or None, bytes)] → request body."""
+    body = b""
+    for field, filename, data in parts:
+        disposition = f'form-data; name="{field}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+class _FakeRequest:
+    def __init__(self, body, chunk_size=7, content_type=f"multipart/form-data; boundary={BOUNDARY}"):
+        self.headers = {"content-type": content_type}
+        self._body = body
+        self._chunk_size = chunk_size
+        self.chunks_sent = 0
+
+    async def stream(self):
+        for i in range(0, len(self._body), self._chunk_size):
+            self.chunks_sent += 1
+            yield self._body[i:i + self._chunk_size]
+
+
+async def _collect(request, dest, **kwargs):
+    parts = []
+    async for part in iter_uploaded_files(request, str(dest), **kwargs):
+        parts.append((part, request.chunks_sent))
+    return parts
+
+
+class _FakeEngine:
+    """Ingest stand-in: jobs finish in reverse upload order."""
+
+    def __init__(self):
+        self.started = []
+
+    async def ingest(self, path, filename, batch_id=None, **kwargs):
+        self.started.append((filename, os.path.getsize(path)))
+        await asyncio.sleep(0.05 if filename.startswith("a") else 0)
+        error = "Corrupted or invalid PSD file" if filename.startswith("bad") else None
+        return SimpleNamespace(filename=filename, error=error, progress=None)
+
+
+# ── Tests ──
+
+def test_parts_are_yielded_as_soon_as_complete(tmp_path):
+    first, second = os.urandom(300), os.urandom(500)
+    body = _multipart([
+        ("note", None, b"hello"),
+        ("files", "../../evil/Hero.psd", first),
+        ("files", "readme.txt", b"text"),
+        ("file", "Villain.psd", second),
+    ])
+    request = _FakeRequest(body)
+    parts = asyncio.run(_collect(request, tmp_path, accept=lambda n: n.endswith(".psd"), name_prefix="v2_"))
+
+    (hero, hero_chunks), (readme, _), (villain, _) = parts
+    # Hero.psd was handed over long before the body finished streaming
+    assert hero_chunks < len(body) // 7
+    assert hero.filename == "Hero.psd" and hero.path == str(tmp_path / "v2_Hero.psd")
+    assert open(hero.path, "rb").read() == first
+    assert readme.path is None and readme.size == 4
+    assert villain.field_name == "file" and open(villain.path, "rb").read() == second
+    assert sorted(os.listdir(tmp_path)) == ["v2_Hero.psd", "v2_Villain.psd"]
+
+
+def test_rejects_non_multipart_and_cleans_partial_file(tmp_path):
+    with pytest.raises(UploadStreamError):
+        asyncio.run(_collect(_FakeRequest(b"{}", content_type="application/json"), tmp_path))
+
+    class _Disconnect(_FakeRequest):
+        async def stream(self):
+            yield self._body[:120]
+            raise ConnectionResetError("client went away")
+
+    body = _multipart([("files", "Hero.psd", os.urandom(400))])
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(_collect(_Disconnect(body), tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_route_reports_completion_order(tmp_path, monkeypatch):
+    engine = _FakeEngine()
+    monkeypatch.setattr(psd, "get_ingest_engine", lambda: engine)
+    monkeypatch.setattr(psd, "UPLOADS_DIR", str(tmp_path))
+    messages = []
+
+    async def broadcast(session_id, message):
+        messages.append(message)
+
+    monkeypatch.setattr(psd.upload_progress_manager, "broadcast", broadcast)
+    app = FastAPI()
+    app.include_router(psd.router)
+
+    files = [
+        ("files", ("a_slow.psd", b"1" * 10)),
+        ("files", ("b_fast.psd", b"2" * 20)),
+        ("files", ("bad.psd", b"3")),
+        ("files", ("notes.txt", b"x")),
+    ]
+    with TestClient(app) as client:
+        resp = client.post("/api/upload-psd/?session_id=s1", files=files)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [r["filename"] for r in data["results"]] == ["a_slow.psd", "b_fast.psd"]
+    assert {e["filename"] for e in data["errors"]} == {"bad.psd", "notes.txt"}
+    assert engine.started == [("a_slow.psd", 10), ("b_fast.psd", 20), ("bad.psd", 1)]
+
+    processed = [m for m in messages if m.get("stage") == "processed"]
+    assert [m["filename"] for m in processed][-1] == "a_slow.psd"
+    assert [m["index"] for m in processed] == [1, 2, 3]
+    assert messages[-1]["type"] == "done" and messages[-1]["total"] == 3
+
+    with TestClient(app) as client:
+        assert client.post("/api/upload-psd/", data={"x": "1"}).status_code == 400
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { useAppStore, STATIC_BASE } from '../stores/useAppStore';
 
 import UploadModule from './UploadModule';
+import { drawLayer, layerBoxStyle } from '../utils/layer-placement';
 import { Download, Layers } from 'lucide-react';
 
 const BaseMode: React.FC = () => {
@@ -36,6 +37,10 @@ const BaseMode: React.FC = () => {
         }
     }, [selectedCharId, selectedChar]);
 
+    // Layer entry (bbox/cropped) behind the active path of a group
+    const findLayer = (groupName: string, path: string) =>
+        selectedChar?.layer_groups[groupName]?.find(l => l.path === path);
+
     const handleLayerSelect = (groupName: string, path: string) => {
         setActiveLayers(prev => ({ ...prev, [groupName]: path }));
     };
@@ -43,11 +48,11 @@ const BaseMode: React.FC = () => {
     const handleDownload = () => {
         if (!selectedChar) return;
 
-        const visiblePaths = selectedChar.group_order
-            .map(group => activeLayers[group])
-            .filter(path => path !== ''); // exclude None
+        const visibleLayers = selectedChar.group_order
+            .map(group => ({ path: activeLayers[group], layer: findLayer(group, activeLayers[group]) }))
+            .filter(({ path }) => path); // exclude None
 
-        if (visiblePaths.length === 0) {
+        if (visibleLayers.length === 0) {
             alert("No layers selected to download.");
             return;
         }
@@ -56,19 +61,11 @@ const BaseMode: React.FC = () => {
         const ctx = canvas.getContext('2d');
         if (!ctx) return;
 
-        // Load first image to get dimensions
-        const baseImg = new Image();
-        baseImg.crossOrigin = "Anonymous";
-        baseImg.src = `${STATIC_BASE}/${visiblePaths[0]}`;
-
-        baseImg.onload = () => {
-            canvas.width = baseImg.naturalWidth > 0 ? baseImg.naturalWidth : 1000;
-            canvas.height = baseImg.naturalHeight > 0 ? baseImg.naturalHeight : 1000;
-
+        const drawAll = () => {
             let loadedCount = 0;
             const images: HTMLImageElement[] = [];
 
-            visiblePaths.forEach((path, i) => {
+            visibleLayers.forEach(({ path }, i) => {
                 const img = new Image();
                 img.crossOrigin = "Anonymous";
                 img.src = `${STATIC_BASE}/${path}`;
@@ -76,10 +73,11 @@ const BaseMode: React.FC = () => {
                     loadedCount++;
                     images[i] = img;
 
-                    if (loadedCount === visiblePaths.length) {
-                        // All loaded, draw in order (since visiblePaths maps to group_order which is bottom-to-top z-index)
-                        images.forEach(img => {
-                            if (img) ctx.drawImage(img, 0, 0, canvas.width, canvas.height);
+                    if (loadedCount === visibleLayers.length) {
+                        // All loaded, draw in order (since visibleLayers maps to group_order which is bottom-to-top z-index)
+                        // Cropped layers are drawn at their bbox offset
+                        images.forEach((img, j) => {
+                            if (img) drawLayer(ctx, img, visibleLayers[j].layer, canvas.width, canvas.height);
                         });
 
                         triggerDownload(canvas, `${selectedChar.name}_export.png`);
@@ -87,6 +85,23 @@ const BaseMode: React.FC = () => {
                 };
             });
         };
+
+        if (selectedChar.canvas_size) {
+            [canvas.width, canvas.height] = selectedChar.canvas_size;
+            drawAll();
+            return;
+        }
+
+        // Legacy full-canvas layers: first image gives the dimensions
+        const baseImg = new Image();
+        baseImg.crossOrigin = "Anonymous";
+        baseImg.src = `${STATIC_BASE}/${visibleLayers[0].path}`;
+
+        baseImg.onload = () => {
+            canvas.width = baseImg.naturalWidth > 0 ? baseImg.naturalWidth : 1000;
+            canvas.height = baseImg.naturalHeight > 0 ? baseImg.naturalHeight : 1000;
+            drawAll();
+        };
     };
 
     const triggerDownload = (canvas: HTMLCanvasElement, filename: string) => {
@@ -203,7 +218,27 @@ const BaseMode: React.FC = () => {
                             ))}
                         </div>
 
-                        {selectedChar.group_order.map((groupName, idx) => {
+                        {selectedChar.canvas_size ? (
+                            // Box with the PSD's aspect ratio; cropped layers sit at their bbox
+                            <div className="relative max-w-full max-h-full w-full"
+                                style={{ aspectRatio: `${selectedChar.canvas_size[0]} / ${selectedChar.canvas_size[1]}` }}>
+                                {selectedChar.group_order.map((groupName, idx) => {
+                                    const activePath = activeLayers[groupName];
+                                    if (!activePath) return null;
+
+                                    return (
+                                        <img
+                                            key={groupName}
+                                            src={`${STATIC_BASE}/${activePath}`}
+                                            className="absolute pointer-events-none drop-shadow-xl"
+                                            style={{ zIndex: 10 + idx, ...layerBoxStyle(findLayer(groupName, activePath), selectedChar.canvas_size) }}
+                                            alt={groupName}
+                                            crossOrigin="anonymous"
+                                        />
+                                    );
+                                })}
+                            </div>
+                        ) : selectedChar.group_order.map((groupName, idx) => {
                             const activePath = activeLayers[groupName];
                             if (!activePath) return null;
 
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
-import { useAppStore, STATIC_BASE, type Character } from '../stores/useAppStore';
+import { useAppStore, STATIC_BASE, type Character, type CharacterAsset } from '../stores/useAppStore';
+import { layerBoxStyle } from '../utils/layer-placement';
 import { API_BASE_URL } from '../config/api';
 import Organizer from './Organizer';
 import LazyImage from './ui/LazyImage';
@@ -225,17 +226,22 @@ const DressingRoomMode: React.FC = () => {
             <div className="w-1/3 min-w-[300px] shrink-0 bg-neutral-950 p-8 relative flex items-center justify-center overflow-hidden">
                 {Object.keys(selections).length > 0 ? (
                     <div className="relative w-full h-full flex items-center justify-center">
+                        {/* With a known PSD canvas, layers stack in a box of its aspect ratio (cropped layers at their bbox) */}
+                        <div className={selectedCharacter?.canvas_size ? "relative max-w-full max-h-full w-full" : "contents"}
+                            style={selectedCharacter?.canvas_size ? { aspectRatio: `${selectedCharacter.canvas_size[0]} / ${selectedCharacter.canvas_size[1]}` } : undefined}>
                         {Object.values(selections)
                             .filter(sel => assetVisibility[sel.hash] !== false) // Only show visible assets
                             .sort((a, b) => a.z_index - b.z_index) // Sort by z_index ascending (draw from bottom up)
                             .map(sel => {
                                 // find asset path
                                 let path = "";
+                                let asset: CharacterAsset | undefined;
                                 if (selectedCharacter) {
                                     for (const group of Object.values(selectedCharacter.layer_groups)) {
                                         const found = group.find(a => a.hash === sel.hash);
                                         if (found) {
                                             path = found.path;
+                                            asset = found;
                                             break;
                                         }
                                     }
@@ -245,14 +251,20 @@ const DressingRoomMode: React.FC = () => {
                                     <LazyImage
                                         key={sel.hash}
                                         src={`${STATIC_BASE}/${path}`}
-                                        className="absolute w-full h-full object-contain pointer-events-none drop-shadow-sm"
-                                        style={{ zIndex: sel.z_index }}
+                                        className={selectedCharacter?.canvas_size
+                                            ? "absolute pointer-events-none drop-shadow-sm"
+                                            : "absolute w-full h-full object-contain pointer-events-none drop-shadow-sm"}
+                                        style={{
+                                            zIndex: sel.z_index,
+                                            ...(selectedCharacter?.canvas_size ? layerBoxStyle(asset, selectedCharacter.canvas_size) : {}),
+                                        }}
                                         alt="selected piece"
                                         rootMargin="0px"
                                     />
                                 );
                             })
                         }
+                        </div>
                     </div>
                 ) : (
                     <div className="text-center text-neutral-500 flex flex-col items-center gap-4">
@@ -135,6 +135,9 @@ const AssetSidebar: React.FC = () => {
                     cw = part.bbox[2];
                     ch = part.bbox[3];
                 }
+                // Cropped layer files already contain just the bbox — no source crop offset
+                const srcX = part.cropped ? 0 : cx;
+                const srcY = part.cropped ? 0 : cy;
                 
                 let sourceUrl = part.path;
                 if (!sourceUrl.startsWith('http')) {
@@ -158,8 +161,8 @@ const AssetSidebar: React.FC = () => {
                     height: ch,
                     origWidth: cw,
                     origHeight: ch,
-                    cropX: cx,
-                    cropY: cy,
+                    cropX: srcX,
+                    cropY: srcY,
                     rotation: 0,
                     opacity: 1,
                     zIndex: zIndexOffset + i,
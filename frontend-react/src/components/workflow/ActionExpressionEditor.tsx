@@ -4,6 +4,7 @@ import { useWorkflowStore, type V2PoseFrame, type CharacterV2NodeData } from '@/
 import { X, Plus, Eye, Hand, Palette, Sparkles, RotateCw } from 'lucide-react';
 import { API_BASE_URL } from '@/config/api';
 import TransformEditor from './TransformEditor';
+import { drawLayer } from '@/utils/layer-placement';
 
 interface ActionExpressionEditorProps {
     nodeId: string;
@@ -112,7 +113,7 @@ export default function ActionExpressionEditor({ nodeId, onClose }: ActionExpres
 
                 try {
                     const img = await loadImage(`${API_BASE_URL}/static/${variant.asset_path}`);
-                    ctx.drawImage(img, 0, 0, cw, ch, 0, 0, cw * scale, ch * scale);
+                    drawLayer(ctx, img, variant, cw, ch, scale);
                 } catch { /* skip */ }
             }
 
@@ -123,7 +124,7 @@ export default function ActionExpressionEditor({ nodeId, onClose }: ActionExpres
                     if (face.asset_path) {
                         try {
                             const img = await loadImage(`${API_BASE_URL}/static/${face.asset_path}`);
-                            ctx.drawImage(img, 0, 0, cw, ch, 0, 0, cw * scale, ch * scale);
+                            drawLayer(ctx, img, face, cw, ch, scale);
                         } catch { /* skip */ }
                     }
                 }
@@ -136,7 +137,7 @@ export default function ActionExpressionEditor({ nodeId, onClose }: ActionExpres
                         if (v?.asset_path) {
                             try {
                                 const img = await loadImage(`${API_BASE_URL}/static/${v.asset_path}`);
-                                ctx.drawImage(img, 0, 0, cw, ch, 0, 0, cw * scale, ch * scale);
+                                drawLayer(ctx, img, v, cw, ch, scale);
                             } catch { /* skip */ }
                         }
                     }
@@ -147,7 +148,7 @@ export default function ActionExpressionEditor({ nodeId, onClose }: ActionExpres
                     if (expr?.asset_path) {
                         try {
                             const img = await loadImage(`${API_BASE_URL}/static/${expr.asset_path}`);
-                            ctx.drawImage(img, 0, 0, cw, ch, 0, 0, cw * scale, ch * scale);
+                            drawLayer(ctx, img, expr, cw, ch, scale);
                         } catch { /* skip */ }
                     }
                 }
@@ -159,7 +160,7 @@ export default function ActionExpressionEditor({ nodeId, onClose }: ActionExpres
                     if (hair.asset_path) {
                         try {
                             const img = await loadImage(`${API_BASE_URL}/static/${hair.asset_path}`);
-                            ctx.drawImage(img, 0, 0, cw, ch, 0, 0, cw * scale, ch * scale);
+                            drawLayer(ctx, img, hair, cw, ch, scale);
                         } catch { /* skip */ }
                     }
                 }
@@ -2,9 +2,10 @@ import { memo, useEffect, useState, useRef, useCallback } from 'react';
 import { Handle, Position, type NodeProps, type Node } from '@xyflow/react';
 import type { CharacterV2NodeData, SceneNodeData } from '@/stores/useWorkflowStore';
 import { useWorkflowStore } from '@/stores/useWorkflowStore';
-import { useCharacterV2Store } from '@/stores/useCharacterV2Store';
+import { useCharacterV2Store, type PartVariant } from '@/stores/useCharacterV2Store';
 import { User, GripVertical, Sparkles, Eye, Hand, Palette } from 'lucide-react';
 import { API_BASE_URL } from '@/config/api';
+import { drawLayer } from '@/utils/layer-placement';
 
 type CharacterV2NodeType = Node<CharacterV2NodeData, 'characterV2'>;
 
@@ -75,7 +76,7 @@ function CharacterV2NodeComponent({ id, data, selected }: NodeProps<CharacterV2N
                     img.onerror = () => reject();
                     img.src = `${API_BASE_URL}/static/${variant.asset_path}`;
                 });
-                ctx.drawImage(img, 0, 0, canvasW, canvasH, 0, 0, canvasW * scale, canvasH * scale);
+                drawLayer(ctx, img, variant, canvasW, canvasH, scale);
             } catch {
                 // Skip failed loads
             }
@@ -84,7 +85,7 @@ function CharacterV2NodeComponent({ id, data, selected }: NodeProps<CharacterV2N
         // Draw head expression
         if (character.head) {
             const head = character.head;
-            let exprVariants: { asset_path: string }[] = [];
+            let exprVariants: PartVariant[] = [];
 
             if (head.expression_type === 'combinable') {
                 // Draw mouth, eyes, eyebrows individually
@@ -118,7 +119,7 @@ function CharacterV2NodeComponent({ id, data, selected }: NodeProps<CharacterV2N
                             img.onerror = () => reject();
                             img.src = `${API_BASE_URL}/static/${face.asset_path}`;
                         });
-                        ctx.drawImage(img, 0, 0, canvasW, canvasH, 0, 0, canvasW * scale, canvasH * scale);
+                        drawLayer(ctx, img, face, canvasW, canvasH, scale);
                     } catch { /* skip */ }
                 }
             }
@@ -133,7 +134,7 @@ function CharacterV2NodeComponent({ id, data, selected }: NodeProps<CharacterV2N
                             img.onerror = () => reject();
                             img.src = `${API_BASE_URL}/static/${v.asset_path}`;
                         });
-                        ctx.drawImage(img, 0, 0, canvasW, canvasH, 0, 0, canvasW * scale, canvasH * scale);
+                        drawLayer(ctx, img, v, canvasW, canvasH, scale);
                     } catch { /* skip */ }
                 }
             }
@@ -1,5 +1,5 @@
 import * as PIXI from 'pixi.js';
-import { getAssetPath } from '../../../stores/useAppStore';
+import { getAssetLayout, getAssetPath } from '../../../stores/useAppStore';
 import type { CharacterTrack, Character } from '../../../stores/useAppStore';
 
 export class ImageManager {
@@ -7,6 +7,7 @@ export class ImageManager {
     private container: PIXI.Container;
     private textureCache = new Map<string, PIXI.Texture>();
     private sprites: Map<string, PIXI.Container> = new Map();
+    private layouts = new Map<string, ReturnType<typeof getAssetLayout>>();
 
     constructor(app: PIXI.Application, container: PIXI.Container) {
         this.app = app;
@@ -30,6 +31,7 @@ export class ImageManager {
             if (this.textureCache.has(hash)) return;
             const path = getAssetPath(characters, hash);
             if (!path) return;
+            this.layouts.set(hash, getAssetLayout(characters, hash));
 
             try {
                 const texture = await PIXI.Assets.load(path);
@@ -80,6 +82,15 @@ export class ImageManager {
                 if (texture) {
                     const sprite = new PIXI.Sprite(texture);
                     sprite.anchor.set(0.5); // Center origin
+                    // Cropped layers: offset from the PSD canvas centre to the bbox centre
+                    const layout = this.layouts.get(activeAction.assetHash);
+                    if (layout) {
+                        const [left, top, width, height] = layout.bbox;
+                        sprite.position.set(
+                            left + width / 2 - layout.canvasSize[0] / 2,
+                            top + height / 2 - layout.canvasSize[1] / 2,
+                        );
+                    }
                     (sprite as any)._assetHash = activeAction.assetHash;
                     group.addChild(sprite);
                 } else {
@@ -112,5 +123,6 @@ export class ImageManager {
         this.sprites.forEach(sprite => sprite.destroy({ children: true }));
         this.sprites.clear();
         this.textureCache.clear();
+        this.layouts.clear();
     }
 }
@@ -20,11 +20,14 @@ export interface CharacterAsset {
     name: string;
     path: string;
     hash?: string;
+    bbox?: number[];   // [left, top, width, height] on the PSD canvas
+    cropped?: boolean; // PNG covers bbox only — composite at its offset
 }
 
 export interface Character {
     id: string;
     name: string;
+    canvas_size?: [number, number];
     group_order: string[];
     layer_groups: Record<string, CharacterAsset[]>;
     timestamp: string;
@@ -432,3 +435,22 @@ export const getAssetPath = (characters: Character[], hash: string): string => {
     }
     return `assets/${hash}.png`;
 };
+
+// Placement of a cropped layer on its character's PSD canvas (null for legacy full-canvas PNGs)
+export const getAssetLayout = (
+    characters: Character[],
+    hash: string,
+): { bbox: number[]; canvasSize: [number, number] } | null => {
+    for (const char of characters) {
+        if (!char.layer_groups || !char.canvas_size) continue;
+        for (const group of Object.values(char.layer_groups)) {
+            const found = group.find((a) => a.hash === hash);
+            if (found) {
+                return found.cropped && found.bbox?.length === 4
+                    ? { bbox: found.bbox, canvasSize: char.canvas_size }
+                    : null;
+            }
+        }
+    }
+    return null;
+};
@@ -11,6 +11,7 @@ export interface PartVariant {
     hash: string;
     asset_path: string;
     visible: boolean;
+    cropped?: boolean; // asset covers bbox only — composite at its offset
 }
 
 export interface BodyPartData {
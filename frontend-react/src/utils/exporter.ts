@@ -26,12 +26,49 @@ function waitForRender(): Promise<void> {
     });
 }
 
+/**
+ * Capture the stage as PNG bytes (Blob when the stage supports it,
+ * otherwise decoded from a data URL).
+ */
+async function captureFramePng(stage: any): Promise<Uint8Array> {
+    if (typeof stage.toBlob === 'function') {
+        const blob: Blob | null = await stage.toBlob({ pixelRatio: 1 });
+        if (blob) return new Uint8Array(await blob.arrayBuffer());
+    }
+    const dataURL: string = stage.toDataURL({ pixelRatio: 1 });
+    const binary = atob(dataURL.split(',')[1]);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    return bytes;
+}
+
+/**
+ * Pack frames as binary records for /api/export/chunk-binary:
+ * uint32 frame index | uint32 byte length | PNG bytes (little-endian).
+ */
+function packFrameRecords(frames: { index: number; data: Uint8Array }[]): ArrayBuffer {
+    const total = frames.reduce((sum, f) => sum + 8 + f.data.length, 0);
+    const buffer = new ArrayBuffer(total);
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    let pos = 0;
+    for (const f of frames) {
+        view.setUint32(pos, f.index, true);
+        view.setUint32(pos + 4, f.data.length, true);
+        bytes.set(f.data, pos + 8);
+        pos += 8 + f.data.length;
+    }
+    return buffer;
+}
+
 /**
  * Export the Konva Stage as an MP4 video using chunked upload.
  * 
  * Flow (Chunked — Memory Safe):
- * 1. POST /api/export/start → get renderJobId
- * 2. Loop: capture CHUNK_SIZE frames → POST /api/export/chunk → clear buffer → repeat
+ * 1. POST /api/export/start (streaming) → get renderJobId, server starts FFmpeg
+ * 2. Loop: capture CHUNK_SIZE frames → POST /api/export/chunk-binary → clear buffer → repeat
+ *    (raw PNG bytes with a small frame-index header — no base64)
+ *    (the server pipes each chunk straight into FFmpeg — no temp PNGs on disk)
  * 3. POST /api/export/finish → receive MP4 → trigger download
  * 
  * This keeps browser RAM minimal: only CHUNK_SIZE frames in memory at any time.
@@ -52,7 +89,7 @@ export async function exportVideo(
         const startRes = await fetch(`${API_BASE_URL}/api/export/start`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ totalFrames, fps }),
+            body: JSON.stringify({ totalFrames, fps, streaming: true }),
         });
 
         if (!startRes.ok) {
@@ -64,9 +101,8 @@ export async function exportVideo(
         const { renderJobId } = await startRes.json();
 
         // ── Phase 2: Extract & upload frames in chunks ─────────────
-        let chunkBuffer: string[] = [];
+        let chunkBuffer: { index: number; data: Uint8Array }[] = [];
         let chunkIndex = 0;
-        let frameOffset = 0;
 
         for (let i = 0; i < totalFrames; i++) {
             const time = i / fps;
@@ -87,10 +123,8 @@ export async function exportVideo(
                 return;
             }
 
-            // Capture frame as Base64 PNG
-            const dataURL = stageRef.current.toDataURL({ pixelRatio: 1 });
-            const base64Data = dataURL.split(',')[1];
-            chunkBuffer.push(base64Data);
+            // Capture frame as PNG bytes
+            chunkBuffer.push({ index: i, data: await captureFramePng(stageRef.current) });
 
             onProgress({
                 status: 'extracting',
@@ -108,15 +142,11 @@ export async function exportVideo(
                     message: `Uploading chunk ${chunkIndex + 1} (${chunkBuffer.length} frames)...`
                 });
 
-                const chunkRes = await fetch(`${API_BASE_URL}/api/export/chunk`, {
+                const params = new URLSearchParams({ renderJobId, chunkIndex: String(chunkIndex) });
+                const chunkRes = await fetch(`${API_BASE_URL}/api/export/chunk-binary?${params}`, {
                     method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        renderJobId,
-                        chunkIndex,
-                        frameOffset,
-                        frames: chunkBuffer,
-                    }),
+                    headers: { 'Content-Type': 'application/octet-stream' },
+                    body: packFrameRecords(chunkBuffer),
                 });
 
                 if (!chunkRes.ok) {
@@ -126,7 +156,6 @@ export async function exportVideo(
                 }
 
                 // ✅ Clear buffer → free RAM immediately
-                frameOffset += chunkBuffer.length;
                 chunkBuffer = [];
                 chunkIndex++;
             }
@@ -0,0 +1,53 @@
+import type { CSSProperties } from 'react';
+
+/**
+ * PSD layers are stored cropped to their content (`cropped: true`) with
+ * `bbox = [left, top, width, height]` on the character's PSD canvas.
+ * Legacy layers are full-canvas PNGs.
+ */
+export interface PlacedLayer {
+	bbox?: number[];
+	cropped?: boolean;
+}
+
+export function isCroppedLayer(layer: PlacedLayer | undefined): layer is Required<PlacedLayer> {
+	return !!layer?.cropped && layer.bbox?.length === 4;
+}
+
+/**
+ * Absolute-position style for stacking a layer inside a box that has the
+ * PSD canvas aspect ratio (percentages, so the box can be any size).
+ */
+export function layerBoxStyle(layer: PlacedLayer | undefined, canvasSize?: [number, number]): CSSProperties {
+	if (!isCroppedLayer(layer) || !canvasSize) {
+		return { left: 0, top: 0, width: '100%', height: '100%' };
+	}
+	const [canvasW, canvasH] = canvasSize;
+	const [left, top, width, height] = layer.bbox;
+	return {
+		left: `${(left / canvasW) * 100}%`,
+		top: `${(top / canvasH) * 100}%`,
+		width: `${(width / canvasW) * 100}%`,
+		height: `${(height / canvasH) * 100}%`,
+	};
+}
+
+/**
+ * Draw a layer onto a 2D context showing the PSD canvas at `scale`
+ * (full-canvas or cropped).
+ */
+export function drawLayer(
+	ctx: CanvasRenderingContext2D,
+	img: CanvasImageSource,
+	layer: PlacedLayer | undefined,
+	canvasW: number,
+	canvasH: number,
+	scale = 1,
+): void {
+	if (isCroppedLayer(layer)) {
+		const [left, top, width, height] = layer.bbox;
+		ctx.drawImage(img, left * scale, top * scale, width * scale, height * scale);
+	} else {
+		ctx.drawImage(img, 0, 0, canvasW * scale, canvasH * scale);
+	}
+}